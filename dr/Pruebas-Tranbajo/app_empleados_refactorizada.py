@@ -9,6 +9,8 @@ from services import export_service, history_service, access_service, search_ser
 from ui import (CamposGeneralesFrame, OnboardingFrame, OffboardingFrame, 
                 LateralMovementFrame, FlexStaffFrame, EdicionBusquedaFrame, CreacionPersonaFrame)
 from ui.styles import aplicar_estilos_personalizados
+from ui.task_runner import get_task_runner
+from query_metrics import query_metrics, histogram_labels
 
 
 class AppEmpleadosRefactorizada:
@@ -29,6 +31,9 @@ class AppEmpleadosRefactorizada:
         self.tipo_proceso_var = tk.StringVar()
         self.componentes = {}
         
+        # Las consultas a la base de datos se ejecutan fuera del hilo de Tk
+        self.task_runner = get_task_runner(self.root)
+        
 
         
         self.crear_interfaz()
@@ -103,8 +108,12 @@ class AppEmpleadosRefactorizada:
         # Logo GAMLO (abajo a la izquierda)
         self.crear_logo_gamlo_footer(footer_frame)
         
-        # Espacio en blanco para empujar el logo a la izquierda
-        ttk.Frame(footer_frame).grid(row=0, column=1, sticky="ew")
+        # Indicador de consultas en curso (a la derecha)
+        self.busy_label = ttk.Label(footer_frame, text="")
+        self.busy_label.grid(row=0, column=1, sticky="e")
+        self.task_runner.add_busy_listener(
+            lambda busy: self.busy_label.config(text="⏳ Consultando base de datos..." if busy else "")
+        )
     
     def crear_logo_gamlo_footer(self, parent):
         """Crea el logo de GAMLO para el footer"""
@@ -154,7 +163,8 @@ class AppEmpleadosRefactorizada:
             ("🔍 Edición y Búsqueda", "edicion"),
             ("👤 Crear Persona", "creacion"),
             ("🔐 Conciliación de Accesos", "conciliacion"),
-            ("📱 Gestión de Aplicaciones", "aplicaciones")
+            ("📱 Gestión de Aplicaciones", "aplicaciones"),
+            ("📊 Diagnóstico", "diagnostico")
         ]
         
         self.botones_navegacion = {}
@@ -187,6 +197,7 @@ class AppEmpleadosRefactorizada:
         self.crear_componente_creacion()
         self.crear_componente_conciliacion()
         self.crear_componente_aplicaciones()
+        self.crear_componente_diagnostico()
         
 
     
@@ -347,11 +358,17 @@ class AppEmpleadosRefactorizada:
         self.componentes['aplicaciones'].frame.grid(row=0, column=0, sticky="nsew")
         self.componentes['aplicaciones'].frame.grid_remove()
     
+    def crear_componente_diagnostico(self):
+        """Crea el panel de diagnóstico de consultas"""
+        self.componentes['diagnostico'] = DiagnosticoFrame(self.contenido_principal_frame)
+        self.componentes['diagnostico'].frame.grid(row=0, column=0, sticky="nsew")
+        self.componentes['diagnostico'].frame.grid_remove()
+    
     
     def cambiar_contenido(self, tipo_contenido):
         """Cambia el contenido mostrado según el botón seleccionado"""
         # Ocultar todos los componentes
-        componentes_a_ocultar = ['gestion_frame', 'edicion_busqueda', 'creacion_persona', 'conciliacion', 'aplicaciones']
+        componentes_a_ocultar = ['gestion_frame', 'edicion_busqueda', 'creacion_persona', 'conciliacion', 'aplicaciones', 'diagnostico']
         for comp in componentes_a_ocultar:
             if comp in self.componentes:
                 if comp == 'gestion_frame':
@@ -370,6 +387,9 @@ class AppEmpleadosRefactorizada:
             self.componentes['conciliacion'].frame.grid()
         elif tipo_contenido == "aplicaciones" and 'aplicaciones' in self.componentes:
             self.componentes['aplicaciones'].frame.grid()
+        elif tipo_contenido == "diagnostico" and 'diagnostico' in self.componentes:
+            self.componentes['diagnostico'].actualizar()
+            self.componentes['diagnostico'].frame.grid()
         
         # Actualizar estado visual de los botones
         for valor, btn in self.botones_navegacion.items():
@@ -377,6 +397,10 @@ class AppEmpleadosRefactorizada:
     
     def guardar_datos(self):
         """Guarda los datos del formulario en la nueva estructura de base de datos"""
+        # Una escritura a la vez: los clics mientras hay un guardado en curso se ignoran
+        if getattr(self, '_guardado_en_curso', False):
+            messagebox.showinfo("Guardando", "Hay un guardado en curso; espere a que termine.")
+            return
         try:
             # Obtener datos generales
             if 'generales' not in self.componentes:
@@ -421,41 +445,35 @@ class AppEmpleadosRefactorizada:
             if tipo_proceso == 'onboarding':
                 # Para onboarding, solo procesamos los accesos (el empleado debe existir previamente)
                 # o se debe crear desde la sección "Crear Persona"
+                titulo = "Onboarding procesado exitosamente."
                 
-                # Verificar si el empleado existe
-                empleado_existente = access_service.get_employee_by_id(scotia_id)
-                if not empleado_existente:
-                    messagebox.showerror("Error", 
-                        f"El empleado {scotia_id} no existe en el headcount.\n"
-                        "Por favor, cree primero el empleado en la sección 'Crear Persona'.")
-                    return
-                
-                # Procesar onboarding
-                success, message, records = access_service.process_employee_onboarding(
-                    scotia_id, 
-                    datos_generales.get('nuevo_cargo', ''), 
-                    datos_generales.get('nueva_unidad_subunidad', ''),  # Corregir nombre del campo
-                    responsable
-                )
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Onboarding procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    # Verificar si el empleado existe
+                    empleado_existente = access_service.get_employee_by_id(scotia_id)
+                    if not empleado_existente:
+                        return (False,
+                                f"El empleado {scotia_id} no existe en el headcount.\n"
+                                "Por favor, cree primero el empleado en la sección 'Crear Persona'.",
+                                [])
+                    
+                    # Procesar onboarding
+                    return access_service.process_employee_onboarding(
+                        scotia_id, 
+                        datos_generales.get('nuevo_cargo', ''), 
+                        datos_generales.get('nueva_unidad_subunidad', ''),  # Corregir nombre del campo
+                        responsable
+                    )
                     
             elif tipo_proceso == 'offboarding':
                 # Procesar offboarding
-                success, message, records = access_service.process_employee_offboarding(scotia_id, responsable)
+                titulo = "Offboarding procesado exitosamente."
                 
-                if success:
-                    messagebox.showinfo("Éxito", f"Offboarding procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    return access_service.process_employee_offboarding(scotia_id, responsable)
                     
             elif tipo_proceso == 'lateral':
                 # Procesar movimiento lateral
+                titulo = "Movimiento lateral procesado exitosamente."
                 nueva_unidad_subunidad = datos_generales.get('nueva_unidad_subunidad', '')
                 # Separar unidad y subunidad si es necesario
                 if '/' in nueva_unidad_subunidad:
@@ -464,22 +482,18 @@ class AppEmpleadosRefactorizada:
                     nueva_unidad = nueva_unidad_subunidad
                     nueva_subunidad = None
                 
-                success, message, records = access_service.process_lateral_movement(
-                    scotia_id,
-                    datos_generales.get('nuevo_cargo', ''),
-                    nueva_unidad,
-                    responsable,
-                    nueva_subunidad
-                )
-                
-                if success:
-                    messagebox.showinfo("Éxito", f"Movimiento lateral procesado exitosamente.\n{message}")
-                    self.limpiar_campos()
-                else:
-                    messagebox.showerror("Error", message)
+                def trabajo():
+                    return access_service.process_lateral_movement(
+                        scotia_id,
+                        datos_generales.get('nuevo_cargo', ''),
+                        nueva_unidad,
+                        responsable,
+                        nueva_subunidad
+                    )
                     
             elif tipo_proceso == 'flex_staff':
                 # Procesar asignación flex staff
+                titulo = "Asignación flex staff procesada exitosamente."
                 datos_flex = self.componentes.get('flex_staff', {}).obtener_datos() if 'flex_staff' in self.componentes else {}
                 
                 # Mapear nombres a los nombres reales de la BD
@@ -491,24 +505,40 @@ class AppEmpleadosRefactorizada:
                 print(f"  Original: '{temp_position}' + '{temp_unit}'")
                 print(f"  Mapeado: '{mapped_position}' + '{mapped_unit}' + '{mapped_unidad_subunidad}'")
                 
-                success, message, records = access_service.process_flex_staff_assignment(
-                    scotia_id,
-                    mapped_position,  # temporary_position (mapeado)
-                    mapped_unit,  # temporary_unit (mapeado)
-                    mapped_unit,  # temporary_subunit (mapeado)
-                    datos_flex.get('duracion_dias'),  # duration_days
-                    responsable  # responsible
-                )
-                
+                def trabajo():
+                    return access_service.process_flex_staff_assignment(
+                        scotia_id,
+                        mapped_position,  # temporary_position (mapeado)
+                        mapped_unit,  # temporary_unit (mapeado)
+                        mapped_unit,  # temporary_subunit (mapeado)
+                        datos_flex.get('duracion_dias'),  # duration_days
+                        responsable  # responsible
+                    )
+            else:
+                messagebox.showerror("Error", f"Tipo de proceso no soportado: {tipo_proceso}")
+                return
+            
+            def al_terminar(resultado):
+                self._guardado_en_curso = False
+                success, message, records = resultado
                 if success:
-                    messagebox.showinfo("Éxito", f"Asignación flex staff procesada exitosamente.\n{message}")
+                    messagebox.showinfo("Éxito", f"{titulo}\n{message}")
                     self.limpiar_campos()
                 else:
                     messagebox.showerror("Error", message)
-            else:
-                messagebox.showerror("Error", f"Tipo de proceso no soportado: {tipo_proceso}")
+            
+            def al_fallar(e):
+                self._guardado_en_curso = False
+                messagebox.showerror("Error", f"Error inesperado: {str(e)}")
+                print(f"Error en guardar_datos: {e}")
+            
+            # La llamada al servicio corre fuera del hilo de Tk; la respuesta vuelve por root.after.
+            # Sin 'key': una escritura no debe cancelarse ni descartarse por un segundo clic
+            self._guardado_en_curso = True
+            self.task_runner.submit(trabajo, on_success=al_terminar, on_error=al_fallar)
                 
         except Exception as e:
+            self._guardado_en_curso = False
             messagebox.showerror("Error", f"Error inesperado: {str(e)}")
             print(f"Error en guardar_datos: {e}")
     
@@ -699,59 +729,72 @@ class ConciliacionFrame:
             messagebox.showerror("Error", "Por favor ingrese un SID válido")
             return
         
-        try:
-            # Verificar si el empleado existe y tiene datos necesarios
-            empleado = access_service.get_employee_by_id(sid)
-            if not empleado:
-                messagebox.showerror("Error", f"El empleado {sid} no existe en el headcount")
+        # Verificar en segundo plano si el empleado existe y tiene datos necesarios
+        get_task_runner(self.frame).submit(
+            access_service.get_employee_by_id, sid,
+            on_success=lambda empleado: self._continuar_conciliacion(sid, empleado),
+            on_error=lambda e: messagebox.showerror("Error", f"Error durante la conciliación: {str(e)}"),
+            key='conciliacion'
+        )
+    
+    def _continuar_conciliacion(self, sid, empleado):
+        """Valida el empleado (en el hilo de Tk) y lanza el reporte de conciliación"""
+        if not empleado:
+            messagebox.showerror("Error", f"El empleado {sid} no existe en el headcount")
+            return
+        
+        usar_datos_ejemplo = False
+        # Verificar si tiene posición y unidad
+        if not empleado.get('position') or not empleado.get('unit'):
+            usar_datos_ejemplo = messagebox.askyesno(
+                "Datos Incompletos", 
+                f"El empleado {sid} no tiene posición o unidad definida.\n\n"
+                "¿Desea usar datos de ejemplo para probar la conciliación?\n"
+                "(Se asignará: ANALISTA SENIOR - TECNOLOGÍA)"
+            )
+            if not usar_datos_ejemplo:
                 return
-            
-            # Verificar si tiene posición y unidad
-            if not empleado.get('position') or not empleado.get('unit'):
-                respuesta = messagebox.askyesno(
-                    "Datos Incompletos", 
-                    f"El empleado {sid} no tiene posición o unidad definida.\n\n"
-                    "¿Desea usar datos de ejemplo para probar la conciliación?\n"
-                    "(Se asignará: ANALISTA SENIOR - TECNOLOGÍA)"
-                )
-                
-                if respuesta:
-                    # Actualizar con datos de ejemplo
-                    conn = access_service.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE headcount 
-                        SET position = 'ANALISTA SENIOR', unit = 'TECNOLOGÍA'
-                        WHERE scotia_id = ?
-                    """, (sid,))
-                    conn.commit()
-                    conn.close()
-                    
-                    # Crear aplicaciones de ejemplo si no existen
-                    
-                    messagebox.showinfo("Datos Actualizados", 
-                        "Se han asignado datos de ejemplo al empleado.\n"
-                        "Ahora puede proceder con la conciliación.")
-                else:
-                    return
-            
+        
+        def trabajo():
+            if usar_datos_ejemplo:
+                # Actualizar con datos de ejemplo
+                conn = access_service.get_connection()
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE headcount 
+                    SET position = 'ANALISTA SENIOR', unit = 'TECNOLOGÍA'
+                    WHERE scotia_id = ?
+                """, (sid,))
+                conn.commit()
+                conn.close()
             # Usar el nuevo servicio de conciliación
-            reporte = access_service.get_access_reconciliation_report(sid)
-            
-            if "error" in reporte:
-                messagebox.showerror("Error", reporte["error"])
-                return
-            
-            self.resultado_conciliacion = reporte
-            if reporte.get('success', False):
-                data = reporte.get('data', {})
-                self._mostrar_resultados_nuevos(data)
-                messagebox.showinfo("Éxito", f"Conciliación completada para {sid}")
-            else:
-                messagebox.showerror("Error", reporte.get('message', 'Error desconocido'))
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error durante la conciliación: {str(e)}")
+            return access_service.get_access_reconciliation_report(sid)
+        
+        get_task_runner(self.frame).submit(
+            trabajo,
+            on_success=lambda reporte: self._mostrar_reporte_conciliacion(sid, reporte, usar_datos_ejemplo),
+            on_error=lambda e: messagebox.showerror("Error", f"Error durante la conciliación: {str(e)}"),
+            key='conciliacion'
+        )
+    
+    def _mostrar_reporte_conciliacion(self, sid, reporte, usar_datos_ejemplo=False):
+        """Muestra el reporte de conciliación recibido del hilo de trabajo"""
+        if usar_datos_ejemplo:
+            messagebox.showinfo("Datos Actualizados", 
+                "Se han asignado datos de ejemplo al empleado.\n"
+                "Ahora puede proceder con la conciliación.")
+        
+        if "error" in reporte:
+            messagebox.showerror("Error", reporte["error"])
+            return
+        
+        self.resultado_conciliacion = reporte
+        if reporte.get('success', False):
+            data = reporte.get('data', {})
+            self._mostrar_resultados_nuevos(data)
+            messagebox.showinfo("Éxito", f"Conciliación completada para {sid}")
+        else:
+            messagebox.showerror("Error", reporte.get('message', 'Error desconocido'))
     
     
     def _asignar_accesos_automaticos(self):
@@ -760,6 +803,10 @@ class ConciliacionFrame:
         if not sid:
             messagebox.showerror("Error", "Por favor ingrese un SID válido")
             return
+        # Una asignación a la vez: los clics mientras hay una en curso se ignoran
+        if getattr(self, '_asignacion_en_curso', False):
+            messagebox.showinfo("Asignación en curso", "Hay una asignación automática en curso; espere a que termine.")
+            return
         
         try:
             # Confirmar la acción
@@ -772,9 +819,31 @@ class ConciliacionFrame:
             if not result:
                 return
             
-            # Llamar al método assign_accesses del servicio
-            success, message, counts = access_service.assign_accesses(sid, "Sistema")
+            def al_terminar(resultado):
+                self._asignacion_en_curso = False
+                self._mostrar_asignacion_automatica(resultado)
             
+            def al_fallar(e):
+                self._asignacion_en_curso = False
+                messagebox.showerror("Error", f"Error durante la asignación automática: {str(e)}")
+            
+            # Llamar al método assign_accesses del servicio fuera del hilo de Tk
+            # (sin 'key': la escritura no se cancela ni se descarta por otro clic)
+            self._asignacion_en_curso = True
+            get_task_runner(self.frame).submit(
+                access_service.assign_accesses, sid, "Sistema",
+                on_success=al_terminar,
+                on_error=al_fallar
+            )
+                
+        except Exception as e:
+            self._asignacion_en_curso = False
+            messagebox.showerror("Error", f"Error durante la asignación automática: {str(e)}")
+    
+    def _mostrar_asignacion_automatica(self, resultado):
+        """Muestra el resultado de assign_accesses y refresca la conciliación"""
+        success, message, counts = resultado
+        try:
             if success:
                 # Mostrar resultados
                 resultado_texto = f"✅ {message}\n\n"
@@ -1740,9 +1809,19 @@ class AplicacionesFrame:
         self.db_info_label.pack(side=tk.RIGHT)
     
     def _cargar_aplicaciones(self):
-        """Carga las aplicaciones desde la nueva estructura de base de datos"""
+        """Carga las aplicaciones desde la nueva estructura de base de datos (en segundo plano)"""
+        self._actualizar_estado("⏳ Cargando aplicaciones...")
+        get_task_runner(self.frame).submit(
+            access_service.get_all_applications,
+            on_success=self._mostrar_aplicaciones,
+            on_error=lambda e: self._actualizar_estado(f"❌ Error al cargar aplicaciones: {str(e)}", error=True),
+            key='aplicaciones'
+        )
+    
+    def _mostrar_aplicaciones(self, applications):
+        """Pinta las aplicaciones recibidas del hilo de trabajo"""
         try:
-            self.applications = access_service.get_all_applications()
+            self.applications = applications
             self.filtered_applications = self.applications.copy()
             self._actualizar_tabla()
             self._actualizar_estado(f"✅ Cargadas {len(self.applications)} aplicaciones")
@@ -1895,14 +1974,13 @@ class AplicacionesFrame:
     def _actualizar_datos(self):
         """Actualiza los datos desde la base de datos"""
         self._cargar_aplicaciones()
-        self._actualizar_estado("🔄 Datos actualizados")
     
     def _actualizar_dropdowns(self):
         """Actualiza los valores de los dropdowns con los datos más recientes de la base de datos"""
         try:
             # Forzar actualización de los valores únicos
             from services.dropdown_service import dropdown_service
-            dropdown_service.get_all_dropdown_values()  # Esto actualiza la caché si existe
+            dropdown_service.refresh(force=True)  # Recarga la caché en memoria y el archivo local
             self._actualizar_estado("🔄 Dropdowns actualizados con valores de la base de datos")
         except Exception as e:
             print(f"Error actualizando dropdowns: {e}")
@@ -2140,11 +2218,112 @@ class ApplicationDialog:
         self.dialog.destroy()
 
 
+class DiagnosticoFrame:
+    """Panel de diagnóstico: latencia de consultas por operación y consultas lentas"""
+    
+    def __init__(self, parent):
+        self.parent = parent
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(2, weight=1)
+        self.frame.rowconfigure(3, weight=1)
+        
+        self._crear_interfaz()
+    
+    def _crear_interfaz(self):
+        """Crea la interfaz del panel"""
+        ttk.Label(self.frame, text="📊 Diagnóstico de Consultas", 
+                  style="Title.TLabel").grid(row=0, column=0, pady=(0, 20), sticky="ew")
+        
+        # Barra de herramientas
+        toolbar = ttk.Frame(self.frame)
+        toolbar.grid(row=1, column=0, sticky="ew", pady=(0, 10))
+        ttk.Button(toolbar, text="🔄 Actualizar", command=self.actualizar).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(toolbar, text="💾 Exportar JSON", command=self._exportar_json).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="🧹 Reiniciar", command=self._reiniciar).pack(side=tk.LEFT, padx=5)
+        self.resumen_label = ttk.Label(toolbar, text="", style="Header.TLabel")
+        self.resumen_label.pack(side=tk.RIGHT)
+        
+        # Operaciones (método que originó las consultas) con su histograma
+        self.buckets = histogram_labels()
+        columnas = ('Operación', 'Llamadas', 'Total ms', 'Prom. ms', 'p95 ms', 'Máx ms', 'Filas', 'Errores') + tuple(self.buckets)
+        ops_frame = ttk.LabelFrame(self.frame, text="Latencia por operación", padding="10")
+        ops_frame.grid(row=2, column=0, sticky="nsew", pady=(0, 10))
+        ops_frame.columnconfigure(0, weight=1)
+        ops_frame.rowconfigure(0, weight=1)
+        self.tree_operaciones = self._crear_tabla(ops_frame, columnas, ancho_primera=320)
+        
+        # Consultas lentas recientes
+        lentas_frame = ttk.LabelFrame(self.frame, text="Consultas lentas recientes", padding="10")
+        lentas_frame.grid(row=3, column=0, sticky="nsew")
+        lentas_frame.columnconfigure(0, weight=1)
+        lentas_frame.rowconfigure(0, weight=1)
+        self.tree_lentas = self._crear_tabla(lentas_frame, ('Hora', 'ms', 'Operación', 'Sentencia'), ancho_primera=150)
+    
+    def _crear_tabla(self, parent, columnas, ancho_primera: int):
+        """Treeview con scrollbars"""
+        tree = ttk.Treeview(parent, columns=columnas, show='headings', height=10)
+        for i, columna in enumerate(columnas):
+            tree.heading(columna, text=columna)
+            tree.column(columna, width=ancho_primera if i == 0 else 80, minwidth=60, stretch=(i == 0))
+        vsb = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
+        hsb = ttk.Scrollbar(parent, orient="horizontal", command=tree.xview)
+        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        return tree
+    
+    def actualizar(self):
+        """Vuelve a pintar las métricas acumuladas"""
+        snapshot = query_metrics.snapshot()
+        
+        self.tree_operaciones.delete(*self.tree_operaciones.get_children())
+        for nombre, datos in snapshot['operations'].items():
+            valores = (nombre, datos['calls'], f"{datos['total_ms']:.1f}", f"{datos['avg_ms']:.1f}",
+                       f"{datos['p95_ms']:.0f}", f"{datos['max_ms']:.1f}", datos['rows'], datos['errors'])
+            self.tree_operaciones.insert('', 'end', values=valores + tuple(datos['histogram'][b] for b in self.buckets))
+        
+        self.tree_lentas.delete(*self.tree_lentas.get_children())
+        for lenta in reversed(snapshot['slow_queries']):
+            self.tree_lentas.insert('', 'end', values=(lenta['at'], f"{lenta['elapsed_ms']:.0f}",
+                                                       lenta['operation'], lenta['sql']))
+        
+        total = sum(datos['calls'] for datos in snapshot['operations'].values())
+        self.resumen_label.config(
+            text=f"{total} sentencias desde {snapshot['started_at']} | lenta >= {snapshot['slow_query_ms']} ms"
+        )
+    
+    def _exportar_json(self):
+        """Guarda las métricas en un archivo JSON"""
+        try:
+            from tkinter import filedialog
+            
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+                initialfile=f"metricas_consultas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                title="Guardar métricas"
+            )
+            if filename:
+                query_metrics.dump_json(filename)
+                messagebox.showinfo("Éxito", f"Métricas exportadas a:\n{filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar métricas: {str(e)}")
+    
+    def _reiniciar(self):
+        """Descarta las métricas acumuladas"""
+        if messagebox.askyesno("Confirmar", "¿Descartar las métricas acumuladas?"):
+            query_metrics.reset()
+            self.actualizar()
+
+
 def main():
     """Función principal para ejecutar la aplicación"""
     root = tk.Tk()
     app = AppEmpleadosRefactorizada(root)
     root.mainloop()
+    app.task_runner.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""
+Benchmarks offline de los servicios
+
+Reemplaza SQL Server por una base SQLite local con el mismo esquema, la llena con
+datos sintéticos y ejecuta escenarios sobre AccessManagementService, SearchService
+y ExportService reportando throughput, latencias p50/p95 y round trips.
+
+    python -m benchmarks --employees 50000 --applications 5000 --history 5000000
+"""
+from .sqlite_backend import SQLiteStandIn, translate_tsql
+from .data_generator import SyntheticDataGenerator
+from .harness import BenchmarkHarness, format_results
+
+__all__ = ['SQLiteStandIn', 'translate_tsql', 'SyntheticDataGenerator', 'BenchmarkHarness', 'format_results']
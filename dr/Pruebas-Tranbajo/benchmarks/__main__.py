@@ -0,0 +1,5 @@
+"""Punto de entrada: python -m benchmarks [opciones]"""
+from benchmarks.harness import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+"""
+Generador de datos sintéticos para Master_Staff_List, applications_dr e historico_dr
+
+Los datos son consistentes entre tablas: cada empleado ocupa una posición
+(unidad / servicio, cargo) que existe en la matriz de aplicaciones y su historial
+sigue la misma lógica que los servicios:
+
+- onboarding:        otorga las aplicaciones de la posición inicial
+- lateral_movement:  revoca (offboarding) lo que la nueva posición no usa y otorga lo que falta
+- flex_staff:        otorga temporalmente aplicaciones de otra posición; flex_staff_return las revoca
+- manual_access:     otorga una aplicación puntual
+- offboarding:       revoca todo lo vigente de los empleados inactivos
+
+La distribución es sesgada como en producción: pocas posiciones concentran a la
+mayoría de los empleados (pesos tipo Zipf, parámetro skew) y la cantidad de
+eventos por empleado tiene cola larga (continue_probability). El cargo y la unidad
+del headcount son los de la última posición del historial. Con la misma semilla
+se generan siempre los mismos datos.
+
+    generator = SyntheticDataGenerator(employees=50000, applications=5000, history=5000000)
+    generator.load(stand_in)                 # Base local de benchmarks o SQL Server (fast_executemany)
+    generator.write_csv('output/dataset')    # Un CSV por tabla
+    generator.write_sql('output/dataset.sql')  # INSERT masivos para sqlcmd / SSMS
+
+Uso:
+    python -m benchmarks.data_generator --format csv --output output/dataset --employees 50000
+    python -m benchmarks.data_generator --format sql --output output/dataset.sql
+    python -m benchmarks.data_generator --format sqlite --output output/benchmark.db
+    python -m benchmarks.data_generator --format sqlserver --history 5000000
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+UNITS = {
+    'Tecnología': ['Desarrollo', 'Infraestructura', 'Datos', 'Seguridad'],
+    'Operaciones': ['Backoffice', 'Pagos', 'Conciliaciones'],
+    'Riesgos': ['AML', 'Crédito', 'Mercado'],
+    'Finanzas': ['Contabilidad', 'Tesorería', 'Impuestos'],
+    'Recursos Humanos': ['Nómina', 'Talento'],
+    'Comercial': ['Banca Personas', 'Banca Empresas', 'Canales Digitales'],
+}
+ROLES = ['Analista', 'Analista Senior', 'Especialista', 'Coordinador', 'Gerente', 'Ejecutivo', 'Cajero', 'Auditor']
+APP_PREFIXES = ['SAP', 'Oracle', 'Salesforce', 'Jira', 'Confluence', 'ServiceNow', 'Workday', 'Tableau',
+                'PowerBI', 'SharePoint', 'Bloomberg', 'Actimize', 'Swift', 'Murex', 'Kondor', 'Citrix']
+APP_MODULES = ['Lectura', 'Escritura', 'Aprobador', 'Admin', 'Reportes', 'Consulta', 'Operador', 'Supervisor']
+FIRST_NAMES = ['Lucía', 'Jorge', 'Ana', 'Carlos', 'María', 'José', 'Sofía', 'Diego', 'Valentina', 'Andrés',
+               'Camila', 'Mateo', 'Isabella', 'Sebastián', 'Daniela', 'Felipe', 'Paula', 'Tomás']
+LAST_NAMES = ['Torres', 'Ramírez', 'Silva', 'González', 'Rodríguez', 'Pérez', 'Soto', 'Muñoz', 'Rojas',
+              'Díaz', 'Morales', 'Herrera', 'Castro', 'Vargas', 'Romero', 'Mora']
+
+HEADCOUNT_COLUMNS = (
+    'scotia_id', 'eikon_id', 'employee_number', 'employee_name', 'employee_last_name', 'business_email',
+    'office', 'department', 'current_position_title', 'current_position_level', 'begdate', 'status',
+    'exit_date', 'gender', 'position_code'
+)
+APPLICATION_COLUMNS = (
+    'status', 'unit', 'service', 'role', 'name_element', 'type_of_element', 'system_description',
+    'roles_and_profiles', 'critical_non_critical', 'application_owner', 'system_application_link'
+)
+HISTORICO_COLUMNS = (
+    'scotia_id', 'employee_email', 'case_id', 'responsible', 'record_date', 'request_date',
+    'process_access', 'subunit', 'event_description', 'app_access_name', 'status', 'general_status_ticket'
+)
+
+Position = Tuple[str, str, str]
+
+
+class _EmployeeState:
+    """Estado de un empleado mientras se simula su historial"""
+
+    __slots__ = ('position', 'held', 'temporary', 'last_date', 'events')
+
+    def __init__(self, position: int, start: date):
+        self.position = position
+        self.held: Set[str] = set()
+        self.temporary: Set[str] = set()
+        self.last_date = start
+        self.events: List[Tuple[str, int, date]] = []   # (proceso, índice de posición, fecha)
+
+
+class SyntheticDataGenerator:
+    """Genera filas consistentes de headcount, matriz de aplicaciones e historial"""
+
+    BATCH_SIZE = 5000
+    SQL_ROWS_PER_INSERT = 1000   # Máximo de filas por INSERT ... VALUES en SQL Server
+    INACTIVE_RATIO = 0.08
+
+    def __init__(self, employees: int = 1000, applications: int = 300, history: int = 10000,
+                 seed: int = 42, start_date: datetime = datetime(2020, 1, 1),
+                 skew: float = 1.1, continue_probability: float = 0.65):
+        """
+        Args:
+            employees: Filas de Master_Staff_List
+            applications: Filas de applications_dr
+            history: Filas de historico_dr (se corta exactamente en este número)
+            seed: Semilla de todos los generadores aleatorios
+            start_date: Fecha base de ingresos y eventos
+            skew: Exponente Zipf de empleados por posición (0 = uniforme)
+            continue_probability: Probabilidad de que un empleado tenga otro evento en cada pasada
+        """
+        self.employee_count = employees
+        self.application_count = applications
+        self.history_count = history
+        self.seed = seed
+        self.start_date = start_date
+        self.skew = skew
+        self.continue_probability = continue_probability
+        self._positions: List[Position] = []
+        self._apps_by_position: Dict[Position, List[str]] = {}
+        self._states: Optional[List[_EmployeeState]] = None
+        self._inactive: Set[int] = set()
+
+    # ------------------------------------------------------------------
+    # Catálogo
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def unidad_subunidad(position: Position) -> str:
+        """Mismo formato que applications (unidad / servicio) y que department en headcount"""
+        return f"{position[0]} / {position[1]}"
+
+    def positions(self) -> List[Position]:
+        """Posiciones (unidad, servicio, cargo) de la matriz"""
+        if not self._positions:
+            self._positions = [(unit, service, role)
+                               for unit, services in UNITS.items()
+                               for service in services
+                               for role in ROLES]
+        return self._positions
+
+    def position_weights(self) -> List[float]:
+        """Peso de cada posición (Zipf sobre un orden aleatorio fijo por semilla)"""
+        ranks = list(range(len(self.positions())))
+        random.Random(self.seed + 3).shuffle(ranks)
+        return [1.0 / (rank + 1) ** self.skew for rank in ranks]
+
+    def applications_by_position(self) -> Dict[Position, List[str]]:
+        """Aplicaciones requeridas por posición (repartidas hasta completar application_count filas)"""
+        if not self._apps_by_position:
+            rng = random.Random(self.seed)
+            positions = self.positions()
+            names = [f"{prefix} {module}" for prefix in APP_PREFIXES for module in APP_MODULES]
+            extra = 1
+            while len(names) * len(positions) < self.application_count:
+                names += [f"{prefix} {module} {extra}" for prefix in APP_PREFIXES for module in APP_MODULES]
+                extra += 1
+            self._apps_by_position = {position: [] for position in positions}
+            for i in range(self.application_count):
+                position = positions[i % len(positions)]
+                assigned = self._apps_by_position[position]
+                name = rng.choice(names)
+                while name in assigned:
+                    name = rng.choice(names)
+                assigned.append(name)
+        return self._apps_by_position
+
+    # ------------------------------------------------------------------
+    # Simulación de historiales
+    # ------------------------------------------------------------------
+
+    def _apply_event(self, state: _EmployeeState, process: str, position_index: int,
+                     rng: Optional[random.Random] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        Aplica un evento al estado y retorna sus filas (proceso, aplicación, subunit, descripción)
+
+        La misma función sirve para planificar (solo se cuentan filas) y para emitir,
+        así el conteo del plan coincide con lo que se escribe.
+        """
+        positions = self.positions()
+        apps = self.applications_by_position()
+        target = positions[position_index]
+        rows = []
+
+        if process == 'onboarding':
+            for name in apps[target]:
+                if name not in state.held:
+                    state.held.add(name)
+                    rows.append(('onboarding', name, target[1], f"Otorgamiento de acceso para {name}"))
+            state.position = position_index
+
+        elif process == 'lateral_movement':
+            required = set(apps[target])
+            for name in sorted(state.held - required):
+                state.held.discard(name)
+                rows.append(('offboarding', name, positions[state.position][1],
+                             f"Revocación de acceso para {name} (lateral movement - cambio de posición)"))
+            for name in apps[target]:
+                if name not in state.held:
+                    state.held.add(name)
+                    rows.append(('lateral_movement', name, target[1],
+                                 f"Otorgamiento de acceso para {name} (lateral movement - nueva posición)"))
+            state.position = position_index
+
+        elif process == 'flex_staff':
+            for name in apps[target]:
+                if name not in state.held and name not in state.temporary:
+                    state.temporary.add(name)
+                    rows.append(('flex_staff', name, target[1],
+                                 f"Otorgamiento temporal de acceso para {name} (flex staff - {target[2]})"))
+
+        elif process == 'flex_staff_return':
+            for name in sorted(state.temporary):
+                rows.append(('flex_staff_return', name, target[1],
+                             f"Revocación de acceso temporal para {name} (retorno flex staff)"))
+            state.temporary.clear()
+
+        elif process == 'manual_access':
+            candidates = [name for name in apps[target] if name not in state.held]
+            if candidates:
+                name = candidates[0] if rng is None else rng.choice(candidates)
+                state.held.add(name)
+                rows.append(('manual_access', name, target[1], f"Acceso manual para {name}"))
+
+        elif process == 'offboarding':
+            for name in sorted(state.held | state.temporary):
+                rows.append(('offboarding', name, 'out of the company', f"Revocación de acceso para {name}"))
+            state.held.clear()
+            state.temporary.clear()
+
+        return rows
+
+    def _plan(self) -> List[_EmployeeState]:
+        """Planifica los eventos de cada empleado hasta cubrir history_count filas"""
+        if self._states is not None:
+            return self._states
+
+        rng = random.Random(self.seed + 1)
+        positions = self.positions()
+        weights = self.position_weights()
+        indices = list(range(len(positions)))
+        states = []
+        produced = 0
+        for i in range(self.employee_count):
+            position = rng.choices(indices, weights)[0]
+            begdate = self.start_date.date() + timedelta(days=rng.randint(0, 1500))
+            state = _EmployeeState(position, begdate)
+            state.events.append(('onboarding', position, begdate))
+            produced += len(self._apply_event(state, 'onboarding', position))
+            states.append(state)
+            if rng.random() < self.INACTIVE_RATIO:
+                self._inactive.add(i)
+
+        # Pasadas: cada empleado "vivo" tiene un evento más con probabilidad continue_probability
+        alive = list(range(len(states)))
+        idle_passes = 0
+        while produced + self._pending_offboarding(states) < self.history_count and idle_passes < 2:
+            if not alive:
+                alive = list(range(len(states)))
+            survivors = []
+            pass_rows = 0
+            pass_events = 0
+            for i in alive:
+                if produced + pass_rows >= self.history_count or rng.random() > self.continue_probability:
+                    continue
+                state = states[i]
+                event_date = state.last_date + timedelta(days=rng.randint(20, 240))
+                if state.temporary:
+                    process, target = 'flex_staff_return', state.position
+                else:
+                    choice = rng.random()
+                    target = rng.choices(indices, weights)[0]
+                    if choice < 0.55:
+                        process = 'lateral_movement' if target != state.position else 'manual_access'
+                    elif choice < 0.85:
+                        process = 'flex_staff'
+                    else:
+                        process = 'manual_access'
+                state.events.append((process, target, event_date))
+                state.last_date = event_date
+                pass_rows += len(self._apply_event(state, process, target, random.Random(f"{self.seed}-{i}-{len(state.events)}")))
+                pass_events += 1
+                survivors.append(i)
+            produced += pass_rows
+            # Eventos sin filas (matriz vacía o ya otorgada): cortar tras dos pasadas así
+            idle_passes = idle_passes + 1 if pass_events and not pass_rows else 0
+            alive = survivors
+
+        for i in sorted(self._inactive):
+            state = states[i]
+            exit_date = state.last_date + timedelta(days=rng.randint(30, 200))
+            state.events.append(('offboarding', state.position, exit_date))
+            state.last_date = exit_date
+
+        self._states = states
+        return states
+
+    def _pending_offboarding(self, states: List[_EmployeeState]) -> int:
+        """Filas que agregará el offboarding final de los inactivos"""
+        return sum(len(states[i].held) + len(states[i].temporary) for i in self._inactive)
+
+    # ------------------------------------------------------------------
+    # Filas
+    # ------------------------------------------------------------------
+
+    def application_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Filas de applications_dr en el orden de APPLICATION_COLUMNS"""
+        for (unit, service, role), names in self.applications_by_position().items():
+            for name in names:
+                yield ('Active', unit, service, role, name, 'Application',
+                       f"Acceso {name} para {role}", 'Usuario estándar',
+                       'Critical' if sum(map(ord, name)) % 4 == 0 else 'Non Critical',
+                       f"owner.{name.split()[0].lower()}@empresa.com", f"https://tickets.empresa.com/{name.split()[0].lower()}")
+
+    def employee_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Filas de Master_Staff_List en el orden de HEADCOUNT_COLUMNS (posición final del historial)"""
+        states = self._plan()
+        positions = self.positions()
+        rng = random.Random(self.seed + 4)
+        for i, state in enumerate(states, start=1):
+            sid = f"SID{i:07d}"
+            position = positions[state.position]
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            active = (i - 1) not in self._inactive
+            yield (sid, f"EIK{i:07d}", f"{100000 + i}", first, last,
+                   f"{first.lower()}.{last.lower()}.{i}@empresa.com", 'Oficina Central',
+                   self.unidad_subunidad(position), position[2], 'Senior' if rng.random() < 0.3 else 'Junior',
+                   state.events[0][2].isoformat(), 'Active' if active else 'Inactive',
+                   None if active else state.last_date.isoformat(),
+                   rng.choice(['Female', 'Male']), f"{position[0][:3].upper()}-{i % 97:02d}")
+
+    def history_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Filas de historico_dr en el orden de HISTORICO_COLUMNS (por empleado, en orden cronológico)"""
+        states = self._plan()
+        produced = 0
+        for i, planned in enumerate(states, start=1):
+            sid = f"SID{i:07d}"
+            replay = _EmployeeState(planned.events[0][1], planned.events[0][2])
+            for number, (process, target, event_date) in enumerate(planned.events, start=1):
+                rows = self._apply_event(replay, process, target, random.Random(f"{self.seed}-{i - 1}-{number}"))
+                record_date = datetime.combine(event_date, datetime.min.time()) + timedelta(seconds=(i * 7919 + number) % 86400)
+                case_id = f"CASE-SYN-{sid}-{number:03d}"
+                for row_process, name, subunit, description in rows:
+                    if produced >= self.history_count:
+                        return
+                    yield (sid, f"{sid.lower()}@empresa.com", case_id, 'Generador',
+                           record_date.strftime('%Y-%m-%d %H:%M:%S'), event_date.isoformat(),
+                           row_process, subunit, description, name, 'closed completed', 'Cerrado')
+                    produced += 1
+
+    def tables(self) -> List[Tuple[str, Tuple[str, ...], Iterator[Tuple[Any, ...]]]]:
+        """(tabla, columnas, filas) en orden de carga"""
+        return [
+            ('applications_dr', APPLICATION_COLUMNS, self.application_rows()),
+            ('Master_Staff_List', HEADCOUNT_COLUMNS, self.employee_rows()),
+            ('historico_dr', HISTORICO_COLUMNS, self.history_rows()),
+        ]
+
+    # ------------------------------------------------------------------
+    # Salidas
+    # ------------------------------------------------------------------
+
+    def load(self, db_manager) -> Dict[str, int]:
+        """
+        Inserta todas las filas por lotes (executemany + fast_executemany) y retorna los conteos
+
+        db_manager puede ser la base local de benchmarks (SQLiteStandIn) o SQLServerConnection;
+        en SQL Server fast_executemany envía cada lote como un único bulk de parámetros.
+        Al final reconstruye las tablas derivadas del historial (ver rebuild_derived).
+        """
+        counts = {}
+        with db_manager.connection() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            for table, columns, rows in self.tables():
+                name = f"[dbo].[{table}]"
+                sql = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+                counts[name] = 0
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= self.BATCH_SIZE:
+                        cursor.executemany(sql, batch)
+                        counts[name] += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(sql, batch)
+                    counts[name] += len(batch)
+                conn.commit()
+            counts.update(self.rebuild_derived(cursor))
+            conn.commit()
+        return counts
+
+    @staticmethod
+    def rebuild_derived(cursor) -> Dict[str, int]:
+        """
+        Reconstruye current_access_dr y historico_trigram_dr desde historico_dr (sin commit)
+
+        Sin esto, después de una carga los accesos actuales quedan vacíos y la búsqueda
+        de texto libre usa un índice de trigramas incompleto.
+        """
+        from services.current_access_state import CurrentAccessState
+        from services.search_index import ProcessSearchIndex
+
+        historico = '[dbo].[historico_dr]'
+        state = CurrentAccessState(historico, '[dbo].[current_access_dr]')
+        index = ProcessSearchIndex(historico)
+        return {
+            state.state_table: state.rebuild(cursor),
+            index.trigram_table: index.rebuild(cursor),
+        }
+
+    def write_csv(self, output_dir: str) -> Dict[str, str]:
+        """Escribe un CSV por tabla (con encabezado, UTF-8) y retorna las rutas"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for table, columns, rows in self.tables():
+            path = os.path.join(output_dir, f"{table}.csv")
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(columns)
+                writer.writerows(rows)
+            paths[table] = path
+        return paths
+
+    @staticmethod
+    def _sql_literal(value: Any) -> str:
+        if value is None:
+            return 'NULL'
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "N'" + str(value).replace("'", "''") + "'"
+
+    def write_sql(self, path: str) -> Dict[str, int]:
+        """
+        Escribe un script T-SQL con INSERT de varias filas (SQL_ROWS_PER_INSERT por sentencia)
+
+        Cada sentencia va en su propio lote (GO) para que sqlcmd no acumule todo el script.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        counts = {}
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write("-- =====================================================\n")
+            handle.write(f"-- Datos sintéticos (semilla {self.seed}): {self.employee_count} empleados, "
+                         f"{self.application_count} aplicaciones, {self.history_count} registros de historial\n")
+            handle.write("-- =====================================================\n\n")
+            handle.write("SET NOCOUNT ON;\nGO\n\n")
+            for table, columns, rows in self.tables():
+                header = f"INSERT INTO [dbo].[{table}] ({', '.join(f'[{c}]' for c in columns)}) VALUES\n"
+                counts[table] = 0
+                batch = []
+                for row in rows:
+                    batch.append('(' + ', '.join(self._sql_literal(value) for value in row) + ')')
+                    if len(batch) >= self.SQL_ROWS_PER_INSERT:
+                        handle.write(header + ',\n'.join(batch) + ";\nGO\n")
+                        counts[table] += len(batch)
+                        batch = []
+                if batch:
+                    handle.write(header + ',\n'.join(batch) + ";\nGO\n")
+                    counts[table] += len(batch)
+                handle.write("\n")
+        return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de headcount, matriz de aplicaciones e historial")
+    parser.add_argument('--format', choices=('csv', 'sql', 'sqlite', 'sqlserver'), default='csv',
+                        help="csv: un archivo por tabla; sql: script de INSERT; sqlite: base local de "
+                             "benchmarks; sqlserver: carga directa con la configuración de config.py")
+    parser.add_argument('--output', default=os.path.join('output', 'dataset'),
+                        help="Carpeta (csv), archivo .sql o archivo .db (sqlite)")
+    parser.add_argument('--employees', type=int, default=1000, help="Empleados")
+    parser.add_argument('--applications', type=int, default=300, help="Filas de la matriz de aplicaciones")
+    parser.add_argument('--history', type=int, default=10000, help="Filas de historico_dr")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla")
+    parser.add_argument('--skew', type=float, default=1.1, help="Sesgo Zipf de empleados por posición (0 = uniforme)")
+    parser.add_argument('--continue-probability', type=float, default=0.65,
+                        help="Probabilidad de otro evento por empleado en cada pasada (largo de los historiales)")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(args.employees, args.applications, args.history, seed=args.seed,
+                                       skew=args.skew, continue_probability=args.continue_probability)
+    if args.format == 'csv':
+        for table, path in generator.write_csv(args.output).items():
+            print(f"✅ {table}: {path}")
+        print("📋 Después de importar los CSV reconstruya las tablas derivadas del historial:\n"
+              "   python -m services.current_access_state --rebuild\n"
+              "   python -m services.search_index --rebuild")
+        return
+    if args.format == 'sql':
+        counts = generator.write_sql(args.output)
+        for table, count in counts.items():
+            print(f"✅ {table}: {count} filas")
+        print("📋 Después de ejecutar el script reconstruya las tablas derivadas del historial:\n"
+              "   python -m services.current_access_state --rebuild\n"
+              "   python -m services.search_index --rebuild")
+        return
+    elif args.format == 'sqlite':
+        from benchmarks.sqlite_backend import SQLiteStandIn
+        counts = generator.load(SQLiteStandIn(args.output))
+    else:
+        from config import get_database_connection
+        counts = generator.load(get_database_connection())
+    for table, count in counts.items():
+        print(f"✅ {table}: {count} filas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Harness de benchmarks: escenarios guionados sobre los servicios reales
+
+Cada escenario llama a las APIs de AccessManagementService, SearchService y
+ExportService contra la base local (benchmarks/sqlite_backend.py) y mide:
+
+- Throughput (operaciones por segundo)
+- Latencia p50 / p95 / máxima por operación
+- Round trips (sentencias enviadas a la base) y filas leídas por operación
+
+Uso:
+    python -m benchmarks --employees 50000 --applications 5000 --history 5000000
+    python -m benchmarks --scenarios onboarding,reconciliation --iterations 50 --json output/bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from query_metrics import QueryMetrics
+from benchmarks.data_generator import SyntheticDataGenerator
+from benchmarks.sqlite_backend import SQLiteStandIn
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano (valores en cualquier orden)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class BenchmarkHarness:
+    """Prepara la base local, conecta los servicios reales y ejecuta los escenarios"""
+
+    SCENARIOS = ('onboarding', 'lateral_movement', 'reconciliation', 'population_reconciliation',
+                 'statistics', 'search', 'export_history')
+
+    def __init__(self, db_path: str = os.path.join('output', 'benchmark.db'),
+                 generator: Optional[SyntheticDataGenerator] = None,
+                 output_dir: str = os.path.join('output', 'benchmarks'),
+                 seed: int = 7, quiet: bool = True):
+        self.db_path = db_path
+        self.generator = generator or SyntheticDataGenerator()
+        self.output_dir = output_dir
+        self.quiet = quiet
+        self.rng = random.Random(seed)
+        self.stand_in = SQLiteStandIn(db_path)
+        self.access_service = None
+        self.search_service = None
+        self.export_service = None
+        self._employees: List[Dict[str, Any]] = []
+
+    # ------------------------------------------------------------------
+    # Preparación
+    # ------------------------------------------------------------------
+
+    def prepare(self, rebuild: bool = False) -> Dict[str, int]:
+        """Crea y llena la base local (solo si no existe o rebuild=True) y crea los servicios"""
+        if rebuild and os.path.exists(self.db_path):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+        fresh = not os.path.exists(self.db_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.stand_in.create_schema()
+        self._create_services()
+
+        if fresh:
+            # load también reconstruye current_access_dr y los trigramas
+            self.generator.load(self.stand_in)
+
+        with self.stand_in.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT scotia_id, department, current_position_title
+                FROM [dbo].[Master_Staff_List] WHERE status = 'Active'
+            """)
+            self._employees = [
+                {'scotia_id': row[0], 'unidad_subunidad': row[1], 'position': row[2]}
+                for row in cursor.fetchall()
+            ]
+        return self.stand_in.table_counts()
+
+    def _create_services(self):
+        """Instancias nuevas de los servicios reales apuntando a la base local"""
+        from services.access_management_service import AccessManagementService
+        from services.search_service import SearchService
+        from services.export_service import ExportService
+
+        self.access_service = AccessManagementService()
+        self.access_service.db_manager = self.stand_in
+        self.access_service.application_cache.invalidate()
+
+        self.search_service = SearchService()
+        self.search_service.db_manager = self.stand_in
+        self.search_service.access_service = self.access_service
+
+        self.export_service = ExportService(self.output_dir)
+
+    @contextlib.contextmanager
+    def _silenced(self):
+        """Oculta los print de los servicios durante las mediciones"""
+        if not self.quiet:
+            yield
+            return
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+
+    # ------------------------------------------------------------------
+    # Escenarios
+    # ------------------------------------------------------------------
+
+    def _sample_employee(self) -> Dict[str, Any]:
+        return self.rng.choice(self._employees)
+
+    def _scenario_operation(self, name: str) -> Callable[[], bool]:
+        """Función que ejecuta una operación del escenario y retorna si tuvo éxito"""
+        access, search, export = self.access_service, self.search_service, self.export_service
+        positions = self.generator.positions()
+
+        if name == 'onboarding':
+            def operation():
+                employee = self._sample_employee()
+                success, _, _ = access.process_employee_onboarding(
+                    employee['scotia_id'], employee['position'], employee['unidad_subunidad'], 'Benchmark')
+                return success
+        elif name == 'lateral_movement':
+            def operation():
+                employee = self._sample_employee()
+                target = self.rng.choice(positions)
+                success, _, _ = access.process_lateral_movement(
+                    employee['scotia_id'], target[2], self.generator.unidad_subunidad(target), 'Benchmark')
+                return success
+        elif name == 'reconciliation':
+            def operation():
+                report = access.get_access_reconciliation_report(self._sample_employee()['scotia_id'], use_cache=False)
+                return bool(report.get('success', 'error' not in report))
+        elif name == 'population_reconciliation':
+            def operation():
+                totals = access.reconcile_population()
+                return sum(1 for _ in totals) >= 0
+        elif name == 'statistics':
+            def operation():
+                return bool(access.get_headcount_statistics(use_cache=False))
+        elif name == 'search':
+            def operation():
+                results = search.buscar_procesos({'scotia_id': self._sample_employee()['scotia_id']}, limit=100)
+                return isinstance(results, list)
+        elif name == 'export_history':
+            def operation():
+                history = search.buscar_procesos({'process_access': 'onboarding'}, limit=2000)
+                return bool(export.export_access_history(history, filename_prefix='benchmark_historial'))
+        else:
+            raise ValueError(f"Escenario desconocido: {name}")
+        return operation
+
+    def run_scenario(self, name: str, iterations: int = 20, warmup: int = 1) -> Dict[str, Any]:
+        """Ejecuta un escenario y retorna sus métricas"""
+        operation = self._scenario_operation(name)
+        with self._silenced():
+            for _ in range(warmup):
+                operation()
+
+            metrics = QueryMetrics(slow_query_ms=None)
+            self.stand_in.metrics = metrics
+            latencies = []
+            failures = 0
+            started = time.perf_counter()
+            try:
+                for _ in range(iterations):
+                    op_start = time.perf_counter()
+                    try:
+                        ok = operation()
+                    except Exception:
+                        ok = False
+                    latencies.append((time.perf_counter() - op_start) * 1000)
+                    failures += 0 if ok else 1
+            finally:
+                self.stand_in.metrics = None
+            elapsed = time.perf_counter() - started
+
+        operations = metrics.snapshot()['operations'].values()
+        round_trips = sum(item['calls'] for item in operations)
+        rows = sum(item['rows'] for item in operations)
+        return {
+            'scenario': name,
+            'iterations': iterations,
+            'failures': failures,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_ops': round(iterations / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'max_ms': round(max(latencies), 3) if latencies else 0.0,
+            'round_trips_per_op': round(round_trips / iterations, 2) if iterations else 0.0,
+            'rows_per_op': round(rows / iterations, 2) if iterations else 0.0
+        }
+
+    def run(self, scenarios: Optional[List[str]] = None, iterations: int = 20) -> Dict[str, Any]:
+        """Ejecuta varios escenarios y arma el reporte completo"""
+        scenarios = scenarios or list(self.SCENARIOS)
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'database': os.path.abspath(self.db_path),
+            'tables': self.stand_in.table_counts(),
+            'results': [self.run_scenario(name, iterations) for name in scenarios]
+        }
+
+
+def format_results(report: Dict[str, Any]) -> str:
+    """Tabla de texto con los resultados"""
+    lines = [f"Base: {report['database']}",
+             "Filas: " + ", ".join(f"{table}={count}" for table, count in report['tables'].items()),
+             "",
+             f"{'Escenario':<28} {'Ops':>6} {'Fallos':>6} {'Ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'Máx ms':>9} {'RT/op':>7} {'Filas/op':>9}"]
+    for item in report['results']:
+        lines.append(f"{item['scenario']:<28} {item['iterations']:>6} {item['failures']:>6} {item['throughput_ops']:>9.2f} "
+                     f"{item['p50_ms']:>9.1f} {item['p95_ms']:>9.1f} {item['max_ms']:>9.1f} "
+                     f"{item['round_trips_per_op']:>7.1f} {item['rows_per_op']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los servicios sobre una base SQLite local")
+    parser.add_argument('--db', default=os.path.join('output', 'benchmark.db'), help="Archivo de la base local")
+    parser.add_argument('--rebuild', action='store_true', help="Regenera la base aunque ya exista")
+    parser.add_argument('--employees', type=int, default=2000, help="Empleados a generar")
+    parser.add_argument('--applications', type=int, default=500, help="Filas de la matriz de aplicaciones")
+    parser.add_argument('--history', type=int, default=50000, help="Filas de historico_dr")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla del generador")
+    parser.add_argument('--scenarios', default=','.join(BenchmarkHarness.SCENARIOS),
+                        help="Escenarios separados por coma")
+    parser.add_argument('--iterations', type=int, default=20, help="Operaciones por escenario")
+    parser.add_argument('--json', help="Guardar el reporte en este archivo JSON")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar la salida de los servicios")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(args.employees, args.applications, args.history, seed=args.seed)
+    harness = BenchmarkHarness(args.db, generator, quiet=not args.verbose)
+    print("Preparando base local...")
+    harness.prepare(rebuild=args.rebuild)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    report = harness.run(scenarios, args.iterations)
+    print(format_results(report))
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.json}")
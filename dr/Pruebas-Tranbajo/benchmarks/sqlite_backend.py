@@ -0,0 +1,780 @@
+"""
+Base de datos local (SQLite) que reemplaza a SQL Server en los benchmarks
+
+Crea Master_Staff_List, applications_dr, historico_dr, procesos_dr, current_access_dr
+y el índice de trigramas del historial con las mismas columnas, índices y triggers
+que sql_server_setup.sql, dentro de un esquema adjunto llamado "dbo" para que los
+nombres [dbo].[tabla] de los servicios funcionen sin cambios.
+
+SQLiteStandIn expone la misma interfaz que SQLServerConnection (get_connection,
+connection, test_connection), así que se asigna como db_manager de los servicios
+reales. Sus cursores aceptan el estilo de pyodbc (execute(sql, *params)) y traducen
+las construcciones T-SQL que usan los servicios:
+
+- SELECT TOP n / DELETE TOP (n)             -> LIMIT
+- OFFSET ? ROWS FETCH NEXT ? ROWS ONLY      -> LIMIT ? OFFSET ?
+- OUTPUT INSERTED.col                       -> last_insert_rowid()
+- CROSS APPLY (SELECT expr AS alias) p      -> expresión en línea
+- GROUP BY GROUPING SETS (...)              -> UNION ALL de un GROUP BY por conjunto
+- 'a' + 'b' (concatenación)                 -> 'a' || 'b'
+- ISNULL, LEN, COUNT_BIG, CHARINDEX, CONCAT, YEAR, GETDATE, COL_LENGTH
+- CONVERT(VARCHAR(n), col, 121) / CAST(? AS DATETIME2(n)) -> col / ? (fechas en texto)
+- EXEC sp_GetAccessReconciliationReport    -> consulta equivalente (PROCEDURES)
+
+CHECKSUM_AGG(BINARY_CHECKSUM(*)) se aproxima con TOTAL(rowid): detecta altas y
+bajas en la matriz pero no modificaciones de filas existentes.
+"""
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from query_metrics import QueryMetrics, instrument
+
+# =====================================================
+# ESQUEMA (equivalente a sql_server_setup.sql)
+# =====================================================
+
+SCHEMA_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS dbo.Master_Staff_List (
+        scotia_id VARCHAR(20) NOT NULL PRIMARY KEY,
+        eikon_id VARCHAR(30),
+        employee_number VARCHAR(30) NOT NULL,
+        employee_name VARCHAR(150) NOT NULL,
+        employee_last_name VARCHAR(150) NOT NULL,
+        business_email VARCHAR(180) NOT NULL,
+        office VARCHAR(150),
+        department VARCHAR(150) NOT NULL,
+        current_position_title VARCHAR(150) NOT NULL,
+        current_position_level VARCHAR(100),
+        hiring_date_bns DATE,
+        hiring_date_gbs DATE,
+        hiring_date_aml DATE,
+        supervisor_name VARCHAR(150),
+        supervisor_last_name VARCHAR(150),
+        address VARCHAR(255),
+        brigade VARCHAR(150),
+        begdate DATE,
+        status VARCHAR(50) NOT NULL,
+        exit_date DATE,
+        modality_as_today VARCHAR(120),
+        action_item VARCHAR(255),
+        exit_reason VARCHAR(255),
+        modality_reason VARCHAR(255),
+        gender VARCHAR(50),
+        dob DATE,
+        position_code VARCHAR(60)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.applications_dr (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        status VARCHAR(50),
+        unit VARCHAR(150),
+        service VARCHAR(150),
+        role VARCHAR(150),
+        system_jurisdiction VARCHAR(150),
+        name_element VARCHAR(200) NOT NULL,
+        type_of_element VARCHAR(150),
+        system_description TEXT,
+        information_needed TEXT,
+        approval_needed TEXT,
+        request_object TEXT,
+        form_need_to_request_access TEXT,
+        roles_and_profiles TEXT,
+        how_to_request_system_access TEXT,
+        how_to_remove_system_access TEXT,
+        for_issues TEXT,
+        critical_non_critical VARCHAR(50),
+        application_owner VARCHAR(150),
+        direct_contact VARCHAR(150),
+        sla_onboarding VARCHAR(50),
+        sla_offboarding VARCHAR(50),
+        system_application_link VARCHAR(255),
+        log_in_information TEXT,
+        access_blocked_password TEXT,
+        bulk_request TEXT,
+        certification_process TEXT,
+        license TEXT,
+        unit_norm VARCHAR(150) GENERATED ALWAYS AS (UPPER(TRIM(IFNULL(unit, '')))) STORED,
+        service_norm VARCHAR(150) GENERATED ALWAYS AS (UPPER(TRIM(IFNULL(service, '')))) STORED,
+        role_norm VARCHAR(150) GENERATED ALWAYS AS (UPPER(TRIM(IFNULL(role, '')))) STORED,
+        name_element_norm VARCHAR(200) GENERATED ALWAYS AS (UPPER(TRIM(IFNULL(name_element, '')))) STORED,
+        unidad_subunidad_norm VARCHAR(303) GENERATED ALWAYS AS (UPPER(TRIM(
+            IFNULL(unit, '') ||
+            CASE WHEN unit IS NOT NULL AND service IS NOT NULL THEN ' / ' ELSE '' END ||
+            IFNULL(service, '')
+        ))) STORED
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.historico_dr (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scotia_id VARCHAR(20) NOT NULL,
+        employee_email VARCHAR(150),
+        case_id VARCHAR(100),
+        responsible VARCHAR(100),
+        record_date DATETIME2 NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        request_date DATE,
+        process_access VARCHAR(50),
+        subunit VARCHAR(100),
+        event_description TEXT,
+        ticket_email VARCHAR(150),
+        app_access_name VARCHAR(150),
+        computer_system_type VARCHAR(100),
+        duration_of_access VARCHAR(50),
+        status VARCHAR(50),
+        closing_date_app DATE,
+        closing_date_ticket DATE,
+        app_quality VARCHAR(50),
+        confirmation_by_user DATE,
+        comment TEXT,
+        comment_tq TEXT,
+        ticket_quality VARCHAR(50),
+        general_status_ticket VARCHAR(50),
+        general_status_case VARCHAR(50),
+        average_time_open_ticket VARCHAR(20),
+        sla_app VARCHAR(50),
+        sla_ticket VARCHAR(50),
+        sla_case VARCHAR(50)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.procesos_dr (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sid VARCHAR(20) NOT NULL,
+        nueva_sub_unidad VARCHAR(100),
+        nuevo_cargo VARCHAR(100),
+        status VARCHAR(50) NOT NULL DEFAULT 'Pendiente',
+        request_date DATE,
+        ingreso_por VARCHAR(100),
+        fecha_creacion DATETIME2 NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        fecha_actualizacion DATETIME2,
+        tipo_proceso VARCHAR(50),
+        app_name VARCHAR(150),
+        mail VARCHAR(150),
+        closing_date_app DATE,
+        app_quality VARCHAR(50),
+        confirmation_by_user DATE,
+        comment TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.current_access_dr (
+        scotia_id VARCHAR(20) NOT NULL,
+        app_key VARCHAR(150) NOT NULL,
+        app_access_name VARCHAR(150) NOT NULL,
+        source_process VARCHAR(50) NOT NULL,
+        historico_id INT NOT NULL,
+        granted_at DATETIME2 NOT NULL,
+        subunit VARCHAR(100),
+        event_description TEXT,
+        status VARCHAR(50),
+        flex_position VARCHAR(150),
+        expires_at DATETIME2,
+        PRIMARY KEY (scotia_id, app_key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.historico_trigram_dr (
+        field TINYINT NOT NULL,
+        trigram NVARCHAR(3) NOT NULL,
+        historico_id INT NOT NULL,
+        PRIMARY KEY (field, trigram, historico_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dbo.historico_trigram_pos (
+        pos SMALLINT NOT NULL PRIMARY KEY
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO dbo.historico_trigram_pos (pos)
+    WITH RECURSIVE n(pos) AS (SELECT 1 UNION ALL SELECT pos + 1 FROM n WHERE pos < 4000)
+    SELECT pos FROM n
+    """,
+]
+
+# Campos de texto de historico_dr con su código (= ProcessSearchIndex.TEXT_FIELDS)
+_TRIGRAM_FIELDS = ('app_access_name', 'responsible', 'event_description', 'comment',
+                   'ticket_email', 'employee_email', 'subunit')
+
+
+def _trigram_insert(row: str) -> str:
+    """INSERT de los trigramas de la fila NEW del trigger (SQLite no admite CTE en triggers)"""
+    fields = " UNION ALL ".join(
+        f"SELECT {code} AS field, LOWER(NEW.{field}) AS value"
+        for code, field in enumerate(_TRIGRAM_FIELDS, start=1)
+    )
+    return f"""
+        INSERT OR IGNORE INTO historico_trigram_dr (field, trigram, historico_id)
+        SELECT f.field, SUBSTR(f.value, p.pos, 3), {row}
+        FROM ({fields}) f
+        JOIN historico_trigram_pos p ON p.pos <= LENGTH(f.value) - 2
+        WHERE f.value IS NOT NULL;
+    """
+
+
+# Equivalente por fila de TR_historico_dr_trigram
+TRIGGER_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS dbo.TR_historico_dr_trigram_insert AFTER INSERT ON historico_dr
+    BEGIN
+        {_trigram_insert('NEW.id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS dbo.TR_historico_dr_trigram_update
+    AFTER UPDATE OF {', '.join(_TRIGRAM_FIELDS)} ON historico_dr
+    BEGIN
+        DELETE FROM historico_trigram_dr WHERE historico_id = OLD.id;
+        {_trigram_insert('NEW.id')}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dbo.TR_historico_dr_trigram_delete AFTER DELETE ON historico_dr
+    BEGIN
+        DELETE FROM historico_trigram_dr WHERE historico_id = OLD.id;
+    END
+    """,
+]
+
+# Mismos índices que sql_server_setup.sql (SQLite no tiene INCLUDE: se omiten esas columnas)
+INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS dbo.IX_headcount_department_title ON Master_Staff_List (department, current_position_title)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_headcount_level_code ON Master_Staff_List (current_position_level, position_code)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_headcount_status ON Master_Staff_List (status)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_unit_role ON applications_dr (unit, role)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_service_role ON applications_dr (service, role)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_status ON applications_dr (status)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_name_element ON applications_dr (name_element)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_norm_position ON applications_dr (unidad_subunidad_norm, role_norm)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_norm_name ON applications_dr (name_element_norm)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_applications_norm_role ON applications_dr (role_norm)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_historico_scotia_status ON historico_dr (scotia_id, status)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_historico_process_status ON historico_dr (process_access, status)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_historico_record_date ON historico_dr (record_date)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_historico_scotia_app ON historico_dr (scotia_id, app_access_name, record_date)",
+    "CREATE INDEX IF NOT EXISTS dbo.IX_historico_trigram_id ON historico_trigram_dr (historico_id)",
+]
+
+# =====================================================
+# TRADUCCIÓN T-SQL -> SQLite
+# =====================================================
+
+_STRING = re.compile(r"N?'(?:[^']|'')*'")
+_MASK = re.compile(r"\x00(\d+)\x00")
+_OUTPUT = re.compile(r"\bOUTPUT\s+INSERTED\.\[?(\w+)\]?", re.IGNORECASE)
+_OFFSET_FETCH = re.compile(r"\bOFFSET\s+\?\s+ROWS\s+FETCH\s+NEXT\s+\?\s+ROWS\s+ONLY\b", re.IGNORECASE)
+_DELETE_TOP = re.compile(r"^\s*DELETE\s+TOP\s*\(\s*(\d+)\s*\)\s+FROM\s+(\S+)\s+WHERE\s+(.*?)\s*;?\s*$",
+                         re.IGNORECASE | re.DOTALL)
+_SELECT_TOP = re.compile(r"\bSELECT(\s+DISTINCT)?\s+TOP\s*(?:\(\s*(\d+)\s*\)|(\d+))", re.IGNORECASE)
+_CROSS_APPLY = re.compile(r"\bCROSS\s+APPLY\s*\(", re.IGNORECASE)
+_GROUPING_SETS = re.compile(r"\bGROUP\s+BY\s+GROUPING\s+SETS\s*\(", re.IGNORECASE)
+_GROUPING = re.compile(r"\bGROUPING\s*\(", re.IGNORECASE)
+_SELECT_FROM = re.compile(r"\b(SELECT|FROM)\b", re.IGNORECASE)
+_ALIAS = re.compile(r"^(.*?)\s+AS\s+(\w+)$", re.IGNORECASE | re.DOTALL)
+_RENAMES = [
+    (re.compile(r"\bISNULL\s*\(", re.IGNORECASE), "IFNULL("),
+    (re.compile(r"\bLEN\s*\(", re.IGNORECASE), "LENGTH("),
+    (re.compile(r"\bCOUNT_BIG\s*\(", re.IGNORECASE), "COUNT("),
+    (re.compile(r"\bCHECKSUM_AGG\s*\(\s*BINARY_CHECKSUM\s*\(\s*\*\s*\)\s*\)", re.IGNORECASE), "TOTAL(rowid)"),
+]
+# Conversiones de fecha exactas (las fechas ya se guardan como texto ISO en SQLite)
+_DATE_CONVERSIONS = [
+    (re.compile(r"\bCONVERT\s*\(\s*VARCHAR\s*\(\s*\d+\s*\)\s*,\s*([\w.\[\]]+)\s*,\s*121\s*\)", re.IGNORECASE), r"\1"),
+    (re.compile(r"\bCAST\s*\(\s*\?\s+AS\s+DATETIME2\s*\(\s*\d+\s*\)\s*\)", re.IGNORECASE), "?"),
+]
+_NUMBER_BEFORE = re.compile(r"(?<![\w.\]])\d+(?:\.\d+)?\s*$")
+_NUMBER_AFTER = re.compile(r"^\s*\d")
+
+
+def _matching_paren(sql: str, open_index: int) -> int:
+    """Índice del paréntesis que cierra el abierto en open_index (literales ya enmascarados)"""
+    depth = 0
+    for i in range(open_index, len(sql)):
+        if sql[i] == '(':
+            depth += 1
+        elif sql[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError("Paréntesis sin cerrar en la sentencia")
+
+
+def _scope_end(sql: str, start: int) -> int:
+    """Fin del SELECT que empieza en start: cierre de su subconsulta o fin de la sentencia"""
+    depth = 0
+    for i in range(start, len(sql)):
+        if sql[i] == '(':
+            depth += 1
+        elif sql[i] == ')':
+            if depth == 0:
+                return i
+            depth -= 1
+        elif sql[i] == ';' and depth == 0:
+            return i
+    return len(sql.rstrip())
+
+
+def _inline_cross_apply(sql: str) -> str:
+    """CROSS APPLY (SELECT expr AS alias) p -> p.alias reemplazado por (expr)"""
+    while True:
+        match = _CROSS_APPLY.search(sql)
+        if not match:
+            return sql
+        close = _matching_paren(sql, match.end() - 1)
+        inner = sql[match.end():close].strip()
+        alias_match = re.match(r"\s*(\w+)", sql[close + 1:])
+        select = re.match(r"SELECT\s+(.*)\s+AS\s+(\w+)$", inner, re.IGNORECASE | re.DOTALL)
+        if not alias_match or not select:
+            raise ValueError("CROSS APPLY no soportado por el reemplazo SQLite")
+        table_alias = alias_match.group(1)
+        expression, column = select.group(1), select.group(2)
+        sql = sql[:match.start()] + sql[close + 1 + alias_match.end():]
+        sql = re.sub(rf"\b{table_alias}\.{column}\b", lambda _: f"({expression})", sql)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Separa por comas que no estén dentro de paréntesis"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _normalize_expression(expression: str) -> str:
+    return re.sub(r"\s+", "", expression).lower()
+
+
+def _expand_grouping_sets(sql: str) -> str:
+    """
+    SELECT ... GROUP BY GROUPING SETS ((a), (a, b), ()) -> un SELECT por conjunto unidos con UNION ALL
+
+    En cada SELECT, GROUPING(x) pasa a 0/1 y las columnas del SELECT que son
+    exactamente una expresión de agrupación fuera del conjunto pasan a NULL.
+    Solo se admite GROUPING SETS al final de la sentencia (sin HAVING ni ORDER BY).
+    """
+    match = _GROUPING_SETS.search(sql)
+    if not match:
+        return sql
+    close = _matching_paren(sql, match.end() - 1)
+    if sql[close + 1:].strip().rstrip(';').strip():
+        raise ValueError("GROUPING SETS solo se admite al final de la sentencia en el reemplazo SQLite")
+    sets = []
+    for grouping_set in _split_top_level(sql[match.end():close]):
+        inner = grouping_set[1:-1] if grouping_set.startswith('(') else grouping_set
+        sets.append(_split_top_level(inner))
+    every = {_normalize_expression(expression) for expression in sum(sets, [])}
+
+    # Lista del SELECT principal (primer SELECT y su FROM al mismo nivel)
+    head = sql[:match.start()]
+    depth, select_end, from_start = 0, None, None
+    for token in _SELECT_FROM.finditer(head):
+        depth = head[:token.start()].count('(') - head[:token.start()].count(')')
+        if depth != 0:
+            continue
+        if token.group(1).upper() == 'SELECT' and select_end is None:
+            select_end = token.end()
+        elif token.group(1).upper() == 'FROM' and select_end is not None:
+            from_start = token.start()
+            break
+    if select_end is None or from_start is None:
+        raise ValueError("GROUPING SETS sin SELECT ... FROM reconocible")
+    items = _split_top_level(head[select_end:from_start])
+    body = head[from_start:]
+
+    def replace_grouping(text: str, members: Set[str]) -> str:
+        while True:
+            found = _GROUPING.search(text)
+            if not found:
+                return text
+            end = _matching_paren(text, found.end() - 1)
+            flag = '0' if _normalize_expression(text[found.end():end]) in members else '1'
+            text = text[:found.start()] + flag + text[end + 1:]
+
+    selects = []
+    for grouping_set in sets:
+        members = {_normalize_expression(expression) for expression in grouping_set}
+        columns = []
+        for item in items:
+            item = replace_grouping(item, members)
+            alias = _ALIAS.match(item)
+            expression, name = (alias.group(1), alias.group(2)) if alias else (item, None)
+            normalized = _normalize_expression(expression)
+            if normalized in every and normalized not in members:
+                name = name or expression.split('.')[-1].strip('[]')
+                item = f"NULL AS {name}"
+            columns.append(item)
+        group_by = f" GROUP BY {', '.join(grouping_set)}" if grouping_set else ""
+        selects.append(f"SELECT {', '.join(columns)} {body.strip()}{group_by}")
+    return "\nUNION ALL\n".join(selects)
+
+
+def _replace_select_top(sql: str) -> str:
+    """SELECT [DISTINCT] TOP n ... -> SELECT [DISTINCT] ... LIMIT n (al final de su ámbito)"""
+    while True:
+        match = _SELECT_TOP.search(sql)
+        if not match:
+            return sql
+        limit = match.group(2) or match.group(3)
+        head = "SELECT" + (match.group(1) or '')
+        sql = sql[:match.start()] + head + sql[match.end():]
+        end = _scope_end(sql, match.start() + len(head))
+        sql = sql[:end].rstrip() + f" LIMIT {limit} " + sql[end:]
+
+
+def _replace_concatenation(sql: str) -> str:
+    """'+' entre textos -> '||' (se conserva '+' si alguno de los lados es un número literal)"""
+    parts = sql.split('+')
+    result = parts[0]
+    for part in parts[1:]:
+        numeric = _NUMBER_BEFORE.search(result) or _NUMBER_AFTER.match(part)
+        result += ('+' if numeric else '||') + part
+    return result
+
+
+@lru_cache(maxsize=2048)
+def translate_tsql(sql: str) -> Tuple[str, bool, Optional[str]]:
+    """
+    Traduce una sentencia T-SQL de los servicios a SQLite
+
+    Returns:
+        (sentencia SQLite, intercambiar los dos últimos parámetros, columna de OUTPUT INSERTED)
+    """
+    literals: List[str] = []
+
+    def mask(match):
+        literal = match.group(0)
+        literals.append(literal[1:] if literal.startswith('N') else literal)
+        return f"\x00{len(literals) - 1}\x00"
+
+    text = _STRING.sub(mask, sql)
+
+    output_column = None
+    output = _OUTPUT.search(text)
+    if output:
+        output_column = output.group(1)
+        text = text[:output.start()] + text[output.end():]
+
+    swap_last_params = False
+    if _OFFSET_FETCH.search(text):
+        text = _OFFSET_FETCH.sub("LIMIT ? OFFSET ?", text)
+        swap_last_params = True
+
+    delete_top = _DELETE_TOP.match(text)
+    if delete_top:
+        limit, table, condition = delete_top.groups()
+        text = (f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE {condition} LIMIT {limit})")
+
+    for pattern, replacement in _RENAMES + _DATE_CONVERSIONS:
+        text = pattern.sub(replacement, text)
+    text = _inline_cross_apply(text)
+    text = _expand_grouping_sets(text)
+    text = _replace_select_top(text)
+    text = _replace_concatenation(text)
+
+    text = _MASK.sub(lambda m: literals[int(m.group(1))], text)
+    return text, swap_last_params, output_column
+
+
+def _adapt(value: Any) -> Any:
+    """Parámetros de Python al formato en que SQLite guarda las fechas (texto ISO)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+# =====================================================
+# FUNCIONES T-SQL REGISTRADAS EN SQLITE
+# =====================================================
+
+def _charindex(needle, haystack, start=1):
+    if needle is None or haystack is None:
+        return None
+    return str(haystack).find(str(needle), max(int(start or 1), 1) - 1) + 1
+
+
+def _substring(value, start, length):
+    if value is None:
+        return None
+    begin = max(int(start), 1) - 1
+    return str(value)[begin:max(int(start) + int(length) - 1, 0)]
+
+
+def _concat(*values):
+    return ''.join('' if value is None else str(value) for value in values)
+
+
+def _year(value):
+    if value is None:
+        return None
+    return int(str(value)[:4])
+
+
+def _getdate():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+# =====================================================
+# CONEXIÓN Y CURSOR CON INTERFAZ DE PYODBC
+# =====================================================
+
+# =====================================================
+# PROCEDIMIENTOS ALMACENADOS EMULADOS
+# =====================================================
+
+# EXEC <nombre> ? -> consulta SQLite equivalente (parámetros numerados ?1, ?2, ...).
+# Se escriben sobre las tablas actuales, no sobre las vistas legadas de sql_server_setup.sql.
+PROCEDURES = {
+    'sp_GetAccessReconciliationReport': """
+        WITH emp AS (
+            SELECT current_position_title AS position,
+                   UPPER(TRIM(department)) AS unidad_norm,
+                   UPPER(TRIM(current_position_title)) AS position_norm
+            FROM dbo.Master_Staff_List
+            WHERE scotia_id = ?1 AND status IN ('Active', 'Activo')
+        ),
+        app AS (
+            SELECT name_element_norm, MIN(unit) AS unit, MIN(role) AS role_name,
+                   MIN(system_description) AS description
+            FROM dbo.applications_dr GROUP BY name_element_norm
+        ),
+        curr AS (
+            SELECT DISTINCT h.app_access_name AS app_name, app.unit, h.subunit, emp.position AS position_role,
+                   app.role_name, app.description, h.record_date, h.status
+            FROM dbo.historico_dr h
+            CROSS JOIN emp
+            LEFT JOIN app ON app.name_element_norm = UPPER(TRIM(h.app_access_name))
+            WHERE h.scotia_id = ?1
+              AND h.process_access IN ('onboarding', 'lateral_movement')
+              AND h.app_access_name IS NOT NULL
+              AND h.status IN ('closed completed', 'Completado')
+        ),
+        req AS (
+            SELECT DISTINCT a.name_element AS app_name, a.unit, a.service AS subunit, a.role AS position_role,
+                   a.role AS role_name, a.system_description AS description
+            FROM dbo.applications_dr a
+            JOIN emp ON a.unidad_subunidad_norm = emp.unidad_norm AND a.role_norm = emp.position_norm
+            WHERE a.status IN ('Activo', 'Active')
+        )
+        SELECT 'error', 'Empleado no encontrado o inactivo', NULL, NULL, NULL, NULL, NULL, NULL, NULL
+        WHERE NOT EXISTS (SELECT 1 FROM emp)
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'current' AS access_type, app_name, unit, subunit, position_role, role_name, description,
+                   record_date, status
+            FROM curr
+            UNION ALL
+            SELECT 'to_grant', app_name, unit, subunit, position_role, role_name, description, NULL, 'To Grant'
+            FROM req WHERE UPPER(TRIM(app_name)) NOT IN (SELECT UPPER(TRIM(app_name)) FROM curr)
+            UNION ALL
+            SELECT 'to_revoke', app_name, unit, subunit, position_role, role_name, description, record_date, 'To Revoke'
+            FROM curr WHERE UPPER(TRIM(app_name)) NOT IN (SELECT UPPER(TRIM(app_name)) FROM req)
+            ORDER BY 1, 2
+        )
+    """,
+}
+
+_EXEC_RE = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:\[?dbo\]?\.)?\[?(\w+)\]?", re.IGNORECASE)
+
+
+class SQLiteCursor:
+    """Cursor SQLite que acepta llamadas al estilo pyodbc y traduce T-SQL"""
+
+    def __init__(self, raw_cursor):
+        self._raw = raw_cursor
+        self._output_row = None
+        self.fast_executemany = False  # Aceptado por compatibilidad con pyodbc
+
+    def execute(self, sql: str, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        values = [_adapt(value) for value in params]
+        procedure = _EXEC_RE.match(sql)
+        if procedure:
+            if procedure.group(1) not in PROCEDURES:
+                raise sqlite3.OperationalError(f"Procedimiento no emulado: {procedure.group(1)}")
+            self._raw.execute(PROCEDURES[procedure.group(1)], values)
+            self._output_row = None
+            return self
+        translated, swap, output_column = translate_tsql(sql)
+        if swap and len(values) >= 2:
+            values[-2], values[-1] = values[-1], values[-2]
+        self._raw.execute(translated, values)
+        self._output_row = (self._raw.lastrowid,) if output_column else None
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        translated, _, _ = translate_tsql(sql)
+        self._raw.executemany(translated, ([_adapt(v) for v in row] for row in seq_of_params))
+        self._output_row = None
+        return self
+
+    def fetchone(self):
+        if self._output_row is not None:
+            row, self._output_row = self._output_row, None
+            return row
+        return self._raw.fetchone()
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._raw.fetchmany(size) if size else self._raw.fetchmany()
+
+    def fetchall(self):
+        if self._output_row is not None:
+            row, self._output_row = self._output_row, None
+            return [row]
+        return self._raw.fetchall()
+
+    @property
+    def description(self):
+        if self._output_row is not None:
+            return (('id', None, None, None, None, None, None),)
+        return self._raw.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._raw.rowcount
+
+    def close(self):
+        self._raw.close()
+
+    def __iter__(self):
+        return iter(self._raw)
+
+
+class SQLiteConnection:
+    """Conexión SQLite con la interfaz que usan los servicios (cursor, commit, rollback, close)"""
+
+    autocommit = False
+
+    def __init__(self, raw_connection: sqlite3.Connection):
+        self._raw = raw_connection
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._raw.cursor())
+
+    def execute(self, sql: str, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._raw.commit()
+            else:
+                self._raw.rollback()
+        finally:
+            self._raw.close()
+        return False
+
+
+class SQLiteStandIn:
+    """Reemplazo de SQLServerConnection sobre un archivo SQLite (db_manager de los servicios)"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._columns: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        # Si se asigna, cada sentencia se registra ahí (round trips por escenario)
+        self.metrics: Optional[QueryMetrics] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        raw = sqlite3.connect(':memory:', timeout=60, check_same_thread=False)
+        raw.execute("ATTACH DATABASE ? AS dbo", (self.path,))
+        raw.execute("PRAGMA dbo.journal_mode = WAL")
+        raw.execute("PRAGMA dbo.synchronous = NORMAL")
+        raw.create_function('CHARINDEX', 2, _charindex, deterministic=True)
+        raw.create_function('CHARINDEX', 3, _charindex, deterministic=True)
+        raw.create_function('SUBSTRING', 3, _substring, deterministic=True)
+        raw.create_function('CONCAT', -1, _concat, deterministic=True)
+        raw.create_function('YEAR', 1, _year, deterministic=True)
+        raw.create_function('GETDATE', 0, _getdate)
+        raw.create_function('COL_LENGTH', 2, self._col_length, deterministic=True)
+        with self._lock:
+            self.connections_opened += 1
+        return raw
+
+    def _col_length(self, table: str, column: str):
+        """COL_LENGTH('[dbo].[tabla]', 'columna'): 1 si la columna existe, NULL si no"""
+        name = str(table or '').replace('[', '').replace(']', '').split('.')[-1].lower()
+        return 1 if str(column or '').lower() in self._columns.get(name, set()) else None
+
+    def create_schema(self):
+        """Crea las tablas e índices (idempotente)"""
+        raw = self._connect()
+        try:
+            for ddl in SCHEMA_DDL + INDEX_DDL + TRIGGER_DDL:
+                raw.execute(ddl)
+            raw.commit()
+            self._load_columns(raw)
+        finally:
+            raw.close()
+
+    def _load_columns(self, raw: sqlite3.Connection):
+        tables = [row[0] for row in raw.execute("SELECT name FROM dbo.sqlite_master WHERE type = 'table'")]
+        self._columns = {
+            table.lower(): {row[1].lower() for row in raw.execute(f"PRAGMA dbo.table_xinfo([{table}])")}
+            for table in tables
+        }
+
+    def get_connection(self) -> SQLiteConnection:
+        if not self._columns:
+            self.create_schema()
+        conn = SQLiteConnection(self._connect())
+        return instrument(conn, self.metrics) if self.metrics is not None else conn
+
+    @contextmanager
+    def connection(self):
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def test_connection(self) -> bool:
+        try:
+            with self.connection() as conn:
+                return conn.cursor().execute("SELECT 1").fetchone()[0] == 1
+        except Exception as e:
+            print(f"Error probando conexión SQLite: {e}")
+            return False
+
+    def table_counts(self) -> Dict[str, int]:
+        """Filas por tabla (para el encabezado del reporte)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            return {
+                table: cursor.execute(f"SELECT COUNT(*) FROM [dbo].[{table}]").fetchone()[0]
+                for table in ('Master_Staff_List', 'applications_dr', 'historico_dr', 'current_access_dr')
+            }
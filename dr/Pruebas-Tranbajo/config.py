@@ -4,10 +4,18 @@ Configuración del sistema para SQL Server
 Sistema optimizado para usar únicamente SQL Server
 """
 import os
+import time
+import atexit
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
 import pyodbc
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from query_metrics import instrument, query_metrics
+
 # =====================================================
 # CONFIGURACIÓN SQL SERVER
 # =====================================================
@@ -20,9 +28,277 @@ SQL_SERVER_CONFIG = {
     'password': '',  # No necesario con Windows Authentication
     'driver': '{ODBC Driver 17 for SQL Server}',  # Ajustar según tu versión
     'trusted_connection': 'yes',  # Usar Windows Authentication
-    'timeout': 30
+    'timeout': 30,
+    # Pool de conexiones (compartido por todos los servicios del proceso)
+    'pool_enabled': True,
+    'pool_min_size': 1,            # Conexiones que se mantienen abiertas aunque estén ociosas
+    'pool_max_size': 10,           # Máximo de conexiones abiertas simultáneamente
+    'pool_idle_timeout': 300,      # Segundos tras los cuales se cierra una conexión ociosa
+    'pool_acquire_timeout': 30,    # Segundos de espera cuando el pool está agotado
+    'pool_validate_on_borrow': True,  # Ejecutar SELECT 1 antes de entregar una conexión reutilizada
+    # Instrumentación de consultas (tiempos, filas y origen de cada sentencia)
+    'instrumentation_enabled': os.environ.get('QUERY_INSTRUMENTATION', '1') != '0',
+    'slow_query_ms': float(os.environ.get('SLOW_QUERY_MS', '500'))  # Umbral para informar consultas lentas
 }
 
+# =====================================================
+# POOL DE CONEXIONES
+# =====================================================
+
+class ConnectionPoolTimeout(Exception):
+    """Se lanza cuando no hay conexiones disponibles dentro del tiempo de espera"""
+
+
+class PooledConnection:
+    """Envoltorio de una conexión pyodbc que la devuelve al pool al cerrarse.
+    
+    Expone la misma interfaz que pyodbc.Connection (cursor, commit, rollback,
+    close, with ...), de modo que el código existente que hace conn.close()
+    sigue funcionando sin cambios.
+    """
+    
+    def __init__(self, pool: 'ConnectionPool', raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+        # Si el llamador no cierra la conexión (p. ej. retorna desde un except),
+        # se devuelve al pool cuando el envoltorio se recolecta
+        self._finalizer = weakref.finalize(self, pool.release, raw_connection)
+    
+    @property
+    def raw(self):
+        """Conexión pyodbc subyacente"""
+        return self._raw
+    
+    @property
+    def closed(self) -> bool:
+        return self._raw is None
+    
+    def close(self):
+        """Devuelve la conexión al pool (llamadas repetidas no tienen efecto)"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._finalizer()
+    
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        return getattr(self._raw, name)
+    
+    def __setattr__(self, name, value):
+        # Atributos propios (_pool, _raw) en el envoltorio; el resto (autocommit, timeout...) en la conexión
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._raw, name, value)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Mismo comportamiento que pyodbc: commit si todo fue bien, rollback si hubo error
+        try:
+            if self._raw is not None and not getattr(self._raw, 'autocommit', False):
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class ConnectionPool:
+    """Pool de conexiones acotado y seguro para hilos.
+    
+    - Mantiene al menos min_size conexiones ociosas y nunca más de max_size abiertas.
+    - Cierra las conexiones ociosas que superan idle_timeout (respetando min_size).
+    - Valida con SELECT 1 las conexiones reutilizadas antes de entregarlas.
+    - Hace rollback de lo no confirmado al devolver una conexión, igual que close().
+    """
+    
+    def __init__(self, connect_fn, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300, acquire_timeout: float = 30,
+                 validate_on_borrow: bool = True):
+        if max_size < 1:
+            raise ValueError("pool_max_size debe ser mayor o igual a 1")
+        self._connect_fn = connect_fn
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.validate_on_borrow = validate_on_borrow
+        self._idle = deque()  # (conexión, último uso)
+        self._total = 0
+        self._condition = threading.Condition(threading.Lock())
+        self._closed = False
+    
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Obtiene una conexión del pool, creando una nueva si hay cupo"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            raw = None
+            create = False
+            with self._condition:
+                if self._closed:
+                    raise pyodbc.InterfaceError("El pool de conexiones está cerrado")
+                self._evict_idle_locked()
+                if self._idle:
+                    raw, _ = self._idle.pop()
+                elif self._total < self.max_size:
+                    self._total += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionPoolTimeout(
+                            f"No hay conexiones disponibles (máximo {self.max_size}) tras {timeout} segundos"
+                        )
+                    self._condition.wait(remaining)
+                    continue
+            
+            if create:
+                try:
+                    raw = self._connect_fn()
+                except Exception:
+                    self._discard(None)
+                    raise
+                self._fill_min_size()
+                return PooledConnection(self, raw)
+            
+            if not self.validate_on_borrow or self._is_healthy(raw):
+                return PooledConnection(self, raw)
+            # Conexión rota: se descarta y se intenta con otra
+            self._discard(raw)
+    
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager: entrega una conexión y la devuelve al pool al salir"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def release(self, raw):
+        """Devuelve una conexión cruda al pool"""
+        try:
+            # Descartar cualquier transacción pendiente, igual que al cerrar la conexión
+            raw.rollback()
+            if getattr(raw, 'autocommit', False):
+                raw.autocommit = False
+        except Exception:
+            self._discard(raw)
+            return
+        with self._condition:
+            if self._closed:
+                self._total -= 1
+                self._close_quietly(raw)
+            else:
+                self._idle.append((raw, time.monotonic()))
+            self._condition.notify()
+    
+    def close_all(self):
+        """Cierra todas las conexiones ociosas y rechaza nuevas solicitudes"""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                raw, _ = self._idle.popleft()
+                self._total -= 1
+                self._close_quietly(raw)
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict[str, int]:
+        """Estado actual del pool"""
+        with self._condition:
+            return {
+                'total': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size
+            }
+    
+    # ------------------------------------------------------------------
+    # Utilidades internas
+    # ------------------------------------------------------------------
+    
+    def _evict_idle_locked(self):
+        """Cierra conexiones ociosas vencidas (se llama con el lock tomado)"""
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        # Las más antiguas están a la izquierda del deque
+        while self._idle and len(self._idle) > self.min_size:
+            raw, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._total -= 1
+            self._close_quietly(raw)
+    
+    def _fill_min_size(self):
+        """Abre conexiones hasta alcanzar min_size (sin bloquear a otros hilos)"""
+        while True:
+            with self._condition:
+                if self._closed or self._total >= self.min_size or self._total >= self.max_size:
+                    return
+                self._total += 1
+            try:
+                raw = self._connect_fn()
+            except Exception:
+                self._discard(None)
+                return
+            with self._condition:
+                self._idle.appendleft((raw, time.monotonic()))
+                self._condition.notify()
+    
+    def _discard(self, raw):
+        if raw is not None:
+            self._close_quietly(raw)
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+    
+    @staticmethod
+    def _is_healthy(raw) -> bool:
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+# Pools compartidos por cadena de conexión: todos los servicios usan el mismo
+_POOLS: Dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def close_all_pools():
+    """Cierra todos los pools de conexiones del proceso"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+atexit.register(close_all_pools)
+
 # =====================================================
 # GESTOR DE BASE DE DATOS
 # =====================================================
@@ -33,6 +309,30 @@ class SQLServerConnection:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or SQL_SERVER_CONFIG
         self.connection_string = self._build_connection_string()
+        self.pool = self._get_pool() if self.config.get('pool_enabled', True) else None
+        self.instrumented = self.config.get('instrumentation_enabled', False)
+        if self.instrumented and 'slow_query_ms' in self.config:
+            query_metrics.slow_query_ms = self.config['slow_query_ms']
+    
+    def _get_pool(self) -> ConnectionPool:
+        """Obtiene (o crea) el pool compartido para esta cadena de conexión"""
+        with _POOLS_LOCK:
+            pool = _POOLS.get(self.connection_string)
+            if pool is None:
+                pool = ConnectionPool(
+                    self._connect,
+                    min_size=self.config.get('pool_min_size', 1),
+                    max_size=self.config.get('pool_max_size', 10),
+                    idle_timeout=self.config.get('pool_idle_timeout', 300),
+                    acquire_timeout=self.config.get('pool_acquire_timeout', 30),
+                    validate_on_borrow=self.config.get('pool_validate_on_borrow', True)
+                )
+                _POOLS[self.connection_string] = pool
+            return pool
+    
+    def _connect(self) -> pyodbc.Connection:
+        """Abre una conexión física nueva"""
+        return pyodbc.connect(self.connection_string)
     
     def _build_connection_string(self) -> str:
         """Construye la cadena de conexión para SQL Server"""
@@ -60,13 +360,35 @@ class SQLServerConnection:
             )
     
     def get_connection(self) -> pyodbc.Connection:
-        """Obtiene una conexión a la base de datos SQL Server"""
+        """Obtiene una conexión a la base de datos SQL Server.
+        
+        Si el pool está habilitado la conexión se toma del pool y conn.close()
+        la devuelve en lugar de cerrarla. Con la instrumentación activa, cada
+        sentencia queda registrada en query_metrics.
+        """
         try:
-            return pyodbc.connect(self.connection_string)
-        except pyodbc.Error as e:
+            conn = self.pool.acquire() if self.pool is not None else self._connect()
+            return instrument(conn) if self.instrumented else conn
+        except (pyodbc.Error, ConnectionPoolTimeout) as e:
             print(f"Error conectando a SQL Server: {e}")
             raise
     
+    @contextmanager
+    def connection(self):
+        """Context manager que entrega una conexión y la libera al salir.
+        
+        Uso:
+            with db_manager.connection() as conn:
+                cursor = conn.cursor()
+                ...
+                conn.commit()
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
     def test_connection(self) -> bool:
         """Prueba la conexión a la base de datos"""
         try:
@@ -101,7 +423,12 @@ def get_connection_info():
         'server': config['server'],
         'database': config['database'],
         'authentication': 'Windows Authentication' if config['trusted_connection'] == 'yes' else 'SQL Server Authentication',
-        'driver': config['driver']
+        'driver': config['driver'],
+        'pool_enabled': config.get('pool_enabled', True),
+        'pool_min_size': config.get('pool_min_size', 1),
+        'pool_max_size': config.get('pool_max_size', 10),
+        'instrumentation_enabled': config.get('instrumentation_enabled', False),
+        'slow_query_ms': config.get('slow_query_ms')
     }
 
 # =====================================================
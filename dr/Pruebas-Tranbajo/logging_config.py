@@ -0,0 +1,120 @@
+"""
+Logging del sistema con niveles por módulo
+
+Los módulos obtienen su logger con get_logger(__name__) y escriben con formato
+diferido (logger.debug("Accesos: %s", n)), de modo que con DEBUG apagado no se
+construye el texto. Lo que solo sirve para diagnóstico (consultas extra, recorrer
+listas para mostrarlas) se protege con debug_enabled(logger).
+
+Niveles:
+    LOG_LEVEL=INFO                                   Nivel de los módulos del proyecto
+    LOG_LEVELS=services.access_management_service=DEBUG,ui=WARNING
+                                                     Niveles por módulo o paquete
+    LOG_FILE=gamlo.log                               Además de la consola, escribir a archivo
+"""
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Paquetes y módulos del proyecto que reciben el nivel por defecto
+PROJECT_LOGGERS = ('services', 'ui', 'config', 'query_metrics', '__main__')
+
+LOGGING_CONFIG = {
+    'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    'module_levels': os.environ.get('LOG_LEVELS', ''),
+    'file': os.environ.get('LOG_FILE', ''),
+    'format': '%(asctime)s %(levelname)-7s [%(name)s] %(message)s',
+    'datefmt': '%H:%M:%S'
+}
+
+_configured = False
+_overridden = set()   # Módulos con nivel propio (se restablecen al reconfigurar)
+_lock = threading.Lock()
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """'modulo=NIVEL,otro=NIVEL' -> {'modulo': 'NIVEL', ...} (se ignoran entradas mal formadas)"""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: Optional[str] = None, module_levels: Optional[Dict[str, str]] = None,
+                      force: bool = False):
+    """
+    Configura los loggers del proyecto (una sola vez, salvo force=True)
+
+    Args:
+        level: Nivel por defecto de los módulos del proyecto (LOG_LEVEL)
+        module_levels: Niveles por módulo o paquete (LOG_LEVELS)
+        force: Volver a aplicar la configuración aunque ya se haya hecho
+    """
+    global _configured
+    with _lock:
+        if _configured and not force:
+            return
+        level = (level or LOGGING_CONFIG['level']).upper()
+        if module_levels is None:
+            module_levels = parse_module_levels(LOGGING_CONFIG['module_levels'])
+
+        root = logging.getLogger()
+        if not root.handlers:
+            formatter = logging.Formatter(LOGGING_CONFIG['format'], LOGGING_CONFIG['datefmt'])
+            handler = logging.StreamHandler()
+            handler.setFormatter(formatter)
+            root.addHandler(handler)
+            if LOGGING_CONFIG['file']:
+                file_handler = logging.FileHandler(LOGGING_CONFIG['file'], encoding='utf-8')
+                file_handler.setFormatter(formatter)
+                root.addHandler(file_handler)
+
+        while _overridden:
+            logging.getLogger(_overridden.pop()).setLevel(logging.NOTSET)
+        for name in PROJECT_LOGGERS:
+            logging.getLogger(name).setLevel(level)
+        for name, module_level in module_levels.items():
+            logging.getLogger(name).setLevel(module_level)
+            if name not in PROJECT_LOGGERS:
+                _overridden.add(name)
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger del módulo (configura el logging la primera vez)"""
+    configure_logging()
+    return logging.getLogger(name)
+
+
+def set_level(name: str, level: str):
+    """Cambia el nivel de un módulo o paquete en tiempo de ejecución"""
+    configure_logging()
+    with _lock:
+        logging.getLogger(name).setLevel(level.upper())
+        if name not in PROJECT_LOGGERS:
+            _overridden.add(name)
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """True si el logger emite DEBUG (para proteger consultas o bucles de diagnóstico)"""
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+class lazy:
+    """Argumento de log que se calcula solo si el mensaje se emite
+
+    Uso: logger.debug("Posiciones: %s", lazy(lambda: sorted(posiciones)))
+    """
+
+    __slots__ = ('_func',)
+
+    def __init__(self, func: Callable[[], Any]):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+    __repr__ = __str__
@@ -0,0 +1,378 @@
+"""
+Instrumentación de consultas a SQL Server
+
+SQLServerConnection envuelve cada conexión en InstrumentedConnection cuando
+'instrumentation_enabled' está activo. Sus cursores miden cada execute/executemany
+y registran en el registro global (query_metrics):
+
+- Huella de la sentencia (literales y listas IN normalizadas, espacios colapsados)
+- Cantidad de parámetros, tiempo transcurrido y filas leídas con fetch*
+- Método del servicio o de la interfaz que originó la consulta
+
+Las métricas se agregan por operación (método que llamó) y por huella, con un
+histograma de latencias por operación. Se pueden volcar a JSON (dump_json) o ver en el panel
+de diagnóstico de la aplicación. Las sentencias que superan 'slow_query_ms' se
+registran con logger.warning y quedan en la lista de consultas lentas recientes.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Límites superiores (ms) de las barras del histograma; la última barra es "> 5000"
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Archivos de infraestructura que no cuentan como origen de una consulta
+_INFRASTRUCTURE_FILES = ('query_metrics.py', 'config.py', 'unit_of_work.py', 'contextlib.py')
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\]@#])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Huella de una sentencia: la misma consulta con distintos valores da la misma huella
+
+    Los literales de texto y numéricos pasan a '?', las listas IN (?, ?, ...) de
+    cualquier largo quedan como IN (?...) y se colapsan los espacios.
+    """
+    if not sql:
+        return ''
+    text = _STRING_LITERAL.sub('?', sql)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _IN_LIST.sub('IN (?...)', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _count_params(params: Tuple[Any, ...]) -> int:
+    """Cantidad de parámetros de execute(sql, *params) o execute(sql, [params])"""
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return len(params[0])
+    return len(params)
+
+
+def call_site(skip: int = 1) -> str:
+    """
+    Método del proyecto que originó la consulta ('modulo.Clase.metodo')
+
+    Recorre la pila saltando la infraestructura (este módulo, config, unidad de
+    trabajo) y el código que no pertenece al proyecto.
+    """
+    frame = sys._getframe(skip)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(_PROJECT_ROOT)
+                and os.path.basename(filename) not in _INFRASTRUCTURE_FILES):
+            module = frame.f_globals.get('__name__', '?')
+            name = getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+            return f"{module}.{name}"
+        frame = frame.f_back
+    return 'desconocido'
+
+
+# =====================================================
+# REGISTRO DE MÉTRICAS
+# =====================================================
+
+class _Aggregate:
+    """Contadores de un grupo de sentencias (una operación o una huella)"""
+
+    __slots__ = ('calls', 'errors', 'total_ms', 'max_ms', 'rows', 'params', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.params = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, params_count: int, failed: bool):
+        self.calls += 1
+        self.errors += 1 if failed else 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.params += params_count
+        index = len(LATENCY_BUCKETS_MS)
+        for i, limit in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= limit:
+                index = i
+                break
+        self.buckets[index] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Percentil aproximado: límite superior de la barra que lo contiene"""
+        if not self.calls:
+            return 0.0
+        target = fraction * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'rows': self.rows,
+            'params': self.params,
+            'histogram': {label: count for label, count in zip(histogram_labels(), self.buckets)}
+        }
+
+
+def histogram_labels() -> List[str]:
+    """Etiquetas de las barras del histograma ('<=1ms', ..., '>5000ms')"""
+    labels = [f"<={limit:g}ms" for limit in LATENCY_BUCKETS_MS]
+    labels.append(f">{LATENCY_BUCKETS_MS[-1]:g}ms")
+    return labels
+
+
+class QueryMetrics:
+    """Registro de métricas de consultas, seguro para hilos"""
+
+    MAX_SLOW_QUERIES = 50
+
+    def __init__(self, slow_query_ms: float = 500):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._by_operation: Dict[str, _Aggregate] = {}
+        self._by_fingerprint: Dict[str, _Aggregate] = {}
+        self._fingerprint_ops: Dict[str, str] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=self.MAX_SLOW_QUERIES)
+        self.started_at = datetime.now()
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def record(self, operation: str, sql_fingerprint: str, params_count: int,
+               elapsed_ms: float, failed: bool = False):
+        """Registra una sentencia ejecutada"""
+        with self._lock:
+            self._aggregate(self._by_operation, operation).add(elapsed_ms, params_count, failed)
+            self._aggregate(self._by_fingerprint, sql_fingerprint).add(elapsed_ms, params_count, failed)
+            self._fingerprint_ops.setdefault(sql_fingerprint, operation)
+            slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+            if slow:
+                self._slow.append({
+                    'at': datetime.now().isoformat(timespec='seconds'),
+                    'operation': operation,
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'params': params_count,
+                    'sql': sql_fingerprint
+                })
+        if slow:
+            logger.warning("Consulta lenta (%.0f ms) en %s: %s", elapsed_ms, operation, sql_fingerprint[:300])
+
+    def add_rows(self, operation: str, sql_fingerprint: str, rows: int):
+        """Suma filas leídas (fetch*) a la sentencia ya registrada"""
+        if rows <= 0:
+            return
+        with self._lock:
+            self._aggregate(self._by_operation, operation).rows += rows
+            self._aggregate(self._by_fingerprint, sql_fingerprint).rows += rows
+
+    def reset(self):
+        """Descarta todas las métricas acumuladas"""
+        with self._lock:
+            self._by_operation.clear()
+            self._by_fingerprint.clear()
+            self._fingerprint_ops.clear()
+            self._slow.clear()
+            self.started_at = datetime.now()
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copia de las métricas (operaciones ordenadas por tiempo total)"""
+        with self._lock:
+            operations = {name: agg.to_dict() for name, agg in self._by_operation.items()}
+            statements = []
+            for sql, agg in self._by_fingerprint.items():
+                item = agg.to_dict()
+                item['sql'] = sql
+                item['operation'] = self._fingerprint_ops.get(sql, '')
+                statements.append(item)
+            slow = list(self._slow)
+            started_at = self.started_at
+        return {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'slow_query_ms': self.slow_query_ms,
+            'histogram_buckets': histogram_labels(),
+            'operations': dict(sorted(operations.items(), key=lambda item: -item[1]['total_ms'])),
+            'statements': sorted(statements, key=lambda item: -item['total_ms']),
+            'slow_queries': slow
+        }
+
+    def dump_json(self, path: str) -> str:
+        """Guarda snapshot() en un archivo JSON y retorna la ruta"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.snapshot(), handle, ensure_ascii=False, indent=2)
+        return path
+
+    @staticmethod
+    def _aggregate(table: Dict[str, _Aggregate], key: str) -> _Aggregate:
+        aggregate = table.get(key)
+        if aggregate is None:
+            aggregate = table[key] = _Aggregate()
+        return aggregate
+
+
+# Registro global del proceso (lo usan todas las conexiones instrumentadas)
+query_metrics = QueryMetrics()
+
+
+# =====================================================
+# ENVOLTORIOS DE CONEXIÓN Y CURSOR
+# =====================================================
+
+class InstrumentedCursor:
+    """Cursor que mide execute/executemany y cuenta las filas leídas"""
+
+    def __init__(self, raw_cursor, metrics: QueryMetrics):
+        self._raw = raw_cursor
+        self._metrics = metrics
+        self._operation = None
+        self._fingerprint = None
+
+    def execute(self, sql, *params):
+        return self._timed(lambda: self._raw.execute(sql, *params), sql, _count_params(params))
+
+    def executemany(self, sql, seq_of_params):
+        if not isinstance(seq_of_params, (list, tuple)):
+            seq_of_params = list(seq_of_params)
+        count = sum(len(row) for row in seq_of_params if isinstance(row, (list, tuple)))
+        return self._timed(lambda: self._raw.executemany(sql, seq_of_params), sql, count)
+
+    def fetchone(self):
+        row = self._raw.fetchone()
+        self._add_rows(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._raw.fetchmany(*args)
+        self._add_rows(len(rows) if rows else 0)
+        return rows
+
+    def fetchall(self):
+        rows = self._raw.fetchall()
+        self._add_rows(len(rows) if rows else 0)
+        return rows
+
+    def __iter__(self):
+        for row in self._raw:
+            self._add_rows(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        # Atributos propios en el envoltorio; el resto (fast_executemany...) en el cursor
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._raw, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._raw.close()
+        return False
+
+    # ------------------------------------------------------------------
+
+    def _timed(self, run: Callable[[], Any], sql: str, params_count: int):
+        self._operation = call_site()
+        self._fingerprint = fingerprint(sql)
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = run()
+            failed = False
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._metrics.record(self._operation, self._fingerprint, params_count, elapsed_ms, failed)
+        # pyodbc retorna el mismo cursor para encadenar (cursor.execute(...).fetchone())
+        return self if result is self._raw else result
+
+    def _add_rows(self, rows: int):
+        if self._fingerprint is not None:
+            self._metrics.add_rows(self._operation, self._fingerprint, rows)
+
+
+class InstrumentedConnection:
+    """Conexión cuyos cursores se miden; el resto se delega a la conexión original"""
+
+    def __init__(self, raw_connection, metrics: QueryMetrics):
+        self._raw = raw_connection
+        self._metrics = metrics
+
+    def cursor(self):
+        return InstrumentedCursor(self._raw.cursor(), self._metrics)
+
+    def execute(self, sql, *params):
+        # pyodbc permite conn.execute(...) como atajo de cursor().execute(...)
+        return self.cursor().execute(sql, *params)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._raw, name, value)
+
+    def __enter__(self):
+        self._raw.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._raw.__exit__(exc_type, exc_value, traceback)
+
+
+def instrument(connection, metrics: Optional[QueryMetrics] = None) -> InstrumentedConnection:
+    """Envuelve una conexión (pyodbc o del pool) para registrar sus consultas"""
+    return InstrumentedConnection(connection, metrics or query_metrics)
+
+
+def format_report(snapshot: Dict[str, Any], limit: int = 15) -> str:
+    """Resumen en texto de un snapshot (operaciones más costosas y consultas lentas)"""
+    lines = [f"Métricas desde {snapshot['started_at']} (lenta >= {snapshot['slow_query_ms']} ms)"]
+    lines.append(f"{'Operación':<60} {'Llamadas':>8} {'Total ms':>10} {'p95 ms':>8} {'Máx ms':>8} {'Filas':>8}")
+    for name, data in list(snapshot['operations'].items())[:limit]:
+        lines.append(f"{name[:60]:<60} {data['calls']:>8} {data['total_ms']:>10.1f} "
+                     f"{data['p95_ms']:>8.0f} {data['max_ms']:>8.1f} {data['rows']:>8}")
+    if snapshot['slow_queries']:
+        lines.append("")
+        lines.append("Consultas lentas recientes:")
+        for item in snapshot['slow_queries'][-limit:]:
+            lines.append(f"  {item['at']} {item['elapsed_ms']:.0f} ms {item['operation']}: {item['sql'][:200]}")
+    return "\n".join(lines)
@@ -7,14 +7,27 @@ Servicio para gestionar la lógica de negocio entre las tablas:
 Sistema optimizado para SQL Server únicamente.
 """
 import pyodbc
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 from datetime import datetime, timedelta
 import sys
 import os
+import copy
+import time
+from contextlib import contextmanager
 
 # Importar configuración
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config import get_database_connection
+from services.application_cache import ApplicationMatrixCache
+from services.headcount_snapshot import HeadcountSnapshot
+from services.population_reconciliation import PopulationReconciler
+from services.current_access_state import CurrentAccessState
+from services.search_index import ProcessSearchIndex
+from services.result_cache import SidResultCache
+from services.unit_of_work import UnitOfWorkManager, transactional
+from logging_config import get_logger, debug_enabled
+
+logger = get_logger(__name__)
 
 
 class AccessManagementService:
@@ -24,6 +37,32 @@ class AccessManagementService:
     APPLICATIONS_TABLE = "[dbo].[applications_dr]"
     HISTORICO_TABLE = "[dbo].[historico_dr]"
     PROCESOS_TABLE = "[dbo].[procesos_dr]"
+    CURRENT_ACCESS_TABLE = "[dbo].[current_access_dr]"
+
+    # Columnas que se insertan en historico (mismo orden que _historical_insert_params)
+    HISTORICO_INSERT_COLUMNS = (
+        'scotia_id', 'employee_email', 'case_id', 'responsible', 'record_date', 'request_date',
+        'process_access', 'subunit', 'event_description', 'ticket_email', 'app_access_name',
+        'computer_system_type', 'status', 'closing_date_app', 'closing_date_ticket', 'app_quality',
+        'confirmation_by_user', 'comment', 'ticket_quality', 'general_status_ticket',
+        'average_time_open_ticket'
+    )
+    # Máximo de parámetros por lista IN (SQL Server admite 2100 por sentencia)
+    MAX_IN_PARAMS = 1000
+
+    # Columnas calculadas persistidas UPPER(LTRIM(RTRIM(...))) de applications_dr
+    # (ver sql_applications_normalized_columns.sql), su largo VARCHAR y la expresión
+    # equivalente sin migrar
+    NORMALIZED_APPLICATION_COLUMNS = {
+        'unit': ('unit_norm', 150, "a.unit"),
+        'service': ('service_norm', 150, "a.service"),
+        'role': ('role_norm', 150, "a.role"),
+        'name_element': ('name_element_norm', 200, "a.name_element"),
+        'unidad_subunidad': (
+            'unidad_subunidad_norm', 303,
+            "ISNULL(a.unit, '') + CASE WHEN a.unit IS NOT NULL AND a.service IS NOT NULL THEN ' / ' ELSE '' END + ISNULL(a.service, '')"
+        ),
+    }
 
     # ==============================
     # UTILIDADES INTERNAS
@@ -204,6 +243,66 @@ class AccessManagementService:
         """Retorna una subconsulta reutilizable con los alias legacy de applications."""
         return f"SELECT * FROM ({self._get_applications_select()}) apps"
 
+    def _has_normalized_application_columns(self) -> bool:
+        """Indica si applications_dr ya tiene las columnas normalizadas persistidas (se consulta una vez)"""
+        available = getattr(self, '_normalized_columns_available', None)
+        if available is None:
+            try:
+                conn = self.get_connection()
+                cursor = conn.cursor()
+                cursor.execute("SELECT COL_LENGTH(?, 'unidad_subunidad_norm')", (self.applications_table,))
+                row = cursor.fetchone()
+                conn.close()
+                available = bool(row and row[0])
+            except Exception as e:
+                print(f"Error verificando columnas normalizadas de applications: {e}")
+                available = False
+            self._normalized_columns_available = available
+        return available
+
+    def _application_match(self, column: str, values: List[Any]) -> Tuple[str, List[str]]:
+        """Predicado sobre applications (alias a) que compara valores normalizados.
+        
+        Con la migración aplicada compara contra la columna persistida e indexada
+        (sargable); si no, aplica UPPER(LTRIM(RTRIM(...))) sobre la columna.
+        Los parámetros se normalizan en Python. pyodbc los envía como NVARCHAR, así
+        que contra la columna VARCHAR se castean: sin eso SQL Server convierte la
+        columna (CONVERT_IMPLICIT) y recorre el índice completo.
+        """
+        norm_column, length, expression = self.NORMALIZED_APPLICATION_COLUMNS[column]
+        if self._has_normalized_application_columns():
+            target = f"a.{norm_column}"
+            placeholder = f"CAST(? AS VARCHAR({length}))"
+        else:
+            target = f"UPPER(LTRIM(RTRIM({expression})))"
+            placeholder = "?"
+        params = [self._safe_strip(value).upper() for value in values]
+        if len(params) == 1:
+            return f"{target} = {placeholder}", params
+        return f"{target} IN ({','.join([placeholder] * len(params))})", params
+
+    def _query_applications(self, unidad_subunidad: Optional[str] = None, position: Optional[str] = None,
+                            subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Busca en la matriz de aplicaciones directamente en SQL Server con predicados sargables.
+        Se usa cuando la caché de la matriz está deshabilitada (APPLICATION_CACHE_TTL=0).
+        """
+        where_parts = []
+        params = []
+        for column, value in (('unidad_subunidad', unidad_subunidad), ('role', position),
+                              ('service', subunit), ('role', title)):
+            if value:
+                clause, clause_params = self._application_match(column, [value])
+                where_parts.append(clause)
+                params.extend(clause_params)
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(self._get_applications_select(" AND ".join(where_parts), "ORDER BY a.name_element"), params)
+        columns = [description[0] for description in cursor.description]
+        applications = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.close()
+        return applications
+
     def _prepare_application_db_data(self, app_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Normaliza los datos recibidos desde la UI para que coincidan con los nombres
@@ -276,11 +375,73 @@ class AccessManagementService:
         self.applications_table = os.getenv('APPLICATIONS_TABLE', self.APPLICATIONS_TABLE)
         self.historico_table = os.getenv('HISTORICO_TABLE', self.HISTORICO_TABLE)
         self.procesos_table = os.getenv('PROCESOS_TABLE', self.PROCESOS_TABLE)
+        self.current_access_table = os.getenv('CURRENT_ACCESS_TABLE', self.CURRENT_ACCESS_TABLE)
+        # Foto compartida de la matriz de aplicaciones (ver services/application_cache.py)
+        self.application_cache = ApplicationMatrixCache(
+            self.get_connection,
+            self._applications_view(),
+            self.applications_table,
+            ttl=float(os.getenv('APPLICATION_CACHE_TTL', ApplicationMatrixCache.DEFAULT_TTL)),
+            probe_interval=float(os.getenv('APPLICATION_CACHE_PROBE_INTERVAL', ApplicationMatrixCache.DEFAULT_PROBE_INTERVAL))
+        )
+        # Foto indexada del headcount para el filtro de personas (ver services/headcount_snapshot.py)
+        self.headcount_snapshot = HeadcountSnapshot(
+            self.get_connection,
+            self.headcount_table,
+            ttl=float(os.getenv('HEADCOUNT_SNAPSHOT_TTL', HeadcountSnapshot.DEFAULT_TTL)),
+            probe_interval=float(os.getenv('HEADCOUNT_SNAPSHOT_PROBE_INTERVAL', HeadcountSnapshot.DEFAULT_PROBE_INTERVAL))
+        )
+        # Resultados por SID (conciliación, accesos actuales), ver services/result_cache.py
+        self.result_cache = SidResultCache(
+            max_entries=int(os.getenv('RESULT_CACHE_SIZE', SidResultCache.DEFAULT_MAX_ENTRIES)),
+            ttl=float(os.getenv('RESULT_CACHE_TTL', SidResultCache.DEFAULT_TTL))
+        )
 
     def get_connection(self) -> pyodbc.Connection:
-        """Obtiene una conexión a la base de datos"""
+        """Obtiene una conexión a la base de datos (la de la unidad de trabajo activa, si hay una)"""
+        unit = self._units().current
+        if unit is not None:
+            return unit.connection()
         return self.db_manager.get_connection()
 
+    # ==============================
+    # UNIDAD DE TRABAJO
+    # ==============================
+
+    def _units(self) -> UnitOfWorkManager:
+        """Unidades de trabajo por hilo de este servicio (se crea una vez)"""
+        manager = getattr(self, '_unit_of_work_manager', None)
+        if manager is None:
+            manager = self._unit_of_work_manager = UnitOfWorkManager(lambda: self.db_manager.get_connection())
+        return manager
+
+    @contextmanager
+    def unit_of_work(self):
+        """Agrupa varias llamadas del servicio en una conexión y una transacción.
+        
+        Uso:
+            with access_service.unit_of_work():
+                access_service.update_employee_position(...)
+                access_service.create_historical_records(...)
+        
+        Si ya hay una unidad activa en el hilo, se une a ella.
+        """
+        manager = self._units()
+        unit = manager.begin()
+        try:
+            yield unit
+        except Exception:
+            manager.end(unit, error=True)
+            raise
+        manager.end(unit)
+
+    def _memoized(self, key: Tuple[Any, ...], loader):
+        """Búsqueda recordada durante la unidad de trabajo activa (sin unidad, consulta siempre)"""
+        unit = self._units().current
+        if unit is None:
+            return loader()
+        return unit.memo(key, loader)
+
 
     # ==============================
     # MÉTODOS PARA HEADCOUNT
@@ -380,6 +541,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(employee_data.get('scotia_id'))
+            self.invalidate_headcount_snapshot()
 
             return True, f"Empleado {employee_data.get('scotia_id')} creado exitosamente"
 
@@ -389,6 +552,10 @@ class AccessManagementService:
             return False, f"Error creando empleado: {str(e)}"
 
     def get_employee_by_id(self, scotia_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un empleado por su scotia_id (una sola consulta por unidad de trabajo)"""
+        return self._memoized(('employee', self._safe_strip(scotia_id)), lambda: self._fetch_employee_by_id(scotia_id))
+
+    def _fetch_employee_by_id(self, scotia_id: str) -> Optional[Dict[str, Any]]:
         """Obtiene un empleado por su scotia_id usando consulta directa"""
         try:
             conn = self.get_connection()
@@ -455,6 +622,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
+            self.invalidate_headcount_snapshot()
 
             return True, f"Posición y unidad actualizadas para {scotia_id}"
 
@@ -597,6 +766,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
+            self.invalidate_headcount_snapshot()
 
             return True, f"Empleado {scotia_id} actualizado exitosamente"
 
@@ -631,6 +802,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
+            self.invalidate_headcount_snapshot()
 
             return True, f"Empleado {scotia_id} eliminado exitosamente"
 
@@ -644,94 +817,33 @@ class AccessManagementService:
     def get_applications_by_position(self, position: str, unidad_subunidad: str, subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
         """Obtiene las aplicaciones que debe tener un empleado según posición/unidad_subunidad/subunidad/título.
         **Sin duplicados**: devuelve una fila por tripleta (unidad_subunidad, position_role, logical_access_name).
+        Se resuelve contra la caché de la matriz de aplicaciones (comparación normalizada).
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            where_parts = []
-            params = []
-            
-            if unidad_subunidad:
-                where_parts.append('UPPER(LTRIM(RTRIM(apps.unidad_subunidad))) = UPPER(LTRIM(RTRIM(?)))')
-                params.append(unidad_subunidad)
-            
-            if subunit:
-                where_parts.append('UPPER(LTRIM(RTRIM(apps.subunit))) = UPPER(LTRIM(RTRIM(?)))')
-                params.append(subunit)
-            
-            if position:
-                where_parts.append('UPPER(LTRIM(RTRIM(apps.position_role))) = UPPER(LTRIM(RTRIM(?)))')
-                params.append(position)
-            
-            if title:
-                where_parts.append('UPPER(LTRIM(RTRIM(apps.role_name))) = UPPER(LTRIM(RTRIM(?)))')
-                params.append(title)
-            
-            query = self._applications_view()
-            if where_parts:
-                query += " WHERE " + " AND ".join(where_parts)
-            query += ' ORDER BY apps.logical_access_name'
-            
-            # Debug: imprimir la consulta y parámetros
-            print(f"DEBUG get_applications_by_position:")
-            print(f"  - Posición: '{position}'")
-            print(f"  - Unidad/Subunidad: '{unidad_subunidad}'")
-            print(f"  - Subunidad: '{subunit}'")
-            print(f"  - Título: '{title}'")
-            print(f"  - Consulta: {query}")
-            print(f"  - Parámetros: {params}")
-            
-            cursor.execute(query, params)
+            logger.debug("get_applications_by_position: posición=%r, unidad_subunidad=%r, subunidad=%r, título=%r",
+                         position, unidad_subunidad, subunit, title)
+
+            if self.application_cache.enabled:
+                applications = self.application_cache.find(
+                    unidad_subunidad=unidad_subunidad,
+                    position_role=position,
+                    subunit=subunit,
+                    role_name=title
+                )
+            else:
+                applications = self._memoized(
+                    ('applications', unidad_subunidad, position, subunit, title),
+                    lambda: self._query_applications(unidad_subunidad, position, subunit, title)
+                )
 
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
-            
-            # Debug: mostrar resultados
-            print(f"  - Resultados encontrados: {len(applications)}")
-            
-            # Si no hay resultados, hacer debug para ver qué datos existen
-            if len(applications) == 0:
-                print("DEBUG: No se encontraron aplicaciones. Verificando qué datos existen...")
-                
-                # Verificar posiciones disponibles
-                cursor.execute(f"SELECT DISTINCT role FROM {self.applications_table} WHERE status = 'Active'")
-                positions = cursor.fetchall()
-                print(f"DEBUG: Posiciones disponibles: {positions}")
-                
-                # Verificar unidades/subunidades disponibles
-                cursor.execute(f"SELECT DISTINCT unit FROM {self.applications_table} WHERE status = 'Active'")
-                unidades = cursor.fetchall()
-                print(f"DEBUG: Unidades/Subunidades disponibles: {unidades}")
-                
-                # Verificar subunidades disponibles
-                cursor.execute(f"SELECT DISTINCT service FROM {self.applications_table} WHERE status = 'Active'")
-                subunidades = cursor.fetchall()
-                print(f"DEBUG: Subunidades disponibles: {subunidades}")
-                
-                # Buscar aplicaciones que contengan "Summer" en cualquier campo
-                cursor.execute(f"""
-                    SELECT name_element, unit, service, role 
-                    FROM {self.applications_table} 
-                    WHERE status = 'Active' AND (role LIKE '%Summer%' OR service LIKE '%Summer%')
-                """)
-                summer_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones que contienen 'Summer': {summer_apps}")
-                
-                # Buscar aplicaciones que contengan "Business Intelligence" o "Analytics"
-                cursor.execute(f"""
-                    SELECT name_element, unit, service, role 
-                    FROM {self.applications_table} 
-                    WHERE status = 'Active' AND (unit LIKE '%Business Intelligence%' OR unit LIKE '%Analytics%' OR service LIKE '%Analytics%')
-                """)
-                bi_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones relacionadas con Business Intelligence/Analytics: {bi_apps}")
-            
-            for app in applications:
-                print(f"    * {app.get('logical_access_name', '')} | {app.get('unidad_subunidad', '')} | {app.get('position_role', '')}")
+            if debug_enabled(logger):
+                logger.debug("Resultados encontrados: %s", len(applications))
+                if len(applications) == 0:
+                    self._log_application_matrix_summary()
+                for app in applications:
+                    logger.debug("* %s | %s | %s", app.get('logical_access_name', ''),
+                                 app.get('unidad_subunidad', ''), app.get('position_role', ''))
 
-            conn.close()
             return applications
 
         except Exception as e:
@@ -740,143 +852,65 @@ class AccessManagementService:
 
     def get_applications_by_position_flexible(self, position: str, unit: str, subunit: Optional[str] = None, title: Optional[str] = None) -> List[Dict[str, Any]]:
         """Obtiene las aplicaciones usando la misma lógica flexible que se usa para accesos normales.
-        Esta función es más permisiva y encuentra aplicaciones incluso si las unidades/subunidades no coinciden exactamente.
+        Filtra por posición y coincidencia exacta (normalizada) de unidad_subunidad; subunidad y
+        título son opcionales. Así "eddu" no encuentra "eddu/qa".
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            query = f"{self._applications_view()} WHERE 1=1"
-            params = []
-            
-            # Filtrar por posición (obligatorio)
-            if position:
-                query += ' AND UPPER(LTRIM(RTRIM(position_role))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(position)
-            
-            # Filtrar por unidad_subunidad (obligatorio) - buscar solo coincidencia exacta
-            # Esto evita encontrar "eddu/qa" cuando se busca "eddu" (solo encuentra "eddu" exacto)
-            if unit:
-                # Normalizar el valor de búsqueda para comparación exacta
-                unit_normalized = unit.strip().upper()
-                # Buscar solo coincidencia exacta de unidad_subunidad
-                query += ' AND UPPER(LTRIM(RTRIM(unidad_subunidad))) = ?'
-                params.append(unit_normalized)
-            
-            # Subunidad es opcional - no filtrar si no se proporciona
-            if subunit:
-                query += ' AND UPPER(LTRIM(RTRIM(subunit))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(subunit)
-            
-            # Título es opcional
-            if title:
-                query += ' AND UPPER(LTRIM(RTRIM(role_name))) = UPPER(LTRIM(RTRIM(?)))'
-                params.append(title)
-            
-            query += ' ORDER BY logical_access_name'
-            
-            # Debug: imprimir la consulta y parámetros
-            print(f"DEBUG get_applications_by_position_flexible:")
-            print(f"  - Posición: '{position}'")
-            print(f"  - Unidad: '{unit}'")
-            print(f"  - Subunidad: '{subunit}' (opcional)")
-            print(f"  - Título: '{title}' (opcional)")
-            print(f"  - Consulta: {query}")
-            print(f"  - Parámetros: {params}")
-            
-            cursor.execute(query, params)
+            logger.debug("get_applications_by_position_flexible: posición=%r, unidad=%r, subunidad=%r (opcional), título=%r (opcional)",
+                         position, unit, subunit, title)
+
+            if self.application_cache.enabled:
+                applications = self.application_cache.find(
+                    unidad_subunidad=unit,
+                    position_role=position,
+                    subunit=subunit,
+                    role_name=title
+                )
+            else:
+                applications = self._memoized(
+                    ('applications', unit, position, subunit, title),
+                    lambda: self._query_applications(unit, position, subunit, title)
+                )
 
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
-            
-            # Debug: mostrar resultados
-            print(f"  - Resultados encontrados: {len(applications)}")
-            
-            # Si no hay resultados, hacer debug para ver qué datos existen
-            if len(applications) == 0:
-                print("DEBUG: No se encontraron aplicaciones para flex staff. Verificando qué datos existen...")
-                
-                # Verificar posiciones disponibles
-                cursor.execute(f"SELECT DISTINCT role FROM {self.applications_table} WHERE status = 'Active'")
-                positions = cursor.fetchall()
-                print(f"DEBUG: Posiciones disponibles: {positions}")
-                
-                # Verificar unidades disponibles
-                cursor.execute(f"SELECT DISTINCT unit FROM {self.applications_table} WHERE status = 'Active'")
-                units = cursor.fetchall()
-                print(f"DEBUG: Unidades disponibles: {units}")
-                
-                # Buscar aplicaciones que contengan "Analista"
-                cursor.execute(f"""
-                    SELECT name_element, unit, service, role 
-                    FROM {self.applications_table} 
-                    WHERE status = 'Active' AND (role LIKE '%Analista%' OR service LIKE '%Analista%')
-                """)
-                analista_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones que contienen 'Analista': {analista_apps}")
-                
-                # Buscar aplicaciones que contengan "Recursos Humanos"
-                cursor.execute(f"""
-                    SELECT name_element, unit, service, role 
-                    FROM {self.applications_table} 
-                    WHERE status = 'Active' AND (unit LIKE '%Recursos Humanos%' OR service LIKE '%Recursos Humanos%')
-                """)
-                rh_apps = cursor.fetchall()
-                print(f"DEBUG: Aplicaciones relacionadas con Recursos Humanos: {rh_apps}")
-            
-            for app in applications:
-                print(f"    * {app.get('logical_access_name', '')} | {app.get('unit', '')} | {app.get('subunit', '')} | {app.get('position_role', '')}")
+            if debug_enabled(logger):
+                logger.debug("Resultados encontrados: %s", len(applications))
+                if len(applications) == 0:
+                    self._log_application_matrix_summary()
+                for app in applications:
+                    logger.debug("* %s | %s | %s | %s", app.get('logical_access_name', ''), app.get('unit', ''),
+                                 app.get('subunit', ''), app.get('position_role', ''))
 
-            conn.close()
             return applications
 
         except Exception as e:
             print(f"Error obteniendo aplicaciones por posición flexible: {e}")
             return []
 
+    def _log_application_matrix_summary(self):
+        """Registra (DEBUG) qué posiciones y unidades existen en la matriz cuando una búsqueda no encuentra nada"""
+        if not self.application_cache.enabled or not debug_enabled(logger):
+            return
+        active = [app for app in self.application_cache.get_all() if self._safe_strip(app.get('access_status')).lower() in ('active', 'activo')]
+        logger.debug("No se encontraron aplicaciones. Verificando qué datos existen...")
+        logger.debug("Posiciones disponibles: %s", sorted({app.get('position_role') for app in active if app.get('position_role')}))
+        logger.debug("Unidades/Subunidades disponibles: %s", sorted({app.get('unidad_subunidad') for app in active if app.get('unidad_subunidad')}))
+
     def get_all_applications(self) -> List[Dict[str, Any]]:
-        """Obtiene todas las aplicaciones"""
+        """Obtiene todas las aplicaciones (desde la caché de la matriz)"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            query = f"{self._applications_view()} ORDER BY apps.logical_access_name"
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-            columns = [description[0] for description in cursor.description]
-            applications = [dict(zip(columns, row)) for row in rows]
-
-            conn.close()
-            return applications
+            return self.application_cache.get_all()
 
         except Exception as e:
             print(f"Error obteniendo aplicaciones: {e}")
             return []
 
     def _get_application_by_name(self, logical_access_name: str) -> Optional[Dict[str, Any]]:
-        """Obtiene una aplicación por su logical_access_name"""
+        """Obtiene una aplicación por su logical_access_name (desde la caché de la matriz)"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            query = f"""
-                SELECT TOP 1 *
-                FROM ({self._get_applications_select()}) apps
-                WHERE apps.logical_access_name = ?
-            """
-            cursor.execute(query, (logical_access_name,))
-
-            row = cursor.fetchone()
-            if row:
-                columns = [description[0] for description in cursor.description]
-                app = dict(zip(columns, row))
-                conn.close()
-                return app
-
-            conn.close()
-            return None
+            return self._memoized(
+                ('application', self._safe_strip(logical_access_name).upper()),
+                lambda: self.application_cache.get_by_name(logical_access_name)
+            )
 
         except Exception as e:
             print(f"Error obteniendo aplicación por nombre: {e}")
@@ -918,6 +952,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.application_cache.invalidate()
+            self._invalidate_application_results([db_app.get('role')], [db_app.get('name_element')])
 
             return True, f"Aplicación {app_data.get('logical_access_name')} creada exitosamente con ID {app_id}"
 
@@ -932,9 +968,9 @@ class AccessManagementService:
             conn = self.get_connection()
             cursor = conn.cursor()
 
-            cursor.execute(f'SELECT COUNT(*) FROM {self.applications_table} WHERE id = ?', (app_id,))
+            cursor.execute(f'SELECT role, name_element FROM {self.applications_table} WHERE id = ?', (app_id,))
             result = cursor.fetchone()
-            if not result or result[0] == 0:
+            if not result:
                 return False, f"Aplicación con ID {app_id} no encontrada"
 
             db_app = self._prepare_application_db_data(app_data)
@@ -956,6 +992,11 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.application_cache.invalidate()
+            # Posición y nombre anteriores y nuevos
+            self._invalidate_application_results(
+                [result[0], db_app.get('role')], [result[1], db_app.get('name_element')]
+            )
 
             return True, f"Aplicación {app_id} actualizada exitosamente"
 
@@ -968,7 +1009,7 @@ class AccessManagementService:
             conn = self.get_connection()
             cursor = conn.cursor()
 
-            cursor.execute(f'SELECT name_element FROM {self.applications_table} WHERE id = ?', (app_id,))
+            cursor.execute(f'SELECT name_element, role FROM {self.applications_table} WHERE id = ?', (app_id,))
             result = cursor.fetchone()
             if not result:
                 return False, f"Aplicación con ID {app_id} no encontrada"
@@ -985,6 +1026,8 @@ class AccessManagementService:
 
             conn.commit()
             conn.close()
+            self.application_cache.invalidate()
+            self._invalidate_application_results([result[1]], [app_name])
 
             return True, f"Aplicación {app_name} eliminada exitosamente"
 
@@ -1017,13 +1060,15 @@ class AccessManagementService:
             app_info = None
             if position:
                 try:
+                    name_clause, name_params = self._application_match('name_element', [app_name])
+                    role_clause, role_params = self._application_match('role', [position])
                     conn = self.get_connection()
                     cursor = conn.cursor()
                     cursor.execute(f'''
-                        SELECT TOP 1 unit, service, role, system_description
-                        FROM {self.applications_table} 
-                        WHERE name_element = ? AND role = ?
-                    ''', (app_name, position))
+                        SELECT TOP 1 a.unit, a.service, a.role, a.system_description
+                        FROM {self.applications_table} a
+                        WHERE {name_clause} AND {role_clause}
+                    ''', name_params + role_params)
                     
                     app_row = cursor.fetchone()
                     if app_row:
@@ -1076,8 +1121,8 @@ class AccessManagementService:
     def create_historical_record(self, record_data: Dict[str, Any]) -> Tuple[bool, str]:
         """Crea un registro en el historial con verificación anti-duplicados"""
         try:
-            print(f"DEBUG: Iniciando creación de registro histórico")
-            print(f"DEBUG: Datos recibidos: {record_data}")
+            logger.debug("Iniciando creación de registro histórico")
+            logger.debug("Datos recibidos: %s", record_data)
             
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -1085,7 +1130,7 @@ class AccessManagementService:
             required_fields = ['scotia_id', 'process_access']
             for field in required_fields:
                 if not record_data.get(field):
-                    print(f"DEBUG: Error - Campo requerido faltante: {field}")
+                    logger.debug("Error - Campo requerido faltante: %s", field)
                     return False, f"Campo requerido faltante: {field}"
 
             # Verificación anti-duplicados: evita más de un "Pendiente" por la misma app/empleado
@@ -1107,58 +1152,335 @@ class AccessManagementService:
             # Obtener el email del empleado si no se proporciona
             employee_email = record_data.get('employee_email')
             if not employee_email:
-                print(f"DEBUG: Obteniendo email del empleado {record_data.get('scotia_id')}")
+                logger.debug("Obteniendo email del empleado %s", record_data.get('scotia_id'))
                 employee = self.get_employee_by_id(record_data.get('scotia_id'))
                 employee_email = employee.get('email') if employee else None
-                print(f"DEBUG: Email obtenido: {employee_email}")
+                logger.debug("Email obtenido: %s", employee_email)
 
-            print(f"DEBUG: Preparando inserción con email: {employee_email}")
+            logger.debug("Preparando inserción con email: %s", employee_email)
             
             # Preparar parámetros para debug
-            params = (
-                record_data.get('scotia_id'),
-                employee_email,
-                record_data.get('case_id'),
-                record_data.get('responsible'),
-                record_data.get('record_date', datetime.now().isoformat()),
-                record_data.get('request_date'),
-                record_data.get('process_access'),
-                record_data.get('subunit'),
-                record_data.get('event_description'),
-                record_data.get('ticket_email'),
-                record_data.get('app_access_name'),
-                record_data.get('computer_system_type'),
-                record_data.get('status', 'Pendiente'),
-                record_data.get('closing_date_app'),
-                record_data.get('closing_date_ticket'),
-                record_data.get('app_quality'),
-                record_data.get('confirmation_by_user'),
-                record_data.get('comment'),
-                record_data.get('ticket_quality'),
-                record_data.get('general_status_ticket'),
-                record_data.get('average_time_open_ticket')
-            )
+            params = self._historical_insert_params(record_data, employee_email)
             
-            print(f"DEBUG: Parámetros para inserción: {params}")
+            logger.debug("Parámetros para inserción: %s", params)
             
-            cursor.execute(f'''
-                INSERT INTO {self.historico_table} 
-                (scotia_id, employee_email, case_id, responsible, record_date, request_date, process_access, subunit, 
-                 event_description, ticket_email, app_access_name, computer_system_type, status, 
-                 closing_date_app, closing_date_ticket, app_quality, confirmation_by_user, comment, 
-                 ticket_quality, general_status_ticket, average_time_open_ticket)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', params)
+            cursor.execute(self._historical_insert_query(), params)
+            if self._is_completed_status(record_data.get('status', 'Pendiente')):
+                self.refresh_current_access(cursor, [record_data['scotia_id']])
 
             conn.commit()
-            print(f"DEBUG: Registro insertado exitosamente en la base de datos")
+            logger.debug("Registro insertado exitosamente en la base de datos")
             conn.close()
+            self.invalidate_employee_cache(record_data['scotia_id'])
 
             return True, "Registro histórico creado exitosamente"
 
         except Exception as e:
             return False, f"Error creando registro histórico: {str(e)}"
 
+    def _historical_insert_query(self) -> str:
+        """INSERT parametrizado de historico con las columnas de HISTORICO_INSERT_COLUMNS"""
+        columns = ', '.join(self.HISTORICO_INSERT_COLUMNS)
+        placeholders = ', '.join(['?'] * len(self.HISTORICO_INSERT_COLUMNS))
+        return f"INSERT INTO {self.historico_table} ({columns}) VALUES ({placeholders})"
+
+    @staticmethod
+    def _historical_insert_params(record_data: Dict[str, Any], employee_email: Optional[str],
+                                  default_record_date: Optional[str] = None) -> Tuple[Any, ...]:
+        """Parámetros del INSERT de historico para un registro"""
+        return (
+            record_data.get('scotia_id'),
+            employee_email,
+            record_data.get('case_id'),
+            record_data.get('responsible'),
+            record_data.get('record_date', default_record_date or datetime.now().isoformat()),
+            record_data.get('request_date'),
+            record_data.get('process_access'),
+            record_data.get('subunit'),
+            record_data.get('event_description'),
+            record_data.get('ticket_email'),
+            record_data.get('app_access_name'),
+            record_data.get('computer_system_type'),
+            record_data.get('status', 'Pendiente'),
+            record_data.get('closing_date_app'),
+            record_data.get('closing_date_ticket'),
+            record_data.get('app_quality'),
+            record_data.get('confirmation_by_user'),
+            record_data.get('comment'),
+            record_data.get('ticket_quality'),
+            record_data.get('general_status_ticket'),
+            record_data.get('average_time_open_ticket')
+        )
+
+    @staticmethod
+    def _pending_key(scotia_id: Any, app_access_name: Optional[str]) -> Tuple[str, str]:
+        """Clave normalizada (scotia_id, app) usada por la verificación anti-duplicados"""
+        return (str(scotia_id or '').strip(), (app_access_name or '').strip().upper())
+
+    def create_historical_records(self, records: List[Dict[str, Any]]) -> Tuple[bool, str, List[Dict[str, Any]]]:
+        """Crea varios registros en el historial en una sola transacción.
+        
+        Aplica las mismas reglas que create_historical_record pero por lotes:
+        - Una sola consulta de registros 'Pendiente' para todos los SID (anti-duplicados,
+          excepto offboarding), incluyendo duplicados dentro del mismo lote.
+        - Una sola consulta de emails de empleados para los registros que no lo traen.
+        - Un único INSERT con fast_executemany y un solo commit.
+        
+        Returns:
+            Tuple[bool, str, List[Dict]]: (éxito, mensaje, registros aceptados). Los registros
+            aceptados incluyen los insertados y los que ya estaban pendientes, igual que
+            create_historical_record cuando retorna éxito.
+        """
+        if not records:
+            return True, "No hay registros históricos para crear", []
+
+        valid_records = []
+        invalid_count = 0
+        for record_data in records:
+            missing = [field for field in ('scotia_id', 'process_access') if not record_data.get(field)]
+            if missing:
+                invalid_count += 1
+                logger.warning("Registro histórico omitido: campo requerido faltante: %s", missing[0])
+                continue
+            valid_records.append(record_data)
+
+        if not valid_records:
+            return False, f"Ningún registro válido ({invalid_count} con campos requeridos faltantes)", []
+
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            scotia_ids = sorted({str(r['scotia_id']).strip() for r in valid_records})
+
+            # 1. Verificación anti-duplicados en una sola consulta por bloque de SID
+            pending_keys = set()
+            if any(r.get('process_access') != 'offboarding' for r in valid_records):
+                for start in range(0, len(scotia_ids), self.MAX_IN_PARAMS):
+                    chunk = scotia_ids[start:start + self.MAX_IN_PARAMS]
+                    placeholders = ','.join(['?'] * len(chunk))
+                    cursor.execute(f'''
+                        SELECT DISTINCT scotia_id, app_access_name
+                        FROM {self.historico_table}
+                        WHERE status = 'Pendiente'
+                          AND scotia_id IN ({placeholders})
+                    ''', tuple(chunk))
+                    pending_keys.update(self._pending_key(row[0], row[1]) for row in cursor.fetchall())
+
+            # 2. Emails de los empleados, una sola vez por SID
+            emails = {}
+            sids_without_email = sorted({str(r['scotia_id']).strip() for r in valid_records if not r.get('employee_email')})
+            for start in range(0, len(sids_without_email), self.MAX_IN_PARAMS):
+                chunk = sids_without_email[start:start + self.MAX_IN_PARAMS]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(
+                    f"SELECT scotia_id, business_email FROM {self.headcount_table} WHERE scotia_id IN ({placeholders})",
+                    tuple(chunk)
+                )
+                for row in cursor.fetchall():
+                    emails[str(row[0]).strip()] = row[1]
+
+            # 3. Armar parámetros descartando duplicados (existentes y dentro del lote)
+            accepted = []
+            params = []
+            duplicate_count = 0
+            record_date = datetime.now().isoformat()
+            for record_data in valid_records:
+                key = self._pending_key(record_data['scotia_id'], record_data.get('app_access_name'))
+                if record_data.get('process_access') != 'offboarding' and key in pending_keys:
+                    duplicate_count += 1
+                    accepted.append(record_data)
+                    continue
+                employee_email = record_data.get('employee_email') or emails.get(key[0])
+                params.append(self._historical_insert_params(record_data, employee_email, record_date))
+                accepted.append(record_data)
+                if record_data.get('status', 'Pendiente') == 'Pendiente':
+                    pending_keys.add(key)
+
+            # 4. Inserción masiva en una sola transacción (con el estado de accesos actuales)
+            if params:
+                cursor.fast_executemany = True
+                cursor.executemany(self._historical_insert_query(), params)
+                completed_sids = {
+                    row[0] for row in params
+                    if self._is_completed_status(row[self.HISTORICO_INSERT_COLUMNS.index('status')])
+                }
+                if completed_sids:
+                    self.refresh_current_access(cursor, completed_sids)
+            conn.commit()
+            self.invalidate_employee_cache(*scotia_ids)
+
+            message = f"{len(params)} registros históricos creados"
+            if duplicate_count:
+                message += f", {duplicate_count} ya pendientes (no se duplicaron)"
+            if invalid_count:
+                message += f", {invalid_count} omitidos por campos requeridos faltantes"
+            return True, message, accepted
+
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return False, f"Error creando registros históricos: {str(e)}", []
+        finally:
+            if conn is not None:
+                conn.close()
+
+    # ==============================
+    # ESTADO DE ACCESOS ACTUALES (current_access_dr)
+    # ==============================
+
+    def _access_state(self) -> CurrentAccessState:
+        """Mantenedor de current_access_dr (se crea una vez)"""
+        state = getattr(self, '_current_access_state', None)
+        if state is None:
+            state = CurrentAccessState(
+                self.historico_table,
+                getattr(self, 'current_access_table', self.CURRENT_ACCESS_TABLE),
+                self.MAX_IN_PARAMS
+            )
+            self._current_access_state = state
+        return state
+
+    @staticmethod
+    def _is_completed_status(status: Optional[str]) -> bool:
+        """True si el estado cuenta como acceso efectivo ('closed completed' o el legado 'Completado')"""
+        return (status or '').strip().upper() in CurrentAccessState.COMPLETED_STATUSES
+
+    def refresh_current_access(self, cursor, scotia_ids: Iterable[Any]) -> int:
+        """Recalcula current_access_dr de esos SIDs en la transacción del cursor recibido (sin commit).
+        
+        Debe llamarse antes del commit de toda escritura en historico que pueda cambiar
+        lo que un SID tiene otorgado (inserción completada, cambio de estado, borrado).
+        """
+        return self._access_state().refresh(cursor, scotia_ids)
+
+    def rebuild_current_access_state(self, scotia_ids: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """Reconstruye current_access_dr desde historico (completo o solo para algunos SIDs)"""
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            if scotia_ids:
+                written = self._access_state().refresh(cursor, scotia_ids)
+            else:
+                written = self._access_state().rebuild(cursor)
+            conn.commit()
+            if scotia_ids:
+                self.invalidate_employee_cache(*scotia_ids)
+            else:
+                self._results().clear()
+            return True, f"Estado de accesos actuales reconstruido: {written} accesos"
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return False, f"Error reconstruyendo estado de accesos actuales: {str(e)}"
+        finally:
+            if conn is not None:
+                conn.close()
+
+    # ==============================
+    # ÍNDICE DE BÚSQUEDA DEL HISTORIAL (historico_trigram_dr)
+    # ==============================
+
+    def _search_index(self) -> ProcessSearchIndex:
+        """Predicados tipados e índice de trigramas de historico (se crea una vez)"""
+        index = getattr(self, '_process_search_index', None)
+        if index is None:
+            index = ProcessSearchIndex(
+                self.historico_table,
+                os.getenv('HISTORICO_TRIGRAM_TABLE', ProcessSearchIndex.TRIGRAM_TABLE),
+                os.getenv('HISTORICO_TRIGRAM_POS_TABLE', ProcessSearchIndex.POSITIONS_TABLE)
+            )
+            self._process_search_index = index
+        return index
+
+    def rebuild_search_index(self) -> Tuple[bool, str]:
+        """Reconstruye la tabla de trigramas del historial (los triggers la mantienen después)"""
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            written = self._search_index().rebuild(cursor)
+            conn.commit()
+            return True, f"Índice de búsqueda del historial reconstruido: {written} trigramas"
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return False, f"Error reconstruyendo índice de búsqueda: {str(e)}"
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def get_employee_access_state(self, scotia_id: str, processes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Accesos que el SID tiene otorgados hoy, leídos de current_access_dr"""
+        try:
+            conn = self.get_connection()
+            try:
+                return self._access_state().fetch(conn.cursor(), scotia_id, processes)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error obteniendo estado de accesos actuales: {e}")
+            return []
+
+    # ==============================
+    # CACHÉ DE RESULTADOS POR SID
+    # ==============================
+
+    def _results(self) -> SidResultCache:
+        """Caché de resultados por SID (se crea con valores por defecto si falta)"""
+        cache = getattr(self, 'result_cache', None)
+        if cache is None:
+            cache = self.result_cache = SidResultCache()
+        return cache
+
+    def invalidate_employee_cache(self, *scotia_ids: Any):
+        """Descarta los resultados cacheados de esos SIDs; llamar después del commit de la escritura.
+        
+        Dentro de una unidad de trabajo, el empleado recordado se descarta de inmediato y la
+        caché de resultados se invalida cuando la unidad se confirma.
+        """
+        unit = self._units().current
+        if unit is None:
+            self._results().invalidate_sid(*scotia_ids)
+            return
+        for scotia_id in scotia_ids:
+            unit.forget(('employee', self._safe_strip(scotia_id)))
+        unit.after_commit(lambda: self._results().invalidate_sid(*scotia_ids))
+
+    def invalidate_headcount_snapshot(self):
+        """Descarta la foto del headcount del filtro de personas y las estadísticas en
+        memoria; llamar después del commit.
+        
+        Dentro de una unidad de trabajo se descarta de nuevo al confirmarla, para que una
+        recarga intermedia no deje en la foto datos que luego se revierten.
+        """
+        self.invalidate_headcount_statistics()
+        unit = self._units().current
+        if unit is not None:
+            unit.after_commit(self.invalidate_headcount_statistics)
+        snapshot = getattr(self, 'headcount_snapshot', None)
+        if snapshot is None:
+            return
+        snapshot.invalidate()
+        if unit is not None:
+            unit.after_commit(snapshot.invalidate)
+
+    def _invalidate_application_results(self, positions: List[Any], app_names: List[Any]):
+        """Descarta los resultados de los SIDs en esas posiciones o que incluyen esas aplicaciones"""
+        tags = [SidResultCache.position_tag(p) for p in positions if p]
+        tags += [SidResultCache.app_tag(name) for name in app_names if name]
+        self._results().invalidate_tags(tags)
+
     def get_employee_history(self, scotia_id: str) -> List[Dict[str, Any]]:
         """Obtiene el historial de un empleado incluyendo metadatos de la app para comparación estricta.
         Evita duplicados usando subconsulta para obtener solo una app por logical_access_name.
@@ -1237,240 +1559,114 @@ class AccessManagementService:
             print(f"Error obteniendo accesos actuales del empleado: {e}")
             return []
 
-    def get_employee_current_position_access(self, scotia_id: str) -> List[Dict[str, Any]]:
-        """Obtiene todos los accesos actuales del empleado: asignados por aplicación, manuales y flex staff"""
+    def get_employee_current_position_access(self, scotia_id: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Obtiene todos los accesos actuales del empleado (cacheados por SID, ver _load_employee_current_position_access)"""
+        if not use_cache or self._units().current is not None:
+            return self._load_employee_current_position_access(scotia_id)[0]
+        return self._results().get_or_load(
+            'current_access', scotia_id,
+            lambda: self._load_employee_current_position_access(scotia_id),
+            tags=lambda result: result[1],
+            cache_if=lambda result: result[2]
+        )[0]
+
+    def _load_employee_current_position_access(self, scotia_id: str) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]], bool]:
+        """Obtiene todos los accesos actuales del empleado: asignados por aplicación, manuales y flex staff.
+        
+        Lee current_access_dr (un acceso por aplicación; los revocados por offboarding ya no
+        figuran) y aplica las reglas de visualización:
+        - onboarding y manual_access: siempre
+        - lateral_movement: con headcount, solo si la aplicación corresponde a la posición actual
+        - flex_staff: solo los de la posición temporal más reciente
+        
+        Returns:
+            (accesos, etiquetas de caché: posición y todas las aplicaciones del SID, éxito)
+        """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            # Primero obtener la posición actual del empleado usando el servicio
             employee = self.get_employee_by_id(scotia_id)
             has_headcount = bool(employee)
-            current_unit = self._safe_strip(employee.get('unit'), '') if has_headcount else None
             current_position = self._safe_strip(employee.get('position'), '') if has_headcount else None
-            if has_headcount:
-                print(f"DEBUG: Accesos actuales - Posición actual: {current_position} en unidad: {current_unit}")
-                print(f"DEBUG: Onboarding: mostrar todos cuyo último proceso fue onboarding (sin filtrar por unidad/posición)")
-                print(f"DEBUG: Lateral Movement: solo los que coinciden con posición actual")
-            else:
-                print("DEBUG: SID sin registro activo en headcount - usando modo fallback solo con historico")
-                print(f"DEBUG: Onboarding: mostrar todos cuyo último proceso fue onboarding")
-                print(f"DEBUG: Lateral Movement: mostrar todos cuyo último proceso fue lateral_movement")
-
-            # Obtener la posición temporal específica de Flex Staff más reciente
-            cursor.execute(f'''
-                SELECT TOP 1 event_description
-                FROM {self.historico_table} 
-                WHERE scotia_id = ? 
-                AND process_access = 'flex_staff' 
-                AND status = 'closed completed'
-                ORDER BY record_date DESC
-            ''', (scotia_id,))
-            
-            flex_staff_desc = cursor.fetchone()
-            flex_staff_position = None
-            if flex_staff_desc:
-                # Extraer la posición temporal de la descripción: "(flex staff - POSICIÓN)"
-                import re
-                match = re.search(r'\(flex staff - ([^)]+)\)', flex_staff_desc[0])
-                if match:
-                    flex_staff_position = match.group(1).strip()
-                    print(f"DEBUG: Posición temporal de Flex Staff encontrada: {flex_staff_position}")
-            
-            # Construir el filtro para Flex Staff
-            flex_staff_filter = f'%flex staff - {flex_staff_position}%' if flex_staff_position else '%flex staff%'
-
-            # Primero verificar qué registros hay en el historial para este empleado
-            cursor.execute(f'''
-                SELECT COUNT(*), process_access, status
-                FROM {self.historico_table}
-                WHERE scotia_id = ?
-                GROUP BY process_access, status
-            ''', (scotia_id,))
-            debug_counts = cursor.fetchall()
-            print(f"DEBUG: Registros en historial por tipo y status:")
-            total_registros = 0
-            for count, proc, stat in debug_counts:
-                print(f"  {proc} - {stat}: {count}")
-                total_registros += count
-            print(f"DEBUG: Total de registros en historial: {total_registros}")
-            
-            # Verificar específicamente registros 'closed completed'
-            cursor.execute(f'''
-                SELECT COUNT(*), process_access
-                FROM {self.historico_table}
-                WHERE scotia_id = ?
-                AND status = 'closed completed'
-                AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                GROUP BY process_access
-            ''', (scotia_id,))
-            completed_counts = cursor.fetchall()
-            print(f"DEBUG: Registros 'closed completed' disponibles:")
-            for count, proc in completed_counts:
-                print(f"  {proc}: {count}")
-            
-            # Verificar cuántos accesos tienen offboarding como último proceso
-            cursor.execute(f'''
-                WITH AllProcessesByApp AS (
-                    SELECT 
-                        app_access_name,
-                        process_access as last_process,
-                        MAX(record_date) as last_record_date
-                    FROM {self.historico_table}
-                    WHERE scotia_id = ?
-                    AND status = 'closed completed'
-                    AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                    AND app_access_name IS NOT NULL
-                    GROUP BY app_access_name, process_access
-                ),
-                LastProcessByApp AS (
-                    SELECT 
-                        app_access_name,
-                        last_process,
-                        ROW_NUMBER() OVER (PARTITION BY app_access_name ORDER BY last_record_date DESC) as rn
-                    FROM AllProcessesByApp
-                )
-                SELECT COUNT(*) 
-                FROM LastProcessByApp 
-                WHERE rn = 1 AND last_process = 'offboarding'
-            ''', (scotia_id,))
-            offboarding_count = cursor.fetchone()[0]
-            print(f"DEBUG: Accesos excluidos por tener offboarding como último proceso: {offboarding_count}")
-
-            # Obtener unidad_subunidad del headcount si existe
             unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '') if has_headcount else None
-            if unidad_subunidad:
-                print(f"DEBUG: unidad_subunidad del headcount: {unidad_subunidad}")
-
-            # Obtener todos los tipos de accesos actuales
-            # IMPORTANTE: Excluir accesos cuyo último proceso sea 'offboarding' (ya fueron removidos)
-            query = '''
-                WITH AllProcessesByApp AS (
-                    -- Para cada aplicación, obtener todos los procesos con sus fechas máximas
-                    SELECT 
-                        app_access_name,
-                        process_access as last_process,
-                        MAX(record_date) as last_record_date
-                    FROM {historico}
-                    WHERE scotia_id = ?
-                    AND status = 'closed completed'
-                    AND process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding')
-                    AND app_access_name IS NOT NULL
-                    GROUP BY app_access_name, process_access
-                ),
-                LastProcessByApp AS (
-                    -- Para cada aplicación, obtener solo el proceso más reciente (último en el tiempo)
-                    SELECT 
-                        app_access_name,
-                        last_process,
-                        last_record_date,
-                        ROW_NUMBER() OVER (PARTITION BY app_access_name ORDER BY last_record_date DESC) as rn
-                    FROM AllProcessesByApp
-                )
-                SELECT 
-                    h.scotia_id,
-                    h.subunit as unit,
-                    h.subunit,
-                    h.app_access_name as logical_access_name,
-                    MAX(h.record_date) as record_date,
-                    h.status,
-                    h.process_access,
-                    MAX(h.event_description) as event_description,
-                    CASE 
-                        WHEN h.process_access = 'flex_staff' THEN 
-                            SUBSTRING(MAX(h.event_description), CHARINDEX('flex staff - ', MAX(h.event_description)) + 13, 
-                                     CHARINDEX(')', MAX(h.event_description), CHARINDEX('flex staff - ', MAX(h.event_description))) - CHARINDEX('flex staff - ', MAX(h.event_description)) - 13)
-                        WHEN h.process_access = 'manual_access' THEN 
-                            COALESCE(MAX(a.position_role), 'Manual')
-                        ELSE MAX(a.position_role)
-                    END as position_role,
-                    MAX(a.role_name) as role_name,
-                    MAX(a.description) as description,
-                    CASE 
-                        WHEN h.process_access = 'manual_access' THEN 'Manual'
-                        WHEN h.process_access = 'flex_staff' THEN 'Flex Staff'
-                        WHEN h.process_access IN ('onboarding', 'lateral_movement') THEN 'Aplicación'
-                        ELSE 'Otro'
-                    END as access_type
-                FROM {historico} h
-                LEFT JOIN {applications} a ON h.app_access_name = a.logical_access_name
-                INNER JOIN LastProcessByApp lp ON h.app_access_name = lp.app_access_name AND lp.rn = 1
-                WHERE h.scotia_id = ?
-                AND h.status = 'closed completed'
-                AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
-                AND h.app_access_name IS NOT NULL
-                -- EXCLUIR accesos cuyo último proceso sea 'offboarding' (ya fueron removidos)
-                AND lp.last_process != 'offboarding'
-                AND (
-                    -- Mostrar onboarding si fue el último proceso (sin filtrar por unidad/posición)
-                    (lp.last_process = 'onboarding' AND h.process_access = 'onboarding')
-                    OR
-                    -- Mostrar lateral_movement si fue el último proceso
-                    -- Y si hay headcount, verificar que coincida con posición actual
-                    (lp.last_process = 'lateral_movement' AND h.process_access = 'lateral_movement'
-                     {lateral_condition})
-                    OR
-                    -- Mostrar manual_access siempre (si fue el último proceso)
-                    (lp.last_process = 'manual_access' AND h.process_access = 'manual_access')
-                    OR
-                    -- Mostrar flex_staff con el filtro de posición temporal (si fue el último proceso)
-                    (lp.last_process = 'flex_staff' AND h.process_access = 'flex_staff' 
-                     AND h.event_description LIKE ?)
-                )
-                GROUP BY h.scotia_id, h.subunit, h.app_access_name, h.status, h.process_access
-                ORDER BY h.process_access, MAX(h.record_date) DESC
-            '''
-
-            # Construir la condición para lateral_movement
-            # Para lateral_movement, si hay headcount, solo mostrar si coincide con unidad_subunidad y posición
-            # Para onboarding, mostrar todos sin restricciones
-            if has_headcount and unidad_subunidad:
-                # Si hay headcount, filtrar lateral_movement por unidad_subunidad y posición
-                # Pero solo si la aplicación tiene estos campos definidos
-                lateral_condition = "AND (a.unidad_subunidad = ? AND a.position_role = ?)"
-                params = (scotia_id, scotia_id, unidad_subunidad, current_position, flex_staff_filter)
-                print(f"DEBUG: Usando filtro lateral_movement con unidad_subunidad={unidad_subunidad}, position={current_position}")
-            else:
-                # Sin headcount o sin unidad_subunidad: mostrar todos los lateral_movement también
-                lateral_condition = ""
-                params = (scotia_id, scotia_id, flex_staff_filter)
-                print(f"DEBUG: Sin filtro lateral_movement (no hay headcount o unidad_subunidad)")
-            
-            query = query.format(
-                historico=self.historico_table,
-                applications=self.applications_table,
-                lateral_condition=lateral_condition
+            if not has_headcount:
+                logger.debug("SID sin registro activo en headcount - se muestran todos los accesos del estado actual")
+
+            state_rows = self.get_employee_access_state(scotia_id)
+
+            # Una sola foto de la matriz para enriquecer y filtrar
+            apps_by_name = {}
+            position_apps = set()
+            for app in self.get_all_applications():
+                name = self._safe_strip(app.get('logical_access_name')).upper()
+                apps_by_name.setdefault(name, app)
+                if (has_headcount and unidad_subunidad
+                        and self._safe_strip(app.get('unidad_subunidad')).upper() == unidad_subunidad.upper()
+                        and self._safe_strip(app.get('position_role')).upper() == current_position.upper()):
+                    position_apps.add(name)
+
+            # Posición temporal de la asignación flex staff más reciente (filas ya ordenadas por fecha)
+            flex_staff_position = next(
+                (row.get('flex_position') for row in state_rows
+                 if row.get('process_access') == 'flex_staff' and row.get('flex_position')),
+                None
             )
-            print(f"DEBUG: Ejecutando consulta con {len(params)} parámetros")
-            print(f"DEBUG: Parámetros: scotia_id (2 veces)={scotia_id}, unidad_subunidad={unidad_subunidad if has_headcount else 'N/A'}, position={current_position if has_headcount else 'N/A'}, flex_staff_filter={flex_staff_filter}")
-            try:
-                cursor.execute(query, params)
-            except Exception as query_error:
-                print(f"ERROR en consulta SQL: {query_error}")
-                print(f"Query: {query}")
-                print(f"Params: {params}")
-                raise
+            if flex_staff_position:
+                logger.debug("Posición temporal de Flex Staff encontrada: %s", flex_staff_position)
+
+            access_types = {
+                'manual_access': 'Manual',
+                'flex_staff': 'Flex Staff',
+                'onboarding': 'Aplicación',
+                'lateral_movement': 'Aplicación'
+            }
+            current_access = []
+            for row in state_rows:
+                process = row.get('process_access')
+                name = self._safe_strip(row.get('app_access_name')).upper()
+                if process == 'lateral_movement' and has_headcount and unidad_subunidad and name not in position_apps:
+                    continue
+                if process == 'flex_staff' and flex_staff_position and row.get('flex_position') != flex_staff_position:
+                    continue
 
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            current_access = [dict(zip(columns, row)) for row in rows]
-            
-            print(f"DEBUG: Accesos encontrados: {len(current_access)}")
-            for acceso in current_access:
-                print(f"DEBUG: - {acceso.get('logical_access_name', '')} | {acceso.get('process_access', '')} | {acceso.get('position_role', '')} | {acceso.get('access_type', '')}")
-                
-            # Debug específico para accesos manuales
-            manual_accesses = [a for a in current_access if a.get('process_access') == 'manual_access']
-            print(f"DEBUG: Accesos manuales encontrados: {len(manual_accesses)}")
-            for manual in manual_accesses:
-                print(f"DEBUG: Manual - {manual.get('logical_access_name', '')} | Status: {manual.get('status', '')}")
+                app = apps_by_name.get(name, {})
+                if process == 'flex_staff':
+                    position_role = row.get('flex_position')
+                elif process == 'manual_access':
+                    position_role = app.get('position_role') or 'Manual'
+                else:
+                    position_role = app.get('position_role')
+
+                current_access.append({
+                    'scotia_id': row.get('scotia_id'),
+                    'unit': row.get('subunit'),
+                    'subunit': row.get('subunit'),
+                    'logical_access_name': row.get('app_access_name'),
+                    'record_date': row.get('record_date'),
+                    'status': row.get('status'),
+                    'process_access': process,
+                    'event_description': row.get('event_description'),
+                    'position_role': position_role,
+                    'role_name': app.get('role_name'),
+                    'description': app.get('description'),
+                    'access_type': access_types.get(process, 'Otro')
+                })
 
-            conn.close()
-            return current_access
+            # Mismo orden que antes: por tipo de proceso y, dentro de cada uno, más recientes primero
+            current_access.sort(key=lambda acceso: acceso['process_access'] or '')
+
+            logger.debug("Accesos encontrados: %s", len(current_access))
+            if debug_enabled(logger):
+                for acceso in current_access:
+                    logger.debug("- %s | %s | %s | %s", acceso.get('logical_access_name', ''), acceso.get('process_access', ''), acceso.get('position_role', ''), acceso.get('access_type', ''))
+
+            # Las filas descartadas por posición también dependen de la matriz
+            tags = [SidResultCache.app_tag(row.get('app_access_name')) for row in state_rows]
+            if current_position:
+                tags.append(SidResultCache.position_tag(current_position))
+            return current_access, tags, True
 
         except Exception as e:
             print(f"Error obteniendo accesos actuales del empleado: {e}")
-            return []
+            return [], [], False
 
     # ==============================
     # MÉTODOS DE LÓGICA DE NEGOCIO
@@ -1507,12 +1703,15 @@ class AccessManagementService:
             
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
+            self.invalidate_headcount_snapshot()
             
             return True, f"Estado del empleado {scotia_id} cambiado a {status_text}"
             
         except Exception as e:
             return False, f"Error actualizando estado del empleado: {str(e)}"
 
+    @transactional
     def process_employee_onboarding(self, scotia_id: str, position: str, unit: str, 
                                    responsible: str = "Sistema",
                                    subunit: Optional[str] = None) -> Tuple[bool, str, List[Dict[str, Any]]]:
@@ -1565,7 +1764,7 @@ class AccessManagementService:
 
             # 6. Crear registros históricos para cada aplicación (dedupe por tripleta normalizada)
             case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{scotia_id}"
-            created_records = []
+            records = []
             seen_triplets = set()
 
             for app in required_apps:
@@ -1591,23 +1790,24 @@ class AccessManagementService:
                     'status': 'Pendiente',
                     'general_status_ticket': 'En Proceso'
                 }
+                records.append(record_data)
 
-                success, message = self.create_historical_record(record_data)
-                if success:
-                    created_records.append(record_data)
-                else:
-                    print(f"Error creando registro para {app.get('logical_access_name')}: {message}")
+            # 7. Insertar todos los registros en una sola transacción
+            success, message, created_records = self.create_historical_records(records)
+            if not success:
+                return False, f"Error creando registros de onboarding: {message}", []
 
             return True, f"Onboarding procesado para {scotia_id}. {len(created_records)} accesos requeridos.", created_records
 
         except Exception as e:
             return False, f"Error procesando onboarding: {str(e)}", []
 
+    @transactional
     def process_employee_offboarding(self, scotia_id: str, responsible: str = "Sistema") -> Tuple[bool, str, List[Dict[str, Any]]]:
         """Procesa el offboarding de un empleado (revoca todo lo que figure completado).
         
-        Busca directamente en la base de datos todos los accesos con 'closed completed' del empleado,
-        sin filtrar por subunidad u otros campos. Solo busca por scotia_id.
+        Lee los accesos vigentes del empleado desde current_access_dr, sin filtrar por
+        subunidad u otros campos. Solo busca por scotia_id.
         
         Solo revoca accesos que:
         - Tienen estado 'closed completed'
@@ -1622,44 +1822,18 @@ class AccessManagementService:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Buscar directamente en la base de datos todos los accesos completados del empleado
-            # que NO hayan sido ya revocados en un offboarding anterior
-            cursor.execute(f'''
-                SELECT DISTINCT
-                    h.id,
-                    h.app_access_name,
-                    h.process_access,
-                    h.record_date,
-                    h.subunit,
-                    h.event_description
-                FROM {self.historico_table} h
-                WHERE h.scotia_id = ?
-                AND UPPER(LTRIM(RTRIM(h.status))) = 'CLOSED COMPLETED'
-                AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
-                AND h.app_access_name IS NOT NULL
-                AND NOT EXISTS (
-                    -- Verificar que no haya un offboarding completado posterior para este mismo acceso
-                    SELECT 1 
-                    FROM {self.historico_table} h2 
-                    WHERE h2.scotia_id = h.scotia_id
-                    AND h2.app_access_name = h.app_access_name
-                    AND h2.process_access = 'offboarding'
-                    AND UPPER(LTRIM(RTRIM(h2.status))) = 'CLOSED COMPLETED'
-                    AND h2.record_date >= h.record_date
-                )
-                ORDER BY h.record_date DESC
-            ''', (scotia_id,))
-            
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            active_access = [dict(zip(columns, row)) for row in rows]
+            # Accesos otorgados que siguen vigentes (current_access_dr ya excluye los
+            # revocados en un offboarding anterior): una búsqueda por SID
+            active_access = self._access_state().fetch(
+                cursor, scotia_id, ['onboarding', 'lateral_movement', 'flex_staff', 'manual_access']
+            )
             
             conn.close()
             
-            print(f"DEBUG: Accesos encontrados para revocar (solo 'closed completed' y no revocados previamente): {len(active_access)}")
+            logger.debug("Accesos encontrados para revocar (solo 'closed completed' y no revocados previamente): %s", len(active_access))
             for acc in active_access:
                 app_name = acc.get('app_access_name') or ''
-                print(f"DEBUG: Acceso a revocar: {app_name} - Tipo: {acc.get('process_access', 'N/A')}")
+                logger.debug("Acceso a revocar: %s - Tipo: %s", app_name, acc.get('process_access', 'N/A'))
 
             case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
             created_records = []
@@ -1679,7 +1853,7 @@ class AccessManagementService:
                 normalized_status = access_status.lower()
                 is_active_status = normalized_status in ('activo', 'active')
                 if access_status and not is_active_status:
-                    print(f"DEBUG: Omitiendo offboarding para {app_name} porque el acceso está '{access_status}'")
+                    logger.debug("Omitiendo offboarding para %s porque el acceso está '%s'", app_name, access_status)
                     skipped_inactive_access.append(app_name)
                     continue
                 
@@ -1727,6 +1901,7 @@ class AccessManagementService:
             ''', (inactivation_date, scotia_id))
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
 
             # Crear mensaje detallado con conteo por tipo de acceso
             access_counts = {}
@@ -1755,6 +1930,7 @@ class AccessManagementService:
         except Exception as e:
             return False, f"Error procesando offboarding: {str(e)}", []
 
+    @transactional
     def process_lateral_movement(self, scotia_id: str, new_position: str, new_unit: str, 
                                 responsible: str = "Sistema", new_subunit: Optional[str] = None) -> Tuple[bool, str, List[Dict[str, Any]]]:
         """Procesa un movimiento lateral: revoca accesos de posición anterior y otorga nuevos.
@@ -1765,35 +1941,36 @@ class AccessManagementService:
         - Evita duplicados comparando por logical_access_name y unidad
         """
         try:
-            print(f"DEBUG: Iniciando lateral movement para {scotia_id}")
-            print(f"DEBUG: Nueva posición: {new_position}")
-            print(f"DEBUG: Nueva unidad: {new_unit}")
-            print(f"DEBUG: Nueva subunidad: {new_subunit}")
+            logger.debug("Iniciando lateral movement para %s", scotia_id)
+            logger.debug("Nueva posición: %s", new_position)
+            logger.debug("Nueva unidad: %s", new_unit)
+            logger.debug("Nueva subunidad: %s", new_subunit)
             
             employee = self.get_employee_by_id(scotia_id)
             if not employee:
-                print(f"DEBUG: Error - Empleado {scotia_id} no encontrado")
+                logger.debug("Error - Empleado %s no encontrado", scotia_id)
                 return False, f"Empleado {scotia_id} no encontrado", []
 
             old_position = self._safe_strip(employee.get('position'), '')
             old_unit = self._safe_strip(employee.get('unit'), '')
             old_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
             
-            print(f"DEBUG: Posición anterior: {old_position}")
-            print(f"DEBUG: Unidad anterior: {old_unit}")
-            print(f"DEBUG: Unidad/Subunidad anterior: {old_unidad_subunidad}")
+            logger.debug("Posición anterior: %s", old_position)
+            logger.debug("Unidad anterior: %s", old_unit)
+            logger.debug("Unidad/Subunidad anterior: %s", old_unidad_subunidad)
 
             # Obtener accesos requeridos para la nueva posición (usando unidad_subunidad como el onboarding)
             new_unidad_subunidad = f"{new_unit}/{new_subunit}" if new_subunit else new_unit
-            print(f"DEBUG: Nueva unidad_subunidad: {new_unidad_subunidad}")
+            logger.debug("Nueva unidad_subunidad: %s", new_unidad_subunidad)
             new_mesh_apps = self.get_applications_by_position(new_position, new_unidad_subunidad, subunit=new_subunit)
-            print(f"DEBUG: Aplicaciones encontradas para nueva posición: {len(new_mesh_apps)}")
-            for app in new_mesh_apps:
-                print(f"DEBUG: App requerida para nueva posición: {app.get('logical_access_name', '')} - Unidad/Subunidad: {app.get('unidad_subunidad', '')}")
+            logger.debug("Aplicaciones encontradas para nueva posición: %s", len(new_mesh_apps))
+            if debug_enabled(logger):
+                for app in new_mesh_apps:
+                    logger.debug("App requerida para nueva posición: %s - Unidad/Subunidad: %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
             
             # Obtener accesos ACTUALES del empleado (no los de la malla anterior, sino los que realmente tiene)
             current_access = self.get_employee_current_position_access(scotia_id)
-            print(f"DEBUG: Accesos actuales del empleado: {len(current_access)}")
+            logger.debug("Accesos actuales del empleado: %s", len(current_access))
             
             # Crear índice de accesos actuales usando logical_access_name + unidad_subunidad
             # Obtener unidad_subunidad de todas las aplicaciones de una vez
@@ -1805,19 +1982,23 @@ class AccessManagementService:
             hc_result = cursor.fetchone()
             default_unidad_subunidad = self._safe_strip(hc_result[0] if hc_result else None, '').upper()
             
-            # Obtener unidad_subunidad de todas las aplicaciones actuales de una vez
-            app_names = [self._safe_strip(acc.get('logical_access_name'), '').upper() for acc in current_access if acc.get('logical_access_name')]
+            # Obtener los datos de todas las aplicaciones actuales de una vez (también se usan al revocar)
+            app_names = sorted({self._safe_strip(acc.get('logical_access_name'), '').upper() for acc in current_access if acc.get('logical_access_name')})
             app_unidad_subunidad_map = {}
+            app_rows_by_name = {}
             
-            if app_names:
-                placeholders = ','.join(['?'] * len(app_names))
-                cursor.execute(f'''
-                    SELECT DISTINCT a.logical_access_name, a.unidad_subunidad
-                    FROM {self.applications_table} a
-                    WHERE a.logical_access_name IN ({placeholders})
-                ''', tuple(app_names))
+            for start in range(0, len(app_names), self.MAX_IN_PARAMS):
+                name_clause, name_params = self._application_match('name_element', app_names[start:start + self.MAX_IN_PARAMS])
+                cursor.execute(
+                    self._get_applications_select(name_clause, "ORDER BY a.id"),
+                    name_params
+                )
+                columns = [description[0] for description in cursor.description]
                 for row in cursor.fetchall():
-                    app_unidad_subunidad_map[self._safe_strip(row[0], '').upper()] = self._safe_strip(row[1], '').upper()
+                    app_row = dict(zip(columns, row))
+                    name_key = self._safe_strip(app_row.get('logical_access_name'), '').upper()
+                    app_rows_by_name.setdefault(name_key, app_row)
+                    app_unidad_subunidad_map[name_key] = self._safe_strip(app_row.get('unidad_subunidad'), '').upper()
             
             conn.close()
             
@@ -1836,9 +2017,10 @@ class AccessManagementService:
                         'status': acc.get('status', '')
                     }
             
-            print(f"DEBUG: Accesos actuales indexados: {len(current_access_by_key)}")
-            for key, acc in current_access_by_key.items():
-                print(f"DEBUG: Acceso actual: {acc.get('logical_access_name', '')} - {acc.get('unidad_subunidad', '')}")
+            logger.debug("Accesos actuales indexados: %s", len(current_access_by_key))
+            if debug_enabled(logger):
+                for key, acc in current_access_by_key.items():
+                    logger.debug("Acceso actual: %s - %s", acc.get('logical_access_name', ''), acc.get('unidad_subunidad', ''))
             
             # Crear índice de accesos requeridos para la nueva posición
             new_apps_by_key = {}
@@ -1849,9 +2031,10 @@ class AccessManagementService:
                 if app_name:  # Solo agregar si tiene nombre
                     new_apps_by_key[key] = app
             
-            print(f"DEBUG: Accesos requeridos para nueva posición: {len(new_apps_by_key)}")
-            for key, app in new_apps_by_key.items():
-                print(f"DEBUG: Acceso requerido: {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
+            logger.debug("Accesos requeridos para nueva posición: %s", len(new_apps_by_key))
+            if debug_enabled(logger):
+                for key, app in new_apps_by_key.items():
+                    logger.debug("Acceso requerido: %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
             
             # Calcular qué revocar y qué otorgar
             to_revoke = []
@@ -1865,26 +2048,18 @@ class AccessManagementService:
                     # Este acceso actual no es necesario en la nueva posición, revocarlo
                     # Pero solo si está en 'closed completed'
                     if self._safe_strip(current_acc.get('status'), '').lower() == 'closed completed':
-                        # Buscar la app completa en applications para obtener todos los datos
-                        conn = self.get_connection()
-                        cursor = conn.cursor()
-                        cursor.execute(f'''
-                            SELECT logical_access_name, unidad_subunidad, subunit, path_email_url
-                            FROM {self.applications_table}
-                            WHERE logical_access_name = ?
-                        ''', (current_acc.get('logical_access_name', ''),))
-                        app_data = cursor.fetchone()
-                        conn.close()
+                        # Datos completos de la app (ya cargados junto con unidad_subunidad)
+                        app_data = app_rows_by_name.get(self._safe_strip(current_acc.get('logical_access_name'), '').upper())
                         
                         if app_data:
                             app_dict = {
-                                'logical_access_name': app_data[0],
-                                'unidad_subunidad': app_data[1] or current_acc.get('unidad_subunidad', ''),
-                                'subunit': app_data[2] or '',
-                                'path_email_url': app_data[3] or ''
+                                'logical_access_name': app_data.get('logical_access_name'),
+                                'unidad_subunidad': app_data.get('unidad_subunidad') or current_acc.get('unidad_subunidad', ''),
+                                'subunit': app_data.get('subunit') or '',
+                                'path_email_url': app_data.get('path_email_url') or ''
                             }
                             to_revoke.append(app_dict)
-                            print(f"DEBUG: Marcado para revocar (no necesario en nueva posición): {app_dict.get('logical_access_name', '')} - {app_dict.get('unidad_subunidad', '')}")
+                            logger.debug("Marcado para revocar (no necesario en nueva posición): %s - %s", app_dict.get('logical_access_name', ''), app_dict.get('unidad_subunidad', ''))
                         else:
                             # Si no está en applications, crear un dict básico
                             app_dict = {
@@ -1894,29 +2069,29 @@ class AccessManagementService:
                                 'path_email_url': ''
                             }
                             to_revoke.append(app_dict)
-                            print(f"DEBUG: Marcado para revocar (no está en applications): {app_dict.get('logical_access_name', '')}")
+                            logger.debug("Marcado para revocar (no está en applications): %s", app_dict.get('logical_access_name', ''))
                 else:
                     # Este acceso ya lo tiene y también lo necesita en la nueva posición, mantenerlo
                     maintained.append(current_acc)
-                    print(f"DEBUG: Acceso mantenido (ya lo tiene y lo necesita): {current_acc.get('logical_access_name', '')} - {current_acc.get('unidad_subunidad', '')}")
+                    logger.debug("Acceso mantenido (ya lo tiene y lo necesita): %s - %s", current_acc.get('logical_access_name', ''), current_acc.get('unidad_subunidad', ''))
             
             # OTORGAR: accesos requeridos de la nueva posición que NO tiene actualmente
             for key, app in new_apps_by_key.items():
                 if key not in current_access_by_key:
                     to_grant.append(app)
-                    print(f"DEBUG: Marcado para otorgar (no lo tiene actualmente): {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
+                    logger.debug("Marcado para otorgar (no lo tiene actualmente): %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
                 else:
-                    print(f"DEBUG: Acceso ya existe (no se otorga): {app.get('logical_access_name', '')} - {app.get('unidad_subunidad', '')}")
+                    logger.debug("Acceso ya existe (no se otorga): %s - %s", app.get('logical_access_name', ''), app.get('unidad_subunidad', ''))
             
-            print(f"DEBUG: Resumen - Mantener: {len(maintained)}, Revocar: {len(to_revoke)}, Otorgar: {len(to_grant)}")
+            logger.debug("Resumen - Mantener: %s, Revocar: %s, Otorgar: %s", len(maintained), len(to_revoke), len(to_grant))
 
             case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
-            created_records = []
+            records = []
 
             # 1. REVOCAR accesos de la posición anterior que ya no son necesarios
-            print(f"DEBUG: Procesando {len(to_revoke)} aplicaciones para revocar")
+            logger.debug("Procesando %s aplicaciones para revocar", len(to_revoke))
             for acc in to_revoke:
-                print(f"DEBUG: Procesando revocación: {acc.get('logical_access_name', '')}")
+                logger.debug("Procesando revocación: %s", acc.get('logical_access_name', ''))
                 record_data = {
                     'scotia_id': scotia_id,
                     'case_id': case_id,
@@ -1930,19 +2105,12 @@ class AccessManagementService:
                     'status': 'Pendiente',
                     'general_status_ticket': 'En Proceso'
                 }
-                print(f"DEBUG: Creando registro de revocación para {acc.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de revocación: {ok}, Mensaje: {message}")
-                if ok:
-                    created_records.append(record_data)
-                    print(f"DEBUG: Registro de revocación agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro de revocación: {message}")
+                records.append(record_data)
 
             # 2. OTORGAR nuevos accesos de la nueva posición que no tiene actualmente
-            print(f"DEBUG: Procesando {len(to_grant)} aplicaciones para otorgar")
+            logger.debug("Procesando %s aplicaciones para otorgar", len(to_grant))
             for app in to_grant:
-                print(f"DEBUG: Procesando otorgamiento: {app.get('logical_access_name', '')}")
+                logger.debug("Procesando otorgamiento: %s", app.get('logical_access_name', ''))
                 record_data = {
                     'scotia_id': scotia_id,
                     'case_id': case_id,
@@ -1956,14 +2124,13 @@ class AccessManagementService:
                     'status': 'Pendiente',
                     'general_status_ticket': 'En Proceso'
                 }
-                print(f"DEBUG: Creando registro de otorgamiento para {app.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de otorgamiento: {ok}, Mensaje: {message}")
-                if ok:
-                    created_records.append(record_data)
-                    print(f"DEBUG: Registro de otorgamiento agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro de otorgamiento: {message}")
+                records.append(record_data)
+
+            # 3. Insertar revocaciones y otorgamientos en una sola transacción
+            ok, message, created_records = self.create_historical_records(records)
+            logger.debug("Resultado de registros del movimiento lateral: %s, Mensaje: %s", ok, message)
+            if not ok:
+                return False, f"Error creando registros de movimiento lateral: {message}", []
 
             # Actualizar posición/unidad del empleado
             success, message = self.update_employee_position(scotia_id, new_position, new_unit, new_unidad_subunidad)
@@ -1993,6 +2160,7 @@ class AccessManagementService:
         except Exception as e:
             return False, f"Error procesando movimiento lateral: {str(e)}", []
 
+    @transactional
     def process_flex_staff_assignment(self, scotia_id: str, temporary_position: str, temporary_unit: str, 
                                     temporary_subunit: Optional[str] = None, duration_days: Optional[int] = None,
                                     responsible: str = "Sistema") -> Tuple[bool, str, List[Dict[str, Any]]]:
@@ -2005,15 +2173,15 @@ class AccessManagementService:
         - NO revoca ningún acceso existente
         """
         try:
-            print(f"DEBUG: Iniciando flex staff para {scotia_id}")
-            print(f"DEBUG: Posición temporal: {temporary_position}")
-            print(f"DEBUG: Unidad temporal: {temporary_unit}")
-            print(f"DEBUG: Subunidad temporal: {temporary_subunit}")
-            print(f"DEBUG: Duración: {duration_days} días")
+            logger.debug("Iniciando flex staff para %s", scotia_id)
+            logger.debug("Posición temporal: %s", temporary_position)
+            logger.debug("Unidad temporal: %s", temporary_unit)
+            logger.debug("Subunidad temporal: %s", temporary_subunit)
+            logger.debug("Duración: %s días", duration_days)
             
             employee = self.get_employee_by_id(scotia_id)
             if not employee:
-                print(f"DEBUG: Error - Empleado {scotia_id} no encontrado")
+                logger.debug("Error - Empleado %s no encontrado", scotia_id)
                 return False, f"Empleado {scotia_id} no encontrado", []
 
             original_position = self._safe_strip(employee.get('position'), '')
@@ -2024,15 +2192,16 @@ class AccessManagementService:
             
             # También obtener accesos flex_staff existentes (pendientes y completados) para evitar duplicados
             flex_staff_access = self._get_all_flex_staff_access(scotia_id)
-            print(f"DEBUG: Accesos flex_staff existentes (pendientes y completados): {len(flex_staff_access)}")
+            logger.debug("Accesos flex_staff existentes (pendientes y completados): %s", len(flex_staff_access))
             
             # Obtener accesos requeridos para la posición temporal usando lógica flexible
             # No usar subunidad para flex staff - buscar solo por posición y unidad
-            print(f"DEBUG: Buscando aplicaciones para posición temporal: {temporary_position} en unidad: {temporary_unit}")
+            logger.debug("Buscando aplicaciones para posición temporal: %s en unidad: %s", temporary_position, temporary_unit)
             temp_mesh_apps = self.get_applications_by_position_flexible(temporary_position, temporary_unit, subunit=None)
-            print(f"DEBUG: Aplicaciones encontradas para posición temporal: {len(temp_mesh_apps)}")
-            for app in temp_mesh_apps:
-                print(f"DEBUG: - {app.get('logical_access_name', '')} | {app.get('unit', '')} | {app.get('subunit', '')}")
+            logger.debug("Aplicaciones encontradas para posición temporal: %s", len(temp_mesh_apps))
+            if debug_enabled(logger):
+                for app in temp_mesh_apps:
+                    logger.debug("- %s | %s | %s", app.get('logical_access_name', ''), app.get('unit', ''), app.get('subunit', ''))
             
             # Crear índices para comparación (incluyendo accesos flex_staff existentes)
             current_apps_by_name = {}
@@ -2046,7 +2215,7 @@ class AccessManagementService:
                 app_name = self._safe_strip(acc.get('logical_access_name'), '').upper()
                 if app_name and app_name not in current_apps_by_name:
                     current_apps_by_name[app_name] = acc
-                    print(f"DEBUG: Acceso flex_staff existente incluido en comparación: {app_name}")
+                    logger.debug("Acceso flex_staff existente incluido en comparación: %s", app_name)
             
             temp_apps_by_name = {}
             for app in temp_mesh_apps:
@@ -2062,12 +2231,12 @@ class AccessManagementService:
                     to_grant_temp.append(app)
 
             case_id = f"FLEX-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
-            created_records = []
+            records = []
 
             # OTORGAR accesos temporales de la nueva posición
-            print(f"DEBUG: Procesando {len(to_grant_temp)} aplicaciones para flex staff")
+            logger.debug("Procesando %s aplicaciones para flex staff", len(to_grant_temp))
             for app in to_grant_temp:
-                print(f"DEBUG: Procesando flex staff: {app.get('logical_access_name', '')}")
+                logger.debug("Procesando flex staff: %s", app.get('logical_access_name', ''))
                 # Calcular fecha de expiración si se especifica duración
                 expiration_date = None
                 if duration_days:
@@ -2087,14 +2256,12 @@ class AccessManagementService:
                     'general_status_ticket': 'En Proceso',
                     'expiration_date': expiration_date.isoformat() if expiration_date else None
                 }
-                print(f"DEBUG: Creando registro flex staff para {app.get('logical_access_name', '')}")
-                ok, message = self.create_historical_record(record_data)
-                print(f"DEBUG: Resultado de flex staff: {ok}, Mensaje: {message}")
-                if ok:
-                    created_records.append(record_data)
-                    print(f"DEBUG: Registro flex staff agregado a created_records")
-                else:
-                    print(f"DEBUG: Error creando registro flex staff: {message}")
+                records.append(record_data)
+
+            ok, message, created_records = self.create_historical_records(records)
+            logger.debug("Resultado de flex staff: %s, Mensaje: %s", ok, message)
+            if not ok:
+                return False, f"Error creando registros flex staff: {message}", []
 
             # Crear mensaje detallado
             grant_details = [app.get('logical_access_name', '') for app in to_grant_temp]
@@ -2114,6 +2281,7 @@ class AccessManagementService:
         except Exception as e:
             return False, f"Error procesando asignación flex staff: {str(e)}", []
 
+    @transactional
     def process_flex_staff_return(self, scotia_id: str, responsible: str = "Sistema") -> Tuple[bool, str, List[Dict[str, Any]]]:
         """Procesa el retorno de flex staff: revoca solo los accesos temporales.
         
@@ -2200,7 +2368,7 @@ class AccessManagementService:
     def get_employee_flex_staff_access(self, scotia_id: str) -> List[Dict[str, Any]]:
         """Obtiene los accesos temporales (flex_staff) de un empleado"""
         try:
-            print(f"DEBUG: Buscando accesos flex_staff para {scotia_id}")
+            logger.debug("Buscando accesos flex_staff para %s", scotia_id)
             conn = self.get_connection()
             cursor = conn.cursor()
             
@@ -2225,13 +2393,14 @@ class AccessManagementService:
             columns = [description[0] for description in cursor.description]
             access_list = [dict(zip(columns, row)) for row in rows]
             
-            print(f"DEBUG: Accesos flex_staff encontrados: {len(access_list)}")
-            for acc in access_list:
-                print(f"DEBUG: - {acc.get('logical_access_name', '')} | {acc.get('status', '')} | {acc.get('event_description', '')}")
+            logger.debug("Accesos flex_staff encontrados: %s", len(access_list))
+            if debug_enabled(logger):
+                for acc in access_list:
+                    logger.debug("- %s | %s | %s", acc.get('logical_access_name', ''), acc.get('status', ''), acc.get('event_description', ''))
             
-            # Si no hay resultados, verificar qué registros existen para este empleado
-            if len(access_list) == 0:
-                print(f"DEBUG: No se encontraron accesos flex_staff. Verificando registros del empleado...")
+            # Si no hay resultados, verificar qué registros existen para este empleado (solo en DEBUG)
+            if len(access_list) == 0 and debug_enabled(logger):
+                logger.debug("No se encontraron accesos flex_staff. Verificando registros del empleado...")
                 cursor.execute(f'''
                     SELECT process_access, app_access_name, status, event_description
                     FROM {self.historico_table} 
@@ -2239,9 +2408,9 @@ class AccessManagementService:
                     ORDER BY record_date DESC
                 ''', (scotia_id,))
                 all_records = cursor.fetchall()
-                print(f"DEBUG: Todos los registros del empleado: {len(all_records)}")
+                logger.debug("Todos los registros del empleado: %s", len(all_records))
                 for record in all_records[:10]:  # Mostrar solo los primeros 10
-                    print(f"DEBUG: - {record[0]} | {record[1]} | {record[2]} | {record[3]}")
+                    logger.debug("- %s | %s | %s | %s", record[0], record[1], record[2], record[3])
             
             conn.close()
             return access_list
@@ -2263,13 +2432,8 @@ class AccessManagementService:
             emp_unidad_subunidad = self._safe_strip(employee.get('unidad_subunidad'), '')
             
             # Debug: mostrar valores del empleado
-            print(f"DEBUG empleado {scotia_id}:")
-            print(f"  - unit: '{emp_unit}'")
-            print(f"  - position: '{emp_position}'")
-            print(f"  - unidad_subunidad: '{emp_unidad_subunidad}'")
-            print(f"  - Datos completos del empleado:")
-            for key, value in employee.items():
-                print(f"    - {key}: '{value}'")
+            logger.debug("Empleado %s: unit=%r, position=%r, unidad_subunidad=%r, datos=%s",
+                         scotia_id, emp_unit, emp_position, emp_unidad_subunidad, employee)
             
             # Si no hay unidad_subunidad, construirla a partir de unit y subunit
             if not emp_unidad_subunidad:
@@ -2473,8 +2637,8 @@ class AccessManagementService:
     def delete_historical_record(self, scotia_id: str, case_id: str, app_access_name: str = None, delete_all: bool = False) -> bool:
         """Elimina un registro específico o todos los registros de un case_id."""
         try:
-            print(f"[DEBUG] delete_historical_record called -> scotia_id={scotia_id}, case_id={case_id}, app_access_name={app_access_name}, delete_all={delete_all}")
-            with self.db_manager.get_connection() as conn:
+            logger.debug("delete_historical_record called -> scotia_id=%s, case_id=%s, app_access_name=%s, delete_all=%s", scotia_id, case_id, app_access_name, delete_all)
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 historico_table = self.historico_table
@@ -2483,12 +2647,12 @@ class AccessManagementService:
                         f"DELETE FROM {historico_table} WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?",
                         (scotia_id, case_id)
                     )
-                    print(f"[DEBUG] delete_all affected rows: {cursor.rowcount}")
+                    logger.debug("delete_all affected rows: %s", cursor.rowcount)
                 elif app_access_name:
                     cursor.execute(f'SELECT id FROM {historico_table} WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ? AND app_access_name = ?', (scotia_id, case_id, app_access_name))
                     
                     if not cursor.fetchone():
-                        print("[DEBUG] No matching record found for provided app_access_name")
+                        logger.debug("No matching record found for provided app_access_name")
                         return False
                     
                     # Eliminar solo el registro específico
@@ -2496,13 +2660,13 @@ class AccessManagementService:
                         f"DELETE FROM {historico_table} WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ? AND app_access_name = ?",
                         (scotia_id, case_id, app_access_name)
                     )
-                    print(f"[DEBUG] delete specific rowcount: {cursor.rowcount}")
+                    logger.debug("delete specific rowcount: %s", cursor.rowcount)
                 else:
                     # Si no se proporciona app_access_name, eliminar solo el primer registro encontrado
                     cursor.execute(f'SELECT TOP 1 id FROM {historico_table} WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?', (scotia_id, case_id))
                     
                     if not cursor.fetchone():
-                        print("[DEBUG] No records found for given scotia_id and case_id")
+                        logger.debug("No records found for given scotia_id and case_id")
                         return False
                     
                     # Eliminar solo el primer registro
@@ -2510,102 +2674,141 @@ class AccessManagementService:
                         f"DELETE TOP (1) FROM {historico_table} WHERE CAST(scotia_id AS NVARCHAR(50)) = ? AND case_id = ?",
                         (scotia_id, case_id)
                     )
-                    print(f"[DEBUG] delete first row rowcount: {cursor.rowcount}")
+                    logger.debug("delete first row rowcount: %s", cursor.rowcount)
                 
-                return cursor.rowcount > 0
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    self.refresh_current_access(cursor, [scotia_id])
+            
+            if deleted:
+                self.invalidate_employee_cache(scotia_id)
+            return deleted
                 
         except Exception as e:
             print(f"Error eliminando registro: {str(e)}")
             return False
 
-    def get_headcount_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas del headcount agrupadas por diferentes criterios"""
+    HEADCOUNT_STATS_TTL = 300  # Segundos que se reutilizan las estadísticas del headcount
+
+    # Conjuntos de la consulta de estadísticas: (GROUPING de unidad, puesto, estado, año) -> sección
+    HEADCOUNT_STATS_SETS = {
+        (0, 1, 1, 1): 'por_unidad',
+        (0, 0, 1, 1): 'por_puesto',
+        (1, 1, 0, 1): 'por_estado',
+        (1, 1, 1, 0): 'por_año_inicio',
+        (1, 1, 1, 1): 'generales'
+    }
+
+    def _headcount_statistics_query(self) -> str:
+        """Una sola pasada sobre el headcount con GROUPING SETS para todos los desgloses.
+        
+        Solo proyecta las columnas que se agrupan o cuentan (sin los alias legacy de
+        _get_headcount_select); GROUPING() indica a qué conjunto pertenece cada fila.
+        """
+        return f'''
+            SELECT
+                GROUPING(unit) AS g_unidad,
+                GROUPING(position) AS g_puesto,
+                GROUPING(activo) AS g_estado,
+                GROUPING(YEAR(start_date)) AS g_año,
+                unit AS unidad,
+                position AS puesto,
+                activo,
+                YEAR(start_date) AS año_inicio,
+                COUNT(*) AS total_empleados,
+                SUM(activo) AS activos,
+                SUM(1 - activo) AS inactivos,
+                COUNT(CASE WHEN position IS NOT NULL AND position != '' THEN 1 END) AS con_posicion,
+                COUNT(CASE WHEN unit IS NOT NULL AND unit != '' THEN 1 END) AS con_unidad,
+                COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) AS con_fecha_inicio,
+                COUNT(inactivation_date) AS con_fecha_inactivacion
+            FROM (
+                SELECT
+                    h.department AS unit,
+                    h.current_position_title AS position,
+                    h.begdate AS start_date,
+                    h.exit_date AS inactivation_date,
+                    CASE WHEN LOWER(ISNULL(h.status,'')) IN ('inactive','terminated','offboarded','baja') THEN 0 ELSE 1 END AS activo
+                FROM {self.headcount_table} h
+            ) head
+            GROUP BY GROUPING SETS ((unit), (position, unit), (activo), (YEAR(start_date)), ())
+        '''
+
+    def _build_headcount_statistics(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Reparte las filas de la consulta GROUPING SETS en las secciones de get_headcount_statistics"""
+        sections = {name: [] for name in self.HEADCOUNT_STATS_SETS.values()}
+        for row in rows:
+            flags = (row['g_unidad'], row['g_puesto'], row['g_estado'], row['g_año'])
+            name = self.HEADCOUNT_STATS_SETS.get(tuple(int(flag) for flag in flags))
+            if name is not None:
+                sections[name].append(row)
+
+        def counts(row, *keys):
+            return {key: int(row.get(key) or 0) for key in keys}
+
+        def by_total(items):
+            return sorted(items, key=lambda item: item['total_empleados'], reverse=True)
+
+        stats = {}
+        stats['por_unidad'] = by_total(
+            {'unidad': row['unidad'],
+             **counts(row, 'total_empleados', 'activos', 'inactivos', 'con_posicion', 'con_fecha_inicio')}
+            for row in sections['por_unidad'] if self._safe_strip(row['unidad'])
+        )
+        stats['por_puesto'] = by_total(
+            {'puesto': row['puesto'], 'unidad': row['unidad'],
+             **counts(row, 'total_empleados', 'activos', 'inactivos', 'con_fecha_inicio')}
+            for row in sections['por_puesto'] if self._safe_strip(row['puesto'])
+        )
+        # manager y senior_manager no existen en Master_Staff_List (alias NULL en _get_headcount_select)
+        stats['por_manager'] = []
+        stats['por_senior_manager'] = []
+        stats['por_estado'] = sorted(
+            ({'estado': 'Active' if row['activo'] == 1 else 'Inactive',
+              **counts(row, 'total_empleados', 'con_fecha_inactivacion')}
+             for row in sections['por_estado']),
+            key=lambda item: item['estado']
+        )
+        stats['por_año_inicio'] = sorted(
+            ({'año_inicio': row['año_inicio'], **counts(row, 'total_empleados', 'activos', 'inactivos')}
+             for row in sections['por_año_inicio'] if row['año_inicio'] is not None),
+            key=lambda item: item['año_inicio'], reverse=True
+        )
+
+        general = sections['generales'][0] if sections['generales'] else {}
+        stats['generales'] = counts(general, 'total_empleados', 'activos', 'inactivos', 'con_posicion',
+                                    'con_unidad', 'con_fecha_inicio', 'con_fecha_inactivacion')
+        stats['generales'].update({
+            'con_manager': 0,
+            'con_senior_manager': 0,
+            'unidades_unicas': len(stats['por_unidad']),
+            'puestos_unicos': len({self._safe_strip(row['puesto']) for row in stats['por_puesto']})
+        })
+        return stats
+
+    def get_headcount_statistics(self, use_cache: bool = True) -> Dict[str, Any]:
+        """Obtiene estadísticas del headcount agrupadas por diferentes criterios.
+        
+        Los desgloses salen de una sola consulta GROUPING SETS y el resultado se guarda
+        en memoria hasta que vence HEADCOUNT_STATS_TTL o se modifica un empleado
+        (ver invalidate_headcount_snapshot); use_cache=False fuerza el cálculo.
+        """
+        cacheable = use_cache and self._units().current is None
+        if cacheable:
+            cached = getattr(self, '_headcount_stats_cache', None)
+            if cached is not None and time.monotonic() - cached[0] < self._headcount_stats_ttl():
+                return copy.deepcopy(cached[1])
+
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            stats = {}
-            headcount_view = self._get_headcount_select()
-            subquery = f"({headcount_view}) head"
-            
-            # 1. Estadísticas por unidad
-            cursor.execute(f'''
-                SELECT unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                       COUNT(CASE WHEN position IS NOT NULL AND position != '' THEN 1 END) as con_posicion,
-                       COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio
-                FROM {subquery}
-                WHERE unit IS NOT NULL AND unit != ''
-                GROUP BY unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_unidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 2. Estadísticas por puesto
-            cursor.execute(f'''
-                SELECT position as puesto, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                       COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio
-                FROM {subquery}
-                WHERE position IS NOT NULL AND position != ''
-                GROUP BY position, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_puesto'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 3. Estadísticas por manager
-            cursor.execute(f'''
-                SELECT manager, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM {subquery}
-                WHERE manager IS NOT NULL AND manager != ''
-                GROUP BY manager, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_manager'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 4. Estadísticas por senior manager
-            cursor.execute(f'''
-                SELECT senior_manager, unit as unidad, COUNT(*) as total_empleados,
-                       COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                       COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM {subquery}
-                WHERE senior_manager IS NOT NULL AND senior_manager != ''
-                GROUP BY senior_manager, unit
-                ORDER BY total_empleados DESC
-            ''')
-            stats['por_senior_manager'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 5. Estadísticas por estado de activación
-            cursor.execute(f'''
-                SELECT 
-                    CASE WHEN activo = 1 THEN 'Active' ELSE 'Inactive' END as estado,
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN inactivation_date IS NOT NULL THEN 1 END) as con_fecha_inactivacion
-                FROM {subquery}
-                GROUP BY activo
-                ORDER BY activo DESC
-            ''')
-            stats['por_estado'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
-            
-            # 6. Estadísticas por año de inicio (si hay fecha de inicio)
-            cursor.execute(f'''
-                SELECT 
-                    YEAR(start_date) as año_inicio,
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                    COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos
-                FROM {subquery}
-                WHERE start_date IS NOT NULL
-                GROUP BY YEAR(start_date)
-                ORDER BY año_inicio DESC
-            ''')
-            stats['por_año_inicio'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
+            cursor.execute(self._headcount_statistics_query())
+            columns = [col[0] for col in cursor.description]
+            stats = self._build_headcount_statistics([dict(zip(columns, row)) for row in cursor.fetchall()])
             
-            # 7. Resumen detallado por unidad (con lista de empleados)
+            # Resumen detallado por unidad (con lista de empleados)
+            headcount_view = self._get_headcount_select()
             cursor.execute(f'''
                 SELECT 
                     unit as unidad,
@@ -2617,33 +2820,27 @@ class AccessManagementService:
                     CASE WHEN activo = 1 THEN 'Active' ELSE 'Inactive' END as estado,
                     start_date,
                     inactivation_date
-                FROM {subquery}
+                FROM ({headcount_view}) head
                 WHERE unit IS NOT NULL AND unit != ''
                 ORDER BY unit, full_name
             ''')
             stats['detalle_por_unidad'] = [dict(zip([col[0] for col in cursor.description], row)) for row in cursor.fetchall()]
             
-            # 8. Estadísticas generales
-            cursor.execute(f'''
-                SELECT 
-                    COUNT(*) as total_empleados,
-                    COUNT(CASE WHEN activo = 1 THEN 1 END) as activos,
-                    COUNT(CASE WHEN activo = 0 THEN 1 END) as inactivos,
-                    COUNT(CASE WHEN position IS NOT NULL AND position != '' THEN 1 END) as con_posicion,
-                    COUNT(CASE WHEN start_date IS NOT NULL AND start_date != '' THEN 1 END) as con_fecha_inicio,
-                    COUNT(CASE WHEN manager IS NOT NULL AND manager != '' THEN 1 END) as con_manager,
-                    COUNT(CASE WHEN senior_manager IS NOT NULL AND senior_manager != '' THEN 1 END) as con_senior_manager,
-                    COUNT(CASE WHEN inactivation_date IS NOT NULL THEN 1 END) as con_fecha_inactivacion
-                FROM {subquery}
-            ''')
-            stats['generales'] = dict(zip([col[0] for col in cursor.description], cursor.fetchone()))
-            
             conn.close()
+            if cacheable:
+                self._headcount_stats_cache = (time.monotonic(), copy.deepcopy(stats))
             return stats
             
         except Exception as e:
             return {"error": f"Error obteniendo estadísticas del headcount: {str(e)}"}
 
+    def _headcount_stats_ttl(self) -> float:
+        return float(os.getenv('HEADCOUNT_STATS_TTL', self.HEADCOUNT_STATS_TTL))
+
+    def invalidate_headcount_statistics(self):
+        """Descarta las estadísticas del headcount guardadas en memoria"""
+        self._headcount_stats_cache = None
+
     def get_available_applications(self) -> List[Dict[str, Any]]:
         """Obtiene la lista de aplicaciones disponibles para registros manuales"""
         try:
@@ -2695,31 +2892,19 @@ class AccessManagementService:
             return []
     
     def get_applications_by_position_simple(self, position: str) -> List[Dict[str, Any]]:
-        """Obtiene aplicaciones filtradas por posición (versión simple)"""
+        """Obtiene aplicaciones filtradas por posición (versión simple, desde la caché de la matriz)"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            apps_view = f"({self._get_applications_select()}) apps"
-            
-            cursor.execute(f'''
-                SELECT logical_access_name, description, role_name, unit, subunit
-                FROM {apps_view}
-                WHERE access_status = 'Active' 
-                AND position_role = ?
-                ORDER BY logical_access_name
-            ''', (position,))
-            
             applications = []
-            for row in cursor.fetchall():
+            for app in self.application_cache.find(position_role=position):
+                if self._safe_strip(app.get('access_status')).upper() != 'ACTIVE':
+                    continue
                 applications.append({
-                    'logical_access_name': row[0],
-                    'description': row[1] or '',
-                    'role_name': row[2] or '',
-                    'unit': row[3] or '',
-                    'subunit': row[4] or ''
+                    'logical_access_name': app.get('logical_access_name'),
+                    'description': app.get('description') or '',
+                    'role_name': app.get('role_name') or '',
+                    'unit': app.get('unit') or '',
+                    'subunit': app.get('subunit') or ''
                 })
-            
-            conn.close()
             return applications
             
         except Exception as e:
@@ -2829,10 +3014,25 @@ class AccessManagementService:
         except Exception as e:
             return {"error": f"Error obteniendo estadísticas: {str(e)}"}
 
+    # Filtros de buscar_procesos -> columnas de historico
+    BUSQUEDA_CAMPOS = {
+        'numero_caso': 'case_id',
+        'sid': 'scotia_id',
+        'proceso': 'process_access',
+        'aplicacion': 'app_access_name',
+        'estado': 'status',
+        'fecha': 'record_date',
+        'responsable': 'responsible',
+        'descripcion': 'event_description'
+    }
+
     def buscar_procesos(self, filtros: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         Busca procesos en el historial con filtros opcionales.
         
+        Cada filtro usa el predicado de su tipo (ver services/search_index.py): prefijo
+        para IDs, rango para la fecha y el índice de trigramas para texto libre.
+        
         Args:
             filtros: Diccionario con filtros de búsqueda
             
@@ -2843,55 +3043,27 @@ class AccessManagementService:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Query base
+            # Primera aplicación con ese nombre (búsqueda por IX_applications_name_element)
             query = f'''
-                SELECT h.*, a.logical_access_name, a.description as app_description
+                SELECT h.*, a.name_element as logical_access_name, a.system_description as app_description
                 FROM {self.historico_table} h
-                LEFT JOIN (
-                    SELECT 
-                        logical_access_name,
-                        description,
-                        ROW_NUMBER() OVER (PARTITION BY logical_access_name ORDER BY id) as rn
-                    FROM {self.applications_table}
-                ) a ON h.app_access_name = a.logical_access_name AND a.rn = 1
+                LEFT JOIN {self.applications_table} a ON a.id = (
+                    SELECT MIN(a2.id) FROM {self.applications_table} a2
+                    WHERE a2.name_element = h.app_access_name
+                )
             '''
             
             # Construir WHERE clause basado en filtros
-            where_conditions = []
-            params = []
-            
-            if filtros:
-                for campo, valor in filtros.items():
-                    if valor and valor.strip():
-                        if campo == 'numero_caso':
-                            where_conditions.append("h.case_id LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'sid':
-                            where_conditions.append("h.scotia_id LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'proceso':
-                            where_conditions.append("h.process_access LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'aplicacion':
-                            where_conditions.append("h.app_access_name LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'estado':
-                            where_conditions.append("h.status LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'fecha':
-                            where_conditions.append("h.record_date LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'responsable':
-                            where_conditions.append("h.responsible LIKE ?")
-                            params.append(f"%{valor}%")
-                        elif campo == 'descripcion':
-                            where_conditions.append("h.event_description LIKE ?")
-                            params.append(f"%{valor}%")
+            where_conditions, params = self._search_index().where(
+                [(self.BUSQUEDA_CAMPOS[campo], valor) for campo, valor in (filtros or {}).items()
+                 if campo in self.BUSQUEDA_CAMPOS],
+                alias="h.", cursor=cursor
+            )
             
             if where_conditions:
                 query += " WHERE " + " AND ".join(where_conditions)
             
-            query += " ORDER BY h.record_date DESC"
+            query += " ORDER BY h.record_date DESC, h.id DESC"
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
@@ -2905,6 +3077,7 @@ class AccessManagementService:
             print(f"Error en buscar_procesos: {e}")
             return []
 
+    @transactional
     def assign_accesses(self, scotia_id: str, responsable: str = "Sistema") -> Tuple[bool, str, Dict[str, int]]:
         """
         Asigna accesos automáticamente según la unit y position del empleado.
@@ -2929,12 +3102,14 @@ class AccessManagementService:
             cursor.execute(f'SELECT COUNT(*) FROM {self.historico_table} WHERE scotia_id = ? AND status = \'Pendiente\'', (scotia_id,))
             existing_pending = cursor.fetchone()[0]
             
+            conn.close()
+            
             if existing_pending > 0:
-                conn.close()
                 return False, f"Ya existen {existing_pending} registros pendientes para {scotia_id}. Complete los procesos pendientes antes de crear nuevos.", {'granted': 0, 'revoked': 0}
             
-            # Obtener reporte de conciliación usando el procedimiento almacenado
-            reconciliation_report = self.get_access_reconciliation_report(scotia_id)
+            # Obtener reporte de conciliación usando el procedimiento almacenado (sin caché:
+            # los registros que se generan deben salir del estado actual de la base)
+            reconciliation_report = self.get_access_reconciliation_report(scotia_id, use_cache=False)
             
             if not reconciliation_report.get('success', False):
                 return False, reconciliation_report.get('message', 'Error obteniendo reporte de conciliación'), {'granted': 0, 'revoked': 0}
@@ -2943,9 +3118,7 @@ class AccessManagementService:
             to_grant = data.get('to_grant', [])
             to_revoke = data.get('to_revoke', [])
             
-            # Contadores
-            granted_count = 0
-            revoked_count = 0
+            records = []
             
             # Generar un solo case_id para todo el proceso
             case_id = f"CASE-{datetime.now().strftime('%Y%m%d%H%M%S')}-{scotia_id}"
@@ -2970,12 +3143,7 @@ class AccessManagementService:
                         'status': 'Pendiente',
                         'general_status_ticket': 'En Proceso'
                     }
-                    
-                    success, message = self.create_historical_record(record_data)
-                    if success:
-                        granted_count += 1
-                    else:
-                        print(f"Error creando registro de otorgamiento: {message}")
+                    records.append(record_data)
             
             # Procesar accesos por revocar
             for access_data in to_revoke:
@@ -2997,15 +3165,15 @@ class AccessManagementService:
                         'status': 'Pendiente',
                         'general_status_ticket': 'En Proceso'
                     }
-                    
-                    success, message = self.create_historical_record(record_data)
-                    if success:
-                        revoked_count += 1
-                    else:
-                        print(f"Error creando registro de revocación: {message}")
+                    records.append(record_data)
             
-            conn.close()
+            # Insertar otorgamientos y revocaciones en una sola transacción
+            success, message, created_records = self.create_historical_records(records)
+            if not success:
+                return False, f"Error en assign_accesses: {message}", {'granted': 0, 'revoked': 0}
             
+            granted_count = sum(1 for r in created_records if r['process_access'] == 'onboarding')
+            revoked_count = sum(1 for r in created_records if r['process_access'] == 'offboarding')
             counts = {'granted': granted_count, 'revoked': revoked_count}
             message = f"Proceso completado. Otorgados: {granted_count}, Revocados: {revoked_count}"
             
@@ -3014,7 +3182,33 @@ class AccessManagementService:
         except Exception as e:
             return False, f"Error en assign_accesses: {str(e)}", {'granted': 0, 'revoked': 0}
 
-    def get_access_reconciliation_report(self, scotia_id: str) -> Dict[str, Any]:
+    def get_access_reconciliation_report(self, scotia_id: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Reporte de conciliación de accesos de un empleado (cacheado por SID si fue exitoso).
+        
+        Las escrituras que afectan al SID, a su posición o a sus aplicaciones invalidan la
+        entrada; use_cache=False fuerza el cálculo (por ejemplo, antes de generar registros).
+        Dentro de una unidad de trabajo siempre se calcula, para ver sus propias escrituras.
+        """
+        if not use_cache or self._units().current is not None:
+            return self._load_access_reconciliation_report(scotia_id)
+        return self._results().get_or_load(
+            'reconciliation', scotia_id,
+            lambda: self._load_access_reconciliation_report(scotia_id),
+            tags=self._reconciliation_report_tags,
+            cache_if=lambda report: report.get('success', False)
+        )
+
+    @staticmethod
+    def _reconciliation_report_tags(report: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Posición del empleado y aplicaciones del reporte (para invalidar por matriz)"""
+        data = report.get('data', {})
+        employee = data.get('employee') or {}
+        tags = [SidResultCache.position_tag(employee.get('position'))]
+        for section in ('current_access', 'to_grant', 'to_revoke'):
+            tags.extend(SidResultCache.app_tag(access.get('app_name')) for access in data.get(section, []))
+        return tags
+
+    def _load_access_reconciliation_report(self, scotia_id: str) -> Dict[str, Any]:
         """Obtiene el reporte de conciliación de accesos para un empleado usando procedimiento almacenado"""
         try:
             conn = self.get_connection()
@@ -3104,6 +3298,24 @@ class AccessManagementService:
                 'data': {}
             }
 
+    def reconcile_population(self, scotia_ids: Optional[Iterable[str]] = None,
+                             unidad_subunidad: Optional[str] = None,
+                             position: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Conciliación masiva: un reporte por SID activo en una sola consulta por conjuntos
+        (ver services/population_reconciliation.py). Pensado para la recertificación
+        trimestral de todo el Master_Staff_List.
+        
+        Args:
+            scotia_ids: Limitar a estos SIDs (None = toda la población activa)
+            unidad_subunidad: Filtro opcional por unidad_subunidad del empleado
+            position: Filtro opcional por posición del empleado
+            
+        Returns:
+            Generador de reportes por SID (employee, current_access, to_grant, to_revoke, summary)
+        """
+        return PopulationReconciler(self).reconcile(scotia_ids, unidad_subunidad, position)
+
     def revoke_specific_access(self, scotia_id: str, app_name: str, access_type: str, responsible: str = "Sistema") -> Dict[str, Any]:
         """
         Revoca un acceso específico (flex staff o manual) de un empleado
@@ -3122,7 +3334,7 @@ class AccessManagementService:
             cursor = conn.cursor()
             
             # Verificar que el acceso existe y es del tipo correcto
-            print(f"DEBUG: Buscando acceso {access_type} para {app_name} del empleado {scotia_id}")
+            logger.debug("Buscando acceso %s para %s del empleado %s", access_type, app_name, scotia_id)
             cursor.execute(f'''
                 SELECT h.id, h.app_access_name, h.process_access, h.event_description, h.status
                 FROM {self.historico_table} h
@@ -3135,9 +3347,9 @@ class AccessManagementService:
             
             access_record = cursor.fetchone()
             
-            if not access_record:
-                print(f"DEBUG: No se encontró acceso {access_type} con status 'Pendiente'. Verificando otros estados...")
-                # Buscar con otros estados
+            if not access_record and debug_enabled(logger):
+                logger.debug("No se encontró acceso %s con status 'Pendiente'. Verificando otros estados...", access_type)
+                # Buscar con otros estados (solo para diagnóstico)
                 cursor.execute(f'''
                     SELECT h.id, h.app_access_name, h.process_access, h.event_description, h.status
                     FROM {self.historico_table} h
@@ -3148,10 +3360,11 @@ class AccessManagementService:
                 ''', (scotia_id, app_name, access_type))
                 
                 all_records = cursor.fetchall()
-                print(f"DEBUG: Registros encontrados para {app_name} con {access_type}: {len(all_records)}")
+                logger.debug("Registros encontrados para %s con %s: %s", app_name, access_type, len(all_records))
                 for record in all_records:
-                    print(f"DEBUG: - ID: {record[0]}, App: {record[1]}, Process: {record[2]}, Status: {record[4]}")
-                
+                    logger.debug("- ID: %s, App: %s, Process: %s, Status: %s", record[0], record[1], record[2], record[4])
+
+            if not access_record:
                 return {
                     'success': False,
                     'message': f'No se encontró acceso {access_type} activo para {app_name}'
@@ -3186,9 +3399,11 @@ class AccessManagementService:
                     comment = COALESCE(comment, '') + ' | Revocado por ' + ?
                 WHERE id = ?
             ''', (datetime.now(), responsible, access_record[0]))
+            self.refresh_current_access(cursor, [scotia_id])
             
             conn.commit()
             conn.close()
+            self.invalidate_employee_cache(scotia_id)
             
             return {
                 'success': True,
@@ -3207,7 +3422,8 @@ class AccessManagementService:
 
     def get_revocable_accesses(self, scotia_id: str) -> List[Dict[str, Any]]:
         """
-        Obtiene los accesos que pueden ser revocados (flex staff y manuales)
+        Obtiene los accesos que pueden ser revocados (flex staff y manuales vigentes,
+        desde current_access_dr)
         
         Args:
             scotia_id: ID del empleado
@@ -3220,18 +3436,18 @@ class AccessManagementService:
             cursor = conn.cursor()
             
             cursor.execute(f'''
-                SELECT DISTINCT 
-                    h.app_access_name,
-                    h.process_access,
-                    h.event_description,
-                    h.record_date,
+                SELECT
+                    s.app_access_name,
+                    s.source_process,
+                    s.event_description,
+                    s.granted_at,
                     h.responsible,
                     h.case_id
-                FROM {self.historico_table} h
-                WHERE h.scotia_id = ? 
-                AND h.process_access IN ('flex_staff', 'manual_access')
-                AND h.status = 'Pendiente'
-                ORDER BY h.record_date DESC
+                FROM {self.current_access_table} s
+                LEFT JOIN {self.historico_table} h ON h.id = s.historico_id
+                WHERE s.scotia_id = ?
+                AND s.source_process IN ('flex_staff', 'manual_access')
+                ORDER BY s.granted_at DESC
             ''', (scotia_id,))
             
             accesses = []
@@ -0,0 +1,106 @@
+"""
+Caché en memoria de la matriz de aplicaciones (applications_dr)
+
+La matriz es pequeña y cambia poco, así que se mantiene una foto indexada por
+(unidad_subunidad, position_role, logical_access_name) normalizados y por nombre.
+El ciclo de vida (TTL, sonda COUNT + CHECKSUM e invalidación) es el de
+services/table_snapshot.py; la foto se invalida explícitamente desde
+create_application / update_application / delete_application.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from services.table_snapshot import TableSnapshot, normalize
+
+
+class ApplicationMatrixCache(TableSnapshot):
+    """Foto indexada y segura para hilos de la matriz de aplicaciones"""
+
+    DEFAULT_TTL = 300            # Segundos antes de recargar la foto completa
+    DEFAULT_PROBE_INTERVAL = 30  # Segundos entre sondas de cambios (COUNT + CHECKSUM)
+    DESCRIPTION = 'la matriz de aplicaciones'
+
+    normalize = staticmethod(normalize)
+
+    def __init__(self, connection_factory: Callable[[], Any], select_query: str, table_name: str,
+                 ttl: float = DEFAULT_TTL, probe_interval: Optional[float] = DEFAULT_PROBE_INTERVAL):
+        super().__init__(connection_factory, table_name, ttl=ttl, probe_interval=probe_interval)
+        self._select_query = select_query
+
+    # ------------------------------------------------------------------
+    # Consultas sobre la foto
+    # ------------------------------------------------------------------
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """Todas las aplicaciones, ordenadas por logical_access_name"""
+        return [dict(row) for row in self._snapshot()[0]]
+
+    def get_by_name(self, logical_access_name: str) -> Optional[Dict[str, Any]]:
+        """Primera aplicación con ese logical_access_name (sin distinguir mayúsculas)"""
+        by_name = self._snapshot()[1]['by_name']
+        row = by_name.get(self.normalize(logical_access_name))
+        return dict(row) if row else None
+
+    def get_by_triplet(self, unidad_subunidad: str, position_role: str,
+                       logical_access_name: str) -> Optional[Dict[str, Any]]:
+        """Aplicación por tripleta normalizada (unidad_subunidad, position_role, logical_access_name)"""
+        by_triplet = self._snapshot()[1]['by_triplet']
+        key = (self.normalize(unidad_subunidad), self.normalize(position_role), self.normalize(logical_access_name))
+        row = by_triplet.get(key)
+        return dict(row) if row else None
+
+    def find(self, unidad_subunidad: Optional[str] = None, position_role: Optional[str] = None,
+             subunit: Optional[str] = None, role_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Filtra la matriz por igualdad normalizada; los filtros vacíos no se aplican"""
+        rows, indexes = self._snapshot()
+        if unidad_subunidad and position_role:
+            rows = indexes['by_position'].get((self.normalize(unidad_subunidad), self.normalize(position_role)), [])
+        else:
+            if unidad_subunidad:
+                target = self.normalize(unidad_subunidad)
+                rows = [r for r in rows if self.normalize(r.get('unidad_subunidad')) == target]
+            if position_role:
+                target = self.normalize(position_role)
+                rows = [r for r in rows if self.normalize(r.get('position_role')) == target]
+        if subunit:
+            target = self.normalize(subunit)
+            rows = [r for r in rows if self.normalize(r.get('subunit')) == target]
+        if role_name:
+            target = self.normalize(role_name)
+            rows = [r for r in rows if self.normalize(r.get('role_name')) == target]
+        return [dict(row) for row in rows]
+
+    def distinct_values(self, column: str,
+                        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[str]:
+        """Valores distintos y no vacíos de una columna, ordenados (como SELECT DISTINCT ... ORDER BY)"""
+        seen = {}
+        for row in self._snapshot()[0]:
+            if predicate is not None and not predicate(row):
+                continue
+            value = row.get(column)
+            if value is None or str(value).strip() == '':
+                continue
+            seen.setdefault(str(value).rstrip().casefold(), value)
+        return sorted(seen.values(), key=lambda v: str(v).casefold())
+
+    # ------------------------------------------------------------------
+    # Carga e índices
+    # ------------------------------------------------------------------
+
+    def _fetch_rows(self, cursor) -> List[Dict[str, Any]]:
+        cursor.execute(f"{self._select_query} ORDER BY apps.logical_access_name")
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, values)) for values in cursor.fetchall()]
+
+    def _build_indexes(self, rows: List[Dict[str, Any]]) -> Dict[str, Dict[Any, Any]]:
+        """Índices por tripleta, por (unidad_subunidad, position_role) y por nombre"""
+        by_triplet = {}
+        by_position = {}
+        by_name = {}
+        for row in rows:
+            uds = self.normalize(row.get('unidad_subunidad'))
+            position = self.normalize(row.get('position_role'))
+            name = self.normalize(row.get('logical_access_name'))
+            by_triplet.setdefault((uds, position, name), row)
+            by_position.setdefault((uds, position), []).append(row)
+            by_name.setdefault(name, row)
+        return {'by_triplet': by_triplet, 'by_position': by_position, 'by_name': by_name}
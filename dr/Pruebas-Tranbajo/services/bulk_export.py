@@ -0,0 +1,363 @@
+"""
+Exportación masiva de historico_dr y Master_Staff_List a CSV o Parquet
+
+Para auditorías se exportan las tablas completas. En lugar de armar una lista de
+diccionarios, un DataFrame y un Excel, el resultado se recorre con fetchmany sobre
+el cursor del servidor (forward-only en SQL Server) y cada lote se escribe de
+inmediato al archivo: la memoria usada depende del tamaño del lote, no de la tabla.
+
+- CSV, opcionalmente comprimido con gzip o zstd (zstd requiere el paquete zstandard)
+- Parquet, un row group por lote (requiere pyarrow; compresión snappy, gzip o zstd)
+- Proyección de columnas y filtro por rango de fechas sobre una columna de fecha
+
+El archivo se escribe con sufijo .part y se renombra al terminar, así una
+exportación interrumpida no deja un archivo que parezca completo.
+
+    python -m services.bulk_export historico output/historico_2024.csv.gz --from 2024-01-01 --to 2024-12-31
+    python -m services.bulk_export headcount output/headcount.parquet --columns scotia_id,department,status
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config import get_database_connection
+
+DateLike = Union[str, date, datetime, None]
+
+# Tablas exportables: atributo con el nombre de la tabla, columnas de fecha filtrables y orden
+DATASETS = {
+    'historico': {
+        'table_attr': 'historico_table',
+        'date_columns': ('record_date', 'request_date', 'closing_date_app', 'closing_date_ticket',
+                         'confirmation_by_user'),
+        'order_by': 'id'
+    },
+    'headcount': {
+        'table_attr': 'headcount_table',
+        'date_columns': ('begdate', 'exit_date', 'hiring_date_bns', 'hiring_date_gbs', 'hiring_date_aml', 'dob'),
+        'order_by': 'scotia_id'
+    },
+}
+
+FORMATS = ('csv', 'parquet')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+# =====================================================
+# DESTINOS (un lote a la vez)
+# =====================================================
+
+class _CsvSink:
+    """CSV con encabezado; gzip con la librería estándar, zstd con zstandard"""
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str]):
+        if compression == 'gzip':
+            self._handle = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("La compresión zstd requiere el paquete 'zstandard' (pip install zstandard)")
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+            self._handle = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        else:
+            self._handle = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(columns)
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._handle.close()
+
+
+class _ParquetSink:
+    """Parquet con pyarrow: el esquema sale de los tipos de cursor.description
+
+    Así una columna que viene toda en NULL en el primer lote (p. ej. exit_date)
+    conserva su tipo real. Solo las columnas sin tipo informado por el driver se
+    infieren del primer lote (las que no tienen valores, como texto).
+    """
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str],
+                 description: Optional[Sequence[Sequence[Any]]] = None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("La exportación a Parquet requiere el paquete 'pyarrow' (pip install pyarrow)")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._columns = columns
+        self._compression = compression or 'snappy'
+        self._writer = None
+        self._schema = None
+        self._declared = [self.arrow_type(pyarrow, column) for column in description or []]
+        if len(self._declared) != len(columns):
+            self._declared = [None] * len(columns)
+
+    @staticmethod
+    def arrow_type(pa, column: Sequence[Any]):
+        """Tipo Arrow para una entrada de cursor.description (None si el driver no lo informa)"""
+        type_code = column[1] if len(column) > 1 else None
+        if type_code is None:
+            return None
+        if type_code is bool:
+            return pa.bool_()
+        if type_code is int:
+            return pa.int64()
+        if type_code is float:
+            return pa.float64()
+        if type_code is Decimal:
+            precision = column[4] if len(column) > 4 and column[4] else 38
+            scale = column[5] if len(column) > 5 and column[5] is not None else 0
+            return pa.decimal128(min(int(precision), 38), int(scale))
+        if type_code is datetime:
+            return pa.timestamp('us')
+        if type_code is date:
+            return pa.date32()
+        if type_code is time:
+            return pa.time64('us')
+        if type_code in (bytes, bytearray):
+            return pa.binary()
+        if type_code is str:
+            return pa.string()
+        return None
+
+    def _table(self, rows: Sequence[Sequence[Any]]):
+        data = {column: [row[i] for row in rows] for i, column in enumerate(self._columns)}
+        if self._schema is None:
+            inferred = self._pa.Table.from_pydict(data).schema
+            fields = []
+            for field, declared in zip(inferred, self._declared):
+                if declared is not None:
+                    fields.append(field.with_type(declared))
+                elif self._pa.types.is_null(field.type):
+                    fields.append(field.with_type(self._pa.string()))
+                else:
+                    fields.append(field)
+            self._schema = self._pa.schema(fields)
+        return self._pa.Table.from_pydict(data, schema=self._schema)
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]):
+        table = self._table(rows)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, self._schema, compression=self._compression)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is None:
+            # Sin filas: archivo válido con el esquema (texto donde el driver no informa el tipo)
+            self._schema = self._pa.schema([(column, declared or self._pa.string())
+                                            for column, declared in zip(self._columns, self._declared)])
+            self._writer = self._pq.ParquetWriter(self._path, self._schema, compression=self._compression)
+        self._writer.close()
+
+
+# =====================================================
+# SERVICIO
+# =====================================================
+
+class BulkExportService:
+    """Exporta tablas completas (o filtradas) directo desde el cursor a CSV/Parquet"""
+
+    BATCH_SIZE = 10000
+
+    def __init__(self):
+        from services.access_management_service import access_service
+        self.db_manager = get_database_connection()
+        self.historico_table = access_service.historico_table
+        self.headcount_table = access_service.headcount_table
+
+    def get_connection(self):
+        """Obtiene una conexión a la base de datos"""
+        return self.db_manager.get_connection()
+
+    @staticmethod
+    def infer_format(path: str) -> Tuple[str, Optional[str]]:
+        """Formato y compresión según la extensión (.parquet, .csv.gz, .csv.zst, .csv)"""
+        lower = path.lower()
+        if lower.endswith('.parquet'):
+            return 'parquet', None
+        if lower.endswith('.gz'):
+            return 'csv', 'gzip'
+        if lower.endswith('.zst'):
+            return 'csv', 'zstd'
+        return 'csv', None
+
+    @staticmethod
+    def _parse_date(value: DateLike) -> Optional[date]:
+        if value in (None, ''):
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+
+    def table_columns(self, dataset: str) -> List[str]:
+        """Columnas reales de la tabla (consulta sin filas)"""
+        table = getattr(self, DATASETS[dataset]['table_attr'])
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT TOP 0 * FROM {table}")
+            return [description[0] for description in cursor.description]
+        finally:
+            conn.close()
+
+    def build_query(self, dataset: str, columns: List[str], date_column: Optional[str] = None,
+                    date_from: DateLike = None, date_to: DateLike = None) -> Tuple[str, List[Any]]:
+        """
+        SELECT con proyección y rango de fechas [date_from, date_to] (ambos días incluidos)
+
+        Las columnas ya deben estar validadas contra table_columns.
+        """
+        spec = DATASETS[dataset]
+        table = getattr(self, spec['table_attr'])
+        conditions = []
+        params: List[Any] = []
+        start, end = self._parse_date(date_from), self._parse_date(date_to)
+        if start or end:
+            date_column = date_column or spec['date_columns'][0]
+            if start:
+                conditions.append(f"[{date_column}] >= ?")
+                params.append(start)
+            if end:
+                conditions.append(f"[{date_column}] < ?")
+                params.append(end + timedelta(days=1))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = ', '.join(f"[{column}]" for column in columns)
+        return f"SELECT {select} FROM {table} {where} ORDER BY [{spec['order_by']}]", params
+
+    def export(self, dataset: str, path: str, fmt: Optional[str] = None,
+               columns: Optional[Sequence[str]] = None, date_from: DateLike = None, date_to: DateLike = None,
+               date_column: Optional[str] = None, compression: Optional[str] = None,
+               batch_size: Optional[int] = None,
+               progress: Optional[Callable[[int], None]] = None) -> Tuple[bool, str, int]:
+        """
+        Exporta una tabla a CSV o Parquet leyendo por lotes con fetchmany
+
+        Args:
+            dataset: 'historico' o 'headcount'
+            path: Archivo de salida
+            fmt: 'csv' o 'parquet' (por defecto según la extensión)
+            columns: Columnas a exportar (None = todas)
+            date_from / date_to: Rango de fechas 'YYYY-MM-DD' (ambos incluidos, opcionales)
+            date_column: Columna de fecha del filtro (por defecto la primera de DATASETS)
+            compression: None, 'gzip' o 'zstd' (por defecto según la extensión en CSV)
+            batch_size: Filas por fetchmany (por defecto BATCH_SIZE)
+            progress: Se llama con el total de filas escritas después de cada lote
+
+        Returns:
+            Tupla (éxito, mensaje, filas exportadas)
+        """
+        if dataset not in DATASETS:
+            return False, f"Tabla no exportable: {dataset} (opciones: {', '.join(DATASETS)})", 0
+        inferred_format, inferred_compression = self.infer_format(path)
+        fmt = fmt or inferred_format
+        compression = compression if compression is not None else (inferred_compression if fmt == 'csv' else None)
+        if fmt not in FORMATS:
+            return False, f"Formato no soportado: {fmt}", 0
+        if compression not in COMPRESSIONS:
+            return False, f"Compresión no soportada: {compression}", 0
+        if date_column and date_column not in DATASETS[dataset]['date_columns']:
+            return False, f"Columna de fecha no válida para {dataset}: {date_column}", 0
+
+        conn = None
+        sink = None
+        partial_path = f"{path}.part"
+        try:
+            available = self.table_columns(dataset)
+            if columns:
+                by_lower = {column.lower(): column for column in available}
+                unknown = [column for column in columns if column.lower() not in by_lower]
+                if unknown:
+                    return False, f"Columnas desconocidas en {dataset}: {', '.join(unknown)}", 0
+                selected = [by_lower[column.lower()] for column in columns]
+            else:
+                selected = available
+            query, params = self.build_query(dataset, selected, date_column, date_from, date_to)
+
+            batch_size = batch_size or self.BATCH_SIZE
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(query, params)
+
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            if fmt == 'parquet':
+                sink = _ParquetSink(partial_path, selected, compression, cursor.description)
+            else:
+                sink = _CsvSink(partial_path, selected, compression)
+
+            total = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                sink.write_batch(rows)
+                total += len(rows)
+                if progress:
+                    progress(total)
+
+            sink.close()
+            sink = None
+            os.replace(partial_path, path)
+            return True, f"{total} filas de {dataset} exportadas a {path}", total
+
+        except Exception as e:
+            return False, f"Error exportando {dataset}: {str(e)}", 0
+        finally:
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception:
+                    pass
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            if conn is not None:
+                conn.close()
+
+
+# Instancia global para usar en toda la aplicación
+bulk_export_service = BulkExportService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta historico_dr o Master_Staff_List a CSV/Parquet por lotes")
+    parser.add_argument('dataset', choices=sorted(DATASETS), help="Tabla a exportar")
+    parser.add_argument('output', help="Archivo de salida (.csv, .csv.gz, .csv.zst o .parquet)")
+    parser.add_argument('--format', choices=FORMATS, help="Formato (por defecto según la extensión)")
+    parser.add_argument('--compression', choices=[c for c in COMPRESSIONS if c], help="gzip o zstd")
+    parser.add_argument('--columns', default='', help="Columnas separadas por coma (vacío = todas)")
+    parser.add_argument('--from', dest='date_from', help="Fecha inicial YYYY-MM-DD (incluida)")
+    parser.add_argument('--to', dest='date_to', help="Fecha final YYYY-MM-DD (incluida)")
+    parser.add_argument('--date-column', help="Columna del filtro de fechas")
+    parser.add_argument('--batch-size', type=int, default=BulkExportService.BATCH_SIZE, help="Filas por lote")
+    args = parser.parse_args()
+
+    columns = [column.strip() for column in args.columns.split(',') if column.strip()] or None
+    success, message, _ = bulk_export_service.export(
+        args.dataset, args.output, fmt=args.format, columns=columns,
+        date_from=args.date_from, date_to=args.date_to, date_column=args.date_column,
+        compression=args.compression, batch_size=args.batch_size,
+        progress=lambda total: print(f"  {total} filas...", end='\r')
+    )
+    print(message)
+    if not success:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Estado materializado de accesos actuales (current_access_dr)
+
+Una fila por (SID, aplicación) con el último otorgamiento completado que no fue
+revocado después: proceso de origen, fecha de otorgamiento, posición flex staff y
+vencimiento. Evita reconstruir "qué tiene hoy este SID" con funciones de ventana y
+NOT EXISTS sobre todo el historial en cada lectura.
+
+El estado se recalcula por SID dentro de la MISMA transacción que escribe en
+historico_dr (inserciones, cambios de estado, borrados): refresh(cursor, sids) no
+hace commit, lo hace el llamador. rebuild() lo reconstruye completo, por ejemplo
+después de cargas masivas hechas por fuera de la aplicación:
+
+    python -m services.current_access_state --rebuild
+"""
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+class CurrentAccessState:
+    """Mantiene y consulta la tabla de accesos actuales derivada de historico_dr"""
+
+    # Procesos que otorgan un acceso y procesos que lo retiran
+    GRANT_PROCESSES = ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')
+    REVOKE_PROCESSES = ('offboarding', 'flex_staff_return')
+    # Estados (normalizados) que cuentan como efectivos: flujo actual y legado
+    COMPLETED_STATUSES = ('CLOSED COMPLETED', 'COMPLETADO')
+
+    STATE_COLUMNS = (
+        'scotia_id', 'app_key', 'app_access_name', 'source_process', 'historico_id',
+        'granted_at', 'subunit', 'event_description', 'status', 'flex_position', 'expires_at'
+    )
+
+    def __init__(self, historico_table: str, state_table: str, max_in_params: int = 1000):
+        self.historico_table = historico_table
+        self.state_table = state_table
+        self.max_in_params = max_in_params
+
+    @staticmethod
+    def _sql_list(values: Sequence[str]) -> str:
+        """Lista literal para IN (solo constantes de esta clase, nunca datos del usuario)"""
+        return ', '.join(f"'{value}'" for value in values)
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def refresh(self, cursor, scotia_ids: Iterable[Any]) -> int:
+        """
+        Recalcula el estado de los SIDs indicados usando el cursor (y la transacción) del llamador
+
+        Returns:
+            Número de filas de estado escritas
+        """
+        ids = sorted({str(sid).strip() for sid in scotia_ids if sid is not None and str(sid).strip()})
+        written = 0
+        for start in range(0, len(ids), self.max_in_params):
+            chunk = ids[start:start + self.max_in_params]
+            placeholders = ', '.join('?' for _ in chunk)
+            cursor.execute(f"DELETE FROM {self.state_table} WHERE scotia_id IN ({placeholders})", chunk)
+            cursor.execute(self._insert_latest_query(f"AND h.scotia_id IN ({placeholders})"), chunk)
+            written += max(cursor.rowcount, 0)
+        return written
+
+    def rebuild(self, cursor) -> int:
+        """Reconstruye la tabla completa desde historico_dr (sin commit)"""
+        cursor.execute(f"DELETE FROM {self.state_table}")
+        cursor.execute(self._insert_latest_query(""))
+        return max(cursor.rowcount, 0)
+
+    def _insert_latest_query(self, sid_filter: str) -> str:
+        """INSERT ... SELECT del último evento completado por (SID, aplicación) si es un otorgamiento"""
+        processes = self.GRANT_PROCESSES + self.REVOKE_PROCESSES
+        return f"""
+            INSERT INTO {self.state_table} ({', '.join(self.STATE_COLUMNS)})
+            SELECT
+                u.scotia_id,
+                u.app_key,
+                LTRIM(RTRIM(u.app_access_name)),
+                u.process_access,
+                u.id,
+                u.record_date,
+                u.subunit,
+                u.event_description,
+                u.status,
+                CASE WHEN u.process_access = 'flex_staff' AND p.flex_start > 0
+                     THEN LTRIM(RTRIM(SUBSTRING(u.event_description, p.flex_start + 14,
+                          CHARINDEX(')', u.event_description, p.flex_start) - p.flex_start - 14)))
+                END,
+                NULL
+            FROM (
+                SELECT
+                    h.id, h.scotia_id, h.app_access_name, h.process_access, h.record_date,
+                    h.subunit, h.event_description, h.status,
+                    UPPER(LTRIM(RTRIM(h.app_access_name))) AS app_key,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY h.scotia_id, UPPER(LTRIM(RTRIM(h.app_access_name)))
+                        ORDER BY h.record_date DESC, h.id DESC
+                    ) AS rn
+                FROM {self.historico_table} h
+                WHERE UPPER(LTRIM(RTRIM(h.status))) IN ({self._sql_list(self.COMPLETED_STATUSES)})
+                AND h.process_access IN ({self._sql_list(processes)})
+                AND LTRIM(RTRIM(ISNULL(h.app_access_name, ''))) <> ''
+                {sid_filter}
+            ) u
+            CROSS APPLY (SELECT CHARINDEX('(flex staff - ', u.event_description) AS flex_start) p
+            WHERE u.rn = 1
+            AND u.process_access IN ({self._sql_list(self.GRANT_PROCESSES)})
+        """
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+
+    def fetch(self, cursor, scotia_id: str, processes: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Accesos actuales de un SID (búsqueda por clave primaria), más recientes primero"""
+        params: List[Any] = [str(scotia_id).strip()]
+        process_filter = ""
+        if processes:
+            process_filter = f"AND source_process IN ({', '.join('?' for _ in processes)})"
+            params.extend(processes)
+        cursor.execute(f"""
+            SELECT
+                historico_id AS id,
+                scotia_id,
+                app_access_name,
+                source_process AS process_access,
+                granted_at AS record_date,
+                subunit,
+                event_description,
+                status,
+                flex_position,
+                expires_at
+            FROM {self.state_table}
+            WHERE scotia_id = ?
+            {process_filter}
+            ORDER BY granted_at DESC
+        """, params)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento de la tabla de accesos actuales")
+    parser.add_argument('--rebuild', action='store_true', help="Reconstruye current_access_dr desde historico_dr")
+    parser.add_argument('--sid', action='append', default=[], help="Recalcula solo este SID (se puede repetir)")
+    args = parser.parse_args()
+
+    if not args.rebuild and not args.sid:
+        parser.print_help()
+        return
+
+    from services.access_management_service import access_service
+    success, message = access_service.rebuild_current_access_state(args.sid or None)
+    print(message)
+    if not success:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,297 +1,332 @@
 """
 Servicio para obtener valores únicos de la base de datos para dropdowns
+
+Todos los dropdowns se llenan con una sola consulta sobre applications_dr (un
+SELECT DISTINCT por columna unidos con UNION ALL: una ida y vuelta en lugar de
+once). Los valores quedan en memoria y se guardan en un archivo local junto con
+la firma de la tabla (COUNT + CHECKSUM), así la aplicación arranca con los
+dropdowns llenos sin esperar a SQL Server. La firma se vuelve a comparar en
+segundo plano cada probe_interval segundos y cuando se invalida la matriz de
+aplicaciones (create/update/delete_application); si cambió, se recargan los
+valores y se reescribe el archivo.
 """
 from services.access_management_service import access_service
+from services.table_snapshot import signature_query
+import json
+import os
 import pyodbc
-from typing import List, Dict, Any
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 class DropdownService:
     """Servicio para obtener valores únicos de la base de datos"""
-    
+
+    # Dropdown -> columna de applications_dr
+    DROPDOWN_COLUMNS = (
+        ('units', 'unit'),
+        ('subunits', 'service'),
+        ('positions', 'role'),
+        ('roles', 'roles_and_profiles'),
+        ('jurisdictions', 'system_jurisdiction'),
+        ('system_owners', 'application_owner'),
+        ('categories', 'critical_non_critical'),
+        ('access_types', 'type_of_element'),
+        ('access_statuses', 'status'),
+        ('authentication_methods', 'log_in_information')
+    )
+
+    # Valores por defecto de unidad/subunidad cuando la matriz está vacía
+    DEFAULT_UNIDAD_SUBUNIDAD = ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura",
+                                "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas",
+                                "Operaciones/Logística", "Legal/Compliance"]
+
+    CACHE_FILE_NAME = 'dropdown_cache.json'
+    APP_DATA_DIR = 'GAMLO'  # Carpeta en %LOCALAPPDATA% para el ejecutable empaquetado
+    DEFAULT_PROBE_INTERVAL = 60  # Segundos entre comparaciones de la firma en segundo plano
+    CACHE_FILE_VERSION = 1
+
     def __init__(self):
         self.access_service = access_service
         self.applications_table = self.access_service.applications_table
-    
+        self.application_cache = self.access_service.application_cache
+        # DROPDOWN_CACHE_FILE vacío desactiva el archivo local
+        self.cache_file = os.getenv('DROPDOWN_CACHE_FILE', self.default_cache_file())
+        self.probe_interval = float(os.getenv('DROPDOWN_PROBE_INTERVAL', self.DEFAULT_PROBE_INTERVAL))
+        self._reset_state()
+        # Cambios en la matriz hechos desde esta aplicación -> recarga en segundo plano
+        self.application_cache.add_invalidation_listener(lambda: self.refresh_async(force=True))
+
+    @classmethod
+    def default_cache_file(cls) -> str:
+        """
+        Ruta por defecto del archivo local de dropdowns
+        
+        Desde el código fuente queda en database/. Empaquetado con pyinstaller
+        (--onefile) __file__ apunta a la carpeta temporal _MEIPASS, que se borra al
+        cerrar; ahí se usa la carpeta GAMLO de %LOCALAPPDATA% o, si no existe, la del ejecutable.
+        """
+        if getattr(sys, 'frozen', False):
+            local_app_data = os.getenv('LOCALAPPDATA')
+            if local_app_data:
+                return os.path.join(local_app_data, cls.APP_DATA_DIR, cls.CACHE_FILE_NAME)
+            return os.path.join(os.path.dirname(os.path.abspath(sys.executable)), cls.CACHE_FILE_NAME)
+        return os.path.join(os.path.dirname(__file__), '..', 'database', cls.CACHE_FILE_NAME)
+
+    def _reset_state(self):
+        """Estado de la caché: valores del archivo local (si hay) y control del hilo de recarga"""
+        self._lock = threading.RLock()
+        self._values: Optional[Dict[str, List[str]]] = None
+        self._signature: Optional[List[Optional[str]]] = None
+        self._checked_at = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._pending = False
+        self._pending_force = False
+        self._load_cache_file()
+
     def get_connection(self) -> pyodbc.Connection:
         """Obtiene una conexión a la base de datos"""
         return self.access_service.get_connection()
-    
-    def get_unique_units(self) -> List[str]:
-        """Obtiene las unidades únicas de la base de datos"""
+
+    # ------------------------------------------------------------------
+    # Consulta agrupada
+    # ------------------------------------------------------------------
+
+    def _dropdown_query(self) -> str:
+        """Un SELECT DISTINCT por dropdown en una sola instrucción (columnas campo, valor)"""
+        table = self.applications_table
+        parts = [
+            f"SELECT DISTINCT '{key}' AS campo, {column} AS valor FROM {table} "
+            f"WHERE {column} IS NOT NULL AND LTRIM(RTRIM({column})) <> ''"
+            for key, column in self.DROPDOWN_COLUMNS
+        ]
+        # Misma expresión que unidad_subunidad en _get_applications_select
+        parts.append(
+            f"SELECT DISTINCT 'unidad_subunidad' AS campo, "
+            f"CONCAT(ISNULL(unit, ''), CASE WHEN unit IS NOT NULL AND service IS NOT NULL THEN ' / ' ELSE '' END, "
+            f"ISNULL(service, '')) AS valor FROM {table} "
+            f"WHERE LTRIM(RTRIM(ISNULL(unit, ''))) <> '' OR LTRIM(RTRIM(ISNULL(service, ''))) <> ''"
+        )
+        return "\nUNION ALL\n".join(parts)
+
+    @staticmethod
+    def _signature_of(row) -> Optional[List[Optional[str]]]:
+        """Firma serializable (se guarda en JSON) de COUNT + CHECKSUM"""
+        if not row:
+            return None
+        return [None if value is None else str(value) for value in row]
+
+    def _probe(self, cursor) -> Optional[List[Optional[str]]]:
+        cursor.execute(signature_query(self.applications_table))
+        return self._signature_of(cursor.fetchone())
+
+    def _fetch_values(self, cursor) -> Dict[str, List[str]]:
+        """Ejecuta la consulta agrupada y ordena cada lista (como SELECT DISTINCT ... ORDER BY)"""
+        cursor.execute(self._dropdown_query())
+        grouped: Dict[str, Dict[str, str]] = {key: {} for key, _ in self.DROPDOWN_COLUMNS}
+        grouped['unidad_subunidad'] = {}
+        for campo, valor in cursor.fetchall():
+            if valor is None or str(valor).strip() == '':
+                continue
+            grouped[campo].setdefault(str(valor).rstrip().casefold(), str(valor))
+        return {key: sorted(seen.values(), key=str.casefold) for key, seen in grouped.items()}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de la caché
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = True) -> Dict[str, List[str]]:
+        """
+        Compara la firma de applications_dr y recarga los valores si cambió
+
+        Args:
+            force: Recargar aunque la firma no haya cambiado (la sonda no ve todas
+                   las modificaciones en todos los motores)
+
+        Returns:
+            Valores actuales de los dropdowns
+        """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT unit 
-                FROM {self.applications_table} 
-                WHERE unit IS NOT NULL AND unit != ''
-                ORDER BY unit
-            """)
-            
-            units = [row[0] for row in cursor.fetchall()]
+            signature = self._probe(cursor)
+            with self._lock:
+                unchanged = not force and self._values is not None and signature == self._signature
+            values = None if unchanged else self._fetch_values(cursor)
+        finally:
             conn.close()
-            
-            return units
-            
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if values is not None:
+                self._values = values
+                self._signature = signature
+            current = self._values
+        if values is not None:
+            self._save_cache_file(values, signature)
+        return current
+
+    def refresh_async(self, force: bool = False):
+        """Programa refresh() en un hilo de fondo (si ya hay uno, se repite al terminar)"""
+        with self._lock:
+            self._pending = True
+            self._pending_force = self._pending_force or force
+            if self._refresh_thread is not None:
+                return
+            thread = self._refresh_thread = threading.Thread(
+                target=self._refresh_loop, name='dropdown-refresh', daemon=True)
+        thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._refresh_thread = None
+                    return
+                force = self._pending_force
+                self._pending = self._pending_force = False
+            try:
+                self.refresh(force=force)
+            except Exception as e:
+                print(f"Error actualizando valores de dropdowns: {e}")
+
+    def wait_for_refresh(self, timeout: Optional[float] = None):
+        """Espera a que termine la recarga en segundo plano (si hay una en curso)"""
+        with self._lock:
+            thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _load_cache_file(self):
+        """Carga los valores guardados en el archivo local (se ignora si no corresponde a esta tabla)"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get('version') != self.CACHE_FILE_VERSION or payload.get('table') != self.applications_table:
+                return
+            values = payload.get('values') or {}
+            expected = [key for key, _ in self.DROPDOWN_COLUMNS] + ['unidad_subunidad']
+            if not all(isinstance(values.get(key), list) for key in expected):
+                return
+            self._values = {key: [str(value) for value in values[key]] for key in expected}
+            self._signature = payload.get('signature')
         except Exception as e:
-            print(f"Error obteniendo unidades: {e}")
-            return []
-    
-    def get_unique_subunits(self) -> List[str]:
-        """Obtiene las subunidades únicas de la base de datos"""
+            print(f"Error leyendo caché de dropdowns {self.cache_file}: {e}")
+
+    def _save_cache_file(self, values: Dict[str, List[str]], signature: Optional[List[Optional[str]]]):
+        """Escribe el archivo local de forma atómica (archivo temporal + reemplazo)"""
+        if not self.cache_file:
+            return
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT service 
-                FROM {self.applications_table} 
-                WHERE service IS NOT NULL AND service != ''
-                ORDER BY service
-            """)
-            
-            subunits = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return subunits
-            
+            directory = os.path.dirname(os.path.abspath(self.cache_file))
+            os.makedirs(directory, exist_ok=True)
+            payload = {
+                'version': self.CACHE_FILE_VERSION,
+                'table': self.applications_table,
+                'signature': signature,
+                'saved_at': datetime.now().isoformat(timespec='seconds'),
+                'values': values
+            }
+            temp_file = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=1)
+            os.replace(temp_file, self.cache_file)
         except Exception as e:
-            print(f"Error obteniendo subunidades: {e}")
-            return []
-    
-    def get_unique_positions(self) -> List[str]:
-        """Obtiene las posiciones únicas de la base de datos"""
+            print(f"Error guardando caché de dropdowns {self.cache_file}: {e}")
+
+    # ------------------------------------------------------------------
+    # Valores
+    # ------------------------------------------------------------------
+
+    def get_all_dropdown_values(self) -> Dict[str, List[str]]:
+        """Obtiene todos los valores únicos para los dropdowns"""
+        with self._lock:
+            values = self._values
+            stale = time.monotonic() - self._checked_at >= self.probe_interval
+        if values is None:
+            # Primer arranque sin archivo local: carga en primer plano
+            try:
+                values = self.refresh()
+            except Exception as e:
+                # Sin base ni archivo: listas vacías (y unidades por defecto); se reintenta en la próxima llamada
+                print(f"Error obteniendo valores de dropdowns: {e}")
+                values = self._empty_values()
+        elif stale:
+            # Se devuelven los valores actuales y la firma se revisa en segundo plano
+            self.refresh_async()
+
+        result = {key: list(items) for key, items in values.items()}
+        if not result.get('unidad_subunidad'):
+            result['unidad_subunidad'] = list(self.DEFAULT_UNIDAD_SUBUNIDAD)
+        return result
+
+    def _empty_values(self) -> Dict[str, List[str]]:
+        """Valores vacíos para cada dropdown"""
+        keys = [key for key, _ in self.DROPDOWN_COLUMNS] + ['unidad_subunidad']
+        return {key: [] for key in keys}
+
+    def _get_values(self, key: str, description: str) -> List[str]:
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT role 
-                FROM {self.applications_table} 
-                WHERE role IS NOT NULL AND role != ''
-                ORDER BY role
-            """)
-            
-            positions = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return positions
-            
+            return self.get_all_dropdown_values()[key]
+
         except Exception as e:
-            print(f"Error obteniendo posiciones: {e}")
+            print(f"Error obteniendo {description}: {e}")
             return []
-    
+
+    def get_unique_units(self) -> List[str]:
+        """Obtiene las unidades únicas de la base de datos"""
+        return self._get_values('units', 'unidades')
+
+    def get_unique_subunits(self) -> List[str]:
+        """Obtiene las subunidades únicas de la base de datos"""
+        return self._get_values('subunits', 'subunidades')
+
+    def get_unique_positions(self) -> List[str]:
+        """Obtiene las posiciones únicas de la base de datos"""
+        return self._get_values('positions', 'posiciones')
+
     def get_unique_roles(self) -> List[str]:
         """Obtiene los roles únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT roles_and_profiles 
-                FROM {self.applications_table} 
-                WHERE roles_and_profiles IS NOT NULL AND roles_and_profiles != ''
-                ORDER BY roles_and_profiles
-            """)
-            
-            roles = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return roles
-            
-        except Exception as e:
-            print(f"Error obteniendo roles: {e}")
-            return []
-    
+        return self._get_values('roles', 'roles')
+
     def get_unique_jurisdictions(self) -> List[str]:
         """Obtiene las jurisdicciones únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT system_jurisdiction 
-                FROM {self.applications_table} 
-                WHERE system_jurisdiction IS NOT NULL AND system_jurisdiction != ''
-                ORDER BY system_jurisdiction
-            """)
-            
-            jurisdictions = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return jurisdictions
-            
-        except Exception as e:
-            print(f"Error obteniendo jurisdicciones: {e}")
-            return []
-    
+        return self._get_values('jurisdictions', 'jurisdicciones')
+
     def get_unique_system_owners(self) -> List[str]:
         """Obtiene los propietarios de sistema únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT application_owner 
-                FROM {self.applications_table} 
-                WHERE application_owner IS NOT NULL AND application_owner != ''
-                ORDER BY application_owner
-            """)
-            
-            owners = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return owners
-            
-        except Exception as e:
-            print(f"Error obteniendo propietarios: {e}")
-            return []
-    
+        return self._get_values('system_owners', 'propietarios')
+
     def get_unique_categories(self) -> List[str]:
         """Obtiene las categorías únicas de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT critical_non_critical 
-                FROM {self.applications_table} 
-                WHERE critical_non_critical IS NOT NULL AND critical_non_critical != ''
-                ORDER BY critical_non_critical
-            """)
-            
-            categories = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return categories
-            
-        except Exception as e:
-            print(f"Error obteniendo categorías: {e}")
-            return []
-    
+        return self._get_values('categories', 'categorías')
+
     def get_unique_access_types(self) -> List[str]:
         """Obtiene los tipos de acceso únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT type_of_element 
-                FROM {self.applications_table} 
-                WHERE type_of_element IS NOT NULL AND type_of_element != ''
-                ORDER BY type_of_element
-            """)
-            
-            access_types = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return access_types
-            
-        except Exception as e:
-            print(f"Error obteniendo tipos de acceso: {e}")
-            return []
-    
+        return self._get_values('access_types', 'tipos de acceso')
+
     def get_unique_access_statuses(self) -> List[str]:
         """Obtiene los estados de acceso únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT status 
-                FROM {self.applications_table} 
-                WHERE status IS NOT NULL AND status != ''
-                ORDER BY status
-            """)
-            
-            statuses = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return statuses
-            
-        except Exception as e:
-            print(f"Error obteniendo estados: {e}")
-            return []
-    
+        return self._get_values('access_statuses', 'estados')
+
     def get_unique_authentication_methods(self) -> List[str]:
         """Obtiene los métodos de autenticación únicos de la base de datos"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"""
-                SELECT DISTINCT log_in_information 
-                FROM {self.applications_table} 
-                WHERE log_in_information IS NOT NULL AND log_in_information != ''
-                ORDER BY log_in_information
-            """)
-            
-            methods = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            return methods
-            
-        except Exception as e:
-            print(f"Error obteniendo métodos de autenticación: {e}")
-            return []
-    
+        return self._get_values('authentication_methods', 'métodos de autenticación')
+
     def get_unique_unidad_subunidad(self) -> List[str]:
-        """Obtiene las unidades/subunidades únicas de la base de datos (solo de applications)"""
+        """Obtiene las unidades/subunidades únicas de la matriz de aplicaciones"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Solo obtener de la tabla applications (que tiene las aplicaciones reales)
-            cursor.execute(f"""
-                SELECT DISTINCT 
-                    CONCAT(
-                        ISNULL(unit, ''),
-                        CASE 
-                            WHEN unit IS NOT NULL AND service IS NOT NULL THEN ' / ' 
-                            ELSE '' 
-                        END,
-                        ISNULL(service, '')
-                    ) AS unidad_subunidad
-                FROM {self.applications_table} 
-                WHERE (unit IS NOT NULL AND unit != '') OR (service IS NOT NULL AND service != '')
-                ORDER BY unidad_subunidad
-            """)
-            
-            apps_unidad_subunidad = [row[0] for row in cursor.fetchall()]
-            
-            conn.close()
-            
-            # Si no hay datos en la base de datos, usar valores por defecto
-            if not apps_unidad_subunidad:
-                apps_unidad_subunidad = ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura", 
-                                       "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas", 
-                                       "Operaciones/Logística", "Legal/Compliance"]
-            
-            return apps_unidad_subunidad
-            
+            # Si no hay datos en la base de datos, get_all_dropdown_values usa valores por defecto
+            return self.get_all_dropdown_values()['unidad_subunidad']
+
         except Exception as e:
             print(f"Error obteniendo unidades/subunidades: {e}")
             # En caso de error, devolver valores por defecto
-            return ["Tecnología/Desarrollo", "Tecnología/QA", "Tecnología/Infraestructura", 
-                   "Recursos Humanos/RRHH", "Finanzas/Contabilidad", "Marketing/Ventas", 
-                   "Operaciones/Logística", "Legal/Compliance"]
-    
-    def get_all_dropdown_values(self) -> Dict[str, List[str]]:
-        """Obtiene todos los valores únicos para los dropdowns"""
-        return {
-            'units': self.get_unique_units(),
-            'subunits': self.get_unique_subunits(),
-            'unidad_subunidad': self.get_unique_unidad_subunidad(),
-            'positions': self.get_unique_positions(),
-            'roles': self.get_unique_roles(),
-            'jurisdictions': self.get_unique_jurisdictions(),
-            'system_owners': self.get_unique_system_owners(),
-            'categories': self.get_unique_categories(),
-            'access_types': self.get_unique_access_types(),
-            'access_statuses': self.get_unique_access_statuses(),
-            'authentication_methods': self.get_unique_authentication_methods()
-        }
+            return list(self.DEFAULT_UNIDAD_SUBUNIDAD)
 
 # Instancia global del servicio
 dropdown_service = DropdownService()
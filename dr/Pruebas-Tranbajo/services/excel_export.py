@@ -0,0 +1,105 @@
+"""
+Escritura de Excel en streaming para las exportaciones
+
+openpyxl en modo write_only escribe cada fila directamente al XML de la hoja
+(memoria constante), en lugar de armar un DataFrame y un libro completo en memoria.
+El ancho de las columnas se calcula con una muestra de las primeras filas: en
+write_only las dimensiones se escriben antes que los datos, así que se retienen
+SAMPLE_ROWS filas, se fijan los anchos y luego se sigue escribiendo fila a fila.
+
+    with StreamingExcelWriter(filepath) as writer:
+        writer.write_sheet('Historial', registros)                 # Iterable de diccionarios
+        writer.write_sheet('Tickets', filas, columns=TICKET_COLUMNS)
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+
+class StreamingExcelWriter:
+    """Libro Excel en modo write_only que recibe las filas de cada hoja desde un iterador"""
+
+    SAMPLE_ROWS = 500     # Filas retenidas para estimar el ancho de las columnas
+    MAX_WIDTH = 50        # Mismo tope que el ajuste de columnas anterior
+
+    def __init__(self, filepath):
+        self.filepath = str(filepath)
+        self.workbook = Workbook(write_only=True)
+        self.rows_written: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.save()
+        return False
+
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        """Tipos que openpyxl escribe tal cual; el resto como texto"""
+        if value is None or isinstance(value, (str, int, float, Decimal, datetime, date, time)):
+            return value
+        return str(value)
+
+    @staticmethod
+    def _text_length(value: Any) -> int:
+        return 0 if value is None else len(str(value))
+
+    @staticmethod
+    def _columns_from_sample(sample: List[Any]) -> List[str]:
+        """Columnas de diccionarios en orden de aparición (como pd.DataFrame(lista))"""
+        columns: Dict[str, None] = {}
+        for row in sample:
+            if isinstance(row, dict):
+                for key in row:
+                    columns.setdefault(key, None)
+        return list(columns)
+
+    def write_sheet(self, title: str, rows: Iterable[Any], columns: Optional[Sequence[str]] = None) -> int:
+        """
+        Escribe una hoja completa a partir de un iterable de filas
+
+        Args:
+            title: Nombre de la hoja
+            rows: Diccionarios (por nombre de columna) o secuencias (en el orden de columns)
+            columns: Encabezados; si se omite se toman de las claves de las primeras filas
+                     (claves que aparezcan recién después de la muestra no se exportan)
+
+        Returns:
+            Número de filas de datos escritas
+        """
+        iterator = iter(rows)
+        sample = list(islice(iterator, self.SAMPLE_ROWS))
+        columns = list(columns) if columns is not None else self._columns_from_sample(sample)
+
+        def as_values(row: Any) -> List[Any]:
+            if isinstance(row, dict):
+                return [self._cell_value(row.get(column)) for column in columns]
+            return [self._cell_value(value) for value in row]
+
+        sample_values = [as_values(row) for row in sample]
+        worksheet = self.workbook.create_sheet(title=title)
+        for index, column in enumerate(columns):
+            longest = max([len(str(column))] + [self._text_length(values[index])
+                                                for values in sample_values if index < len(values)])
+            width = min(longest + 2, self.MAX_WIDTH)
+            worksheet.column_dimensions[get_column_letter(index + 1)].width = width
+
+        worksheet.append(columns)
+        count = 0
+        for values in chain(sample_values, (as_values(row) for row in iterator)):
+            worksheet.append(values)
+            count += 1
+        self.rows_written[title] = count
+        return count
+
+    def save(self):
+        """Cierra el libro (un libro sin hojas no es válido: se agrega una vacía)"""
+        if not self.workbook.worksheets:
+            self.workbook.create_sheet(title='Hoja1')
+        self.workbook.save(self.filepath)
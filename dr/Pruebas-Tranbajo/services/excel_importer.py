@@ -6,7 +6,7 @@ import pandas as pd
 import sqlite3
 import pyodbc
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 import sys
 import os
 
@@ -15,6 +15,63 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
 from config import get_database_connection
 
 
+# Formatos que openpyxl puede leer en modo streaming (read_only)
+STREAMABLE_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+DEFAULT_STREAM_CHUNK_SIZE = 5000
+
+
+def iter_excel_chunks(excel_path: str, sheet_name: str, skip_rows: int = 0,
+                      chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Lee una hoja de Excel por bloques sin cargarla completa en memoria
+    
+    Usa openpyxl en modo read_only, que recorre el XML de la hoja fila a fila.
+    Cada bloque es un DataFrame con las columnas del encabezado y cuyo índice es
+    el número de fila en Excel (útil para reportar rechazos).
+    
+    Args:
+        excel_path: Ruta del archivo Excel (.xlsx/.xlsm)
+        sheet_name: Nombre de la hoja
+        skip_rows: Filas a saltar antes del encabezado
+        chunk_size: Filas por bloque
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        for _ in range(skip_rows):
+            if next(rows, None) is None:
+                return
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        
+        buffer = []
+        first_row = skip_rows + 2  # Filas de Excel empiezan en 1 y el encabezado ocupa una
+        for values in rows:
+            buffer.append(values[:len(columns)])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns, index=range(first_row, first_row + len(buffer)))
+                first_row += len(buffer)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, index=range(first_row, first_row + len(buffer)))
+    finally:
+        workbook.close()
+
+
+def read_excel_chunks(excel_path: str, sheet_name: str, skip_rows: int = 0,
+                      chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Bloques de la hoja: streaming para .xlsx/.xlsm y pandas completo para otros formatos (.xls)"""
+    if str(excel_path).lower().endswith(STREAMABLE_EXTENSIONS):
+        return iter_excel_chunks(excel_path, sheet_name, skip_rows, chunk_size)
+    df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows)
+    df.index = df.index + skip_rows + 2
+    return iter([df])
+
+
 class ExcelToSQLiteImporter:
     """Importador de Excel a SQLite"""
     
@@ -37,40 +94,38 @@ class ExcelToSQLiteImporter:
             Tuple[success, message, records_imported]
         """
         try:
-            # Leer Excel
-            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows)
-            
-            # Limpiar datos
-            df = df.dropna(how='all')  # Eliminar filas completamente vacías
-            df = df.fillna('')  # Llenar valores nulos con string vacío
-            
-            # Convertir columnas a string para evitar problemas de tipos
-            for col in df.columns:
-                df[col] = df[col].astype(str)
-            
-            # Insertar datos
+            # Insertar datos a medida que se leen los bloques del Excel
             cursor = self.connection.cursor()
             records_imported = 0
             
-            for _, row in df.iterrows():
-                try:
-                    # Preparar datos para inserción
-                    data_dict = row.to_dict()
-                    
-                    if table_name == 'headcount':
-                        self._insert_headcount(cursor, data_dict)
-                    elif table_name == 'applications':
-                        self._insert_application(cursor, data_dict)
-                    elif table_name == 'historico':
-                        self._insert_historico(cursor, data_dict)
-                    else:
-                        return False, f"Tabla {table_name} no soportada", 0
-                    
-                    records_imported += 1
-                    
-                except Exception as e:
-                    print(f"Error insertando fila: {e}")
-                    continue
+            for df in read_excel_chunks(excel_path, sheet_name, skip_rows):
+                # Limpiar datos
+                df = df.dropna(how='all')  # Eliminar filas completamente vacías
+                df = df.fillna('')  # Llenar valores nulos con string vacío
+                
+                # Convertir columnas a string para evitar problemas de tipos
+                for col in df.columns:
+                    df[col] = df[col].astype(str)
+                
+                for _, row in df.iterrows():
+                    try:
+                        # Preparar datos para inserción
+                        data_dict = row.to_dict()
+                        
+                        if table_name == 'headcount':
+                            self._insert_headcount(cursor, data_dict)
+                        elif table_name == 'applications':
+                            self._insert_application(cursor, data_dict)
+                        elif table_name == 'historico':
+                            self._insert_historico(cursor, data_dict)
+                        else:
+                            return False, f"Tabla {table_name} no soportada", 0
+                        
+                        records_imported += 1
+                        
+                    except Exception as e:
+                        print(f"Error insertando fila: {e}")
+                        continue
             
             self.connection.commit()
             return True, f"Importación exitosa: {records_imported} registros importados", records_imported
@@ -303,7 +358,7 @@ class ExcelToSQLServerImporter:
     def import_from_excel(self, excel_path: str, sheet_name: str, table_name: str, 
                          skip_rows: int = 0) -> Tuple[bool, str, int]:
         """
-        Importa datos desde Excel a SQL Server
+        Importa datos desde Excel a SQL Server (usa la carga masiva por lotes)
         
         Args:
             excel_path: Ruta del archivo Excel
@@ -314,161 +369,282 @@ class ExcelToSQLServerImporter:
         Returns:
             Tuple[success, message, records_imported]
         """
-        try:
-            # Leer Excel
-            df = pd.read_excel(excel_path, sheet_name=sheet_name, skiprows=skip_rows)
-            
-            # Limpiar datos
-            df = df.dropna(how='all')
-            df = df.fillna('')
-            
-            # Convertir columnas a string
-            for col in df.columns:
-                df[col] = df[col].astype(str)
+        result = self.bulk_import_from_excel(excel_path, sheet_name, table_name, skip_rows)
+        return result['success'], result['message'], result['imported']
+    
+    # =====================================================
+    # CARGA MASIVA: STAGING + fast_executemany + MERGE
+    # =====================================================
+    
+    # Columnas por tabla destino, clave para MERGE (None = solo INSERT),
+    # campos obligatorios y columnas de fecha que se validan antes de cargar
+    BULK_TABLE_SPECS = {
+        'headcount': {
+            'columns': ['scotia_id', 'employee', 'full_name', 'email', 'position', 'manager',
+                        'senior_manager', 'unit', 'start_date', 'ceco', 'skip_level', 'cafe_alcides',
+                        'parents', 'personal_email', 'size', 'birthday', 'validacion', 'activo'],
+            'key': ['scotia_id'],
+            'required': ['scotia_id'],
+            'date_columns': ['start_date', 'birthday'],
+            'max_lengths': {'scotia_id': 20}
+        },
+        'applications': {
+            'columns': ['jurisdiction', 'unit', 'subunit', 'logical_access_name', 'alias', 'path_email_url',
+                        'position_role', 'exception_tracking', 'fulfillment_action', 'system_owner',
+                        'role_name', 'access_type', 'category', 'additional_data', 'ad_code', 'access_status',
+                        'last_update_date', 'require_licensing', 'description', 'authentication_method'],
+            'key': None,
+            'required': ['logical_access_name'],
+            'date_columns': ['last_update_date'],
+            'max_lengths': {'logical_access_name': 150}
+        },
+        'historico': {
+            'columns': ['scotia_id', 'employee_email', 'case_id', 'responsible', 'record_date', 'request_date',
+                        'process_access', 'subunit', 'event_description', 'ticket_email', 'app_access_name',
+                        'computer_system_type', 'status', 'closing_date_app', 'closing_date_ticket',
+                        'app_quality', 'confirmation_by_user', 'comment', 'ticket_quality',
+                        'general_status_ticket', 'average_time_open_ticket'],
+            'key': None,
+            'required': ['scotia_id'],
+            'date_columns': ['record_date', 'request_date', 'closing_date_app', 'closing_date_ticket'],
+            'max_lengths': {'scotia_id': 20}
+        }
+    }
+    
+    # Tamaño máximo de texto en la tabla staging (NVARCHAR(MAX) degrada fast_executemany)
+    STAGING_MAX_LENGTH = 4000
+    DEFAULT_CHUNK_SIZE = 5000
+    
+    def bulk_import_from_excel(self, excel_path: str, sheet_name: str, table_name: str,
+                               skip_rows: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                               progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Importa una hoja completa con carga masiva
+        
+        0. Lee la hoja por bloques (openpyxl read_only para .xlsx/.xlsm), sin cargarla completa
+        1. Mapea y valida las columnas de forma vectorizada (pandas)
+        2. Carga lotes con executemany + fast_executemany a una tabla staging temporal
+        3. Aplica un único MERGE (headcount) o INSERT ... SELECT (applications, historico)
+        Todo ocurre en una sola transacción.
+        
+        Args:
+            excel_path: Ruta del archivo Excel
+            sheet_name: Nombre de la hoja
+            table_name: Tabla destino (headcount, applications, historico)
+            skip_rows: Filas a saltar desde el inicio
+            chunk_size: Filas por lote enviado a la tabla staging
+            progress_callback: Función que recibe un dict de progreso por cada lote
             
-            # Insertar datos
-            cursor = self.connection.cursor()
-            records_imported = 0
+        Returns:
+            Dict con success, message, imported, rejected (fila, motivo, datos) y chunks
+        """
+        if table_name not in self.BULK_TABLE_SPECS:
+            return self._bulk_result(False, f"Tabla {table_name} no soportada")
+        try:
+            # Los bloques se leen y cargan a staging a medida que se recorre la hoja
+            frames = read_excel_chunks(excel_path, sheet_name, skip_rows, chunk_size)
+        except Exception as e:
+            return self._bulk_result(False, f"Error importando desde Excel: {str(e)}")
+        
+        return self.bulk_load_frames(frames, table_name, chunk_size, progress_callback)
+    
+    def bulk_load_frames(self, frames, table_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Carga uno o varios DataFrames (por ejemplo, bloques leídos de un Excel) con el
+        mismo flujo staging + MERGE. El índice de cada DataFrame se usa como número de fila
+        al reportar rechazos.
+        """
+        spec = self.BULK_TABLE_SPECS.get(table_name)
+        if spec is None:
+            return self._bulk_result(False, f"Tabla {table_name} no soportada")
+        
+        staging_table = f"#stg_{table_name}"
+        rejected = []
+        loaded = 0
+        chunk_number = 0
+        cursor = self.connection.cursor()
+        try:
+            self._create_staging_table(cursor, staging_table, spec)
             
-            for _, row in df.iterrows():
-                try:
-                    data_dict = row.to_dict()
-                    
-                    if table_name == 'headcount':
-                        self._insert_headcount_sqlserver(cursor, data_dict)
-                    elif table_name == 'applications':
-                        self._insert_application_sqlserver(cursor, data_dict)
-                    elif table_name == 'historico':
-                        self._insert_historico_sqlserver(cursor, data_dict)
-                    else:
-                        return False, f"Tabla {table_name} no soportada", 0
-                    
-                    records_imported += 1
-                    
-                except Exception as e:
-                    print(f"Error insertando fila: {e}")
-                    continue
+            for frame in frames:
+                for start in range(0, len(frame), chunk_size):
+                    chunk = frame.iloc[start:start + chunk_size]
+                    rows, chunk_rejected = self._prepare_bulk_rows(chunk, spec)
+                    chunk_rejected += self._load_staging_chunk(cursor, staging_table, spec, rows)
+                    chunk_number += 1
+                    chunk_loaded = len(rows) - len([r for r in chunk_rejected if r.get('stage') == 'staging'])
+                    loaded += chunk_loaded
+                    rejected.extend(chunk_rejected)
+                    self._report_progress(progress_callback, {
+                        'table': table_name,
+                        'chunk': chunk_number,
+                        'rows_in_chunk': len(chunk),
+                        'loaded_in_chunk': chunk_loaded,
+                        'rejected_in_chunk': len(chunk_rejected),
+                        'loaded_total': loaded,
+                        'rejected_total': len(rejected)
+                    })
             
+            rejected.extend(self._reject_duplicate_keys(cursor, staging_table, spec))
+            imported = self._merge_staging(cursor, staging_table, table_name, spec)
+            cursor.execute(f"DROP TABLE {staging_table}")
             self.connection.commit()
-            return True, f"Importación exitosa: {records_imported} registros importados", records_imported
+            
+            message = f"Importación exitosa: {imported} registros importados"
+            if rejected:
+                message += f", {len(rejected)} filas rechazadas"
+            return self._bulk_result(True, message, imported, rejected, chunk_number)
             
         except Exception as e:
-            return False, f"Error importando desde Excel: {str(e)}", 0
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+            return self._bulk_result(False, f"Error importando desde Excel: {str(e)}", 0, rejected, chunk_number)
     
-    def _insert_headcount_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla headcount de SQL Server"""
-        cursor.execute('''
-            MERGE headcount AS target
-            USING (SELECT ? AS scotia_id, ? AS employee, ? AS full_name, ? AS email, 
-                          ? AS position, ? AS manager, ? AS senior_manager, ? AS unit,
-                          ? AS start_date, ? AS ceco, ? AS skip_level, ? AS cafe_alcides,
-                          ? AS parents, ? AS personal_email, ? AS size, ? AS birthday,
-                          ? AS validacion, ? AS activo) AS source
-            ON target.scotia_id = source.scotia_id
-            WHEN MATCHED THEN
-                UPDATE SET employee = source.employee, full_name = source.full_name,
-                          email = source.email, position = source.position,
-                          manager = source.manager, senior_manager = source.senior_manager,
-                          unit = source.unit, start_date = source.start_date,
-                          ceco = source.ceco, skip_level = source.skip_level,
-                          cafe_alcides = source.cafe_alcides, parents = source.parents,
-                          personal_email = source.personal_email, size = source.size,
-                          birthday = source.birthday, validacion = source.validacion,
-                          activo = source.activo
-            WHEN NOT MATCHED THEN
-                INSERT (scotia_id, employee, full_name, email, position, manager, 
-                       senior_manager, unit, start_date, ceco, skip_level, cafe_alcides,
-                       parents, personal_email, size, birthday, validacion, activo)
-                VALUES (source.scotia_id, source.employee, source.full_name, source.email,
-                       source.position, source.manager, source.senior_manager, source.unit,
-                       source.start_date, source.ceco, source.skip_level, source.cafe_alcides,
-                       source.parents, source.personal_email, source.size, source.birthday,
-                       source.validacion, source.activo);
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('employee', ''),
-            data.get('full_name', ''),
-            data.get('email', ''),
-            data.get('position', ''),
-            data.get('manager', ''),
-            data.get('senior_manager', ''),
-            data.get('unit', ''),
-            data.get('start_date', ''),
-            data.get('ceco', ''),
-            data.get('skip_level', ''),
-            data.get('cafe_alcides', ''),
-            data.get('parents', ''),
-            data.get('personal_email', ''),
-            data.get('size', ''),
-            data.get('birthday', ''),
-            data.get('validacion', ''),
-            1 if data.get('activo', 'True').lower() == 'true' else 0
-        ))
+    @staticmethod
+    def _bulk_result(success: bool, message: str, imported: int = 0,
+                     rejected: Optional[List[Dict[str, Any]]] = None, chunks: int = 0) -> Dict[str, Any]:
+        return {
+            'success': success,
+            'message': message,
+            'imported': imported,
+            'rejected': rejected or [],
+            'chunks': chunks
+        }
     
-    def _insert_application_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla applications de SQL Server"""
-        cursor.execute('''
-            INSERT INTO applications 
-            (jurisdiction, unit, subunit, logical_access_name, alias, path_email_url, 
-             position_role, exception_tracking, fulfillment_action, system_owner, 
-             role_name, access_type, category, additional_data, ad_code, access_status, 
-             last_update_date, require_licensing, description, authentication_method)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('jurisdiction', ''),
-            data.get('unit', ''),
-            data.get('subunit', ''),
-            data.get('logical_access_name', ''),
-            data.get('alias', ''),
-            data.get('path_email_url', ''),
-            data.get('position_role', ''),
-            data.get('exception_tracking', ''),
-            data.get('fulfillment_action', ''),
-            data.get('system_owner', ''),
-            data.get('role_name', ''),
-            data.get('access_type', ''),
-            data.get('category', ''),
-            data.get('additional_data', ''),
-            data.get('ad_code', ''),
-            data.get('access_status', ''),
-            data.get('last_update_date', ''),
-            data.get('require_licensing', ''),
-            data.get('description', ''),
-            data.get('authentication_method', '')
-        ))
+    @staticmethod
+    def _report_progress(progress_callback, progress: Dict[str, Any]) -> None:
+        if progress_callback:
+            progress_callback(progress)
+        else:
+            print(f"📦 {progress['table']} lote {progress['chunk']}: "
+                  f"{progress['loaded_in_chunk']} cargadas, {progress['rejected_in_chunk']} rechazadas "
+                  f"(total {progress['loaded_total']})")
     
-    def _insert_historico_sqlserver(self, cursor, data: Dict[str, Any]) -> None:
-        """Inserta datos en la tabla historico de SQL Server"""
-        cursor.execute('''
-            INSERT INTO historico 
-            (scotia_id, employee_email, case_id, responsible, record_date, request_date, process_access, 
-             subunit, event_description, ticket_email, app_access_name, 
-             computer_system_type, status, closing_date_app, closing_date_ticket, 
-             app_quality, confirmation_by_user, comment, ticket_quality, general_status_ticket, 
-             average_time_open_ticket)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('scotia_id', ''),
-            data.get('employee_email', ''),
-            data.get('case_id', ''),
-            data.get('responsible', ''),
-            data.get('record_date', ''),
-            data.get('request_date', ''),
-            data.get('process_access', ''),
-            data.get('subunit', ''),
-            data.get('event_description', ''),
-            data.get('ticket_email', ''),
-            data.get('app_access_name', ''),
-            data.get('computer_system_type', ''),
-            data.get('status', ''),
-            data.get('closing_date_app', ''),
-            data.get('closing_date_ticket', ''),
-            data.get('app_quality', ''),
-            data.get('confirmation_by_user', ''),
-            data.get('comment', ''),
-            data.get('ticket_quality', ''),
-            data.get('average_time_open_ticket', '')
-        ))
+    def _prepare_bulk_rows(self, chunk: pd.DataFrame, spec: Dict[str, Any]) -> Tuple[List[Tuple], List[Dict[str, Any]]]:
+        """Mapea columnas y valida un bloque de forma vectorizada; devuelve filas y rechazos"""
+        columns = spec['columns']
+        chunk = chunk.dropna(how='all')
+        frame = chunk.reindex(columns=columns)
+        if 'activo' in columns and 'activo' not in chunk.columns:
+            frame['activo'] = 'True'
+        frame = frame.fillna('').astype(str)
+        
+        reasons = pd.Series('', index=frame.index)
+        for column in spec['required']:
+            reasons = reasons.mask((reasons == '') & (frame[column].str.strip() == ''), f"{column} vacío")
+        for column, max_length in spec.get('max_lengths', {}).items():
+            reasons = reasons.mask((reasons == '') & (frame[column].str.len() > max_length),
+                                   f"{column} excede {max_length} caracteres")
+        for column in spec['date_columns']:
+            present = frame[column].str.strip() != ''
+            parsed = pd.to_datetime(frame[column].where(present), errors='coerce')
+            reasons = reasons.mask((reasons == '') & present & parsed.isna(), f"fecha inválida en {column}")
+        too_long = frame.apply(lambda col: col.str.len() > self.STAGING_MAX_LENGTH).any(axis=1)
+        reasons = reasons.mask((reasons == '') & too_long, f"valor excede {self.STAGING_MAX_LENGTH} caracteres")
+        
+        if 'activo' in columns:
+            frame['activo'] = (frame['activo'].str.lower() == 'true').astype(int).astype(str)
+        
+        bad = reasons != ''
+        rejected = [
+            {'row': int(index), 'reason': reasons[index], 'data': frame.loc[index].to_dict(), 'stage': 'validation'}
+            for index in frame.index[bad]
+        ]
+        valid = frame[~bad]
+        rows = [(int(index),) + tuple(values) for index, values in zip(valid.index, valid.itertuples(index=False, name=None))]
+        return rows, rejected
+    
+    def _create_staging_table(self, cursor, staging_table: str, spec: Dict[str, Any]) -> None:
+        column_defs = ', '.join(f"[{column}] NVARCHAR({self.STAGING_MAX_LENGTH}) NULL" for column in spec['columns'])
+        cursor.execute(f"IF OBJECT_ID('tempdb..{staging_table}') IS NOT NULL DROP TABLE {staging_table}")
+        cursor.execute(f"CREATE TABLE {staging_table} ([source_row] INT NOT NULL, {column_defs})")
+    
+    def _load_staging_chunk(self, cursor, staging_table: str, spec: Dict[str, Any],
+                            rows: List[Tuple]) -> List[Dict[str, Any]]:
+        """Inserta un lote en staging; si el lote falla se reintenta fila a fila para aislar los rechazos"""
+        if not rows:
+            return []
+        columns = ['source_row'] + spec['columns']
+        insert_sql = (f"INSERT INTO {staging_table} ({', '.join(f'[{c}]' for c in columns)}) "
+                      f"VALUES ({', '.join(['?'] * len(columns))})")
+        cursor.fast_executemany = True
+        # Punto de guardado: si el lote falla a mitad, las filas que alcanzaron a
+        # insertarse se descartan antes del reintento fila a fila (no se duplican)
+        cursor.execute("IF @@TRANCOUNT = 0 BEGIN TRANSACTION; SAVE TRANSACTION stg_chunk")
+        try:
+            cursor.executemany(insert_sql, rows)
+            return []
+        except pyodbc.Error:
+            cursor.execute("ROLLBACK TRANSACTION stg_chunk")
+        
+        rejected = []
+        for row in rows:
+            try:
+                cursor.execute(insert_sql, row)
+            except pyodbc.Error as e:
+                rejected.append({
+                    'row': row[0],
+                    'reason': f"error de base de datos: {e}",
+                    'data': dict(zip(spec['columns'], row[1:])),
+                    'stage': 'staging'
+                })
+        return rejected
+    
+    def _reject_duplicate_keys(self, cursor, staging_table: str, spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """El MERGE no admite claves repetidas en el origen: se conserva la última fila de cada clave"""
+        if not spec['key']:
+            return []
+        key_columns = ', '.join(f"[{c}]" for c in spec['key'])
+        cursor.execute(f"""
+            WITH ranked AS (
+                SELECT source_row, {key_columns},
+                       ROW_NUMBER() OVER (PARTITION BY {key_columns} ORDER BY source_row DESC) AS rn
+                FROM {staging_table}
+            )
+            DELETE FROM ranked
+            OUTPUT DELETED.source_row, {', '.join(f'DELETED.[{c}]' for c in spec['key'])}
+            WHERE rn > 1
+        """)
+        return [
+            {'row': row[0], 'reason': f"clave duplicada en el archivo ({', '.join(spec['key'])}); se usa la última fila",
+             'data': dict(zip(spec['key'], row[1:])), 'stage': 'merge'}
+            for row in cursor.fetchall()
+        ]
+    
+    def _merge_staging(self, cursor, staging_table: str, table_name: str, spec: Dict[str, Any]) -> int:
+        """Pasa el contenido de staging a la tabla destino con una sola sentencia"""
+        columns = spec['columns']
+        
+        def source_value(column):
+            # Las fechas vacías se guardan como NULL en lugar de 1900-01-01
+            if column in spec['date_columns']:
+                return f"NULLIF(s.[{column}], '')"
+            return f"s.[{column}]"
+        
+        column_list = ', '.join(f"[{c}]" for c in columns)
+        values_list = ', '.join(source_value(c) for c in columns)
+        
+        if spec['key']:
+            on_clause = ' AND '.join(f"target.[{c}] = s.[{c}]" for c in spec['key'])
+            update_clause = ', '.join(f"[{c}] = {source_value(c)}" for c in columns if c not in spec['key'])
+            cursor.execute(f"""
+                MERGE {table_name} AS target
+                USING {staging_table} AS s
+                ON {on_clause}
+                WHEN MATCHED THEN
+                    UPDATE SET {update_clause}
+                WHEN NOT MATCHED THEN
+                    INSERT ({column_list}) VALUES ({values_list});
+            """)
+        else:
+            cursor.execute(f"""
+                INSERT INTO {table_name} ({column_list})
+                SELECT {values_list} FROM {staging_table} s ORDER BY s.source_row
+            """)
+        return cursor.rowcount
     
     def close(self):
         """Cierra la conexión"""
@@ -487,6 +663,24 @@ def import_excel_to_sqlite(excel_path: str, sheet_name: str, table_name: str,
         importer.close()
 
 
+def bulk_import_excel_to_sqlserver(excel_path: str, sheet_name: str, table_name: str,
+                                   server: str, database: str, username: str = None,
+                                   password: str = None, trusted_connection: bool = True,
+                                   skip_rows: int = 0, chunk_size: int = ExcelToSQLServerImporter.DEFAULT_CHUNK_SIZE,
+                                   progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Función de conveniencia para la carga masiva; retorna también las filas rechazadas"""
+    importer = ExcelToSQLServerImporter(server, database, username, password, trusted_connection)
+    try:
+        success, message = importer.create_tables()
+        if not success:
+            return importer._bulk_result(False, f"Error creando tablas: {message}")
+        
+        return importer.bulk_import_from_excel(excel_path, sheet_name, table_name, skip_rows,
+                                               chunk_size, progress_callback)
+    finally:
+        importer.close()
+
+
 def import_excel_to_sqlserver(excel_path: str, sheet_name: str, table_name: str,
                              server: str, database: str, username: str = None, 
                              password: str = None, trusted_connection: bool = True,
@@ -1,12 +1,42 @@
 """
 Servicio de exportación a Excel para tickets de conciliación
+
+Todas las exportaciones escriben en streaming con StreamingExcelWriter
+(services/excel_export.py): las filas van directo al archivo y el ancho de las
+columnas se calcula con una muestra, sin DataFrame ni libro completo en memoria.
 """
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Sequence, Tuple
 import os
 
+from .excel_export import StreamingExcelWriter
+
+SUMMARY_COLUMNS = [
+    "SID", "Área", "Sub Unidad", "Cargo", "Accesos Actuales", "Accesos Objetivo", "A Otorgar", "A Revocar"
+]
+TICKET_COLUMNS = [
+    "SID", "App", "Rol", "Acción", "Motivo", "Ingresado Por", "Fecha Solicitud", "Status", "Comentarios"
+]
+
+# (clave en statistics_data, nombre de hoja) después de 'Generales'
+HEADCOUNT_STATISTICS_SHEETS = [
+    ('por_unidad', 'Por Unidad'),
+    ('por_puesto', 'Por Puesto'),
+    ('por_manager', 'Por Manager'),
+    ('por_senior_manager', 'Por Senior Manager'),
+    ('por_estado', 'Por Estado'),
+    ('por_año_inicio', 'Por Año de Inicio'),
+    ('detalle_por_unidad', 'Detalle por Unidad'),
+]
+HISTORIAL_STATISTICS_SHEETS = [
+    ('por_unidad', 'Por Unidad'),
+    ('por_subunidad', 'Por Subunidad'),
+    ('por_puesto', 'Por Puesto'),
+    ('por_aplicacion', 'Por Aplicación'),
+    ('por_proceso', 'Por Proceso'),
+]
+
 
 class ExportService:
     """Servicio para exportar datos de conciliación a Excel"""
@@ -38,104 +68,60 @@ class ExportService:
             filename = f"tickets_{timestamp}.xlsx"
             filepath = self.output_dir / filename
             
-            # Preparar datos para la hoja de resumen
-            summary_data = []
-            all_tickets = []
-            
-            for person_data in reconciliation_data:
-                if "error" in person_data:
-                    continue
-                
-                sid = person_data.get("person_info", {}).get("sid", "N/A")
-                area = person_data.get("person_info", {}).get("area", "N/A")
-                subunit = person_data.get("person_info", {}).get("subunit", "N/A")
-                cargo = person_data.get("person_info", {}).get("cargo", "N/A")
-                
-                current_count = len(person_data.get("current", []))
-                target_count = len(person_data.get("target", []))
-                to_grant_count = len(person_data.get("to_grant", []))
-                to_revoke_count = len(person_data.get("to_revoke", []))
-                
-                # Agregar a resumen
-                summary_data.append({
-                    "SID": sid,
-                    "Área": area,
-                    "Sub Unidad": subunit,
-                    "Cargo": cargo,
-                    "Accesos Actuales": current_count,
-                    "Accesos Objetivo": target_count,
-                    "A Otorgar": to_grant_count,
-                    "A Revocar": to_revoke_count
-                })
-                
-                # Agregar tickets de GRANT
-                for grant_item in person_data.get("to_grant", []):
-                    all_tickets.append({
-                        "SID": grant_item["sid"],
-                        "App": grant_item["app_name"],
-                        "Rol": grant_item.get("role_name", ""),
-                        "Acción": grant_item["accion"],
-                        "Motivo": grant_item["motivo"],
-                        "Ingresado Por": ingresado_por,
-                        "Fecha Solicitud": datetime.now().strftime("%Y-%m-%d"),
-                        "Status": status,
-                        "Comentarios": comment or f"Acceso requerido para {grant_item['app_name']}"
-                    })
-                
-                # Agregar tickets de REVOKE
-                for revoke_item in person_data.get("to_revoke", []):
-                    all_tickets.append({
-                        "SID": revoke_item["sid"],
-                        "App": revoke_item["app_name"],
-                        "Rol": revoke_item.get("role_name", ""),
-                        "Acción": revoke_item["accion"],
-                        "Motivo": revoke_item["motivo"],
-                        "Ingresado Por": ingresado_por,
-                        "Fecha Solicitud": datetime.now().strftime("%Y-%m-%d"),
-                        "Status": status,
-                        "Comentarios": comment or f"Acceso no autorizado para {revoke_item['app_name']}"
-                    })
-            
-            # Crear DataFrames
-            summary_df = pd.DataFrame(summary_data)
-            tickets_df = pd.DataFrame(all_tickets)
-            
-            # Crear archivo Excel con múltiples hojas
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja de resumen
-                summary_df.to_excel(writer, sheet_name='Resumen', index=False)
-                
-                # Hoja de tickets
-                if not tickets_df.empty:
-                    tickets_df.to_excel(writer, sheet_name='Tickets', index=False)
-                else:
-                    # Crear hoja vacía con columnas
-                    empty_tickets = pd.DataFrame(columns=[
-                        "SID", "App", "Rol", "Acción", "Motivo", 
-                        "Ingresado Por", "Fecha Solicitud", "Status", "Comentarios"
-                    ])
-                    empty_tickets.to_excel(writer, sheet_name='Tickets', index=False)
-                
-                # Ajustar ancho de columnas
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
+            # Las hojas se escriben fila a fila desde generadores
+            with StreamingExcelWriter(filepath) as writer:
+                writer.write_sheet('Resumen', self._summary_rows(reconciliation_data), columns=SUMMARY_COLUMNS)
+                writer.write_sheet('Tickets', self._ticket_rows(reconciliation_data, ingresado_por, status, comment),
+                                   columns=TICKET_COLUMNS)
             
             return str(filepath)
             
         except Exception as e:
             raise Exception(f"Error exportando a Excel: {str(e)}")
     
+    @staticmethod
+    def _summary_rows(reconciliation_data: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Any, ...]]:
+        """Una fila de resumen por persona (en el orden de SUMMARY_COLUMNS)"""
+        for person_data in reconciliation_data:
+            if "error" in person_data:
+                continue
+            person_info = person_data.get("person_info", {})
+            yield (
+                person_info.get("sid", "N/A"),
+                person_info.get("area", "N/A"),
+                person_info.get("subunit", "N/A"),
+                person_info.get("cargo", "N/A"),
+                len(person_data.get("current", [])),
+                len(person_data.get("target", [])),
+                len(person_data.get("to_grant", [])),
+                len(person_data.get("to_revoke", []))
+            )
+    
+    @staticmethod
+    def _ticket_rows(reconciliation_data: Iterable[Dict[str, Any]], ingresado_por: str,
+                     status: str, comment: str) -> Iterator[Tuple[Any, ...]]:
+        """Tickets de GRANT y REVOKE de cada persona (en el orden de TICKET_COLUMNS)"""
+        fecha_solicitud = datetime.now().strftime("%Y-%m-%d")
+        for person_data in reconciliation_data:
+            if "error" in person_data:
+                continue
+            for items, default_comment in (
+                (person_data.get("to_grant", []), "Acceso requerido para {}"),
+                (person_data.get("to_revoke", []), "Acceso no autorizado para {}"),
+            ):
+                for item in items:
+                    yield (
+                        item["sid"],
+                        item["app_name"],
+                        item.get("role_name", ""),
+                        item["accion"],
+                        item["motivo"],
+                        ingresado_por,
+                        fecha_solicitud,
+                        status,
+                        comment or default_comment.format(item['app_name'])
+                    )
+    
     def export_single_person_tickets(self, 
                                    reconciliation_data: Dict[str, Any],
                                    ingresado_por: str = "Sistema",
@@ -156,13 +142,13 @@ class ExportService:
         return self.export_reconciliation_tickets([reconciliation_data], ingresado_por, status, comment)
     
     def export_access_history(self, 
-                            access_history: List[Dict[str, Any]],
+                            access_history: Iterable[Dict[str, Any]],
                             filename_prefix: str = "historial_accesos") -> str:
         """
         Exporta el historial de accesos a Excel
         
         Args:
-            access_history: Lista de registros de historial
+            access_history: Registros de historial (lista o generador; no se cargan todos en memoria)
             filename_prefix: Prefijo para el nombre del archivo
             
         Returns:
@@ -174,26 +160,9 @@ class ExportService:
             filename = f"{filename_prefix}_{timestamp}.xlsx"
             filepath = self.output_dir / filename
             
-            # Crear DataFrame
-            df = pd.DataFrame(access_history)
-            
-            # Crear archivo Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Historial', index=False)
-                
-                # Ajustar ancho de columnas
-                worksheet = writer.sheets['Historial']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            # Escribir fila a fila (acepta listas o generadores)
+            with StreamingExcelWriter(filepath) as writer:
+                writer.write_sheet('Historial', access_history)
             
             return str(filepath)
             
@@ -201,13 +170,13 @@ class ExportService:
             raise Exception(f"Error exportando historial: {str(e)}")
     
     def export_authorized_matrix(self, 
-                               matrix_data: List[Dict[str, Any]],
+                               matrix_data: Iterable[Dict[str, Any]],
                                filename_prefix: str = "matriz_autorizaciones") -> str:
         """
         Exporta la matriz de autorizaciones a Excel
         
         Args:
-            matrix_data: Lista de registros de matriz de autorizaciones
+            matrix_data: Registros de matriz de autorizaciones (lista o generador)
             filename_prefix: Prefijo para el nombre del archivo
             
         Returns:
@@ -219,26 +188,9 @@ class ExportService:
             filename = f"{filename_prefix}_{timestamp}.xlsx"
             filepath = self.output_dir / filename
             
-            # Crear DataFrame
-            df = pd.DataFrame(matrix_data)
-            
-            # Crear archivo Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Matriz', index=False)
-                
-                # Ajustar ancho de columnas
-                worksheet = writer.sheets['Matriz']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            # Escribir fila a fila (acepta listas o generadores)
+            with StreamingExcelWriter(filepath) as writer:
+                writer.write_sheet('Matriz', matrix_data)
             
             return str(filepath)
             
@@ -300,46 +252,7 @@ class ExportService:
             filename = f"estadisticas_headcount_{timestamp}.xlsx"
             filepath = os.path.join(self.output_dir, filename)
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja 1: Estadísticas Generales
-                if 'generales' in statistics_data:
-                    generales_df = pd.DataFrame([statistics_data['generales']])
-                    generales_df.to_excel(writer, sheet_name='Generales', index=False)
-                
-                # Hoja 2: Por Unidad
-                if 'por_unidad' in statistics_data and statistics_data['por_unidad']:
-                    unidad_df = pd.DataFrame(statistics_data['por_unidad'])
-                    unidad_df.to_excel(writer, sheet_name='Por Unidad', index=False)
-                
-                # Hoja 3: Por Puesto
-                if 'por_puesto' in statistics_data and statistics_data['por_puesto']:
-                    puesto_df = pd.DataFrame(statistics_data['por_puesto'])
-                    puesto_df.to_excel(writer, sheet_name='Por Puesto', index=False)
-                
-                # Hoja 4: Por Manager
-                if 'por_manager' in statistics_data and statistics_data['por_manager']:
-                    manager_df = pd.DataFrame(statistics_data['por_manager'])
-                    manager_df.to_excel(writer, sheet_name='Por Manager', index=False)
-                
-                # Hoja 5: Por Senior Manager
-                if 'por_senior_manager' in statistics_data and statistics_data['por_senior_manager']:
-                    senior_manager_df = pd.DataFrame(statistics_data['por_senior_manager'])
-                    senior_manager_df.to_excel(writer, sheet_name='Por Senior Manager', index=False)
-                
-                # Hoja 6: Por Estado
-                if 'por_estado' in statistics_data and statistics_data['por_estado']:
-                    estado_df = pd.DataFrame(statistics_data['por_estado'])
-                    estado_df.to_excel(writer, sheet_name='Por Estado', index=False)
-                
-                # Hoja 7: Por Año de Inicio
-                if 'por_año_inicio' in statistics_data and statistics_data['por_año_inicio']:
-                    año_df = pd.DataFrame(statistics_data['por_año_inicio'])
-                    año_df.to_excel(writer, sheet_name='Por Año de Inicio', index=False)
-                
-                # Hoja 8: Detalle por Unidad
-                if 'detalle_por_unidad' in statistics_data and statistics_data['detalle_por_unidad']:
-                    detalle_df = pd.DataFrame(statistics_data['detalle_por_unidad'])
-                    detalle_df.to_excel(writer, sheet_name='Detalle por Unidad', index=False)
+            self._write_statistics(filepath, statistics_data, HEADCOUNT_STATISTICS_SHEETS)
             
             return filepath
             
@@ -354,42 +267,25 @@ class ExportService:
             filename = f"estadisticas_historial_{timestamp}.xlsx"
             filepath = os.path.join(self.output_dir, filename)
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Hoja 1: Estadísticas Generales
-                if 'generales' in statistics_data:
-                    generales_df = pd.DataFrame([statistics_data['generales']])
-                    generales_df.to_excel(writer, sheet_name='Generales', index=False)
-                
-                # Hoja 2: Por Unidad
-                if 'por_unidad' in statistics_data and statistics_data['por_unidad']:
-                    unidad_df = pd.DataFrame(statistics_data['por_unidad'])
-                    unidad_df.to_excel(writer, sheet_name='Por Unidad', index=False)
-                
-                # Hoja 3: Por Subunidad
-                if 'por_subunidad' in statistics_data and statistics_data['por_subunidad']:
-                    subunidad_df = pd.DataFrame(statistics_data['por_subunidad'])
-                    subunidad_df.to_excel(writer, sheet_name='Por Subunidad', index=False)
-                
-                # Hoja 4: Por Puesto
-                if 'por_puesto' in statistics_data and statistics_data['por_puesto']:
-                    puesto_df = pd.DataFrame(statistics_data['por_puesto'])
-                    puesto_df.to_excel(writer, sheet_name='Por Puesto', index=False)
-                
-                # Hoja 5: Por Aplicación
-                if 'por_aplicacion' in statistics_data and statistics_data['por_aplicacion']:
-                    aplicacion_df = pd.DataFrame(statistics_data['por_aplicacion'])
-                    aplicacion_df.to_excel(writer, sheet_name='Por Aplicación', index=False)
-                
-                # Hoja 6: Por Proceso
-                if 'por_proceso' in statistics_data and statistics_data['por_proceso']:
-                    proceso_df = pd.DataFrame(statistics_data['por_proceso'])
-                    proceso_df.to_excel(writer, sheet_name='Por Proceso', index=False)
+            self._write_statistics(filepath, statistics_data, HISTORIAL_STATISTICS_SHEETS)
             
             return filepath
             
         except Exception as e:
             raise Exception(f"Error exportando estadísticas: {str(e)}")
 
+    
+    @staticmethod
+    def _write_statistics(filepath: str, statistics_data: Dict[str, Any],
+                          sheets: Sequence[Tuple[str, str]]):
+        """Una hoja por sección presente ('generales' es un único diccionario)"""
+        with StreamingExcelWriter(filepath) as writer:
+            if 'generales' in statistics_data:
+                writer.write_sheet('Generales', [statistics_data['generales']])
+            for key, sheet_name in sheets:
+                if statistics_data.get(key):
+                    writer.write_sheet(sheet_name, statistics_data[key])
+
 
 # Instancia global para usar en toda la aplicación
 export_service = ExportService()
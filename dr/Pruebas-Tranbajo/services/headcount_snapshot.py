@@ -0,0 +1,147 @@
+"""
+Foto en memoria del headcount (Master_Staff_List) indexada para el filtro de personas
+
+El filtro en tiempo real de "Personas" buscaba en SQL Server en cada pulsación:
+la vista completa del headcount, diccionarios y un recorrido con 'in'. Esta foto
+guarda solo las columnas filtrables, con claves en minúsculas y sin acentos
+("José" encuentra "jose") y, por columna:
+
+- Un índice de trigramas para búsquedas "contiene" (los candidatos salen de la
+  lista más corta de los trigramas del texto y se verifican con 'in')
+- Un índice ordenado de claves para búsquedas por prefijo (bisect)
+
+El ciclo de vida es el de services/table_snapshot.py (igual que la caché de la
+matriz de aplicaciones): la foto se recarga cuando vence su TTL, cuando la sonda
+COUNT + CHECKSUM detecta cambios hechos desde otro proceso, o cuando se invalida
+desde las altas, cambios y bajas de empleados.
+"""
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional
+
+from services.table_snapshot import TableSnapshot
+
+
+def fold(value: Any) -> str:
+    """Clave de búsqueda: minúsculas y sin acentos ('José Muñoz' -> 'jose munoz')"""
+    if value is None:
+        return ''
+    text = unicodedata.normalize('NFKD', str(value).lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+class _ColumnIndex:
+    """Claves plegadas de una columna con índice de trigramas y de prefijos"""
+
+    __slots__ = ('keys', 'trigrams', 'sorted_keys', 'sorted_rows')
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        trigrams: Dict[str, array] = {}
+        for row_id, key in enumerate(keys):
+            for gram in {key[i:i + 3] for i in range(len(key) - 2)}:
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array('I')
+                postings.append(row_id)
+        self.trigrams = trigrams
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.sorted_keys = [keys[row_id] for row_id in order]
+        self.sorted_rows = array('I', order)
+
+    def contains(self, needle: str) -> List[int]:
+        """Filas cuya clave contiene needle (en el orden de la foto)"""
+        if len(needle) < 3:
+            return [row_id for row_id, key in enumerate(self.keys) if needle in key]
+        candidates = None
+        for gram in {needle[i:i + 3] for i in range(len(needle) - 2)}:
+            postings = self.trigrams.get(gram)
+            if postings is None:
+                return []
+            if candidates is None or len(postings) < len(candidates):
+                candidates = postings
+        keys = self.keys
+        return [row_id for row_id in candidates if needle in keys[row_id]]
+
+    def prefix(self, needle: str) -> List[int]:
+        """Filas cuya clave empieza con needle (en el orden de la foto)"""
+        start = bisect_left(self.sorted_keys, needle)
+        matches = []
+        for position in range(start, len(self.sorted_keys)):
+            if not self.sorted_keys[position].startswith(needle):
+                break
+            matches.append(self.sorted_rows[position])
+        return sorted(matches)
+
+
+class HeadcountSnapshot(TableSnapshot):
+    """Foto indexada y segura para hilos de las columnas filtrables del headcount"""
+
+    DEFAULT_TTL = 600            # Segundos antes de recargar la foto completa
+    DEFAULT_PROBE_INTERVAL = 15  # Segundos entre sondas de cambios (COUNT + CHECKSUM)
+    DESCRIPTION = 'la foto del headcount'
+
+    # Columnas de la foto (las que muestra y filtra la pantalla de personas)
+    COLUMNS = ('scotia_id', 'eikon_id', 'employee_number', 'employee_name', 'employee_last_name',
+               'business_email', 'department', 'current_position_title', 'status')
+
+    def __init__(self, connection_factory: Callable[[], Any], table_name: str,
+                 ttl: float = DEFAULT_TTL, probe_interval: Optional[float] = DEFAULT_PROBE_INTERVAL):
+        super().__init__(connection_factory, table_name, ttl=ttl, probe_interval=probe_interval)
+
+    # ------------------------------------------------------------------
+    # Consultas sobre la foto
+    # ------------------------------------------------------------------
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """Todos los empleados de la foto, ordenados por nombre y apellido"""
+        return [dict(row) for row in self._snapshot()[0]]
+
+    def search(self, column: str, text: str, mode: str = 'contains',
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Empleados cuyo valor en column contiene (o empieza con) text, sin distinguir
+        mayúsculas ni acentos
+
+        Args:
+            column: Una de COLUMNS
+            text: Texto buscado (vacío = todos)
+            mode: 'contains' o 'prefix'
+            limit: Máximo de filas a retornar
+
+        Returns:
+            Copias de las filas en el orden de la foto
+        """
+        if column not in self.COLUMNS:
+            raise ValueError(f"Columna no indexada: {column}")
+        rows, indexes = self._snapshot()
+        needle = fold(text).strip()
+        if not needle:
+            row_ids = range(len(rows))
+        elif mode == 'prefix':
+            row_ids = indexes[column].prefix(needle)
+        else:
+            row_ids = indexes[column].contains(needle)
+        if limit is not None:
+            row_ids = row_ids[:limit]
+        return [dict(rows[row_id]) for row_id in row_ids]
+
+    # ------------------------------------------------------------------
+    # Carga e índices
+    # ------------------------------------------------------------------
+
+    def _fetch_rows(self, cursor) -> List[Dict[str, Any]]:
+        cursor.execute(f"""
+            SELECT {', '.join(self.COLUMNS)}
+            FROM {self._table_name}
+            ORDER BY employee_name, employee_last_name, scotia_id
+        """)
+        return [dict(zip(self.COLUMNS, values)) for values in cursor.fetchall()]
+
+    def _build_indexes(self, rows: List[Dict[str, Any]]) -> Dict[str, _ColumnIndex]:
+        return {column: _ColumnIndex([fold(row.get(column)) for row in rows])
+                for column in self.COLUMNS}
+
+    def _extra_stats(self) -> Dict[str, Any]:
+        return {'trigrams': sum(len(index.trigrams) for index in (self._indexes or {}).values())}
@@ -0,0 +1,297 @@
+"""
+Listados paginados por clave (keyset) con proyección de columnas
+
+buscar_procesos, get_all_employees, get_all_applications y obtener_todo_headcount
+devuelven listas completas con todas las columnas (incluidos los alias legacy
+NULL AS manager/ceco/... del headcount). Para pantallas y exportaciones que solo
+muestran algunas columnas y avanzan de a páginas:
+
+    page = listing_service.page('historico', columns=['id', 'scotia_id', 'status'], page_size=200)
+    for row in page:                      # tuplas en el orden de page.columns
+        ...
+    if page.has_more:
+        page = listing_service.page('historico', columns=[...], token=page.next_token)
+
+La página siguiente se pide con WHERE (clave) < (última clave vista) en lugar de
+OFFSET, así el costo no crece con el número de página y las filas insertadas
+mientras tanto no desplazan las páginas ya leídas. El token es opaco (JSON en
+base64) y guarda la tabla, el orden y la última clave.
+"""
+import base64
+import json
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config import get_database_connection
+from services.search_index import ProcessSearchIndex
+
+# Listados disponibles: atributo con el nombre de la tabla y órdenes permitidos.
+# Cada orden termina en una columna única para que la clave no tenga empates.
+# 'exact_keys': columnas de clave que no sobreviven el paso por Python sin perder
+# precisión (DATETIME2(7) tiene 100 ns y datetime solo microsegundos). Se leen como
+# texto (estilo 121, 7 decimales) y se comparan convirtiendo el parámetro en SQL,
+# así el ORDER BY y el WHERE siguen usando la columna (y su índice).
+DATASETS = {
+    'historico': {
+        'table_attr': 'historico_table',
+        'sorts': {
+            'record_date': (('record_date', 'DESC'), ('id', 'DESC')),
+            'id': (('id', 'DESC'),)
+        },
+        'default_sort': 'record_date',
+        'exact_keys': {
+            'record_date': ("CONVERT(VARCHAR(27), [record_date], 121)", "CAST(? AS DATETIME2(7))")
+        }
+    },
+    'headcount': {
+        'table_attr': 'headcount_table',
+        'sorts': {
+            'scotia_id': (('scotia_id', 'ASC'),)
+        },
+        'default_sort': 'scotia_id'
+    },
+    'applications': {
+        'table_attr': 'applications_table',
+        'sorts': {
+            'id': (('id', 'ASC'),),
+            'name_element': (('name_element', 'ASC'), ('id', 'ASC'))
+        },
+        'default_sort': 'id'
+    },
+}
+
+
+class Page:
+    """Una página de un listado: filas (tuplas) en el orden de columns y token de la siguiente"""
+
+    __slots__ = ('columns', 'rows', 'next_token')
+
+    def __init__(self, columns: List[str], rows: List[tuple], next_token: Optional[str] = None):
+        self.columns = columns
+        self.rows = rows
+        self.next_token = next_token
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_token is not None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self.rows)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Filas como diccionarios (para código que espera el formato de buscar_procesos)"""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+class ListingService:
+    """Listados de historico, headcount y applications por páginas de tamaño fijo"""
+
+    DEFAULT_PAGE_SIZE = 200
+    MAX_PAGE_SIZE = 5000
+
+    def __init__(self):
+        from services.access_management_service import access_service
+        self.db_manager = get_database_connection()
+        self.access_service = access_service
+        self.historico_table = access_service.historico_table
+        self.headcount_table = access_service.headcount_table
+        self.applications_table = access_service.applications_table
+        self._columns: Dict[str, List[str]] = {}
+
+    def get_connection(self):
+        """Obtiene una conexión a la base de datos"""
+        return self.db_manager.get_connection()
+
+    def _search_index(self) -> ProcessSearchIndex:
+        """Predicados tipados del historial (compartidos con las búsquedas)"""
+        access = getattr(self, 'access_service', None)
+        if access is not None:
+            return access._search_index()
+        index = getattr(self, '_process_search_index', None)
+        if index is None:
+            index = self._process_search_index = ProcessSearchIndex(self.historico_table)
+        return index
+
+    # ------------------------------------------------------------------
+    # Token de continuación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode_value(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'n': str(value)}
+        return value
+
+    @staticmethod
+    def _decode_value(value: Any) -> Any:
+        if isinstance(value, dict):
+            if 'dt' in value:
+                return datetime.fromisoformat(value['dt'])
+            if 'd' in value:
+                return date.fromisoformat(value['d'])
+            if 'n' in value:
+                return Decimal(value['n'])
+        return value
+
+    @classmethod
+    def encode_token(cls, dataset: str, sort: str, key: Sequence[Any]) -> str:
+        payload = {'d': dataset, 's': sort, 'k': [cls._encode_value(value) for value in key]}
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode_token(cls, token: str, dataset: str, sort: str) -> List[Any]:
+        """Última clave del token; ValueError si el token no corresponde a este listado"""
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw.decode('utf-8'))
+        except Exception:
+            raise ValueError("Token de continuación inválido")
+        if payload.get('d') != dataset or payload.get('s') != sort:
+            raise ValueError(f"El token no corresponde al listado {dataset} ordenado por {sort}")
+        return [cls._decode_value(value) for value in payload.get('k', [])]
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def table_columns(self, dataset: str) -> List[str]:
+        """Columnas reales de la tabla (consulta sin filas, una vez por listado)"""
+        columns = self._columns.get(dataset)
+        if columns is None:
+            table = getattr(self, DATASETS[dataset]['table_attr'])
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT TOP 0 * FROM {table}")
+                columns = self._columns[dataset] = [description[0] for description in cursor.description]
+            finally:
+                conn.close()
+        return columns
+
+    @staticmethod
+    def keyset_condition(keys: Sequence[Tuple[str, str]], values: Sequence[Any],
+                         placeholders: Optional[Dict[str, str]] = None) -> Tuple[str, List[Any]]:
+        """(a, b) después de (va, vb) en el orden dado: a < va OR (a = va AND b < vb)
+
+        placeholders permite convertir el parámetro de una columna en SQL (p. ej.
+        CAST(? AS DATETIME2(7))) en lugar de usar '?'.
+        """
+        placeholders = placeholders or {}
+        clauses = []
+        params: List[Any] = []
+        for position, (column, direction) in enumerate(keys):
+            operator = '<' if direction == 'DESC' else '>'
+            parts = [f"[{previous}] = {placeholders.get(previous, '?')}" for previous, _ in keys[:position]]
+            parts.append(f"[{column}] {operator} {placeholders.get(column, '?')}")
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params.extend(values[:position + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+
+    def build_query(self, dataset: str, columns: Sequence[str], sort: str, page_size: int,
+                    key: Optional[Sequence[Any]] = None, filters: Optional[Dict[str, Any]] = None,
+                    cursor=None) -> Tuple[str, List[Any]]:
+        """
+        SELECT de una página (pide page_size + 1 filas para saber si hay más)
+
+        Las columnas (y las de filters) ya deben estar validadas contra table_columns.
+        Después de las columnas pedidas se traen las de la clave del orden (en texto
+        exacto las de 'exact_keys'), que page() usa para armar el token.
+        """
+        spec = DATASETS[dataset]
+        table = getattr(self, spec['table_attr'])
+        keys = spec['sorts'][sort]
+        exact = spec.get('exact_keys', {})
+
+        index = self._search_index()
+        filter_pairs = [(column, value) for column, value in (filters or {}).items()]
+        # El índice de trigramas solo existe para el historial
+        conditions, params = index.where(filter_pairs, cursor=cursor if dataset == 'historico' else None)
+        if key is not None:
+            condition, values = self.keyset_condition(
+                keys, key, {column: exact[column][1] for column, _ in keys if column in exact})
+            conditions.append(condition)
+            params.extend(values)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = ', '.join(f"[{column}] {direction}" for column, direction in keys)
+        select = ', '.join([f"[{column}]" for column in columns] +
+                           [exact[column][0] if column in exact else f"[{column}]" for column, _ in keys])
+        query = f"SELECT {select} FROM {table}{where} ORDER BY {order} OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+        params.extend([0, page_size + 1])
+        return query, params
+
+    def page(self, dataset: str, columns: Optional[Sequence[str]] = None, sort: Optional[str] = None,
+             page_size: Optional[int] = None, token: Optional[str] = None,
+             filters: Optional[Dict[str, Any]] = None) -> Page:
+        """
+        Trae una página de un listado
+
+        Args:
+            dataset: 'historico', 'headcount' o 'applications'
+            columns: Columnas a traer (None = todas las de la tabla)
+            sort: Orden (ver DATASETS; por defecto el de cada listado)
+            page_size: Filas por página (por defecto DEFAULT_PAGE_SIZE, máximo MAX_PAGE_SIZE)
+            token: next_token de la página anterior (None = primera página)
+            filters: {columna: valor} con los predicados tipados de services/search_index.py
+                     (prefijo para IDs, rango para fechas, contiene para el resto)
+
+        Returns:
+            Page con las filas y el token de la página siguiente (None al final)
+
+        Raises:
+            ValueError: Listado, orden, columnas o token inválidos
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Listado no disponible: {dataset} (opciones: {', '.join(DATASETS)})")
+        spec = DATASETS[dataset]
+        sort = sort or spec['default_sort']
+        if sort not in spec['sorts']:
+            raise ValueError(f"Orden no válido para {dataset}: {sort} (opciones: {', '.join(spec['sorts'])})")
+        page_size = max(1, min(int(page_size or self.DEFAULT_PAGE_SIZE), self.MAX_PAGE_SIZE))
+
+        available = self.table_columns(dataset)
+        by_lower = {column.lower(): column for column in available}
+        requested = list(columns) if columns else list(available)
+        unknown = [column for column in list(requested) + list(filters or {}) if column.lower() not in by_lower]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas en {dataset}: {', '.join(unknown)}")
+        selected = [by_lower[column.lower()] for column in requested]
+        filters = {by_lower[column.lower()]: value for column, value in (filters or {}).items()}
+
+        keys = [column for column, _ in spec['sorts'][sort]]
+        key = self.decode_token(token, dataset, sort) if token else None
+        if key is not None and len(key) != len(keys):
+            raise ValueError("Token de continuación inválido")
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            query, params = self.build_query(dataset, selected, sort, page_size, key, filters, cursor)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        # Las columnas de la clave van al final de cada fila (ver build_query)
+        width = len(selected)
+        next_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_token = self.encode_token(dataset, sort, list(tuple(rows[-1])[width:]))
+        return Page(selected, [tuple(row)[:width] for row in rows], next_token)
+
+
+# Instancia global para usar en toda la aplicación
+listing_service = ListingService()
@@ -0,0 +1,241 @@
+"""
+Conciliación masiva de accesos (toda la población o un subconjunto de SIDs)
+
+En lugar de ejecutar sp_GetAccessReconciliationReport una vez por empleado, se hace
+una sola consulta por conjuntos: headcount activo LEFT JOIN el último registro
+completado de cada (SID, aplicación) en el histórico, ordenado por SID. Las filas se
+leen con fetchmany y se agrupan por SID en Python; los accesos requeridos salen de una
+foto de la matriz de aplicaciones indexada por (unidad_subunidad, position_role).
+El resultado se entrega como un generador: un reporte por SID, con memoria constante.
+"""
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.table_snapshot import normalize
+
+
+class PopulationReconciler:
+    """Calcula current / to_grant / to_revoke para muchos SIDs en una sola pasada"""
+
+    FETCH_SIZE = 2000
+    # Procesos que otorgan acceso; un offboarding posterior lo deja fuera de los actuales
+    GRANT_PROCESSES = ('onboarding', 'lateral_movement')
+    REVOKE_PROCESSES = ('offboarding',)
+    # Estados que cuentan como acceso efectivo (flujo actual y legado)
+    COMPLETED_STATUSES = ('closed completed', 'Completado')
+    ACTIVE_APPLICATION_STATUSES = ('ACTIVE', 'ACTIVO')
+
+    def __init__(self, service):
+        self.service = service
+
+    normalize = staticmethod(normalize)  # UPPER(LTRIM(RTRIM(valor))), ver services/table_snapshot.py
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def reconcile(self, scotia_ids: Optional[Iterable[str]] = None,
+                  unidad_subunidad: Optional[str] = None,
+                  position: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Genera el reporte de conciliación de cada empleado activo
+
+        Args:
+            scotia_ids: Limitar a estos SIDs (None = toda la población activa)
+            unidad_subunidad: Filtro opcional por unidad_subunidad del empleado
+            position: Filtro opcional por posición del empleado
+
+        Yields:
+            Un diccionario por SID con employee, current_access, to_grant, to_revoke y summary
+        """
+        required_index, by_name = self._application_indexes()
+
+        if scotia_ids is None:
+            batches = [None]
+        else:
+            ids = sorted({str(sid).strip() for sid in scotia_ids if sid and str(sid).strip()})
+            if not ids:
+                return
+            size = self.service.MAX_IN_PARAMS
+            batches = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+        for batch in batches:
+            query, params = self._population_query(batch, unidad_subunidad, position)
+            for scotia_id, rows in groupby(self._stream_rows(query, params), key=lambda r: r['scotia_id']):
+                yield self._reconcile_employee(list(rows), required_index, by_name)
+
+    def summarize(self, reports: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Totales de una corrida (consume el generador de reconcile)"""
+        totals = {'employees': 0, 'with_changes': 0, 'current': 0, 'to_grant': 0, 'to_revoke': 0, 'errors': 0}
+        for report in reports:
+            totals['employees'] += 1
+            if report.get('error'):
+                totals['errors'] += 1
+            summary = report['summary']
+            totals['current'] += summary['current_count']
+            totals['to_grant'] += summary['to_grant_count']
+            totals['to_revoke'] += summary['to_revoke_count']
+            if summary['to_grant_count'] or summary['to_revoke_count']:
+                totals['with_changes'] += 1
+        return totals
+
+    # ------------------------------------------------------------------
+    # Consulta por conjuntos
+    # ------------------------------------------------------------------
+
+    def _population_query(self, scotia_ids: Optional[List[str]], unidad_subunidad: Optional[str],
+                          position: Optional[str]) -> Tuple[str, List[Any]]:
+        service = self.service
+        processes = self.GRANT_PROCESSES + self.REVOKE_PROCESSES
+        params: List[Any] = list(self.COMPLETED_STATUSES) + list(processes) + list(self.GRANT_PROCESSES)
+
+        conditions = ["e.activo = 1"]
+        if scotia_ids:
+            conditions.append(f"e.scotia_id IN ({', '.join('?' for _ in scotia_ids)})")
+            params.extend(scotia_ids)
+        if unidad_subunidad:
+            conditions.append("UPPER(LTRIM(RTRIM(e.unidad_subunidad))) = ?")
+            params.append(self.normalize(unidad_subunidad))
+        if position:
+            conditions.append("UPPER(LTRIM(RTRIM(e.position))) = ?")
+            params.append(self.normalize(position))
+
+        query = f"""
+            WITH ultimo AS (
+                SELECT
+                    h.scotia_id,
+                    h.app_access_name,
+                    h.subunit,
+                    h.record_date,
+                    h.status,
+                    h.process_access,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY h.scotia_id, UPPER(LTRIM(RTRIM(h.app_access_name)))
+                        ORDER BY h.record_date DESC, h.id DESC
+                    ) AS rn
+                FROM {service.historico_table} h
+                WHERE h.status IN ({', '.join('?' for _ in self.COMPLETED_STATUSES)})
+                AND h.process_access IN ({', '.join('?' for _ in processes)})
+                AND h.app_access_name IS NOT NULL
+            )
+            SELECT
+                e.scotia_id, e.full_name, e.email, e.unit, e.position, e.unidad_subunidad,
+                u.app_access_name, u.subunit, u.record_date, u.status
+            FROM ({service._get_headcount_select()}) e
+            LEFT JOIN ultimo u
+                ON u.scotia_id = e.scotia_id
+               AND u.rn = 1
+               AND u.process_access IN ({', '.join('?' for _ in self.GRANT_PROCESSES)})
+            WHERE {' AND '.join(conditions)}
+            ORDER BY e.scotia_id
+        """
+        return query, params
+
+    def _stream_rows(self, query: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+        conn = self.service.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(self.FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Álgebra de conjuntos por SID
+    # ------------------------------------------------------------------
+
+    def _application_indexes(self) -> Tuple[Dict[Tuple[str, str], Dict[str, Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+        """
+        Una sola foto de la matriz para toda la corrida:
+        (unidad_subunidad, position_role) -> {nombre: aplicación activa} y nombre -> aplicación
+        """
+        required_index: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for app in self.service.get_all_applications():
+            name = self.normalize(app.get('logical_access_name'))
+            if not name:
+                continue
+            by_name.setdefault(name, app)
+            if self.normalize(app.get('access_status')) not in self.ACTIVE_APPLICATION_STATUSES:
+                continue
+            key = (self.normalize(app.get('unidad_subunidad')), self.normalize(app.get('position_role')))
+            required_index.setdefault(key, {}).setdefault(name, app)
+        return required_index, by_name
+
+    def _reconcile_employee(self, rows: List[Dict[str, Any]],
+                            required_index: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]],
+                            by_name: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        first = rows[0]
+        employee = {
+            'scotia_id': first['scotia_id'],
+            'full_name': first.get('full_name'),
+            'email': first.get('email'),
+            'unit': first.get('unit'),
+            'position': first.get('position'),
+            'unidad_subunidad': first.get('unidad_subunidad'),
+        }
+        position = first.get('position')
+        error = None
+        if not self.normalize(position) or not self.normalize(first.get('unit')):
+            error = 'Empleado sin posición o unidad definida'
+            required = {}
+        else:
+            required = required_index.get(
+                (self.normalize(first.get('unidad_subunidad')), self.normalize(position)), {}
+            )
+
+        current: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            name = self.normalize(row.get('app_access_name'))
+            if not name:
+                continue  # Empleado sin accesos (fila del LEFT JOIN sin histórico)
+            app = required.get(name) or by_name.get(name) or {}
+            current[name] = {
+                'app_name': row['app_access_name'],
+                'unit': app.get('unit'),
+                'subunit': row.get('subunit'),
+                'position_role': position,
+                'role_name': app.get('role_name'),
+                'description': app.get('description'),
+                'status': row.get('status'),
+                'date': row.get('record_date'),
+            }
+
+        to_grant = [{
+            'app_name': app.get('logical_access_name'),
+            'unit': app.get('unit'),
+            'subunit': app.get('subunit'),
+            'position_role': app.get('position_role'),
+            'role_name': app.get('role_name'),
+            'description': app.get('description'),
+            'status': 'To Grant',
+        } for name, app in sorted(required.items()) if name not in current]
+
+        to_revoke = [
+            dict(access, status='To Revoke')
+            for name, access in sorted(current.items()) if name not in required
+        ] if not error else []
+
+        current_access = [current[name] for name in sorted(current)]
+        report = {
+            'scotia_id': employee['scotia_id'],
+            'employee': employee,
+            'current_access': current_access,
+            'to_grant': to_grant,
+            'to_revoke': to_revoke,
+            'summary': {
+                'current_count': len(current_access),
+                'to_grant_count': len(to_grant),
+                'to_revoke_count': len(to_revoke),
+                'final_count': len(current_access) + len(to_grant) - len(to_revoke)
+            }
+        }
+        if error:
+            report['error'] = error
+        return report
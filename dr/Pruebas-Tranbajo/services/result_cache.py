@@ -0,0 +1,154 @@
+"""
+Caché LRU + TTL de resultados por SID (reporte de conciliación, accesos actuales)
+
+Cada entrada se guarda con etiquetas: el SID, la posición del empleado y las
+aplicaciones que aparecen en el resultado. Las escrituras invalidan por etiqueta
+(invalidate_sid / invalidate_tags) justo después de su commit, así que una vista
+repetida no vuelve a consultar SQL Server pero tampoco muestra datos viejos. El TTL
+solo cubre cambios hechos desde otro proceso.
+
+Una carga que empezó antes de una invalidación no se guarda (contador de generación),
+para no reinsertar un resultado calculado con datos anteriores al commit.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from services.table_snapshot import normalize
+
+
+class SidResultCache:
+    """LRU + TTL segura para hilos, con invalidación por SID, posición o aplicación"""
+
+    DEFAULT_MAX_ENTRIES = 512
+    DEFAULT_TTL = 120   # Segundos; cubre cambios hechos por otras instancias de la aplicación
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any, Set[Tuple[str, str]]]]" = OrderedDict()
+        self._by_tag: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """La caché se deshabilita con ttl <= 0 o max_entries <= 0"""
+        return self.ttl > 0 and self.max_entries > 0
+
+    normalize = staticmethod(normalize)  # UPPER(LTRIM(RTRIM(valor))), ver services/table_snapshot.py
+
+    # Etiquetas estándar
+    @classmethod
+    def sid_tag(cls, scotia_id: Any) -> Tuple[str, str]:
+        return ('sid', cls.normalize(scotia_id))
+
+    @classmethod
+    def position_tag(cls, position: Any) -> Tuple[str, str]:
+        return ('position', cls.normalize(position))
+
+    @classmethod
+    def app_tag(cls, app_name: Any) -> Tuple[str, str]:
+        return ('app', cls.normalize(app_name))
+
+    # ------------------------------------------------------------------
+    # Lectura / escritura
+    # ------------------------------------------------------------------
+
+    def get_or_load(self, kind: str, scotia_id: Any, loader: Callable[[], Any],
+                    tags: Optional[Callable[[Any], Iterable[Tuple[str, str]]]] = None,
+                    cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Devuelve el resultado cacheado o lo calcula con loader()
+
+        Args:
+            kind: Tipo de resultado ('reconciliation', 'current_access', ...)
+            scotia_id: SID del empleado
+            loader: Función que calcula el resultado (consulta a SQL Server)
+            tags: Etiquetas adicionales del resultado (posición, aplicaciones)
+            cache_if: Solo se guarda si retorna True (por ejemplo, reportes exitosos)
+        """
+        if not self.enabled:
+            return loader()
+
+        key = (kind, self.normalize(scotia_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if cache_if is not None and not cache_if(value):
+            return value
+
+        entry_tags = {self.sid_tag(scotia_id)}
+        if tags is not None:
+            entry_tags.update(tag for tag in tags(value) if tag[1])
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, copy.deepcopy(value), entry_tags)
+        return value
+
+    def invalidate_sid(self, *scotia_ids: Any):
+        """Descarta los resultados de esos SIDs"""
+        self.invalidate_tags(self.sid_tag(sid) for sid in scotia_ids)
+
+    def invalidate_tags(self, tags: Iterable[Tuple[str, str]]):
+        """Descarta las entradas con cualquiera de esas etiquetas"""
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        """Descarta todo"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de la caché (para diagnóstico)"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _store(self, key: Tuple[str, str], value: Any, tags: Set[Tuple[str, str]]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), value, tags)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
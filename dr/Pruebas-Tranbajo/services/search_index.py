@@ -0,0 +1,250 @@
+"""
+Índice de búsqueda del historial (historico_dr) para buscar_procesos
+
+Antes todos los filtros se traducían a LIKE '%valor%' (incluso IDs y fechas), así
+que cada búsqueda recorría historico_dr completo. Ahora cada campo tiene un tipo:
+
+- IDs (scotia_id, case_id): prefijo sargable (LIKE 'valor%') o exacto con '=valor'
+- Fechas (record_date, request_date, confirmation_by_user): rango [desde, hasta) a partir de 'YYYY',
+  'YYYY-MM', 'YYYY-MM-DD', 'DD/MM/YYYY' o date/datetime
+- Texto libre (aplicación, responsable, descripción, comentario, correos, subunidad):
+  tabla lateral de trigramas historico_trigram_dr (campo, trigrama, historico_id).
+  Los candidatos son los registros que tienen todos los trigramas buscados y el
+  LIKE '%valor%' final solo verifica esos candidatos
+- Resto (status, process_access, ...): LIKE '%valor%' como antes (valores cortos)
+
+La ruta indexada se elige sola: si la tabla de trigramas no existe o el texto tiene
+menos de 3 caracteres se usa el LIKE de siempre. La tabla la mantienen triggers
+sobre historico_dr (ver sql_server_setup.sql); para poblarla la primera vez o
+después de cargas hechas con los triggers deshabilitados:
+
+    python -m services.search_index --rebuild
+"""
+import argparse
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, List, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProcessSearchIndex:
+    """Predicados tipados e índice de trigramas para las búsquedas en historico_dr"""
+
+    TRIGRAM_TABLE = "[dbo].[historico_trigram_dr]"
+    POSITIONS_TABLE = "[dbo].[historico_trigram_pos]"
+
+    # Campos de texto libre indexados y su código en la tabla de trigramas
+    TEXT_FIELDS = {
+        'app_access_name': 1,
+        'responsible': 2,
+        'event_description': 3,
+        'comment': 4,
+        'ticket_email': 5,
+        'employee_email': 6,
+        'subunit': 7
+    }
+    ID_FIELDS = ('scotia_id', 'case_id')
+    DATE_FIELDS = ('record_date', 'request_date', 'confirmation_by_user')
+
+    MAX_TEXT = 4000       # Caracteres indexados por campo (= filas de la tabla de posiciones)
+    MAX_TRIGRAMS = 6      # Trigramas usados por búsqueda (el LIKE verifica el resto)
+
+    DATE_FORMATS = (
+        (re.compile(r'^(\d{4})$'), 'year'),
+        (re.compile(r'^(\d{4})-(\d{1,2})$'), 'month'),
+        (re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})'), 'day'),
+        (re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$'), 'day_latin')
+    )
+
+    def __init__(self, historico_table: str, trigram_table: str = TRIGRAM_TABLE,
+                 positions_table: str = POSITIONS_TABLE):
+        self.historico_table = historico_table
+        self.trigram_table = trigram_table
+        self.positions_table = positions_table
+        self._available: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    # Disponibilidad del índice
+    # ------------------------------------------------------------------
+
+    def available(self, cursor) -> bool:
+        """True si la tabla de trigramas existe y está construida (se consulta una vez por proceso).
+
+        Una tabla vacía con historial existente no se usa (devolvería cero resultados):
+        las búsquedas siguen con LIKE hasta ejecutar --rebuild.
+        """
+        if self._available is None:
+            try:
+                cursor.execute("SELECT COL_LENGTH(?, 'historico_id')", (self.trigram_table,))
+                row = cursor.fetchone()
+                available = bool(row) and row[0] is not None
+                if available:
+                    cursor.execute(f"""
+                        SELECT CASE WHEN EXISTS (SELECT 1 FROM {self.trigram_table})
+                                      OR NOT EXISTS (SELECT 1 FROM {self.historico_table})
+                               THEN 1 ELSE 0 END
+                    """)
+                    row = cursor.fetchone()
+                    available = bool(row and row[0])
+                    if not available:
+                        logger.warning("Índice de trigramas vacío; ejecutar 'python -m services.search_index --rebuild'")
+                self._available = available
+            except Exception as e:
+                logger.warning("Índice de trigramas no disponible: %s", e)
+                self._available = False
+        return self._available
+
+    def reset(self):
+        """Vuelve a comprobar la tabla de trigramas en la próxima búsqueda"""
+        self._available = None
+
+    # ------------------------------------------------------------------
+    # Predicados
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def escape_like(value: str) -> str:
+        """Escapa comodines de LIKE (se usa con ESCAPE '\\')"""
+        return re.sub(r'([\\%_\[])', r'\\\1', value)
+
+    @classmethod
+    def trigrams(cls, text: str) -> List[str]:
+        """Trigramas distintos del texto en minúsculas, en orden de aparición"""
+        text = text.lower()[:cls.MAX_TEXT]
+        return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+    @classmethod
+    def date_range(cls, value: Any) -> Optional[Tuple[datetime, datetime]]:
+        """Rango [desde, hasta) de un valor de fecha parcial; None si no se reconoce"""
+        if isinstance(value, datetime):
+            start = datetime(value.year, value.month, value.day)
+            return start, start + timedelta(days=1)
+        if isinstance(value, date):
+            start = datetime(value.year, value.month, value.day)
+            return start, start + timedelta(days=1)
+
+        text = str(value).strip()
+        for pattern, kind in cls.DATE_FORMATS:
+            match = pattern.match(text)
+            if not match:
+                continue
+            parts = [int(part) for part in match.groups()]
+            try:
+                if kind == 'year':
+                    return datetime(parts[0], 1, 1), datetime(parts[0] + 1, 1, 1)
+                if kind == 'month':
+                    start = datetime(parts[0], parts[1], 1)
+                    end = datetime(parts[0] + (parts[1] == 12), parts[1] % 12 + 1, 1)
+                    return start, end
+                if kind == 'day':
+                    start = datetime(parts[0], parts[1], parts[2])
+                else:
+                    start = datetime(parts[2], parts[1], parts[0])
+                return start, start + timedelta(days=1)
+            except ValueError:
+                return None
+        return None
+
+    def predicate(self, field: str, value: Any, alias: str = "", cursor=None) -> Tuple[str, List[Any]]:
+        """
+        Condición SQL (y parámetros) para filtrar field por value según su tipo
+
+        Args:
+            field: Columna de historico_dr
+            value: Valor ingresado por el usuario
+            alias: Prefijo de la tabla en la consulta ('h.' o '')
+            cursor: Cursor para comprobar el índice de trigramas (None = sin trigramas)
+
+        Returns:
+            Tupla (condición, parámetros)
+        """
+        column = f"{alias}{field}"
+
+        if field in self.ID_FIELDS:
+            text = str(value).strip()
+            if text.startswith('='):
+                return f"{column} = ?", [text[1:].strip()]
+            return f"{column} LIKE ? ESCAPE '\\'", [f"{self.escape_like(text)}%"]
+
+        if field in self.DATE_FIELDS:
+            bounds = self.date_range(value)
+            if bounds is not None:
+                return f"{column} >= ? AND {column} < ?", list(bounds)
+            return f"{column} LIKE ?", [f"%{value}%"]
+
+        text = str(value).strip()
+        pattern = f"%{self.escape_like(text)}%"
+        grams = self.trigrams(text) if field in self.TEXT_FIELDS else []
+        if grams and cursor is not None and self.available(cursor):
+            if len(grams) > self.MAX_TRIGRAMS:
+                step = (len(grams) - 1) / (self.MAX_TRIGRAMS - 1)
+                grams = [grams[round(i * step)] for i in range(self.MAX_TRIGRAMS)]
+            return (
+                f"{alias}id IN ("
+                f"SELECT t.historico_id FROM {self.trigram_table} t "
+                f"WHERE t.field = ? AND t.trigram IN ({', '.join('?' for _ in grams)}) "
+                f"GROUP BY t.historico_id HAVING COUNT(*) = ?"
+                f") AND {column} LIKE ? ESCAPE '\\'",
+                [self.TEXT_FIELDS[field], *grams, len(grams), pattern]
+            )
+        return f"{column} LIKE ? ESCAPE '\\'", [pattern]
+
+    def where(self, filters: Iterable[Tuple[str, Any]], alias: str = "", cursor=None) -> Tuple[List[str], List[Any]]:
+        """Condiciones y parámetros de varios filtros (field, value); se omiten los vacíos"""
+        conditions: List[str] = []
+        params: List[Any] = []
+        for field, value in filters:
+            if value is None or (isinstance(value, str) and not value.strip()):
+                continue
+            condition, values = self.predicate(field, value, alias, cursor)
+            conditions.append(condition)
+            params.extend(values)
+        return conditions, params
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def _insert_trigrams_query(self, source: str) -> str:
+        """INSERT ... SELECT de los trigramas de los registros de source (tabla o pseudo-tabla)"""
+        fields = " UNION ALL ".join(
+            f"SELECT id, {code} AS field, LOWER(CAST({field} AS NVARCHAR(4000))) AS value FROM {source}"
+            for field, code in self.TEXT_FIELDS.items()
+        )
+        return f"""
+            INSERT INTO {self.trigram_table} (field, trigram, historico_id)
+            SELECT DISTINCT f.field, SUBSTRING(f.value, p.pos, 3), f.id
+            FROM ({fields}) f
+            JOIN {self.positions_table} p ON p.pos <= LEN(f.value) - 2
+            WHERE f.value IS NOT NULL
+        """
+
+    def rebuild(self, cursor) -> int:
+        """Reconstruye la tabla de trigramas completa desde historico_dr (sin commit)"""
+        cursor.execute(f"DELETE FROM {self.trigram_table}")
+        cursor.execute(self._insert_trigrams_query(self.historico_table))
+        self._available = True
+        return max(cursor.rowcount, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento del índice de búsqueda del historial")
+    parser.add_argument('--rebuild', action='store_true', help="Reconstruye historico_trigram_dr desde historico_dr")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from services.access_management_service import access_service
+    success, message = access_service.rebuild_search_index()
+    print(message)
+    if not success:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ Servicio de búsqueda para el sistema de gestión de empleados
 Sistema optimizado para SQL Server únicamente
 """
 import pyodbc
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import sys
 import os
 
@@ -11,6 +11,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config import get_database_connection
 from services.access_management_service import access_service
+from services.search_index import ProcessSearchIndex
 
 
 class SearchService:
@@ -31,12 +32,88 @@ class SearchService:
         """Obtiene una conexión a la base de datos"""
         return self.db_manager.get_connection()
     
-    def buscar_procesos(self, filtros: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    # Columnas del historial que devuelve buscar_procesos
+    PROCESOS_COLUMNS = """
+        id, case_id, scotia_id, process_access, record_date, request_date,
+        status, comment, responsible, subunit, event_description,
+        ticket_email, app_access_name, closing_date_app, app_quality,
+        confirmation_by_user, employee_email, computer_system_type,
+        duration_of_access, closing_date_ticket, comment_tq, ticket_quality,
+        general_status_ticket, general_status_case, average_time_open_ticket,
+        sla_app, sla_ticket, sla_case
+    """
+    
+    # Filtros de buscar_procesos -> columna de historico (los alias comparten columna)
+    PROCESOS_FILTROS = (
+        (('case_id',), 'case_id'),
+        (('scotia_id', 'sid'), 'scotia_id'),
+        (('process_access', 'tipo_proceso'), 'process_access'),
+        (('status',), 'status'),
+        (('request_date',), 'request_date'),
+        (('app_access_name', 'app_name'), 'app_access_name'),
+        (('ticket_email', 'mail'), 'ticket_email'),
+        (('employee_email',), 'employee_email'),
+        (('app_quality',), 'app_quality'),
+        (('confirmation_by_user',), 'confirmation_by_user'),
+        (('comment',), 'comment'),
+        (('subunit',), 'subunit'),
+        (('responsible',), 'responsible'),
+        (('event_description',), 'event_description')
+    )
+    
+    def _search_index(self) -> ProcessSearchIndex:
+        """Índice de búsqueda del historial (el del servicio de accesos si está disponible)"""
+        index = getattr(self, '_process_search_index', None)
+        if index is None:
+            access = getattr(self, 'access_service', None)
+            index = access._search_index() if access is not None else ProcessSearchIndex(self.historico_table)
+            self._process_search_index = index
+        return index
+    
+    def _procesos_where(self, filtros: Optional[Dict[str, Any]], cursor=None) -> Tuple[str, List[Any]]:
+        """
+        Construye la cláusula WHERE (y sus parámetros) de buscar_procesos / contar_procesos
+        
+        Cada filtro usa el predicado de su tipo (prefijo para IDs, rango para fechas,
+        trigramas para texto libre; ver services/search_index.py).
+        
+        Args:
+            filtros: Diccionario con filtros de búsqueda
+            cursor: Cursor de la consulta (para elegir la ruta indexada)
+            
+        Returns:
+            Tupla (cláusula WHERE o cadena vacía, parámetros)
+        """
+        filtros = filtros or {}
+        pares = []
+        for alias, columna in self.PROCESOS_FILTROS:
+            # El primer alias con valor gana ('sid' es un alias de 'scotia_id', etc.)
+            valor = next((filtros[a] for a in alias if filtros.get(a)), None)
+            if valor:
+                pares.append((columna, valor))
+        
+        conditions, params = self._search_index().where(pares, cursor=cursor)
+        
+        if filtros.get('fecha_desde'):
+            conditions.append("record_date >= ?")
+            params.append(filtros['fecha_desde'])
+        
+        if filtros.get('fecha_hasta'):
+            conditions.append("record_date <= ?")
+            params.append(filtros['fecha_hasta'])
+        
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+    
+    def buscar_procesos(self, filtros: Optional[Dict[str, Any]] = None,
+                        limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Busca procesos en la tabla histórico con filtros opcionales
         
         Args:
             filtros: Diccionario con filtros de búsqueda
+            limit: Tamaño de página (None = todos los registros)
+            offset: Registros a saltar cuando se pagina (OFFSET/FETCH)
             
         Returns:
             Lista de procesos encontrados
@@ -45,98 +122,17 @@ class SearchService:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Query base - seleccionar todos los campos relevantes
+            where, params = self._procesos_where(filtros, cursor)
+            # id como desempate para que las páginas sean estables
             query = f"""
-                SELECT id, case_id, scotia_id, process_access, record_date, request_date,
-                       status, comment, responsible, subunit, event_description,
-                       ticket_email, app_access_name, closing_date_app, app_quality,
-                       confirmation_by_user, employee_email, computer_system_type,
-                       duration_of_access, closing_date_ticket, comment_tq, ticket_quality,
-                       general_status_ticket, general_status_case, average_time_open_ticket,
-                       sla_app, sla_ticket, sla_case
-                FROM {self.historico_table}
+                SELECT {self.PROCESOS_COLUMNS}
+                FROM {self.historico_table}{where}
+                ORDER BY record_date DESC, id DESC
             """
             
-            conditions = []
-            params = []
-            
-            if filtros:
-                if filtros.get('case_id'):
-                    conditions.append("case_id LIKE ?")
-                    params.append(f"%{filtros['case_id']}%")
-                
-                if filtros.get('sid') or filtros.get('scotia_id'):
-                    # 'sid' es un alias para 'scotia_id'
-                    valor = filtros.get('scotia_id') or filtros.get('sid')
-                    conditions.append("scotia_id LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('process_access') or filtros.get('tipo_proceso'):
-                    # 'tipo_proceso' es un alias para 'process_access'
-                    valor = filtros.get('process_access') or filtros.get('tipo_proceso')
-                    conditions.append("process_access LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('status'):
-                    conditions.append("status LIKE ?")
-                    params.append(f"%{filtros['status']}%")
-                
-                if filtros.get('request_date'):
-                    conditions.append("request_date LIKE ?")
-                    params.append(f"%{filtros['request_date']}%")
-                
-                if filtros.get('app_access_name') or filtros.get('app_name'):
-                    # 'app_name' es un alias para 'app_access_name'
-                    valor = filtros.get('app_access_name') or filtros.get('app_name')
-                    conditions.append("app_access_name LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('ticket_email') or filtros.get('mail'):
-                    # 'mail' es un alias para 'ticket_email'
-                    valor = filtros.get('ticket_email') or filtros.get('mail')
-                    conditions.append("ticket_email LIKE ?")
-                    params.append(f"%{valor}%")
-                
-                if filtros.get('employee_email'):
-                    conditions.append("employee_email LIKE ?")
-                    params.append(f"%{filtros['employee_email']}%")
-                
-                if filtros.get('app_quality'):
-                    conditions.append("app_quality LIKE ?")
-                    params.append(f"%{filtros['app_quality']}%")
-                
-                if filtros.get('confirmation_by_user'):
-                    conditions.append("confirmation_by_user LIKE ?")
-                    params.append(f"%{filtros['confirmation_by_user']}%")
-                
-                if filtros.get('comment'):
-                    conditions.append("comment LIKE ?")
-                    params.append(f"%{filtros['comment']}%")
-                
-                if filtros.get('subunit'):
-                    conditions.append("subunit LIKE ?")
-                    params.append(f"%{filtros['subunit']}%")
-                
-                if filtros.get('responsible'):
-                    conditions.append("responsible LIKE ?")
-                    params.append(f"%{filtros['responsible']}%")
-                
-                if filtros.get('event_description'):
-                    conditions.append("event_description LIKE ?")
-                    params.append(f"%{filtros['event_description']}%")
-                
-                if filtros.get('fecha_desde'):
-                    conditions.append("record_date >= ?")
-                    params.append(filtros['fecha_desde'])
-                
-                if filtros.get('fecha_hasta'):
-                    conditions.append("record_date <= ?")
-                    params.append(filtros['fecha_hasta'])
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            
-            query += " ORDER BY record_date DESC"
+            if limit is not None:
+                query += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+                params.extend([max(0, int(offset)), int(limit)])
             
             cursor.execute(query, params)
             columns = [description[0] for description in cursor.description]
@@ -159,6 +155,65 @@ class SearchService:
                 pass
             return []
     
+    def contar_procesos(self, filtros: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Cuenta los procesos que devolvería buscar_procesos con los mismos filtros
+        
+        Args:
+            filtros: Diccionario con filtros de búsqueda
+            
+        Returns:
+            Total de registros (0 si hay error)
+        """
+        try:
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                where, params = self._procesos_where(filtros, cursor)
+                cursor.execute(f"SELECT COUNT_BIG(*) FROM {self.historico_table}{where}", params)
+                row = cursor.fetchone()
+                return int(row[0]) if row else 0
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error en contar_procesos: {e}")
+            return 0
+    
+    def emails_headcount(self, scotia_ids: List[str]) -> Dict[str, str]:
+        """
+        Emails del headcount (business_email) para los SID de una página del historial
+        
+        Args:
+            scotia_ids: SIDs de los registros mostrados
+            
+        Returns:
+            Diccionario scotia_id -> email (vacío si hay error)
+        """
+        sids = sorted({str(sid).strip() for sid in scotia_ids if sid})
+        emails = {}
+        if not sids:
+            return emails
+        try:
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                step = self.access_service.MAX_IN_PARAMS
+                for start in range(0, len(sids), step):
+                    chunk = sids[start:start + step]
+                    placeholders = ','.join(['?'] * len(chunk))
+                    cursor.execute(
+                        f"SELECT scotia_id, business_email FROM {self.headcount_table} WHERE scotia_id IN ({placeholders})",
+                        tuple(chunk)
+                    )
+                    for row in cursor.fetchall():
+                        if row[1]:
+                            emails[str(row[0]).strip()] = row[1]
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error en emails_headcount: {e}")
+        return emails
+    
     def buscar_headcount_por_sid(self, sid: str) -> List[Dict[str, Any]]:
         """
         Busca empleados en headcount por SID
@@ -231,6 +286,45 @@ class SearchService:
             print(f"Error en obtener_todo_headcount: {e}")
             return []
     
+    def filtrar_headcount(self, campo: str, texto: str, modo: str = 'contains') -> List[Dict[str, Any]]:
+        """
+        Filtra el headcount por una columna usando la foto indexada en memoria
+        (sin distinguir mayúsculas ni acentos)
+
+        Args:
+            campo: Columna de Master_Staff_List (ver HeadcountSnapshot.COLUMNS)
+            texto: Texto a buscar (vacío = todos)
+            modo: 'contains' o 'prefix'
+
+        Returns:
+            Empleados que coinciden, ordenados por nombre y apellido
+        """
+        try:
+            snapshot = self.access_service.headcount_snapshot
+            if snapshot.enabled:
+                return snapshot.search(campo, texto, modo)
+
+            # Foto deshabilitada (HEADCOUNT_SNAPSHOT_TTL=0): filtro directo en SQL Server
+            if campo not in snapshot.COLUMNS:
+                raise ValueError(f"Columna no indexada: {campo}")
+            patron = f"{texto}%" if modo == 'prefix' else f"%{texto}%"
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {', '.join(snapshot.COLUMNS)}
+                    FROM {self.headcount_table}
+                    WHERE {campo} LIKE ?
+                    ORDER BY employee_name, employee_last_name, scotia_id
+                """, (patron,))
+                return [dict(zip(snapshot.COLUMNS, row)) for row in cursor.fetchall()]
+            finally:
+                conn.close()
+
+        except Exception as e:
+            print(f"Error en filtrar_headcount: {e}")
+            return []
+
     def actualizar_proceso(self, case_id: str, datos_actualizados: Dict[str, Any]) -> tuple[bool, str]:
         """
         Actualiza un proceso en la tabla histórico
@@ -280,9 +374,15 @@ class SearchService:
             params.append(case_id)
             
             cursor.execute(query, params)
+            # Antes del refresh: después rowcount sería el del INSERT en current_access_dr
+            updated = cursor.rowcount
+            if scotia_id_result:
+                self.access_service.refresh_current_access(cursor, [scotia_id_result[0]])
             conn.commit()
+            if scotia_id_result:
+                self.access_service.invalidate_employee_cache(scotia_id_result[0])
             
-            if cursor.rowcount > 0:
+            if updated > 0:
                 return True, f"Proceso {case_id} actualizado exitosamente"
             else:
                 return False, f"No se encontró el proceso {case_id}"
@@ -0,0 +1,145 @@
+"""
+Fotos en memoria de tablas de SQL Server con TTL y sonda de cambios
+
+Base común de la caché de la matriz de aplicaciones y de la foto del headcount.
+La foto se recarga cuando vence su TTL, cuando una sonda barata (COUNT + CHECKSUM)
+detecta cambios hechos desde otro proceso, o cuando se invalida explícitamente.
+Cada subclase define qué filas lee (_fetch_rows) y qué índices construye (_build_indexes);
+filas e índices se publican juntos bajo el mismo lock.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def normalize(value: Any) -> str:
+    """Equivalente en Python de UPPER(LTRIM(RTRIM(valor)))"""
+    return '' if value is None else str(value).strip().upper()
+
+
+def signature_query(table_name: str) -> str:
+    """Firma barata de una tabla: COUNT + CHECKSUM de todas sus filas"""
+    return f"SELECT COUNT_BIG(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM {table_name}"
+
+
+class TableSnapshot:
+    """Ciclo de vida (TTL + sonda + invalidación) de una foto indexada y segura para hilos"""
+
+    DEFAULT_TTL = 300            # Segundos antes de recargar la foto completa
+    DEFAULT_PROBE_INTERVAL = 30  # Segundos entre sondas de cambios (COUNT + CHECKSUM)
+    DESCRIPTION = 'la foto'      # Para los mensajes de error
+
+    def __init__(self, connection_factory: Callable[[], Any], table_name: str,
+                 ttl: float = DEFAULT_TTL, probe_interval: Optional[float] = DEFAULT_PROBE_INTERVAL):
+        self._connection_factory = connection_factory
+        self._table_name = table_name
+        self.ttl = ttl
+        self.probe_interval = probe_interval  # None = sin sonda (solo TTL e invalidación)
+        self._lock = threading.RLock()
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._indexes: Any = None
+        self._signature = None
+        self._loaded_at = 0.0
+        self._probed_at = 0.0
+        self._listeners: List[Callable[[], Any]] = []
+
+    @property
+    def enabled(self) -> bool:
+        """La foto se deshabilita con ttl <= 0 (las consultas van directo a SQL Server)"""
+        return self.ttl > 0
+
+    # ------------------------------------------------------------------
+    # Puntos de extensión
+    # ------------------------------------------------------------------
+
+    def _fetch_rows(self, cursor) -> List[Dict[str, Any]]:
+        """Lee las filas de la foto con el cursor dado"""
+        raise NotImplementedError
+
+    def _build_indexes(self, rows: List[Dict[str, Any]]) -> Any:
+        """Índices sobre las filas recién leídas (se publican junto con ellas)"""
+        return None
+
+    def _extra_stats(self) -> Dict[str, Any]:
+        """Datos adicionales para stats()"""
+        return {}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de la foto
+    # ------------------------------------------------------------------
+
+    def add_invalidation_listener(self, callback: Callable[[], Any]):
+        """Registra una función a llamar cada vez que se invalida la foto (p. ej. los dropdowns)"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def invalidate(self):
+        """Descarta la foto actual; la próxima consulta la recarga"""
+        with self._lock:
+            self._rows = None
+            self._signature = None
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error notificando invalidación de {self.DESCRIPTION}: {e}")
+
+    def refresh(self):
+        """Recarga la foto inmediatamente"""
+        with self._lock:
+            self._load()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de la foto (para diagnóstico)"""
+        with self._lock:
+            stats = {
+                'loaded': self._rows is not None,
+                'rows': len(self._rows or []),
+            }
+            stats.update(self._extra_stats())
+            stats.update({
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._rows is not None else None,
+                'ttl': self.ttl,
+                'probe_interval': self.probe_interval
+            })
+            return stats
+
+    def _snapshot(self) -> Tuple[List[Dict[str, Any]], Any]:
+        """Filas e índices vigentes (recarga si venció el TTL o la sonda detecta cambios)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._rows is None or now - self._loaded_at >= self.ttl:
+                self._load()
+            elif self.probe_interval is not None and now - self._probed_at >= self.probe_interval:
+                self._probed_at = now
+                if self._probe() != self._signature:
+                    self._load()
+            return self._rows, self._indexes
+
+    def _probe(self):
+        """Firma barata de la tabla para detectar cambios hechos fuera de este proceso"""
+        conn = self._connection_factory()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(signature_query(self._table_name))
+            row = cursor.fetchone()
+            return tuple(row) if row else None
+        finally:
+            conn.close()
+
+    def _load(self):
+        conn = self._connection_factory()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(signature_query(self._table_name))
+            row = cursor.fetchone()
+            signature = tuple(row) if row else None
+            rows = self._fetch_rows(cursor)
+        finally:
+            conn.close()
+
+        self._indexes = self._build_indexes(rows)
+        self._rows = rows
+        self._signature = signature
+        self._loaded_at = self._probed_at = time.monotonic()
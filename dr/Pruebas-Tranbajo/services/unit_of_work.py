@@ -0,0 +1,201 @@
+"""
+Unidad de trabajo: una conexión y una transacción por operación de negocio
+
+Un onboarding, movimiento lateral, flex staff u offboarding llama a muchos métodos del
+servicio y cada uno abre, confirma y cierra su propia conexión. Dentro de una unidad
+de trabajo, get_connection() entrega siempre la misma conexión envuelta en
+ScopedConnection: commit() y close() de los métodos internos no tienen efecto,
+rollback() marca la unidad para deshacerse, y al salir del bloque se hace un único
+commit (o rollback si hubo error o la operación retornó fallo).
+
+La unidad es por hilo (threading.local), de modo que las tareas de la interfaz que
+corren en segundo plano no comparten transacción. Las unidades anidadas se unen a la
+externa. Además guarda búsquedas de entidades (empleado, aplicaciones por posición)
+durante su vida y difiere hasta después del commit las acciones registradas con
+after_commit (por ejemplo, invalidar cachés).
+"""
+import copy
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class ScopedConnection:
+    """Conexión compartida por los métodos que participan en una unidad de trabajo"""
+
+    def __init__(self, unit: 'UnitOfWork', raw_connection):
+        self._unit = unit
+        self._raw = raw_connection
+
+    def cursor(self):
+        return self._raw.cursor()
+
+    def commit(self):
+        """El commit real lo hace la unidad de trabajo al terminar"""
+
+    def rollback(self):
+        """Un rollback interno invalida toda la unidad"""
+        self._unit.set_rollback_only()
+
+    def close(self):
+        """La conexión se devuelve al terminar la unidad de trabajo"""
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._unit.set_rollback_only()
+        return False
+
+
+class UnitOfWork:
+    """Conexión, transacción y memoria de búsquedas de una operación de negocio"""
+
+    def __init__(self, connection_factory: Callable[[], Any]):
+        self._connection_factory = connection_factory
+        self._raw = None
+        self._scoped: Optional[ScopedConnection] = None
+        self._memo: Dict[Hashable, Any] = {}
+        self._after_commit: List[Callable[[], None]] = []
+        self.rollback_only = False
+        self.depth = 0
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    def connection(self) -> ScopedConnection:
+        """Conexión compartida (se abre con la primera consulta)"""
+        if self._scoped is None:
+            self._raw = self._connection_factory()
+            self._scoped = ScopedConnection(self, self._raw)
+        return self._scoped
+
+    def set_rollback_only(self):
+        """Marca la unidad para deshacerse al terminar"""
+        self.rollback_only = True
+
+    def after_commit(self, action: Callable[[], None]):
+        """Ejecuta la acción solo si la unidad se confirma (después del commit)"""
+        self._after_commit.append(action)
+
+    # ------------------------------------------------------------------
+    # Memoria de búsquedas
+    # ------------------------------------------------------------------
+
+    def memo(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Resultado de loader() guardado por clave durante la unidad (se entregan copias)"""
+        if key not in self._memo:
+            value = loader()
+            if value is None:
+                return None  # No se recuerdan las búsquedas vacías ni los errores
+            self._memo[key] = value
+        return copy.deepcopy(self._memo[key])
+
+    def forget(self, key: Hashable):
+        """Descarta una búsqueda recordada (después de modificar la entidad)"""
+        self._memo.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Cierre
+    # ------------------------------------------------------------------
+
+    def finish(self, error: bool = False):
+        """Commit o rollback único, devolución de la conexión y acciones posteriores"""
+        raw, self._raw, self._scoped = self._raw, None, None
+        committed = False
+        try:
+            if raw is not None:
+                if error or self.rollback_only:
+                    raw.rollback()
+                else:
+                    raw.commit()
+                    committed = True
+        finally:
+            if raw is not None:
+                raw.close()
+            self._memo.clear()
+        if committed or raw is None and not (error or self.rollback_only):
+            for action in self._after_commit:
+                try:
+                    action()
+                except Exception as e:
+                    print(f"Error en acción posterior al commit: {e}")
+        self._after_commit.clear()
+
+
+class UnitOfWorkManager:
+    """Unidad de trabajo activa por hilo para un servicio"""
+
+    def __init__(self, connection_factory: Callable[[], Any]):
+        self._connection_factory = connection_factory
+        self._local = threading.local()
+
+    @property
+    def current(self) -> Optional[UnitOfWork]:
+        return getattr(self._local, 'unit', None)
+
+    def begin(self) -> UnitOfWork:
+        unit = self.current
+        if unit is None:
+            unit = UnitOfWork(self._connection_factory)
+            self._local.unit = unit
+        unit.depth += 1
+        return unit
+
+    def end(self, unit: UnitOfWork, error: bool = False):
+        unit.depth -= 1
+        if error:
+            unit.set_rollback_only()
+        if unit.depth == 0:
+            self._local.unit = None
+            unit.finish(error)
+
+
+def transactional(method):
+    """
+    Ejecuta un método del servicio dentro de una unidad de trabajo (o se une a la activa).
+
+    Si el método retorna una tupla (False, mensaje, ...) la unidad se deshace; si falla
+    el commit final, o una llamada interna marcó la unidad para deshacerse aunque el
+    método retornó éxito, se retorna el mismo formato con el error.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        manager = self._units()
+        unit = manager.begin()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception:
+            manager.end(unit, error=True)
+            raise
+        if isinstance(result, tuple) and result and result[0] is False:
+            unit.set_rollback_only()
+        try:
+            manager.end(unit)
+        except Exception as e:
+            return _failed_result(result, f"Error confirmando la transacción: {str(e)}")
+        if unit.depth == 0 and unit.rollback_only and not (isinstance(result, tuple) and result and result[0] is False):
+            # Un rollback interno deshizo la unidad: no se puede informar éxito
+            return _failed_result(result, "La operación se deshizo: una consulta interna falló")
+        return result
+    return wrapper
+
+
+def _failed_result(result: Any, message: str) -> Any:
+    """Mismo formato de tupla que el resultado original, marcado como fallo"""
+    if not isinstance(result, tuple) or not result:
+        raise RuntimeError(message)
+    rest = []
+    for value in result[2:]:
+        if isinstance(value, dict):
+            rest.append({key: 0 for key in value})
+        elif isinstance(value, list):
+            rest.append([])
+        else:
+            rest.append(value)
+    return (False, message, *rest)
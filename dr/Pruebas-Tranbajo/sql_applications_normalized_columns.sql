@@ -0,0 +1,100 @@
+-- =====================================================
+-- MIGRACIÓN: COLUMNAS NORMALIZADAS E ÍNDICES EN APPLICATIONS_DR
+-- =====================================================
+-- Script idempotente para bases existentes. Se puede ejecutar varias veces.
+-- sql_server_setup.sql incluye el mismo bloque para instalaciones nuevas.
+
+USE GAMLO_Empleados_DR;
+GO
+
+-- =====================================================
+-- COLUMNAS NORMALIZADAS EN APPLICATIONS (búsquedas sargables)
+-- =====================================================
+-- Columnas calculadas persistidas con UPPER(LTRIM(RTRIM(...))) para que las
+-- búsquedas por unidad_subunidad / posición / nombre usen índices en lugar de
+-- evaluar la expresión fila por fila.
+-- Requiere ANSI_NULLS y QUOTED_IDENTIFIER en ON para indexar columnas calculadas.
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+SET ANSI_PADDING ON;
+SET ANSI_WARNINGS ON;
+SET ARITHABORT ON;
+SET CONCAT_NULL_YIELDS_NULL ON;
+SET NUMERIC_ROUNDABORT OFF;
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'unit_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [unit_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([unit], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna unit_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'service_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [service_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([service], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna service_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'role_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [role_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([role], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna role_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'name_element_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [name_element_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([name_element], '')))) AS VARCHAR(200)) PERSISTED;
+    PRINT 'Columna name_element_norm agregada a applications_dr';
+END
+GO
+
+-- Misma expresión que unidad_subunidad en AccessManagementService._get_applications_select
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [unidad_subunidad_norm] AS CAST(UPPER(LTRIM(RTRIM(
+        ISNULL([unit], '') +
+        CASE WHEN [unit] IS NOT NULL AND [service] IS NOT NULL THEN ' / ' ELSE '' END +
+        ISNULL([service], '')
+    ))) AS VARCHAR(303)) PERSISTED;
+    PRINT 'Columna unidad_subunidad_norm agregada a applications_dr';
+END
+GO
+
+-- Búsqueda de la malla por posición: (unidad_subunidad, role) [+ subunidad]
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_position' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_position ON [dbo].[applications_dr] ([unidad_subunidad_norm], [role_norm])
+        INCLUDE ([service_norm], [name_element_norm], [name_element], [status]);
+    PRINT 'Índice IX_applications_norm_position creado exitosamente';
+END
+GO
+
+-- Búsqueda por nombre de aplicación (movimientos laterales, revocaciones, registros manuales)
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_name' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_name ON [dbo].[applications_dr] ([name_element_norm])
+        INCLUDE ([role_norm], [unidad_subunidad_norm], [service], [system_application_link], [status]);
+    PRINT 'Índice IX_applications_norm_name creado exitosamente';
+END
+GO
+
+-- Búsqueda solo por posición (get_applications_by_position_simple, flex staff)
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_role' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_role ON [dbo].[applications_dr] ([role_norm])
+        INCLUDE ([unidad_subunidad_norm], [name_element_norm], [status]);
+    PRINT 'Índice IX_applications_norm_role creado exitosamente';
+END
+GO
+
+-- Verificación
+SELECT c.name AS columna, c.is_computed, cc.is_persisted
+FROM sys.columns c
+LEFT JOIN sys.computed_columns cc ON cc.object_id = c.object_id AND cc.column_id = c.column_id
+WHERE c.object_id = OBJECT_ID(N'[dbo].[applications_dr]')
+AND c.name LIKE '%[_]norm';
+GO
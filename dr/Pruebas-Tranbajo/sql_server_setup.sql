@@ -399,6 +399,269 @@ BEGIN
 END
 GO
 
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_historico_scotia_app' AND object_id = OBJECT_ID(N'[dbo].[historico_dr]'))
+BEGIN
+    CREATE INDEX IX_historico_scotia_app ON [dbo].[historico_dr] ([scotia_id], [app_access_name], [record_date])
+        INCLUDE ([status], [process_access]);
+    PRINT 'Índice IX_historico_scotia_app creado exitosamente';
+END
+GO
+
+-- =====================================================
+-- TABLA 5: ACCESOS ACTUALES (estado derivado de historico)
+-- =====================================================
+-- Una fila por (SID, aplicación) con el último otorgamiento completado que no fue
+-- revocado. La aplicación la recalcula por SID en la misma transacción que escribe en
+-- historico_dr (ver services/current_access_state.py). Este script la llena desde el
+-- historial existente cuando está vacía; después de cargas hechas por fuera de la
+-- aplicación, reconstruirla con:
+--     python -m services.current_access_state --rebuild
+IF OBJECT_ID(N'[dbo].[current_access_dr]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[current_access_dr] (
+        [scotia_id] VARCHAR(20) NOT NULL,
+        [app_key] VARCHAR(150) NOT NULL,              -- UPPER(LTRIM(RTRIM(app_access_name)))
+        [app_access_name] VARCHAR(150) NOT NULL,
+        [source_process] VARCHAR(50) NOT NULL,        -- onboarding, lateral_movement, flex_staff, manual_access
+        [historico_id] INT NOT NULL,                  -- Registro de historico_dr que otorgó el acceso
+        [granted_at] DATETIME2 NOT NULL,
+        [subunit] VARCHAR(100) NULL,
+        [event_description] NVARCHAR(MAX) NULL,
+        [status] VARCHAR(50) NULL,
+        [flex_position] VARCHAR(150) NULL,            -- Posición temporal (solo flex_staff)
+        [expires_at] DATETIME2 NULL,                  -- Vencimiento; NULL = sin vencimiento registrado
+        CONSTRAINT [PK_current_access_dr] PRIMARY KEY ([scotia_id], [app_key])
+    );
+    PRINT 'Tabla current_access_dr creada exitosamente';
+END
+ELSE
+BEGIN
+    PRINT 'Tabla current_access_dr ya existía. Se conserva tal cual.';
+END
+GO
+
+-- Carga inicial desde historico_dr (misma consulta que CurrentAccessState.rebuild).
+-- Sin esto, offboarding y los accesos actuales no verían nada de los empleados existentes.
+IF NOT EXISTS (SELECT 1 FROM [dbo].[current_access_dr]) AND EXISTS (SELECT 1 FROM [dbo].[historico_dr])
+BEGIN
+    INSERT INTO [dbo].[current_access_dr] (scotia_id, app_key, app_access_name, source_process, historico_id, granted_at, subunit, event_description, status, flex_position, expires_at)
+    SELECT
+        u.scotia_id,
+        u.app_key,
+        LTRIM(RTRIM(u.app_access_name)),
+        u.process_access,
+        u.id,
+        u.record_date,
+        u.subunit,
+        u.event_description,
+        u.status,
+        CASE WHEN u.process_access = 'flex_staff' AND p.flex_start > 0
+             THEN LTRIM(RTRIM(SUBSTRING(u.event_description, p.flex_start + 14,
+                  CHARINDEX(')', u.event_description, p.flex_start) - p.flex_start - 14)))
+        END,
+        NULL
+    FROM (
+        SELECT
+            h.id, h.scotia_id, h.app_access_name, h.process_access, h.record_date,
+            h.subunit, h.event_description, h.status,
+            UPPER(LTRIM(RTRIM(h.app_access_name))) AS app_key,
+            ROW_NUMBER() OVER (
+                PARTITION BY h.scotia_id, UPPER(LTRIM(RTRIM(h.app_access_name)))
+                ORDER BY h.record_date DESC, h.id DESC
+            ) AS rn
+        FROM [dbo].[historico_dr] h
+        WHERE UPPER(LTRIM(RTRIM(h.status))) IN ('CLOSED COMPLETED', 'COMPLETADO')
+        AND h.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access', 'offboarding', 'flex_staff_return')
+        AND LTRIM(RTRIM(ISNULL(h.app_access_name, ''))) <> ''
+    ) u
+    CROSS APPLY (SELECT CHARINDEX('(flex staff - ', u.event_description) AS flex_start) p
+    WHERE u.rn = 1
+    AND u.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access');
+    PRINT 'Tabla current_access_dr poblada desde historico_dr: ' + CAST(@@ROWCOUNT AS VARCHAR(20)) + ' accesos';
+END
+GO
+
+-- =====================================================
+-- TABLA 6: ÍNDICE DE BÚSQUEDA DEL HISTORIAL (trigramas)
+-- =====================================================
+-- Una fila por (campo, trigrama, registro) de los campos de texto libre de
+-- historico_dr, para que buscar_procesos no recorra el historial con LIKE '%valor%'
+-- (ver services/search_index.py). Los códigos de campo deben coincidir con
+-- ProcessSearchIndex.TEXT_FIELDS. El trigger TR_historico_dr_trigram la mantiene y
+-- este script la llena desde el historial existente cuando está vacía; después de
+-- cargas hechas con el trigger deshabilitado, reconstruirla con:
+--     python -m services.search_index --rebuild
+IF OBJECT_ID(N'[dbo].[historico_trigram_dr]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[historico_trigram_dr] (
+        [field] TINYINT NOT NULL,                     -- 1 app_access_name, 2 responsible, 3 event_description,
+                                                      -- 4 comment, 5 ticket_email, 6 employee_email, 7 subunit
+        [trigram] NVARCHAR(3) NOT NULL,               -- En minúsculas
+        [historico_id] INT NOT NULL,
+        CONSTRAINT [PK_historico_trigram_dr] PRIMARY KEY ([field], [trigram], [historico_id])
+    );
+    CREATE INDEX IX_historico_trigram_id ON [dbo].[historico_trigram_dr] ([historico_id]);
+    PRINT 'Tabla historico_trigram_dr creada exitosamente';
+END
+ELSE
+BEGIN
+    PRINT 'Tabla historico_trigram_dr ya existía. Se conserva tal cual.';
+END
+GO
+
+-- Posiciones 1..4000 para partir cada texto en trigramas (se indexan los primeros 4000 caracteres)
+IF OBJECT_ID(N'[dbo].[historico_trigram_pos]', N'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[historico_trigram_pos] (
+        [pos] SMALLINT NOT NULL PRIMARY KEY
+    );
+    INSERT INTO [dbo].[historico_trigram_pos] ([pos])
+    SELECT TOP (4000) ROW_NUMBER() OVER (ORDER BY (SELECT NULL))
+    FROM sys.all_objects a CROSS JOIN sys.all_objects b;
+    PRINT 'Tabla historico_trigram_pos creada exitosamente';
+END
+GO
+
+IF OBJECT_ID(N'[dbo].[TR_historico_dr_trigram]', N'TR') IS NOT NULL
+    DROP TRIGGER [dbo].[TR_historico_dr_trigram];
+GO
+CREATE TRIGGER [dbo].[TR_historico_dr_trigram] ON [dbo].[historico_dr]
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Los cambios que no tocan campos de texto (estado, fechas de cierre...) no reindexan
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE([app_access_name]) OR UPDATE([responsible]) OR UPDATE([event_description]) OR UPDATE([comment]) OR UPDATE([ticket_email]) OR UPDATE([employee_email]) OR UPDATE([subunit]))
+        RETURN;
+
+    DELETE t FROM [dbo].[historico_trigram_dr] t
+    WHERE t.[historico_id] IN (SELECT [id] FROM deleted);
+
+    INSERT INTO [dbo].[historico_trigram_dr] ([field], [trigram], [historico_id])
+    SELECT DISTINCT f.[field], SUBSTRING(f.[value], p.[pos], 3), f.[id]
+    FROM (
+        SELECT [id], 1 AS [field], LOWER(CAST([app_access_name] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 2 AS [field], LOWER(CAST([responsible] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 3 AS [field], LOWER(CAST([event_description] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 4 AS [field], LOWER(CAST([comment] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 5 AS [field], LOWER(CAST([ticket_email] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 6 AS [field], LOWER(CAST([employee_email] AS NVARCHAR(4000))) AS [value] FROM inserted
+        UNION ALL SELECT [id], 7 AS [field], LOWER(CAST([subunit] AS NVARCHAR(4000))) AS [value] FROM inserted
+    ) f
+    JOIN [dbo].[historico_trigram_pos] p ON p.[pos] <= LEN(f.[value]) - 2
+    WHERE f.[value] IS NOT NULL;
+END
+GO
+PRINT 'Trigger TR_historico_dr_trigram creado exitosamente';
+GO
+
+-- Carga inicial desde historico_dr (misma consulta que ProcessSearchIndex.rebuild).
+-- La aplicación solo usa el índice cuando tiene filas (o el historial está vacío).
+IF NOT EXISTS (SELECT 1 FROM [dbo].[historico_trigram_dr]) AND EXISTS (SELECT 1 FROM [dbo].[historico_dr])
+BEGIN
+    INSERT INTO [dbo].[historico_trigram_dr] ([field], [trigram], [historico_id])
+    SELECT DISTINCT f.[field], SUBSTRING(f.[value], p.[pos], 3), f.[id]
+    FROM (
+        SELECT [id], 1 AS [field], LOWER(CAST([app_access_name] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 2 AS [field], LOWER(CAST([responsible] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 3 AS [field], LOWER(CAST([event_description] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 4 AS [field], LOWER(CAST([comment] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 5 AS [field], LOWER(CAST([ticket_email] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 6 AS [field], LOWER(CAST([employee_email] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+        UNION ALL SELECT [id], 7 AS [field], LOWER(CAST([subunit] AS NVARCHAR(4000))) AS [value] FROM [dbo].[historico_dr]
+    ) f
+    JOIN [dbo].[historico_trigram_pos] p ON p.[pos] <= LEN(f.[value]) - 2
+    WHERE f.[value] IS NOT NULL;
+    PRINT 'Tabla historico_trigram_dr poblada desde historico_dr: ' + CAST(@@ROWCOUNT AS VARCHAR(20)) + ' trigramas';
+END
+GO
+
+-- =====================================================
+-- COLUMNAS NORMALIZADAS EN APPLICATIONS (búsquedas sargables)
+-- =====================================================
+-- Columnas calculadas persistidas con UPPER(LTRIM(RTRIM(...))) para que las
+-- búsquedas por unidad_subunidad / posición / nombre usen índices en lugar de
+-- evaluar la expresión fila por fila.
+-- Requiere ANSI_NULLS y QUOTED_IDENTIFIER en ON para indexar columnas calculadas.
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+SET ANSI_PADDING ON;
+SET ANSI_WARNINGS ON;
+SET ARITHABORT ON;
+SET CONCAT_NULL_YIELDS_NULL ON;
+SET NUMERIC_ROUNDABORT OFF;
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'unit_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [unit_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([unit], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna unit_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'service_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [service_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([service], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna service_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'role_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [role_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([role], '')))) AS VARCHAR(150)) PERSISTED;
+    PRINT 'Columna role_norm agregada a applications_dr';
+END
+GO
+
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'name_element_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [name_element_norm] AS CAST(UPPER(LTRIM(RTRIM(ISNULL([name_element], '')))) AS VARCHAR(200)) PERSISTED;
+    PRINT 'Columna name_element_norm agregada a applications_dr';
+END
+GO
+
+-- Misma expresión que unidad_subunidad en AccessManagementService._get_applications_select
+IF COL_LENGTH(N'[dbo].[applications_dr]', N'unidad_subunidad_norm') IS NULL
+BEGIN
+    ALTER TABLE [dbo].[applications_dr] ADD [unidad_subunidad_norm] AS CAST(UPPER(LTRIM(RTRIM(
+        ISNULL([unit], '') +
+        CASE WHEN [unit] IS NOT NULL AND [service] IS NOT NULL THEN ' / ' ELSE '' END +
+        ISNULL([service], '')
+    ))) AS VARCHAR(303)) PERSISTED;
+    PRINT 'Columna unidad_subunidad_norm agregada a applications_dr';
+END
+GO
+
+-- Búsqueda de la malla por posición: (unidad_subunidad, role) [+ subunidad]
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_position' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_position ON [dbo].[applications_dr] ([unidad_subunidad_norm], [role_norm])
+        INCLUDE ([service_norm], [name_element_norm], [name_element], [status]);
+    PRINT 'Índice IX_applications_norm_position creado exitosamente';
+END
+GO
+
+-- Búsqueda por nombre de aplicación (movimientos laterales, revocaciones, registros manuales)
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_name' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_name ON [dbo].[applications_dr] ([name_element_norm])
+        INCLUDE ([role_norm], [unidad_subunidad_norm], [service], [system_application_link], [status]);
+    PRINT 'Índice IX_applications_norm_name creado exitosamente';
+END
+GO
+
+-- Búsqueda solo por posición (get_applications_by_position_simple, flex staff)
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_applications_norm_role' AND object_id = OBJECT_ID(N'[dbo].[applications_dr]'))
+BEGIN
+    CREATE INDEX IX_applications_norm_role ON [dbo].[applications_dr] ([role_norm])
+        INCLUDE ([unidad_subunidad_norm], [name_element_norm], [status]);
+    PRINT 'Índice IX_applications_norm_role creado exitosamente';
+END
+GO
+
 -- =====================================================
 -- VISTAS DEL SISTEMA
 -- =====================================================
@@ -1204,6 +1467,7 @@ PRINT 'Procedimientos básicos: sp_GetDatabaseStats, sp_GetEmployeeHistory, sp_G
 PRINT 'Procedimientos de conciliación: sp_GetAccessReconciliationReport, sp_ProcessEmployeeOnboarding, sp_ProcessEmployeeOffboarding, sp_GetReconciliationStats';
 PRINT 'Migración automática: confirmation_by_user de VARCHAR a DATE';
 PRINT 'Función creada: fn_NormalizeText';
+PRINT 'Columnas normalizadas en applications_dr: unit_norm, service_norm, role_norm, name_element_norm, unidad_subunidad_norm';
 PRINT 'Datos de ejemplo insertados correctamente';
 PRINT '=====================================================';
 PRINT 'CAMBIOS EN TABLA HISTORICO:';
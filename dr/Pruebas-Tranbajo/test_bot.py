@@ -9,6 +9,8 @@ Funcionalidades:
    El resultado se almacena localmente en SQLite (schema_catalog.db) para evitar JSON masivos.
 2) Iniciar un "chat" en consola para buscar tablas/columnas por descripción
    usando coincidencias léxicas y heurísticas (sin depender de IA ni catálogos manuales).
+   Los candidatos salen del índice FTS5 (bm25 + prefijos) y solo los mejores
+   FTS_TOP_K se re-puntúan con coincidencia difusa.
 
 Requisitos:
     pip install pyodbc
@@ -17,6 +19,9 @@ Uso:
     # 1. Construir catálogo
     python db_schema_assistant.py --build-catalog
 
+    # 1b. Re-catalogar solo las bases con cambios (firma de sys.tables y descripciones)
+    python db_schema_assistant.py --build-catalog --incremental
+
     # 2. Iniciar chat
     python db_schema_assistant.py
 
@@ -36,7 +41,11 @@ import sys
 import unicodedata
 import argparse
 import difflib
+import queue
+import threading
 import pyodbc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 
@@ -67,7 +76,15 @@ DATABASES = [
 # Archivo local donde se guarda el catálogo (SQLite para evitar JSON masivo)
 CATALOG_DB_FILE = "schema_catalog.db"
 BATCH_SIZE = 500
+# Hilos que leen metadatos de SQL Server en paralelo (uno por base de datos)
+CATALOG_WORKERS = 4
+# Segundos que un lector espera lugar en la cola antes de volver a revisar si se canceló
+QUEUE_PUT_TIMEOUT = 0.5
 CANDIDATE_LIMIT = 400
+# Cantidad de aciertos FTS (ordenados por bm25) que pasan al re-puntaje difuso
+FTS_TOP_K = 60
+# Longitud mínima para buscar un término como prefijo ("term"*)
+FTS_PREFIX_MIN_LENGTH = 3
 
 
 # ==========================
@@ -120,9 +137,18 @@ def init_catalog_store(reset: bool = False) -> sqlite3.Connection:
             tokenize = 'unicode61 remove_diacritics 2'
         )
     """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            database_name TEXT PRIMARY KEY,
+            last_modified TEXT,
+            column_count INTEGER,
+            built_at TEXT
+        )
+    """)
     if reset:
         cursor.execute("DELETE FROM catalog")
         cursor.execute("DELETE FROM catalog_fts")
+        cursor.execute("DELETE FROM catalog_state")
     conn.commit()
     return conn
 
@@ -208,6 +234,22 @@ def sanitize_for_fts(keyword: str) -> str:
     return re.sub(r"[^0-9a-z_]", "", keyword)
 
 
+def build_fts_query(keywords: List[str]) -> str:
+    """
+    Arma la expresión MATCH de FTS5: términos unidos por OR, entre comillas para
+    neutralizar la sintaxis de FTS y con búsqueda por prefijo cuando son largos.
+    """
+    terms = []
+    for kw in keywords:
+        term = sanitize_for_fts(normalize_token(kw))
+        if not term:
+            continue
+        expression = f'"{term}"*' if len(term) >= FTS_PREFIX_MIN_LENGTH else f'"{term}"'
+        if expression not in terms:
+            terms.append(expression)
+    return " OR ".join(terms)
+
+
 def get_wordnet_variants(token: str) -> List[str]:
     """
     Obtiene sinónimos desde WordNet (si está disponible) para enriquecer la búsqueda.
@@ -241,48 +283,100 @@ def get_wordnet_variants(token: str) -> List[str]:
 # CONSTRUCCIÓN DEL CATÁLOGO
 # ==========================
 
-def build_catalog() -> int:
+METADATA_QUERY = """
+    SELECT
+        DB_NAME() AS database_name,
+        s.name AS schema_name,
+        t.name AS table_name,
+        c.name AS column_name,
+        ty.name AS data_type,
+        c.max_length,
+        c.is_nullable,
+        ep.value AS column_description
+    FROM sys.tables t
+    INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    INNER JOIN sys.columns c ON c.object_id = t.object_id
+    INNER JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+    LEFT JOIN sys.extended_properties ep 
+        ON ep.major_id = c.object_id
+       AND ep.minor_id = c.column_id
+       AND ep.name = 'MS_Description'
+    ORDER BY s.name, t.name, c.column_id;
+"""
+
+# Firma del esquema: MAX(modify_date) no cambia al borrar una tabla ni al editar una
+# descripción, por eso se suman la cantidad de tablas, un checksum de sus object_id y
+# otro de las descripciones (MS_Description) de columnas
+LAST_MODIFIED_QUERY = """
+    SELECT
+        MAX(t.modify_date),
+        COUNT(*),
+        CHECKSUM_AGG(t.object_id),
+        (SELECT CHECKSUM_AGG(CHECKSUM(ep.major_id, ep.minor_id, CAST(ep.value AS NVARCHAR(4000))))
+         FROM sys.extended_properties ep
+         WHERE ep.class = 1 AND ep.name = 'MS_Description')
+    FROM sys.tables t
+"""
+
+
+def _schema_signature(row) -> Optional[str]:
+    """Convierte la fila de LAST_MODIFIED_QUERY en el texto guardado en catalog_state"""
+    if not row or row[0] is None:
+        return None
+    modified, table_count, tables_checksum, descriptions_checksum = row
+    return f"{modified.isoformat()}|{table_count}|{tables_checksum}|{descriptions_checksum}"
+
+
+def _put_message(out_queue: "queue.Queue", cancel: threading.Event, message: Tuple[str, str, Any]) -> bool:
     """
-    Recorre las bases de datos configuradas y almacena un catálogo de columnas
-    en SQLite (evita generar un JSON gigante).
+    Encola un mensaje para el escritor sin quedar bloqueado si este se detuvo:
+    reintenta con timeout mientras no se cancele. Retorna False si se canceló.
     """
-    catalog_conn = init_catalog_store(reset=True)
-    insert_cursor = catalog_conn.cursor()
-    total = 0
+    while not cancel.is_set():
+        try:
+            out_queue.put(message, timeout=QUEUE_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain_queue(out_queue: "queue.Queue"):
+    """Vacía la cola para liberar a los lectores que esperan lugar"""
+    while True:
+        try:
+            out_queue.get_nowait()
+        except queue.Empty:
+            return
+
 
-    for db_name in DATABASES:
-        print(f"[INFO] Catalogando base de datos: {db_name} ...")
+def _fetch_database_metadata(db_name: str, out_queue: "queue.Queue", known_modified: Optional[str] = None,
+                             cancel: Optional[threading.Event] = None):
+    """
+    Lee los metadatos de una base de datos y los envía por lotes a la cola del escritor.
+    Mensajes: ('rows', db, entries), ('done', db, last_modified), ('skip', db, last_modified)
+    o ('error', db, mensaje). Con known_modified (modo incremental) la base se omite si
+    la firma del esquema (LAST_MODIFIED_QUERY) no cambió desde la última construcción.
+    Si cancel se activa (el escritor falló) deja de leer y de encolar.
+    """
+    cancel = cancel or threading.Event()
+    try:
         sql_conn = get_connection(db_name)
-        sql_cursor = sql_conn.cursor()
-
-        sql_cursor.execute("""
-            SELECT
-                DB_NAME() AS database_name,
-                s.name AS schema_name,
-                t.name AS table_name,
-                c.name AS column_name,
-                ty.name AS data_type,
-                c.max_length,
-                c.is_nullable,
-                ep.value AS column_description
-            FROM sys.tables t
-            INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
-            INNER JOIN sys.columns c ON c.object_id = t.object_id
-            INNER JOIN sys.types ty ON ty.user_type_id = c.user_type_id
-            LEFT JOIN sys.extended_properties ep 
-                ON ep.major_id = c.object_id
-               AND ep.minor_id = c.column_id
-               AND ep.name = 'MS_Description'
-            ORDER BY s.name, t.name, c.column_id;
-        """)
-
-        while True:
-            rows = sql_cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-
-            for row in rows:
-                entry = {
+        try:
+            sql_cursor = sql_conn.cursor()
+            sql_cursor.execute(LAST_MODIFIED_QUERY)
+            last_modified = _schema_signature(sql_cursor.fetchone())
+
+            if known_modified is not None and last_modified == known_modified:
+                _put_message(out_queue, cancel, ("skip", db_name, last_modified))
+                return
+
+            sql_cursor.execute(METADATA_QUERY)
+            while not cancel.is_set():
+                rows = sql_cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                entries = [{
                     "database": row.database_name,
                     "schema": row.schema_name,
                     "table": row.table_name,
@@ -291,38 +385,153 @@ def build_catalog() -> int:
                     "max_length": int(row.max_length) if row.max_length is not None else None,
                     "is_nullable": int(bool(row.is_nullable)),
                     "description": str(row.column_description) if row.column_description is not None else ""
-                }
-
-                insert_cursor.execute("""
-                    INSERT INTO catalog (
-                        database_name, schema_name, table_name, column_name,
-                        data_type, max_length, is_nullable, description
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    entry["database"],
-                    entry["schema"],
-                    entry["table"],
-                    entry["column"],
-                    entry["data_type"],
-                    entry["max_length"],
-                    entry["is_nullable"],
-                    entry["description"]
-                ))
-
-                catalog_id = insert_cursor.lastrowid
-                content_blob = build_search_blob(entry) or entry["column"]
-                insert_cursor.execute("""
-                    INSERT INTO catalog_fts (catalog_id, content)
-                    VALUES (?, ?)
-                """, (catalog_id, content_blob))
-
-                total += 1
-
-            catalog_conn.commit()
-
-        sql_conn.close()
-
-    catalog_conn.close()
+                } for row in rows]
+                if not _put_message(out_queue, cancel, ("rows", db_name, entries)):
+                    return
+        finally:
+            sql_conn.close()
+        _put_message(out_queue, cancel, ("done", db_name, last_modified))
+    except Exception as e:
+        _put_message(out_queue, cancel, ("error", db_name, str(e)))
+
+
+def _write_catalog_batch(cursor: sqlite3.Cursor, entries: List[Dict[str, Any]], first_id: int):
+    """
+    Inserta un lote en catalog y catalog_fts con executemany. Los ids se asignan aquí
+    (hay un único escritor) para poder enlazar catalog_fts sin depender de lastrowid.
+    """
+    catalog_rows = []
+    fts_rows = []
+    for offset, entry in enumerate(entries):
+        catalog_id = first_id + offset
+        catalog_rows.append((
+            catalog_id,
+            entry["database"],
+            entry["schema"],
+            entry["table"],
+            entry["column"],
+            entry["data_type"],
+            entry["max_length"],
+            entry["is_nullable"],
+            entry["description"]
+        ))
+        fts_rows.append((catalog_id, build_search_blob(entry) or entry["column"]))
+
+    cursor.executemany("""
+        INSERT INTO catalog (
+            id, database_name, schema_name, table_name, column_name,
+            data_type, max_length, is_nullable, description
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, catalog_rows)
+    cursor.executemany("""
+        INSERT INTO catalog_fts (catalog_id, content)
+        VALUES (?, ?)
+    """, fts_rows)
+
+
+def _delete_database_rows(cursor: sqlite3.Cursor, db_name: str, condition: str, boundary_id: int):
+    """Elimina de catalog y catalog_fts las filas de una base según su id (<= o > boundary_id)"""
+    cursor.execute(f"""
+        DELETE FROM catalog_fts
+        WHERE catalog_id IN (SELECT id FROM catalog WHERE database_name = ? AND id {condition} ?)
+    """, (db_name, boundary_id))
+    cursor.execute(f"DELETE FROM catalog WHERE database_name = ? AND id {condition} ?", (db_name, boundary_id))
+
+
+def build_catalog(incremental: bool = False, workers: int = CATALOG_WORKERS) -> int:
+    """
+    Recorre las bases de datos configuradas y almacena un catálogo de columnas
+    en SQLite (evita generar un JSON gigante).
+    
+    La lectura de metadatos corre en paralelo (un hilo por base); un único escritor
+    consume los lotes desde una cola y los inserta con executemany dentro de una sola
+    transacción (WAL + synchronous=OFF mientras dura la construcción).
+    
+    Con incremental=True solo se re-catalogan las bases cuya firma de esquema (LAST_MODIFIED_QUERY)
+    cambió desde la última construcción; el resto conserva sus filas. Si una base falla,
+    se conserva su catálogo anterior en ambos modos.
+    """
+    catalog_conn = init_catalog_store()
+    catalog_conn.execute("PRAGMA journal_mode=WAL")
+    catalog_conn.execute("PRAGMA synchronous=OFF")
+    insert_cursor = catalog_conn.cursor()
+
+    known_state: Dict[str, Optional[str]] = {}
+    if incremental:
+        for row in insert_cursor.execute("SELECT database_name, last_modified FROM catalog_state"):
+            known_state[row["database_name"]] = row["last_modified"]
+
+    # Las filas existentes tienen id <= run_start_id; las de esta corrida, id > run_start_id
+    run_start_id = insert_cursor.execute("SELECT COALESCE(MAX(id), 0) FROM catalog").fetchone()[0]
+    next_id = run_start_id + 1
+    counts: Dict[str, int] = {}
+    total = 0
+
+    out_queue: "queue.Queue" = queue.Queue(maxsize=max(1, workers) * 4)
+    cancel = threading.Event()
+    pending = len(DATABASES)
+    try:
+        insert_cursor.execute("BEGIN")
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        try:
+            for db_name in DATABASES:
+                print(f"[INFO] Catalogando base de datos: {db_name} ...")
+                executor.submit(_fetch_database_metadata, db_name, out_queue,
+                                known_state.get(db_name) if incremental and db_name in known_state else None,
+                                cancel)
+
+            while pending:
+                kind, db_name, payload = out_queue.get()
+                if kind == "rows":
+                    _write_catalog_batch(insert_cursor, payload, next_id)
+                    next_id += len(payload)
+                    counts[db_name] = counts.get(db_name, 0) + len(payload)
+                    total += len(payload)
+                    continue
+
+                pending -= 1
+                if kind == "skip":
+                    print(f"[INFO] {db_name}: sin cambios desde la última construcción, se omite.")
+                elif kind == "done":
+                    # Reemplaza las filas previas de la base por las recién leídas
+                    _delete_database_rows(insert_cursor, db_name, "<=", run_start_id)
+                    insert_cursor.execute("""
+                        INSERT OR REPLACE INTO catalog_state (database_name, last_modified, column_count, built_at)
+                        VALUES (?, ?, ?, ?)
+                    """, (db_name, payload, counts.get(db_name, 0), datetime.now().isoformat(timespec="seconds")))
+                    print(f"[INFO] {db_name}: {counts.get(db_name, 0)} columnas.")
+                else:
+                    # Descarta lo parcial de esta corrida y conserva el catálogo previo de la base
+                    _delete_database_rows(insert_cursor, db_name, ">", run_start_id)
+                    total -= counts.pop(db_name, 0)
+                    print(f"[ERROR] No se pudo catalogar {db_name}: {payload}")
+        except BaseException:
+            # Si el escritor falla (SQLite, disco lleno, Ctrl-C) los lectores no deben
+            # quedar bloqueados en una cola llena: se cancelan antes de esperar a los hilos
+            cancel.set()
+            _drain_queue(out_queue)
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
+        if not incremental:
+            # Construcción completa: quitar bases que ya no están configuradas
+            placeholders = ", ".join("?" for _ in DATABASES) or "NULL"
+            insert_cursor.execute(f"""
+                DELETE FROM catalog_fts
+                WHERE catalog_id IN (SELECT id FROM catalog WHERE database_name NOT IN ({placeholders}))
+            """, DATABASES)
+            insert_cursor.execute(f"DELETE FROM catalog WHERE database_name NOT IN ({placeholders})", DATABASES)
+            insert_cursor.execute(f"DELETE FROM catalog_state WHERE database_name NOT IN ({placeholders})", DATABASES)
+
+        insert_cursor.execute("INSERT INTO catalog_fts (catalog_fts) VALUES ('optimize')")
+        catalog_conn.commit()
+    except BaseException:
+        catalog_conn.rollback()
+        raise
+    finally:
+        catalog_conn.close()
+
     print(f"[INFO] Se catalogaron {total} columnas en total.")
     return total
 
@@ -367,6 +576,48 @@ def expand_keywords(words: List[str], debug: bool = False) -> Tuple[List[str], D
     return list(expanded), debug_map
 
 
+def _row_to_candidate(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "database": row["database_name"],
+        "schema": row["schema_name"],
+        "table": row["table_name"],
+        "column": row["column_name"],
+        "data_type": row["data_type"],
+        "max_length": row["max_length"],
+        "is_nullable": bool(row["is_nullable"]),
+        "description": row["description"] or ""
+    }
+
+
+def _filter_clauses(
+    db_filter: Optional[str] = None,
+    schema_filter: Optional[str] = None,
+    table_filter: Optional[str] = None,
+    column_filter: Optional[str] = None,
+    alias: str = "",
+) -> Tuple[str, List[Any]]:
+    """
+    Condiciones adicionales (AND ...) para los filtros @db, @schema, @table y @column.
+    """
+    prefix = f"{alias}." if alias else ""
+    clauses = []
+    params: List[Any] = []
+    if db_filter:
+        clauses.append(f"UPPER({prefix}database_name) = ?")
+        params.append(db_filter.upper().strip())
+    if schema_filter:
+        clauses.append(f"UPPER({prefix}schema_name) = ?")
+        params.append(schema_filter.upper().strip())
+    if table_filter:
+        clauses.append(f"UPPER({prefix}table_name) LIKE ?")
+        params.append(f"%{table_filter.upper().strip()}%")
+    if column_filter:
+        clauses.append(f"UPPER({prefix}column_name) LIKE ?")
+        params.append(f"%{column_filter.upper().strip()}%")
+    sql = "".join(f" AND {clause}" for clause in clauses)
+    return sql, params
+
+
 def _collect_candidates(
     conn: sqlite3.Connection,
     keywords: List[str],
@@ -374,65 +625,91 @@ def _collect_candidates(
     schema_filter: Optional[str] = None,
     table_filter: Optional[str] = None,
     column_filter: Optional[str] = None,
+    top_k: int = FTS_TOP_K,
+) -> List[Dict[str, Any]]:
+    """
+    Recupera candidatos desde el índice FTS5 (catalog_fts) ordenados por bm25.
+    Solo los top_k mejores aciertos se devuelven para el re-puntaje difuso.
+    Las consultas solo con filtros (comodín '*') recorren catalog directamente.
+    """
+    filter_sql, filter_params = _filter_clauses(
+        db_filter, schema_filter, table_filter, column_filter, alias="c"
+    )
+    cursor = conn.cursor()
+    fts_query = build_fts_query([kw for kw in keywords if kw != '*'])
+
+    if not fts_query:
+        cursor.execute(f"""
+            SELECT 
+                c.database_name, c.schema_name, c.table_name, c.column_name,
+                c.data_type, c.max_length, c.is_nullable, c.description
+            FROM catalog c
+            WHERE 1 = 1{filter_sql}
+            LIMIT ?
+        """, (*filter_params, CANDIDATE_LIMIT))
+        return [_row_to_candidate(row) for row in cursor.fetchall()]
+
+    try:
+        cursor.execute(f"""
+            SELECT 
+                c.database_name, c.schema_name, c.table_name, c.column_name,
+                c.data_type, c.max_length, c.is_nullable, c.description,
+                bm25(catalog_fts) AS rank
+            FROM catalog_fts
+            INNER JOIN catalog c ON c.id = catalog_fts.catalog_id
+            WHERE catalog_fts MATCH ?{filter_sql}
+            ORDER BY rank
+            LIMIT ?
+        """, (fts_query, *filter_params, top_k))
+    except sqlite3.OperationalError as e:
+        # Catálogo antiguo o SQLite sin FTS5: usar la búsqueda por LIKE
+        print(f"[WARN] Búsqueda FTS no disponible ({e}); usando LIKE.")
+        return _collect_candidates_like(conn, keywords, filter_sql, filter_params)
+
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for row in cursor.fetchall():
+        key = f"{row['database_name']}|{row['schema_name']}|{row['table_name']}|{row['column_name']}"
+        if key not in candidates:
+            candidate = _row_to_candidate(row)
+            candidate["fts_rank"] = row["rank"]
+            candidates[key] = candidate
+    return list(candidates.values())
+
+
+def _collect_candidates_like(
+    conn: sqlite3.Connection,
+    keywords: List[str],
+    filter_sql: str,
+    filter_params: List[Any],
 ) -> List[Dict[str, Any]]:
     """
-    Recupera candidatos desde SQLite usando coincidencias por LIKE para cada palabra clave.
+    Recupera candidatos usando coincidencias por LIKE para cada palabra clave
+    (respaldo cuando el índice FTS5 no está disponible).
     """
     candidates: Dict[str, Dict[str, Any]] = {}
     cursor = conn.cursor()
-    db_filter_norm = db_filter.upper().strip() if db_filter else None
-    schema_filter_norm = schema_filter.upper().strip() if schema_filter else None
-    table_filter_norm = table_filter.upper().strip() if table_filter else None
-    column_filter_norm = column_filter.upper().strip() if column_filter else None
-
-    for kw in keywords if keywords else ['*']:
-        like_kw = '%' if kw == '*' else f"%{kw}%"
-        query = """
+
+    for kw in keywords:
+        like_kw = f"%{kw}%"
+        cursor.execute(f"""
             SELECT 
-                database_name, schema_name, table_name, column_name,
-                data_type, max_length, is_nullable, description
-            FROM catalog
+                c.database_name, c.schema_name, c.table_name, c.column_name,
+                c.data_type, c.max_length, c.is_nullable, c.description
+            FROM catalog c
             WHERE (
-                column_name LIKE ?
-                OR table_name LIKE ?
-                OR description LIKE ?
-                OR schema_name LIKE ?
-                OR database_name LIKE ?
-            )
-        """
-        params: List[Any] = [like_kw, like_kw, like_kw, like_kw, like_kw]
-
-        if db_filter_norm:
-            query += " AND UPPER(database_name) = ?"
-            params.append(db_filter_norm)
-        if schema_filter_norm:
-            query += " AND UPPER(schema_name) = ?"
-            params.append(schema_filter_norm)
-        if table_filter_norm:
-            query += " AND UPPER(table_name) LIKE ?"
-            params.append(f"%{table_filter_norm}%")
-        if column_filter_norm:
-            query += " AND UPPER(column_name) LIKE ?"
-            params.append(f"%{column_filter_norm}%")
-
-        query += " LIMIT ?"
-        params.append(CANDIDATE_LIMIT)
-
-        cursor.execute(query, tuple(params))
+                c.column_name LIKE ?
+                OR c.table_name LIKE ?
+                OR c.description LIKE ?
+                OR c.schema_name LIKE ?
+                OR c.database_name LIKE ?
+            ){filter_sql}
+            LIMIT ?
+        """, (like_kw, like_kw, like_kw, like_kw, like_kw, *filter_params, CANDIDATE_LIMIT))
 
         for row in cursor.fetchall():
             key = f"{row['database_name']}|{row['schema_name']}|{row['table_name']}|{row['column_name']}"
             if key not in candidates:
-                candidates[key] = {
-                    "database": row["database_name"],
-                    "schema": row["schema_name"],
-                    "table": row["table_name"],
-                    "column": row["column_name"],
-                    "data_type": row["data_type"],
-                    "max_length": row["max_length"],
-                    "is_nullable": bool(row["is_nullable"]),
-                    "description": row["description"] or ""
-                }
+                candidates[key] = _row_to_candidate(row)
     return list(candidates.values())
 
 
@@ -487,11 +764,21 @@ def _cached_search(signature_json: str) -> List[Dict[str, Any]]:
                 if s > 0.6:
                     score += int(s * 3)
 
+        if score == 0 and "fts_rank" in item:
+            # Coincidió en el índice (variante/sinónimo/prefijo) aunque no en el texto visible
+            score = 1
+
         if score > 0:
             scored.append((score, item))
 
+    # sort es estable: a igual puntaje se conserva el orden bm25 del índice
     scored.sort(key=lambda x: x[0], reverse=True)
-    return [x[1] for x in scored[:limit]]
+    results = []
+    for _, item in scored[:limit]:
+        item = dict(item)
+        item.pop("fts_rank", None)
+        results.append(item)
+    return results
 
 
 def search_catalog(question: str,
@@ -645,6 +932,17 @@ def main():
         action="store_true",
         help="Reconstruye el catálogo de columnas a partir de las bases de datos configuradas."
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Con --build-catalog, re-cataloga solo las bases con cambios en sys.objects."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CATALOG_WORKERS,
+        help="Hilos para leer metadatos en paralelo durante --build-catalog."
+    )
     parser.add_argument(
         "--output",
         choices=["text", "json", "csv"],
@@ -665,7 +963,7 @@ def main():
     args = parser.parse_args()
 
     if args.build_catalog:
-        total = build_catalog()
+        total = build_catalog(incremental=args.incremental, workers=args.workers)
         print(f"[INFO] Catálogo guardado en {CATALOG_DB_FILE} ({total} columnas).")
     else:
         run_chat(output_format=args.output, limit=args.limit, debug=args.debug)
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from services.application_cache import ApplicationMatrixCache
+
+
+COLUMNS = ['id', 'access_status', 'unit', 'subunit', 'unidad_subunidad', 'position_role', 'role_name', 'logical_access_name']
+ROWS = [
+    (1, 'Active', 'Tecnología', 'QA', 'Tecnología / QA', 'Analista', 'Analista', 'AppA'),
+    (2, 'Active', 'Tecnología', 'QA', 'Tecnología / QA', 'Analista', 'Analista', 'AppB'),
+    (3, 'Inactive', 'Finanzas', None, 'Finanzas', 'Gerente', 'Gerente', 'AppC'),
+]
+
+
+class ApplicationMatrixCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.signature = (3, 12345)
+        self.connections = []
+
+        def connect():
+            cursor = MagicMock()
+            cursor.description = [(name,) for name in COLUMNS]
+            cursor.fetchone.side_effect = lambda: self.signature
+            cursor.fetchall.return_value = ROWS
+            conn = MagicMock()
+            conn.cursor.return_value = cursor
+            self.connections.append(conn)
+            return conn
+
+        self.cache = ApplicationMatrixCache(connect, "SELECT * FROM (...) apps", "[dbo].[applications_dr]",
+                                            ttl=300, probe_interval=None)
+
+    def test_lookups_are_served_from_one_snapshot(self):
+        apps = self.cache.find(unidad_subunidad=' tecnología / qa ', position_role='ANALISTA')
+        self.assertEqual([a['logical_access_name'] for a in apps], ['AppA', 'AppB'])
+        self.assertEqual(self.cache.get_by_name('appc')['id'], 3)
+        self.assertEqual(self.cache.get_by_triplet('Finanzas', 'gerente', 'APPC')['id'], 3)
+        self.assertEqual(self.cache.distinct_values('unit'), ['Finanzas', 'Tecnología'])
+        self.assertEqual(len(self.connections), 1)
+
+    def test_returned_rows_are_copies(self):
+        self.cache.get_by_name('AppA')['logical_access_name'] = 'changed'
+        self.assertEqual(self.cache.get_by_name('AppA')['logical_access_name'], 'AppA')
+
+    def test_invalidate_forces_reload(self):
+        self.cache.get_all()
+        self.cache.invalidate()
+        self.cache.get_all()
+        self.assertEqual(len(self.connections), 2)
+
+    def test_probe_reloads_only_when_signature_changes(self):
+        self.cache.probe_interval = 0
+        self.cache.get_all()
+        self.cache.get_all()
+        self.assertEqual(len(self.connections), 2)  # carga + sonda sin cambios
+
+        self.signature = (4, 999)
+        self.cache.get_all()
+        self.assertEqual(len(self.connections), 4)  # sonda + recarga
+
+
+class SargableApplicationQueryTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.cursor = MagicMock()
+        self.cursor.description = [(name,) for name in COLUMNS]
+        self.cursor.fetchall.return_value = ROWS[:2]
+        conn = MagicMock()
+        conn.cursor.return_value = self.cursor
+        self.service.get_connection = MagicMock(return_value=conn)
+
+    def test_uses_persisted_normalized_columns_when_migrated(self):
+        self.service._normalized_columns_available = True
+
+        apps = self.service._query_applications(' Tecnología / QA ', 'analista')
+
+        query, params = self.cursor.execute.call_args[0]
+        self.assertIn("a.unidad_subunidad_norm = CAST(? AS VARCHAR(303))", query)
+        self.assertIn("a.role_norm = CAST(? AS VARCHAR(150))", query)
+        self.assertNotIn("UPPER(", query.split("WHERE", 1)[1])
+        self.assertEqual(params, ['TECNOLOGÍA / QA', 'ANALISTA'])
+        self.assertEqual(len(apps), 2)
+
+    def test_falls_back_to_expression_without_migration(self):
+        self.service._normalized_columns_available = False
+
+        clause, params = self.service._application_match('name_element', ['AppA', ' appb '])
+
+        self.assertEqual(clause, "UPPER(LTRIM(RTRIM(a.name_element))) IN (?,?)")
+        self.assertEqual(params, ['APPA', 'APPB'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks import BenchmarkHarness, SQLiteStandIn, SyntheticDataGenerator, translate_tsql
+
+
+class TranslateTsqlTest(unittest.TestCase):
+    def test_top_offset_and_concatenation(self):
+        sql, swap, output = translate_tsql("SELECT TOP 5 unit + ' / ' + service FROM [dbo].[applications_dr] WHERE ISNULL(role, '') = ?")
+        self.assertIn("unit || ' / ' || service", sql)
+        self.assertIn("IFNULL(role, '')", sql)
+        self.assertTrue(sql.rstrip().endswith("LIMIT 5"))
+        self.assertFalse(swap)
+        self.assertIsNone(output)
+
+        sql, swap, _ = translate_tsql("SELECT * FROM t ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+        self.assertIn("LIMIT ? OFFSET ?", sql)
+        self.assertTrue(swap)
+
+    def test_output_inserted_returns_new_id(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stand_in = SQLiteStandIn(os.path.join(tmp, 'bench.db'))
+            with stand_in.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO [dbo].[historico_dr] (scotia_id, process_access, status)
+                    OUTPUT INSERTED.id VALUES (?, ?, ?)
+                """, ('SID0000001', 'onboarding', 'Pendiente'))
+                self.assertEqual(cursor.fetchone()[0], 1)
+                conn.commit()
+
+
+class SyntheticDataGeneratorTest(unittest.TestCase):
+    def test_same_seed_same_rows(self):
+        first = SyntheticDataGenerator(employees=20, applications=30, history=50, seed=3)
+        second = SyntheticDataGenerator(employees=20, applications=30, history=50, seed=3)
+        self.assertEqual(list(first.employee_rows()), list(second.employee_rows()))
+        self.assertEqual(list(first.history_rows()), list(second.history_rows()))
+        self.assertEqual(sum(1 for _ in first.application_rows()), 30)
+
+
+class BenchmarkHarnessTest(unittest.TestCase):
+    def test_scenarios_run_against_real_services(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = SyntheticDataGenerator(employees=40, applications=300, history=400, seed=5)
+            harness = BenchmarkHarness(os.path.join(tmp, 'bench.db'), generator,
+                                       output_dir=os.path.join(tmp, 'exports'))
+            counts = harness.prepare()
+            self.assertEqual(counts['Master_Staff_List'], 40)
+            self.assertEqual(counts['historico_dr'], 400)
+            self.assertGreater(counts['current_access_dr'], 0)
+
+            report = harness.run(iterations=2)
+
+            self.assertEqual([item['scenario'] for item in report['results']], list(BenchmarkHarness.SCENARIOS))
+            for item in report['results']:
+                self.assertEqual(item['failures'], 0, item['scenario'])
+                self.assertGreater(item['round_trips_per_op'], 0, item['scenario'])
+                self.assertLessEqual(item['p50_ms'], item['p95_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
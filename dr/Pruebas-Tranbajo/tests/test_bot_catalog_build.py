@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import test_bot
+
+
+def _column(database, table, column, description=None):
+    return SimpleNamespace(database_name=database, schema_name="dbo", table_name=table, column_name=column,
+                           data_type="varchar", max_length=50, is_nullable=True, column_description=description)
+
+
+class FakeServer:
+    """Simula las bases de SQL Server: columnas y firma del esquema por base"""
+
+    def __init__(self):
+        self.columns = {}
+        self.modified = {}
+        self.failing = set()
+        self.metadata_reads = []
+
+    def connect(self, db_name):
+        if db_name in self.failing:
+            raise RuntimeError("login failed")
+        cursor = MagicMock()
+        rows = list(self.columns[db_name])
+
+        def execute(query):
+            if query == test_bot.LAST_MODIFIED_QUERY:
+                tables = sorted({row.table_name for row in self.columns[db_name]})
+                cursor.fetchone.return_value = (self.modified[db_name], len(tables),
+                                                hash(tuple(tables)) & 0x7FFFFFFF, None)
+            else:
+                self.metadata_reads.append(db_name)
+
+        def fetchmany(size):
+            batch = rows[:size]
+            del rows[:size]
+            return batch
+
+        cursor.execute.side_effect = execute
+        cursor.fetchmany.side_effect = fetchmany
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn
+
+
+class CatalogBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "catalog.db")
+        self.server = FakeServer()
+        self.server.columns = {
+            "Ventas": [_column("Ventas", "Facturas", f"col_{i}") for i in range(7)],
+            "RRHH": [_column("RRHH", "Empleados", "cedula", "Documento de identidad")],
+        }
+        self.server.modified = {"Ventas": datetime(2024, 1, 1), "RRHH": datetime(2024, 1, 1)}
+        self.patches = [
+            patch.object(test_bot, "CATALOG_DB_FILE", self.db_file),
+            patch.object(test_bot, "DATABASES", ["Ventas", "RRHH"]),
+            patch.object(test_bot, "BATCH_SIZE", 3),
+            patch.object(test_bot, "get_connection", side_effect=self.server.connect),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.tmpdir.cleanup()
+
+    def _counts(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            by_db = dict(conn.execute("SELECT database_name, COUNT(*) FROM catalog GROUP BY database_name"))
+            fts = conn.execute("SELECT COUNT(*) FROM catalog_fts").fetchone()[0]
+            linked = conn.execute("""
+                SELECT COUNT(*) FROM catalog_fts f JOIN catalog c ON c.id = f.catalog_id
+            """).fetchone()[0]
+            return by_db, fts, linked
+        finally:
+            conn.close()
+
+    def test_full_build_writes_catalog_and_fts(self):
+        total = test_bot.build_catalog(workers=2)
+
+        self.assertEqual(total, 8)
+        self.assertEqual(self._counts(), ({"Ventas": 7, "RRHH": 1}, 8, 8))
+
+    def test_incremental_skips_unchanged_databases(self):
+        test_bot.build_catalog()
+        self.server.metadata_reads.clear()
+        self.server.columns["RRHH"].append(_column("RRHH", "Empleados", "fecha_ingreso"))
+        self.server.modified["RRHH"] = datetime(2024, 2, 1)
+
+        total = test_bot.build_catalog(incremental=True)
+
+        self.assertEqual(total, 2)
+        self.assertEqual(self.server.metadata_reads, ["RRHH"])
+        self.assertEqual(self._counts(), ({"Ventas": 7, "RRHH": 2}, 9, 9))
+
+    def test_incremental_detects_dropped_table(self):
+        self.server.columns["Ventas"].append(_column("Ventas", "Temporal", "id"))
+        test_bot.build_catalog()
+        self.server.metadata_reads.clear()
+        # Borrar una tabla no cambia MAX(modify_date) de las que quedan
+        self.server.columns["Ventas"].pop()
+
+        total = test_bot.build_catalog(incremental=True)
+
+        self.assertEqual(total, 7)
+        self.assertEqual(self.server.metadata_reads, ["Ventas"])
+        self.assertEqual(self._counts(), ({"Ventas": 7, "RRHH": 1}, 8, 8))
+
+    def test_failed_database_keeps_previous_rows(self):
+        test_bot.build_catalog()
+        self.server.failing.add("Ventas")
+
+        total = test_bot.build_catalog()
+
+        self.assertEqual(total, 1)
+        self.assertEqual(self._counts(), ({"Ventas": 7, "RRHH": 1}, 8, 8))
+
+
+    def test_writer_error_does_not_hang_readers(self):
+        self.server.columns["Ventas"] = [_column("Ventas", "Facturas", f"col_{i}") for i in range(300)]
+        outcome = {}
+
+        def build():
+            try:
+                test_bot.build_catalog(workers=1)
+            except Exception as e:
+                outcome["error"] = e
+
+        with patch.object(test_bot, "_write_catalog_batch", side_effect=sqlite3.OperationalError("disk full")), \
+                patch.object(test_bot, "QUEUE_PUT_TIMEOUT", 0.05):
+            thread = threading.Thread(target=build, daemon=True)
+            thread.start()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive(), "build_catalog quedó bloqueado")
+        self.assertIsInstance(outcome.get("error"), sqlite3.OperationalError)
+
+
+if __name__ == "__main__":
+    unittest.main()
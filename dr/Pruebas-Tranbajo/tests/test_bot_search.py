@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import test_bot
+
+
+ENTRIES = [
+    ("GAMLO_Empleados", "dbo", "Clientes", "numero_cuenta", "varchar", "Número de cuenta del cliente"),
+    ("GAMLO_Empleados", "dbo", "Clientes", "cedula", "varchar", "Documento de identidad"),
+    ("GAMLO_Empleados", "dbo", "Empleados", "fecha_ingreso", "date", "Fecha de ingreso del empleado"),
+    ("Ventas", "dbo", "Facturas", "total_factura", "decimal", ""),
+]
+
+
+class CatalogFtsSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_patch = patch.object(test_bot, "CATALOG_DB_FILE", os.path.join(self.tmpdir.name, "catalog.db"))
+        self.db_patch.start()
+        test_bot._cached_search.cache_clear()
+
+        self.conn = test_bot.init_catalog_store(reset=True)
+        cursor = self.conn.cursor()
+        for database, schema, table, column, data_type, description in ENTRIES:
+            cursor.execute("""
+                INSERT INTO catalog (database_name, schema_name, table_name, column_name,
+                                     data_type, max_length, is_nullable, description)
+                VALUES (?, ?, ?, ?, ?, 50, 1, ?)
+            """, (database, schema, table, column, data_type, description))
+            entry = {"database": database, "schema": schema, "table": table,
+                     "column": column, "data_type": data_type, "description": description}
+            cursor.execute("INSERT INTO catalog_fts (catalog_id, content) VALUES (?, ?)",
+                           (cursor.lastrowid, test_bot.build_search_blob(entry)))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        test_bot._cached_search.cache_clear()
+        self.db_patch.stop()
+        self.tmpdir.cleanup()
+
+    def test_fts_query_quotes_terms_and_uses_prefixes(self):
+        query = test_bot.build_fts_query(["cuenta", "id", "cuenta", "a\"b OR"])
+
+        self.assertEqual(query, '"cuenta"* OR "id" OR "abor"*')
+
+    def test_candidates_come_from_fts_ranked_and_limited(self):
+        candidates = test_bot._collect_candidates(self.conn, ["cuenta"], top_k=5)
+
+        self.assertEqual([c["column"] for c in candidates], ["numero_cuenta"])
+        self.assertIn("fts_rank", candidates[0])
+
+    def test_prefix_match_and_filters(self):
+        results, _ = test_bot.search_catalog("fech", self.conn)
+        self.assertEqual([r["column"] for r in results], ["fecha_ingreso"])
+        self.assertNotIn("fts_rank", results[0])
+
+        results, _ = test_bot.search_catalog("total @db=ventas", self.conn)
+        self.assertEqual([r["table"] for r in results], ["Facturas"])
+
+        results, _ = test_bot.search_catalog("total @db=GAMLO_Empleados", self.conn)
+        self.assertEqual(results, [])
+
+    def test_filter_only_query_scans_catalog(self):
+        candidates = test_bot._collect_candidates(self.conn, ['*'], table_filter="clientes")
+
+        self.assertEqual(sorted(c["column"] for c in candidates), ["cedula", "numero_cuenta"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import datetime
+import gzip
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from services.bulk_export import BulkExportService, _ParquetSink
+
+
+class BulkExportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.stand_in = SQLiteStandIn(os.path.join(self.tmpdir.name, 'bench.db'))
+        SyntheticDataGenerator(employees=20, applications=150, history=300, seed=4).load(self.stand_in)
+
+        self.service = BulkExportService.__new__(BulkExportService)
+        self.service.db_manager = self.stand_in
+        self.service.historico_table = '[dbo].[historico_dr]'
+        self.service.headcount_table = '[dbo].[Master_Staff_List]'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_csv(self, path, opener=open):
+        with opener(path, 'rt', encoding='utf-8', newline='') as handle:
+            return list(csv.reader(handle))
+
+    def test_streams_all_rows_in_batches(self):
+        path = os.path.join(self.tmpdir.name, 'historico.csv')
+        progress = []
+
+        success, message, total = self.service.export('historico', path, batch_size=64, progress=progress.append)
+
+        self.assertTrue(success, message)
+        self.assertEqual(total, 300)
+        self.assertEqual(progress, [64, 128, 192, 256, 300])
+        rows = self.read_csv(path)
+        self.assertEqual(rows[0][:2], ['id', 'scotia_id'])
+        self.assertEqual(len(rows), 301)
+        self.assertFalse(os.path.exists(path + '.part'))
+
+    def test_projection_and_date_range_with_gzip(self):
+        path = os.path.join(self.tmpdir.name, 'historico.csv.gz')
+        with self.stand_in.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(request_date) FROM [dbo].[historico_dr]")
+            first_day = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM [dbo].[historico_dr] WHERE request_date = ?", first_day)
+            expected = cursor.fetchone()[0]
+
+        success, message, total = self.service.export(
+            'historico', path, columns=['SCOTIA_ID', 'request_date'],
+            date_from=first_day, date_to=first_day, date_column='request_date')
+
+        self.assertTrue(success, message)
+        self.assertEqual(total, expected)
+        rows = self.read_csv(path, gzip.open)
+        self.assertEqual(rows[0], ['scotia_id', 'request_date'])
+        self.assertTrue(all(row[1] == first_day for row in rows[1:]))
+
+    def test_rejects_unknown_columns_without_leaving_files(self):
+        path = os.path.join(self.tmpdir.name, 'headcount.csv')
+
+        success, message, total = self.service.export('headcount', path, columns=['scotia_id', 'salario'])
+
+        self.assertFalse(success)
+        self.assertIn('salario', message)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['bench.db'])
+
+    def test_format_from_extension(self):
+        self.assertEqual(BulkExportService.infer_format('a.parquet'), ('parquet', None))
+        self.assertEqual(BulkExportService.infer_format('a.csv.zst'), ('csv', 'zstd'))
+        self.assertEqual(BulkExportService.infer_format('a.csv'), ('csv', None))
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow no instalado")
+    def test_parquet_schema_comes_from_cursor_description(self):
+        import pyarrow.parquet
+        path = os.path.join(self.tmpdir.name, 'salidas.parquet')
+        description = [('scotia_id', str, None, 20, 20, 0, True),
+                       ('exit_date', datetime.date, None, 10, 10, 0, True)]
+        sink = _ParquetSink(path, ['scotia_id', 'exit_date'], None, description)
+        # Primer lote con exit_date todo NULL; el segundo trae fechas reales
+        sink.write_batch([('E001', None), ('E002', None)])
+        sink.write_batch([('E003', datetime.date(2024, 5, 31))])
+        sink.close()
+
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(str(table.schema.field('exit_date').type), 'date32[day]')
+        self.assertEqual(table.column('exit_date').to_pylist(), [None, None, datetime.date(2024, 5, 31)])
+
+
+if __name__ == '__main__':
+    unittest.main()
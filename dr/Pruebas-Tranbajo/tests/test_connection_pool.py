@@ -0,0 +1,99 @@
+import gc
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from config import ConnectionPool, ConnectionPoolTimeout
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def connect():
+            conn = MagicMock()
+            conn.autocommit = False
+            self.created.append(conn)
+            return conn
+
+        self.connect = connect
+
+    def test_close_returns_connection_to_pool(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=2)
+
+        conn = pool.acquire()
+        conn.cursor().execute("SELECT 1")
+        conn.close()
+        conn.close()  # Cerrar dos veces no debe devolverla dos veces
+
+        again = pool.acquire()
+        self.assertIs(again.raw, self.created[0])
+        self.assertEqual(len(self.created), 1)
+        self.created[0].rollback.assert_called()
+        self.created[0].close.assert_not_called()
+
+    def test_broken_connection_is_replaced_on_borrow(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=2)
+        pool.acquire().close()
+        self.created[0].cursor.side_effect = Exception("conexión perdida")
+
+        conn = pool.acquire()
+
+        self.assertIs(conn.raw, self.created[1])
+        self.created[0].close.assert_called_once()
+        self.assertEqual(pool.stats()['total'], 1)
+
+    def test_idle_connections_are_evicted_above_min_size(self):
+        pool = ConnectionPool(self.connect, min_size=1, max_size=3, idle_timeout=0.01)
+        first, second = pool.acquire(), pool.acquire()
+        first.close()
+        second.close()
+        threading.Event().wait(0.02)
+
+        pool.acquire().close()
+
+        self.assertEqual(pool.stats()['total'], 1)
+
+    def test_unclosed_connection_returns_to_pool_when_collected(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=2, acquire_timeout=0.05)
+
+        def failing_call():
+            conn = pool.acquire()
+            try:
+                raise ValueError("falla antes de conn.close()")
+            except ValueError:
+                return False
+
+        failing_call()
+        failing_call()
+        gc.collect()
+
+        self.assertEqual(pool.stats()['in_use'], 0)
+        pool.acquire().close()
+        self.assertEqual(len(self.created), 1)
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=1)
+        held = pool.acquire()
+
+        with self.assertRaises(ConnectionPoolTimeout):
+            pool.acquire(timeout=0.01)
+
+        released = threading.Timer(0.02, held.close)
+        released.start()
+        with pool.connection(timeout=1) as conn:
+            self.assertIs(conn.raw, self.created[0])
+        released.join()
+
+    def test_context_manager_commits_and_releases(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=1)
+
+        with pool.acquire() as conn:
+            conn.cursor().execute("UPDATE t SET x = 1")
+
+        self.created[0].commit.assert_called_once()
+        self.assertEqual(pool.stats()['idle'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
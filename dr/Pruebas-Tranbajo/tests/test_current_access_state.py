@@ -0,0 +1,113 @@
+import os
+import re
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from services.current_access_state import CurrentAccessState
+
+
+class CurrentAccessStateTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
+        self.service.current_access_table = AccessManagementService.CURRENT_ACCESS_TABLE
+
+        self.cursor = MagicMock()
+        self.cursor.rowcount = 3
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def _executed_sql(self):
+        return [call[0][0] for call in self.cursor.execute.call_args_list]
+
+    def test_refresh_recomputes_sids_in_caller_transaction(self):
+        state = CurrentAccessState('[dbo].[historico_dr]', '[dbo].[current_access_dr]', max_in_params=2)
+
+        written = state.refresh(self.cursor, ['EMP002', ' EMP001 ', 'EMP001', None, 'EMP003'])
+
+        self.assertEqual(written, 6)
+        sql = self._executed_sql()
+        self.assertEqual(len(sql), 4)  # DELETE + INSERT por cada bloque de 2 SIDs
+        self.assertTrue(sql[0].startswith("DELETE FROM [dbo].[current_access_dr]"))
+        self.assertIn("ROW_NUMBER()", sql[1])
+        self.assertIn("u.process_access IN ('onboarding', 'lateral_movement', 'flex_staff', 'manual_access')", sql[1])
+        self.assertEqual(self.cursor.execute.call_args_list[0][0][1], ['EMP001', 'EMP002'])
+        self.assertEqual(self.cursor.execute.call_args_list[2][0][1], ['EMP003'])
+        self.conn.commit.assert_not_called()
+
+    def test_setup_script_populates_state_with_rebuild_query(self):
+        setup = os.path.join(os.path.dirname(__file__), '..', 'sql_server_setup.sql')
+        with open(setup, encoding='utf-8') as f:
+            script = re.sub(r"\s+", " ", f.read())
+        query = CurrentAccessState('[dbo].[historico_dr]', '[dbo].[current_access_dr]')._insert_latest_query("")
+
+        self.assertIn(re.sub(r"\s+", " ", query).strip(), script)
+
+    def test_completed_insert_refreshes_state_before_commit(self):
+        self.cursor.fetchone.return_value = (0,)
+        events = []
+        self.cursor.execute.side_effect = lambda sql, *args: events.append(sql.strip().split()[0])
+        self.conn.commit.side_effect = lambda: events.append('COMMIT')
+
+        success, _ = self.service.create_historical_record({
+            'scotia_id': 'EMP001', 'process_access': 'onboarding', 'app_access_name': 'AppA',
+            'status': 'closed completed', 'employee_email': 'emp001@empresa.com'
+        })
+
+        self.assertTrue(success)
+        self.assertEqual(events, ['SELECT', 'INSERT', 'DELETE', 'INSERT', 'COMMIT'])
+
+    def test_pending_insert_does_not_touch_state(self):
+        self.cursor.fetchone.return_value = (0,)
+
+        self.service.create_historical_record({
+            'scotia_id': 'EMP001', 'process_access': 'onboarding', 'app_access_name': 'AppA',
+            'status': 'Pendiente', 'employee_email': 'emp001@empresa.com'
+        })
+
+        self.assertFalse(any('current_access_dr' in sql for sql in self._executed_sql()))
+
+    def test_current_position_access_reads_state_table(self):
+        self.service.get_employee_by_id = MagicMock(return_value={
+            'scotia_id': 'EMP001', 'position': 'Analista', 'unit': 'Tecnología',
+            'unidad_subunidad': 'Tecnología / Desarrollo'
+        })
+        self.service.get_all_applications = MagicMock(return_value=[
+            {'logical_access_name': 'AppLateral', 'unidad_subunidad': 'Tecnología / Desarrollo',
+             'position_role': 'Analista', 'role_name': 'Lector'},
+            {'logical_access_name': 'AppOtraPosicion', 'unidad_subunidad': 'Finanzas / Caja',
+             'position_role': 'Cajero'},
+        ])
+        self.cursor.description = [
+            ('id',), ('scotia_id',), ('app_access_name',), ('process_access',), ('record_date',),
+            ('subunit',), ('event_description',), ('status',), ('flex_position',), ('expires_at',),
+        ]
+        self.cursor.fetchall.return_value = [
+            (5, 'EMP001', 'FlexNueva', 'flex_staff', '2024-05-01', 'Sub', 'x (flex staff - Gerente)', 'closed completed', 'Gerente', None),
+            (4, 'EMP001', 'AppLateral', 'lateral_movement', '2024-04-01', 'Sub', '', 'closed completed', None, None),
+            (3, 'EMP001', 'AppOtraPosicion', 'lateral_movement', '2024-03-01', 'Sub', '', 'closed completed', None, None),
+            (2, 'EMP001', 'FlexVieja', 'flex_staff', '2024-02-01', 'Sub', 'x (flex staff - Cajero)', 'closed completed', 'Cajero', None),
+            (1, 'EMP001', 'Manual1', 'manual_access', '2024-01-01', 'Sub', '', 'closed completed', None, None),
+        ]
+
+        accesses = self.service.get_employee_current_position_access('EMP001')
+
+        self.cursor.execute.assert_called_once()
+        self.assertIn('[dbo].[current_access_dr]', self.cursor.execute.call_args[0][0])
+        self.assertEqual(
+            [(a['logical_access_name'], a['access_type'], a['position_role']) for a in accesses],
+            [('FlexNueva', 'Flex Staff', 'Gerente'),
+             ('AppLateral', 'Aplicación', 'Analista'),
+             ('Manual1', 'Manual', 'Manual')]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
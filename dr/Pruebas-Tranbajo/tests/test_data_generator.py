@@ -0,0 +1,96 @@
+import collections
+import csv
+import os
+import tempfile
+import unittest
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+
+
+class SyntheticHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.generator = SyntheticDataGenerator(employees=300, applications=400, history=6000, seed=11)
+        self.employees = list(self.generator.employee_rows())
+        self.history = list(self.generator.history_rows())
+
+    def test_exact_history_count_and_chain_processes(self):
+        self.assertEqual(len(self.history), 6000)
+        processes = {row[6] for row in self.history}
+        self.assertLessEqual({'onboarding', 'lateral_movement', 'flex_staff', 'flex_staff_return', 'offboarding'}, processes)
+
+    def test_popular_positions_are_skewed(self):
+        per_position = collections.Counter((row[7], row[8]) for row in self.employees)
+        uniform = len(self.employees) / len(self.generator.positions())
+        self.assertGreater(per_position.most_common(1)[0][1], 10 * uniform)
+
+    def test_headcount_position_matches_history(self):
+        required = {(self.generator.unidad_subunidad(position), position[2]): set(names)
+                    for position, names in self.generator.applications_by_position().items()}
+        held = collections.defaultdict(set)
+        for row in self.history:
+            if row[6] in ('onboarding', 'lateral_movement', 'manual_access'):
+                held[row[0]].add(row[9])
+            elif row[6] == 'offboarding':
+                held[row[0]].discard(row[9])
+
+        last_sid = self.history[-1][0]
+        checked = 0
+        for employee in self.employees:
+            sid, department, position, status = employee[0], employee[7], employee[8], employee[11]
+            if sid not in held or sid == last_sid:
+                continue   # Historial cortado por history_count
+            if status == 'Active':
+                self.assertLessEqual(required[(department, position)], held[sid], sid)
+                checked += 1
+            else:
+                self.assertEqual(held[sid], set(), sid)
+                self.assertIsNotNone(employee[12])
+        self.assertGreater(checked, 0)
+
+
+class SyntheticOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.generator = SyntheticDataGenerator(employees=30, applications=150, history=250, seed=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_csv_has_header_and_rows(self):
+        paths = self.generator.write_csv(self.tmp.name)
+        with open(paths['historico_dr'], encoding='utf-8') as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows[0][0], 'scotia_id')
+        self.assertEqual(len(rows), 251)
+
+    def test_sql_script_loads_into_stand_in(self):
+        path = os.path.join(self.tmp.name, 'dataset.sql')
+        counts = self.generator.write_sql(path)
+        self.assertEqual(counts['Master_Staff_List'], 30)
+
+        stand_in = SQLiteStandIn(os.path.join(self.tmp.name, 'bench.db'))
+        with open(path, encoding='utf-8') as handle, stand_in.connection() as conn:
+            cursor = conn.cursor()
+            for batch in handle.read().split('\nGO\n'):
+                statement = batch.strip()
+                if statement.startswith('INSERT'):
+                    cursor.execute(statement)
+            conn.commit()
+        self.assertEqual(stand_in.table_counts()['historico_dr'], 250)
+
+
+    def test_load_rebuilds_current_access_and_trigrams(self):
+        stand_in = SQLiteStandIn(os.path.join(self.tmp.name, 'loaded.db'))
+        counts = self.generator.load(stand_in)
+
+        self.assertEqual(counts['[dbo].[historico_dr]'], 250)
+        self.assertGreater(counts['[dbo].[current_access_dr]'], 0)
+        self.assertEqual(stand_in.table_counts()['current_access_dr'], counts['[dbo].[current_access_dr]'])
+        with stand_in.connection() as conn:
+            trigrams = conn.cursor().execute("SELECT COUNT(*) FROM [dbo].[historico_trigram_dr]").fetchone()[0]
+        self.assertEqual(trigrams, counts['[dbo].[historico_trigram_dr]'])
+        self.assertGreater(trigrams, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
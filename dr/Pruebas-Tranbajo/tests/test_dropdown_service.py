@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from services.access_management_service import AccessManagementService
+from services.application_cache import ApplicationMatrixCache
+from services.dropdown_service import DropdownService
+
+APPLICATIONS = '[dbo].[applications_dr]'
+
+
+class DropdownServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SQLiteStandIn(os.path.join(self.tmpdir.name, 'bench.db'))
+        SyntheticDataGenerator(employees=30, applications=80, history=20, seed=6).load(self.db)
+        self.cache_file = os.path.join(self.tmpdir.name, 'cache', 'dropdowns.json')
+        self.connections = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        self.connections += 1
+        return self.db.get_connection()
+
+    def _service(self, connection_factory=None):
+        service = DropdownService.__new__(DropdownService)
+        service.applications_table = APPLICATIONS
+        service.cache_file = self.cache_file
+        service.probe_interval = 60
+        service.get_connection = connection_factory or self._connect
+        service._reset_state()
+        return service
+
+    def test_single_query_matches_matrix_distinct_values(self):
+        access = AccessManagementService.__new__(AccessManagementService)
+        access.applications_table = APPLICATIONS
+        matrix = ApplicationMatrixCache(self.db.get_connection, access._applications_view(), APPLICATIONS)
+
+        values = self._service().get_all_dropdown_values()
+
+        self.assertEqual(self.connections, 1)
+        for key, column in [('units', 'unit'), ('subunits', 'service'), ('positions', 'role'),
+                            ('roles', 'roles_and_profiles'), ('jurisdictions', 'jurisdiction'),
+                            ('system_owners', 'application_owner'), ('categories', 'critical_non_critical'),
+                            ('access_types', 'type_of_element'), ('access_statuses', 'status'),
+                            ('authentication_methods', 'log_in_information')]:
+            self.assertEqual(values[key], matrix.distinct_values(column), key)
+        self.assertEqual(values['unidad_subunidad'], matrix.distinct_values('unidad_subunidad'))
+
+    def test_cache_file_gives_values_without_database(self):
+        expected = self._service().get_all_dropdown_values()
+        self.assertTrue(os.path.exists(self.cache_file))
+
+        def unavailable():
+            raise RuntimeError("SQL Server no disponible")
+
+        service = self._service(unavailable)
+        service.probe_interval = float('inf')
+        self.assertEqual(service.get_all_dropdown_values(), expected)
+        self.assertEqual(service.get_unique_positions(), expected['positions'])
+
+    def test_background_refresh_picks_up_changes(self):
+        service = self._service()
+        service.get_all_dropdown_values()
+        with self.db.connection() as conn:
+            conn.cursor().execute(f"INSERT INTO {APPLICATIONS} (name_element, role, unit, service) VALUES (?, ?, ?, ?)",
+                                  ('NUEVA_APP', 'Zeta Coordinador', 'Tecnología', 'Nueva Subunidad'))
+            conn.commit()
+
+        # Sin vencer probe_interval no se consulta la base
+        self.assertNotIn('Zeta Coordinador', service.get_unique_positions())
+        self.assertEqual(self.connections, 1)
+
+        service.refresh_async()
+        service.wait_for_refresh(5)
+        self.assertIn('Zeta Coordinador', service.get_unique_positions())
+        self.assertIn('Tecnología / Nueva Subunidad', service.get_unique_unidad_subunidad())
+        with open(self.cache_file, encoding='utf-8') as f:
+            self.assertIn('Zeta Coordinador', json.load(f)['values']['positions'])
+
+    def test_matrix_invalidation_triggers_refresh(self):
+        service = self._service()
+        service.get_all_dropdown_values()
+        matrix = ApplicationMatrixCache(self.db.get_connection, f"SELECT * FROM {APPLICATIONS} apps", APPLICATIONS)
+        matrix.add_invalidation_listener(lambda: service.refresh_async(force=True))
+
+        with self.db.connection() as conn:
+            conn.cursor().execute(f"UPDATE {APPLICATIONS} SET status = ? WHERE id = 1", ('Retirado',))
+            conn.commit()
+        matrix.invalidate()
+        service.wait_for_refresh(5)
+
+        self.assertIn('Retirado', service.get_unique_access_statuses())
+
+    def test_file_for_other_table_is_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'table': '[dbo].[otra]', 'signature': None, 'values': {}}, f)
+
+        service = self._service()
+        self.assertIsNone(service._values)
+        self.assertTrue(service.get_unique_units())
+
+
+    def test_frozen_executable_keeps_cache_outside_meipass(self):
+        executable = os.path.join(self.tmpdir.name, 'dist', 'gamlo.exe')
+        with patch.object(sys, 'frozen', True, create=True), patch.object(sys, 'executable', executable):
+            with patch.dict(os.environ, {'LOCALAPPDATA': os.path.join(self.tmpdir.name, 'AppData')}):
+                self.assertEqual(DropdownService.default_cache_file(),
+                                 os.path.join(self.tmpdir.name, 'AppData', 'GAMLO', 'dropdown_cache.json'))
+            with patch.dict(os.environ):
+                os.environ.pop('LOCALAPPDATA', None)
+                self.assertEqual(DropdownService.default_cache_file(),
+                                 os.path.join(self.tmpdir.name, 'dist', 'dropdown_cache.json'))
+        self.assertEqual(os.path.basename(os.path.dirname(DropdownService.default_cache_file())), 'database')
+
+
+    def test_cold_start_without_database_returns_defaults(self):
+        def unavailable():
+            raise RuntimeError("SQL Server no disponible")
+
+        service = self._service(unavailable)
+        values = service.get_all_dropdown_values()
+
+        self.assertEqual(values['units'], [])
+        self.assertEqual(values['unidad_subunidad'], DropdownService.DEFAULT_UNIDAD_SUBUNIDAD)
+        self.assertEqual(service.get_unique_positions(), [])
+        self.assertFalse(os.path.exists(self.cache_file))
+
+        # Cuando la base vuelve, la siguiente llamada carga los valores reales
+        service.get_connection = self._connect
+        self.assertTrue(service.get_unique_units())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pyodbc
+
+from services.excel_importer import ExcelToSQLServerImporter
+
+
+class ExcelBulkImportTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin abrir conexión real
+        self.importer = ExcelToSQLServerImporter.__new__(ExcelToSQLServerImporter)
+        self.cursor = MagicMock()
+        self.cursor.fetchall.return_value = []
+        self.cursor.rowcount = 2
+        self.importer.connection = MagicMock()
+        self.importer.connection.cursor.return_value = self.cursor
+
+    def _frame(self):
+        df = pd.DataFrame([
+            {'scotia_id': 'EMP001', 'employee': 'Ana', 'start_date': '2024-01-15'},
+            {'scotia_id': '', 'employee': 'Sin ID', 'start_date': ''},
+            {'scotia_id': 'EMP003', 'employee': 'Luis', 'start_date': 'no es fecha'},
+            {'scotia_id': 'EMP004', 'employee': 'Eva', 'start_date': None},
+        ])
+        df.index = df.index + 2
+        return df
+
+    def test_chunks_go_to_staging_and_merge_once(self):
+        progress = []
+
+        result = self.importer.bulk_load_frames([self._frame()], 'headcount', chunk_size=3,
+                                                progress_callback=progress.append)
+
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['imported'], 2)
+        self.assertEqual(result['chunks'], 2)
+        self.assertEqual(len(progress), 2)
+        self.assertEqual(sorted((r['row'], r['reason']) for r in result['rejected']),
+                         [(3, 'scotia_id vacío'), (4, 'fecha inválida en start_date')])
+
+        self.assertEqual(self.cursor.executemany.call_count, 2)
+        staged = [row for call in self.cursor.executemany.call_args_list for row in call[0][1]]
+        self.assertEqual([(row[0], row[1]) for row in staged], [(2, 'EMP001'), (5, 'EMP004')])
+        self.assertEqual(staged[1][-1], '1')  # activo por defecto
+
+        merges = [c[0][0] for c in self.cursor.execute.call_args_list if 'MERGE headcount' in c[0][0]]
+        self.assertEqual(len(merges), 1)
+        self.importer.connection.commit.assert_called_once()
+
+    def test_failed_chunk_is_retried_row_by_row(self):
+        self.cursor.executemany.side_effect = pyodbc.Error("truncation")
+
+        def execute(sql, *params):
+            if params and params[0][1] == 'EMP004':
+                raise pyodbc.Error("String data, right truncation")
+        self.cursor.execute.side_effect = execute
+
+        result = self.importer.bulk_load_frames([self._frame()], 'headcount', chunk_size=10,
+                                                progress_callback=lambda p: None)
+
+        self.assertTrue(result['success'], result['message'])
+        staging_rejects = [r for r in result['rejected'] if r['stage'] == 'staging']
+        self.assertEqual([r['row'] for r in staging_rejects], [5])
+        # Lo insertado por el lote fallido se deshace antes de reintentar fila a fila
+        statements = [c[0][0] for c in self.cursor.execute.call_args_list]
+        rollback = statements.index("ROLLBACK TRANSACTION stg_chunk")
+        self.assertIn("SAVE TRANSACTION stg_chunk", statements[rollback - 1])
+        self.assertTrue(statements[rollback + 1].startswith("INSERT INTO #stg_headcount"))
+
+    def test_unknown_table_is_rejected(self):
+        result = self.importer.bulk_load_frames([self._frame()], 'otra')
+        self.assertFalse(result['success'])
+
+
+if __name__ == "__main__":
+    unittest.main()
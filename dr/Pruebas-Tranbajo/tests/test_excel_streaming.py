@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from openpyxl import Workbook
+
+from services.excel_importer import ExcelToSQLServerImporter, iter_excel_chunks
+
+
+class ExcelStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'headcount.xlsx')
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Headcount'
+        sheet.append(['Reporte generado'])
+        sheet.append(['scotia_id', 'employee', 'start_date'])
+        for i in range(1, 6):
+            sheet.append([f'EMP{i:03d}', f'Empleado {i}', '2024-01-15'])
+        workbook.save(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_chunks_keep_excel_row_numbers(self):
+        chunks = list(iter_excel_chunks(self.path, 'Headcount', skip_rows=1, chunk_size=2))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(list(chunks[0].columns), ['scotia_id', 'employee', 'start_date'])
+        self.assertEqual(list(chunks[0].index), [3, 4])
+        self.assertEqual(chunks[2].iloc[0]['scotia_id'], 'EMP005')
+        self.assertEqual(list(chunks[2].index), [7])
+
+    def test_bulk_import_streams_chunks_to_staging(self):
+        importer = ExcelToSQLServerImporter.__new__(ExcelToSQLServerImporter)
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        cursor.rowcount = 5
+        importer.connection = MagicMock()
+        importer.connection.cursor.return_value = cursor
+
+        result = importer.bulk_import_from_excel(self.path, 'Headcount', 'headcount', skip_rows=1,
+                                                 chunk_size=2, progress_callback=lambda _: None)
+
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['chunks'], 3)
+        staged = [c.args[1] for c in cursor.executemany.call_args_list]
+        self.assertEqual([len(rows) for rows in staged], [2, 2, 1])
+        self.assertEqual(staged[0][0][0], 3)
+        importer.connection.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from datetime import datetime
+
+from openpyxl import load_workbook
+
+from services.excel_export import StreamingExcelWriter
+from services.export_service import ExportService, TICKET_COLUMNS
+
+
+class StreamingExcelWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.service = ExportService(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_history_from_generator_with_sampled_widths(self):
+        def history():
+            for i in range(1200):
+                yield {'scotia_id': f'SID{i:07d}', 'app_access_name': 'SAP' if i else 'Aplicación con nombre largo',
+                       'record_date': datetime(2024, 1, 15, 10, 30), 'extra': {'i': i}}
+
+        path = self.service.export_access_history(history(), filename_prefix='historial')
+
+        sheet = load_workbook(path)['Historial']
+        self.assertEqual([cell.value for cell in sheet[1]], ['scotia_id', 'app_access_name', 'record_date', 'extra'])
+        self.assertEqual(sheet.max_row, 1201)
+        self.assertEqual(sheet['C2'].value, datetime(2024, 1, 15, 10, 30))
+        self.assertEqual(sheet['D2'].value, "{'i': 0}")
+        self.assertEqual(sheet.column_dimensions['B'].width, len('Aplicación con nombre largo') + 2)
+        self.assertEqual(sheet.column_dimensions['A'].width, len('SID0000000') + 2)
+
+    def test_columns_come_from_sample_only(self):
+        writer = StreamingExcelWriter(f"{self.tmpdir.name}/muestra.xlsx")
+        writer.SAMPLE_ROWS = 2
+        count = writer.write_sheet('Datos', [{'a': 1}, {'a': 2, 'b': 3}, {'a': 4, 'c': 5}])
+        writer.save()
+
+        sheet = load_workbook(writer.filepath)['Datos']
+        self.assertEqual(count, 3)
+        self.assertEqual([list(row) for row in sheet.iter_rows(values_only=True)],
+                         [['a', 'b'], [1, None], [2, 3], [4, None]])
+
+    def test_reconciliation_tickets_without_pending_work(self):
+        data = [
+            {'person_info': {'sid': 'SID001', 'area': 'TI', 'subunit': 'Datos', 'cargo': 'Analista'},
+             'current': [{}], 'target': [{}], 'to_grant': [], 'to_revoke': []},
+            {'error': 'no encontrado'}
+        ]
+
+        path = self.service.export_reconciliation_tickets(data)
+
+        workbook = load_workbook(path)
+        self.assertEqual(workbook.sheetnames, ['Resumen', 'Tickets'])
+        self.assertEqual(list(next(workbook['Resumen'].iter_rows(min_row=2, values_only=True))),
+                         ['SID001', 'TI', 'Datos', 'Analista', 1, 1, 0, 0])
+        self.assertEqual([cell.value for cell in workbook['Tickets'][1]], TICKET_COLUMNS)
+        self.assertEqual(workbook['Tickets'].max_row, 1)
+
+    def test_statistics_sheets_skip_empty_sections(self):
+        stats = {
+            'generales': {'total': 10, 'activos': 8},
+            'por_unidad': [{'unidad': 'TI', 'total': 10}],
+            'por_puesto': []
+        }
+
+        path = self.service.export_headcount_statistics(stats)
+
+        workbook = load_workbook(path)
+        self.assertEqual(workbook.sheetnames, ['Generales', 'Por Unidad'])
+        self.assertEqual(list(next(workbook['Generales'].iter_rows(min_row=2, values_only=True))), [10, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from services.headcount_snapshot import HeadcountSnapshot, fold
+
+TABLE = '[dbo].[Master_Staff_List]'
+
+
+class HeadcountSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SQLiteStandIn(os.path.join(self.tmpdir.name, 'headcount.db'))
+        SyntheticDataGenerator(employees=300, applications=20, history=10, seed=11).load(self.db)
+        self.snapshot = HeadcountSnapshot(self.db.get_connection, TABLE, probe_interval=0)
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(HeadcountSnapshot.COLUMNS)} FROM {TABLE}")
+            self.rows = [dict(zip(HeadcountSnapshot.COLUMNS, row)) for row in cursor.fetchall()]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _insert(self, scotia_id, name, last_name, email):
+        with self.db.connection() as conn:
+            conn.cursor().execute(f"""
+                INSERT INTO {TABLE} (scotia_id, employee_number, employee_name, employee_last_name, business_email,
+                                     department, current_position_title, status)
+                VALUES (?, ?, ?, ?, ?, 'Tecnología', 'Analista', 'Active')
+            """, (scotia_id, scotia_id[3:], name, last_name, email))
+            conn.commit()
+
+    def test_fold_lowercases_and_strips_accents(self):
+        self.assertEqual(fold('José MUÑOZ'), 'jose munoz')
+        self.assertEqual(fold(None), '')
+        self.assertEqual(fold(42), '42')
+
+    def test_matches_linear_scan_for_every_column(self):
+        for column in HeadcountSnapshot.COLUMNS:
+            values = [fold(row[column]) for row in self.rows if row[column]]
+            for text in {values[0][:2], values[0][1:5], values[-1][-4:], 'zzzq'}:
+                expected = sorted(row['scotia_id'] for row in self.rows if text in fold(row[column]))
+                found = sorted(row['scotia_id'] for row in self.snapshot.search(column, text))
+                self.assertEqual(found, expected, (column, text))
+
+                expected = sorted(row['scotia_id'] for row in self.rows if fold(row[column]).startswith(text))
+                found = sorted(row['scotia_id'] for row in self.snapshot.search(column, text, mode='prefix'))
+                self.assertEqual(found, expected, (column, text))
+
+    def test_accent_insensitive_search_and_order(self):
+        self._insert('SID9999999', 'José', 'Ñúñez', 'jose.nunez@example.com')
+
+        found = self.snapshot.search('employee_last_name', 'NUNEZ')
+        self.assertEqual([row['scotia_id'] for row in found], ['SID9999999'])
+        self.assertEqual(found[0]['employee_name'], 'José')
+
+        everyone = self.snapshot.search('employee_name', '')
+        self.assertEqual(len(everyone), len(self.rows) + 1)
+        keys = [(row['employee_name'] or '', row['employee_last_name'] or '', row['scotia_id']) for row in everyone]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(self.snapshot.search('employee_name', '', limit=5)), 5)
+
+    def test_probe_reloads_external_changes_and_invalidate(self):
+        self.snapshot.search('scotia_id', 'SID')
+        self._insert('SID9999998', 'Externa', 'Prueba', 'externa@example.com')
+        self.assertEqual(len(self.snapshot.search('scotia_id', 'SID9999998')), 1)
+
+        self.snapshot.probe_interval = 3600
+        with self.db.connection() as conn:
+            conn.cursor().execute(f"DELETE FROM {TABLE} WHERE scotia_id = ?", ('SID9999998',))
+            conn.commit()
+        self.assertEqual(len(self.snapshot.search('scotia_id', 'SID9999998')), 1)
+        self.snapshot.invalidate()
+        self.assertEqual(self.snapshot.search('scotia_id', 'SID9999998'), [])
+        self.assertEqual(self.snapshot.stats()['rows'], len(self.rows))
+
+    def test_search_returns_copies_and_rejects_unknown_columns(self):
+        row = self.snapshot.search('scotia_id', self.rows[0]['scotia_id'])[0]
+        row['employee_name'] = 'cambiado'
+        self.assertNotEqual(self.snapshot.search('scotia_id', self.rows[0]['scotia_id'])[0]['employee_name'], 'cambiado')
+        with self.assertRaises(ValueError):
+            self.snapshot.search('manager', 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from benchmarks.sqlite_backend import translate_tsql
+from services.access_management_service import AccessManagementService
+
+TABLE = '[dbo].[Master_Staff_List]'
+ACTIVO = "CASE WHEN LOWER(IFNULL(status,'')) IN ('inactive','terminated','offboarded','baja') THEN 0 ELSE 1 END"
+
+
+class CountingDatabase:
+    """Cuenta las conexiones pedidas al reemplazo SQLite"""
+
+    def __init__(self, db):
+        self.db = db
+        self.connections = 0
+
+    def get_connection(self):
+        self.connections += 1
+        return self.db.get_connection()
+
+
+class HeadcountStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SQLiteStandIn(os.path.join(self.tmpdir.name, 'headcount.db'))
+        SyntheticDataGenerator(employees=250, applications=20, history=10, seed=5).load(self.db)
+        self.counting = CountingDatabase(self.db)
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.headcount_table = TABLE
+        self.service.db_manager = self.counting
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _query(self, sql):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def test_grouping_sets_match_separate_group_by(self):
+        stats = self.service.get_headcount_statistics()
+
+        expected_units = self._query(f"""
+            SELECT department, COUNT(*), SUM({ACTIVO}), SUM(1 - {ACTIVO}),
+                   COUNT(CASE WHEN current_position_title IS NOT NULL AND current_position_title != '' THEN 1 END),
+                   COUNT(begdate)
+            FROM {TABLE} WHERE department IS NOT NULL AND department != '' GROUP BY department""")
+        self.assertEqual(
+            {row['unidad']: (row['total_empleados'], row['activos'], row['inactivos'], row['con_posicion'],
+                             row['con_fecha_inicio']) for row in stats['por_unidad']},
+            {row[0]: tuple(row[1:]) for row in expected_units})
+        totals = [row['total_empleados'] for row in stats['por_unidad']]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+        expected_positions = self._query(f"""
+            SELECT current_position_title, department, COUNT(*), SUM({ACTIVO}) FROM {TABLE}
+            WHERE current_position_title IS NOT NULL AND current_position_title != ''
+            GROUP BY current_position_title, department""")
+        self.assertEqual(
+            {(row['puesto'], row['unidad']): (row['total_empleados'], row['activos']) for row in stats['por_puesto']},
+            {(row[0], row[1]): (row[2], row[3]) for row in expected_positions})
+
+        estados = {row['estado']: row['total_empleados'] for row in stats['por_estado']}
+        total, activos = self._query(f"SELECT COUNT(*), SUM({ACTIVO}) FROM {TABLE}")[0]
+        self.assertEqual(estados.get('Active', 0), activos)
+        self.assertEqual(estados.get('Inactive', 0), total - activos)
+
+        generales = stats['generales']
+        self.assertEqual((generales['total_empleados'], generales['activos']), (total, activos))
+        self.assertEqual(generales['unidades_unicas'], len(expected_units))
+        self.assertEqual(generales['puestos_unicos'], len({row[0] for row in expected_positions}))
+        self.assertEqual(stats['por_manager'], [])
+        self.assertEqual(len(stats['detalle_por_unidad']), sum(row[1] for row in expected_units))
+
+    def test_cached_until_employee_changes(self):
+        first = self.service.get_headcount_statistics()
+        connections = self.counting.connections
+
+        second = self.service.get_headcount_statistics()
+        self.assertEqual(second, first)
+        self.assertEqual(self.counting.connections, connections)
+        second['generales']['total_empleados'] = -1
+        self.assertNotEqual(self.service.get_headcount_statistics()['generales']['total_empleados'], -1)
+
+        scotia_id = self._query(f"SELECT scotia_id FROM {TABLE} WHERE status = 'Active' ORDER BY scotia_id LIMIT 1")[0][0]
+        success, _ = self.service.update_employee_status(scotia_id, False)
+        self.assertTrue(success)
+
+        updated = self.service.get_headcount_statistics()
+        self.assertEqual(updated['generales']['activos'], first['generales']['activos'] - 1)
+        self.assertGreater(self.counting.connections, connections)
+
+    def test_use_cache_false_always_queries(self):
+        self.service.get_headcount_statistics()
+        connections = self.counting.connections
+        self.service.get_headcount_statistics(use_cache=False)
+        self.assertGreater(self.counting.connections, connections)
+
+    def test_stand_in_expands_grouping_sets(self):
+        sql, _, _ = translate_tsql(
+            "SELECT GROUPING(a) AS ga, a, b, COUNT(*) AS n FROM t GROUP BY GROUPING SETS ((a), (a, b), ())")
+        self.assertEqual(sql.split("\nUNION ALL\n"), [
+            "SELECT 0 AS ga, a, NULL AS b, COUNT(*) AS n FROM t GROUP BY a",
+            "SELECT 0 AS ga, a, b, COUNT(*) AS n FROM t GROUP BY a, b",
+            "SELECT 1 AS ga, NULL AS a, NULL AS b, COUNT(*) AS n FROM t"
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+
+
+class HistoricalBatchWriterTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
+
+        self.cursor = MagicMock()
+        self.cursor.fetchall.side_effect = [
+            [('EMP001', ' pendingapp ')],           # registros pendientes existentes
+            [('EMP001', 'emp001@empresa.com')],    # emails
+        ]
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def _record(self, app_name, process_access='onboarding'):
+        return {
+            'scotia_id': 'EMP001',
+            'case_id': 'CASE-1',
+            'process_access': process_access,
+            'app_access_name': app_name,
+            'status': 'Pendiente'
+        }
+
+    def test_single_transaction_with_set_based_duplicate_check(self):
+        records = [
+            self._record('AppA'),
+            self._record('PendingApp'),               # ya pendiente en la base
+            self._record('appa'),                     # duplicado dentro del lote
+            self._record('PendingApp', 'offboarding'),  # offboarding no se filtra
+            {'process_access': 'onboarding'},         # sin scotia_id
+        ]
+
+        success, message, accepted = self.service.create_historical_records(records)
+
+        self.assertTrue(success, message)
+        self.assertEqual(len(accepted), 4)
+        self.service.get_connection.assert_called_once()
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        self.cursor.executemany.assert_called_once()
+        self.assertTrue(self.cursor.fast_executemany)
+        self.conn.commit.assert_called_once()
+        self.conn.close.assert_called_once()
+
+        params = self.cursor.executemany.call_args[0][1]
+        self.assertEqual([p[10] for p in params], ['AppA', 'PendingApp'])
+        self.assertEqual([p[6] for p in params], ['onboarding', 'offboarding'])
+        self.assertTrue(all(p[1] == 'emp001@empresa.com' for p in params))
+
+    def test_failed_insert_rolls_back_everything(self):
+        self.cursor.executemany.side_effect = Exception("timeout")
+
+        success, _, accepted = self.service.create_historical_records([self._record('AppA')])
+
+        self.assertFalse(success)
+        self.assertEqual(accepted, [])
+        self.conn.rollback.assert_called_once()
+        self.conn.commit.assert_not_called()
+        self.conn.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from services.listing_service import ListingService, Page
+
+
+class ListingServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.stand_in = SQLiteStandIn(os.path.join(self.tmpdir.name, 'bench.db'))
+        SyntheticDataGenerator(employees=60, applications=90, history=500, seed=8).load(self.stand_in)
+
+        self.service = ListingService.__new__(ListingService)
+        self.service.db_manager = self.stand_in
+        self.service.historico_table = '[dbo].[historico_dr]'
+        self.service.headcount_table = '[dbo].[Master_Staff_List]'
+        self.service.applications_table = '[dbo].[applications_dr]'
+        self.service._columns = {}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _all_pages(self, dataset, **kwargs):
+        pages = [self.service.page(dataset, **kwargs)]
+        while pages[-1].has_more:
+            pages.append(self.service.page(dataset, token=pages[-1].next_token, **kwargs))
+        return pages
+
+    def _query(self, sql, params=()):
+        with self.stand_in.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def test_history_pages_follow_record_date_and_id(self):
+        pages = self._all_pages('historico', columns=['scotia_id', 'status'], page_size=64)
+
+        expected = self._query("SELECT scotia_id, status FROM [dbo].[historico_dr] ORDER BY record_date DESC, id DESC")
+        self.assertGreater(len(expected), 128)
+        self.assertEqual([len(page) for page in pages[:-1]], [64] * (len(pages) - 1))
+        self.assertEqual(pages[0].columns, ['scotia_id', 'status'])
+        rows = [row for page in pages for row in page]
+        self.assertEqual(rows, expected)
+        self.assertIsNone(pages[-1].next_token)
+
+    def test_rows_inserted_between_pages_do_not_shift_pages(self):
+        first = self.service.page('historico', columns=['id'], page_size=60)
+        with self.stand_in.connection() as conn:
+            conn.cursor().execute("INSERT INTO [dbo].[historico_dr] (scotia_id, record_date, status) VALUES (?, ?, ?)",
+                                  ('SID0000001', datetime(2099, 1, 1), 'Pendiente'))
+            conn.commit()
+
+        second = self.service.page('historico', columns=['id'], page_size=60, token=first.next_token)
+
+        expected = self._query("SELECT id FROM [dbo].[historico_dr] WHERE record_date < '2099-01-01' "
+                               "ORDER BY record_date DESC, id DESC")
+        self.assertEqual(list(first) + list(second), expected[:120])
+
+    def test_ties_on_100ns_record_date_are_not_skipped(self):
+        # DATETIME2(7) con valores de GETDATE() (.0033333) no se representan en datetime de Python
+        with self.stand_in.connection() as conn:
+            cursor = conn.cursor()
+            for _ in range(5):
+                cursor.execute("INSERT INTO [dbo].[historico_dr] (scotia_id, record_date, status) VALUES (?, ?, ?)",
+                               ('SID0000001', '2099-01-01 10:00:00.0033333', 'Pendiente'))
+            conn.commit()
+        expected = self._query("SELECT id FROM [dbo].[historico_dr] ORDER BY record_date DESC, id DESC")[:7]
+
+        first = self.service.page('historico', columns=['id'], page_size=2)
+        self.assertEqual(ListingService.decode_token(first.next_token, 'historico', 'record_date'),
+                         ['2099-01-01 10:00:00.0033333', expected[1][0]])
+        pages = [first]
+        while len(pages) < 4:
+            pages.append(self.service.page('historico', columns=['id'], page_size=2, token=pages[-1].next_token))
+
+        self.assertEqual([row for page in pages for row in page][:7], expected)
+        query, _ = self.service.build_query('historico', ['id'], 'record_date', 2, key=['x', 1])
+        self.assertIn("[record_date] < CAST(? AS DATETIME2(7))", query)
+        self.assertIn("CONVERT(VARCHAR(27), [record_date], 121)", query)
+
+    def test_headcount_projection_and_filters(self):
+        pages = self._all_pages('headcount', columns=['SCOTIA_ID', 'department'], page_size=25,
+                                filters={'status': 'Active'})
+
+        rows = [row for page in pages for row in page]
+        expected = self._query("SELECT scotia_id, department FROM [dbo].[Master_Staff_List] "
+                               "WHERE status LIKE '%Active%' ORDER BY scotia_id")
+        self.assertEqual(rows, expected)
+        self.assertEqual(pages[0].as_dicts()[0], {'scotia_id': expected[0][0], 'department': expected[0][1]})
+
+    def test_applications_by_name(self):
+        pages = self._all_pages('applications', columns=['name_element'], sort='name_element', page_size=40)
+
+        rows = [row for page in pages for row in page]
+        self.assertEqual(rows, self._query("SELECT name_element FROM [dbo].[applications_dr] ORDER BY name_element, id"))
+
+    def test_invalid_requests(self):
+        page = self.service.page('historico', columns=['id'], page_size=10)
+        with self.assertRaises(ValueError):
+            self.service.page('historico', columns=['id'], sort='id', token=page.next_token)
+        with self.assertRaises(ValueError):
+            self.service.page('headcount', columns=['manager'])
+        with self.assertRaises(ValueError):
+            self.service.page('historico', token='no-es-un-token')
+        with self.assertRaises(ValueError):
+            self.service.page('procesos')
+
+    def test_token_round_trip_keeps_types(self):
+        key = [datetime(2024, 3, 5, 10, 30, 15, 120000), 42]
+        token = ListingService.encode_token('historico', 'record_date', key)
+        self.assertEqual(ListingService.decode_token(token, 'historico', 'record_date'), key)
+        self.assertEqual(ListingService.keyset_condition((('record_date', 'DESC'), ('id', 'DESC')), key),
+                         ("(([record_date] < ?) OR ([record_date] = ? AND [id] < ?))", [key[0], key[0], 42]))
+        self.assertFalse(Page(['id'], []).has_more)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import logging
+import unittest
+from unittest.mock import MagicMock
+
+from logging_config import configure_logging, lazy, parse_module_levels
+from services.access_management_service import AccessManagementService
+
+
+class LoggingConfigTest(unittest.TestCase):
+    def tearDown(self):
+        configure_logging(force=True)
+
+    def test_module_levels_override_default(self):
+        self.assertEqual(parse_module_levels('services=debug, ui =WARNING,malo'),
+                         {'services': 'DEBUG', 'ui': 'WARNING'})
+
+        configure_logging('INFO', {'services.access_management_service': 'DEBUG'}, force=True)
+
+        self.assertTrue(logging.getLogger('services.access_management_service').isEnabledFor(logging.DEBUG))
+        self.assertFalse(logging.getLogger('services.search_service').isEnabledFor(logging.DEBUG))
+
+    def test_lazy_argument_is_only_built_when_emitted(self):
+        configure_logging('INFO', {}, force=True)
+        builder = MagicMock(return_value='texto')
+
+        logging.getLogger('services.prueba').debug("valor: %s", lazy(builder))
+        builder.assert_not_called()
+
+        with self.assertLogs('services.prueba', level='DEBUG') as logs:
+            logging.getLogger('services.prueba').debug("valor: %s", lazy(builder))
+        self.assertEqual(logs.output, ['DEBUG:services.prueba:valor: texto'])
+
+
+class DiagnosticQueriesTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.cursor = MagicMock()
+        self.cursor.description = [('logical_access_name',)]
+        self.cursor.fetchall.return_value = []
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def tearDown(self):
+        configure_logging(force=True)
+
+    def test_diagnostic_query_runs_only_with_debug(self):
+        configure_logging('INFO', {}, force=True)
+        self.service.get_employee_flex_staff_access('EMP001')
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+        self.cursor.reset_mock()
+        configure_logging('INFO', {'services.access_management_service': 'DEBUG'}, force=True)
+        with self.assertLogs('services.access_management_service', level='DEBUG'):
+            self.service.get_employee_flex_staff_access('EMP001')
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
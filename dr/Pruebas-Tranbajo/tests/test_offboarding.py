@@ -9,6 +9,10 @@ class OffboardingInactiveAccessTest(unittest.TestCase):
         # Crear instancia sin ejecutar __init__
         self.service = AccessManagementService.__new__(AccessManagementService)
         self.service.db_manager = MagicMock()
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
 
     def _build_mock_connection(self, rows):
         cursor = MagicMock()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from services.population_reconciliation import PopulationReconciler
+
+
+COLUMNS = [
+    ('scotia_id',), ('full_name',), ('email',), ('unit',), ('position',), ('unidad_subunidad',),
+    ('app_access_name',), ('subunit',), ('record_date',), ('status',),
+]
+
+
+class PopulationReconciliationTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
+        self.service.get_all_applications = MagicMock(return_value=[
+            {'logical_access_name': 'AppA', 'unidad_subunidad': 'Tecnología / Desarrollo',
+             'position_role': 'Analista', 'access_status': 'Active', 'role_name': 'Lector'},
+            {'logical_access_name': 'AppB', 'unidad_subunidad': 'Tecnología / Desarrollo',
+             'position_role': 'Analista', 'access_status': 'Active', 'role_name': 'Editor'},
+            {'logical_access_name': 'AppViejo', 'unidad_subunidad': 'Tecnología / Desarrollo',
+             'position_role': 'Analista', 'access_status': 'Inactive', 'role_name': 'Lector'},
+        ])
+
+    def _mock_connection(self, rows):
+        cursor = MagicMock()
+        cursor.description = COLUMNS
+        cursor.fetchmany.side_effect = [rows[:3], rows[3:], []]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        self.service.get_connection = MagicMock(return_value=conn)
+        return conn, cursor
+
+    def test_groups_rows_per_sid_and_computes_sets(self):
+        employee = ('Ana', 'ana@x.com', 'Tecnología', 'Analista', 'Tecnología / Desarrollo')
+        rows = [
+            ('EMP001',) + employee + ('appa', 'Desarrollo', '2024-01-01', 'closed completed'),
+            ('EMP001',) + employee + ('AppViejo', 'Desarrollo', '2024-01-02', 'closed completed'),
+            ('EMP002',) + employee + (None, None, None, None),
+            ('EMP003', 'Luis', 'luis@x.com', None, None, None, 'AppA', None, '2024-01-03', 'Completado'),
+        ]
+        conn, cursor = self._mock_connection(rows)
+
+        reports = list(self.service.reconcile_population())
+
+        self.assertEqual([r['scotia_id'] for r in reports], ['EMP001', 'EMP002', 'EMP003'])
+        first, second, third = reports
+
+        self.assertEqual([a['app_name'] for a in first['current_access']], ['appa', 'AppViejo'])
+        self.assertEqual([a['app_name'] for a in first['to_grant']], ['AppB'])
+        self.assertEqual([a['app_name'] for a in first['to_revoke']], ['AppViejo'])
+        self.assertEqual(first['summary']['final_count'], 2)
+
+        self.assertEqual(second['current_access'], [])
+        self.assertEqual([a['app_name'] for a in second['to_grant']], ['AppA', 'AppB'])
+
+        # Sin posición/unidad: se reporta el error y no se sugieren revocaciones
+        self.assertIn('error', third)
+        self.assertEqual(third['to_revoke'], [])
+        self.assertEqual(third['summary']['current_count'], 1)
+
+        # Una sola consulta por conjuntos para toda la población
+        cursor.execute.assert_called_once()
+        query, params = cursor.execute.call_args[0]
+        self.assertIn('ROW_NUMBER()', query)
+        self.assertIn('ORDER BY e.scotia_id', query)
+        self.assertNotIn('sp_GetAccessReconciliationReport', query)
+        self.assertEqual(params[:2], ['closed completed', 'Completado'])
+        conn.close.assert_called_once()
+
+    def test_scotia_ids_are_batched_by_max_in_params(self):
+        conn, cursor = self._mock_connection([])
+        cursor.fetchmany.side_effect = None
+        cursor.fetchmany.return_value = []
+        self.service.MAX_IN_PARAMS = 2
+
+        reports = list(self.service.reconcile_population(scotia_ids=['EMP003', 'EMP001', ' EMP002 ', 'EMP001']))
+
+        self.assertEqual(reports, [])
+        self.assertEqual(cursor.execute.call_count, 2)
+        first_params = cursor.execute.call_args_list[0][0][1]
+        second_params = cursor.execute.call_args_list[1][0][1]
+        self.assertEqual(first_params[-2:], ['EMP001', 'EMP002'])
+        self.assertEqual(second_params[-1:], ['EMP003'])
+
+    def test_summarize_totals(self):
+        reconciler = PopulationReconciler(self.service)
+        reports = [
+            {'summary': {'current_count': 2, 'to_grant_count': 1, 'to_revoke_count': 1}},
+            {'summary': {'current_count': 0, 'to_grant_count': 0, 'to_revoke_count': 0}, 'error': 'x'},
+        ]
+        totals = reconciler.summarize(reports)
+        self.assertEqual(totals, {'employees': 2, 'with_changes': 1, 'current': 2,
+                                  'to_grant': 1, 'to_revoke': 1, 'errors': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
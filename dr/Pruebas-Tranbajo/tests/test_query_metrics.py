@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from query_metrics import QueryMetrics, fingerprint, instrument
+
+
+class FingerprintTest(unittest.TestCase):
+    def test_literals_and_in_lists_are_normalized(self):
+        a = fingerprint("SELECT *  FROM [dbo].[historico_dr]\n WHERE scotia_id IN (?, ?, ?) AND id > 10 AND status = 'Pendiente'")
+        b = fingerprint("SELECT * FROM [dbo].[historico_dr] WHERE scotia_id IN (?) AND id > 2 AND status = N'closed completed'")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT * FROM [dbo].[historico_dr] WHERE scotia_id IN (?...) AND id > ? AND status = ?")
+
+
+class InstrumentedConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = QueryMetrics(slow_query_ms=50)
+        self.raw_cursor = MagicMock()
+        self.raw_cursor.fetchall.return_value = [('EMP001',), ('EMP002',)]
+        self.raw_cursor.fetchone.return_value = ('EMP001',)
+        self.raw_conn = MagicMock()
+        self.raw_conn.cursor.return_value = self.raw_cursor
+
+    def consultar_empleados(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT scotia_id FROM [dbo].[Master_Staff_List] WHERE unit = ? AND position = ?", 'TI', 'Analista')
+        cursor.fetchall()
+        cursor.execute("SELECT scotia_id FROM [dbo].[Master_Staff_List] WHERE unit = ? AND position = ?", ['RRHH', 'Cajero'])
+        cursor.fetchone()
+
+    def test_statements_are_timed_counted_and_attributed(self):
+        conn = instrument(self.raw_conn, self.metrics)
+        self.consultar_empleados(conn)
+        conn.commit()
+
+        snapshot = self.metrics.snapshot()
+        operation = snapshot['operations']['tests.test_query_metrics.InstrumentedConnectionTest.consultar_empleados']
+        self.assertEqual(operation['calls'], 2)
+        self.assertEqual(operation['rows'], 3)
+        self.assertEqual(operation['params'], 4)
+        self.assertEqual(sum(operation['histogram'].values()), 2)
+        self.assertEqual(len(snapshot['statements']), 1)
+        self.raw_cursor.execute.assert_any_call(
+            "SELECT scotia_id FROM [dbo].[Master_Staff_List] WHERE unit = ? AND position = ?", 'TI', 'Analista')
+        self.raw_conn.commit.assert_called_once()
+
+    def test_slow_and_failed_statements_are_recorded(self):
+        self.raw_cursor.execute.side_effect = Exception("timeout")
+        conn = instrument(self.raw_conn, self.metrics)
+
+        with patch('query_metrics.time.perf_counter', side_effect=[1.0, 1.2]):
+            with self.assertRaises(Exception):
+                conn.cursor().execute("DELETE FROM [dbo].[current_access_dr] WHERE scotia_id = 'EMP001'")
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(len(snapshot['slow_queries']), 1)
+        self.assertEqual(snapshot['slow_queries'][0]['sql'], "DELETE FROM [dbo].[current_access_dr] WHERE scotia_id = ?")
+        self.assertEqual(snapshot['statements'][0]['errors'], 1)
+        self.assertEqual(snapshot['statements'][0]['histogram']['<=250ms'], 1)
+
+    def test_dump_json_and_reset(self):
+        conn = instrument(self.raw_conn, self.metrics)
+        self.consultar_empleados(conn)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.metrics.dump_json(os.path.join(tmp, 'metricas.json'))
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        self.assertEqual(len(data['operations']), 1)
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot()['operations'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.access_management_service import AccessManagementService
+from services.result_cache import SidResultCache
+
+
+class SidResultCacheTest(unittest.TestCase):
+    def test_hits_return_copies_and_lru_evicts_oldest(self):
+        cache = SidResultCache(max_entries=2, ttl=60)
+        loader = MagicMock(side_effect=lambda: {'apps': ['A']})
+
+        first = cache.get_or_load('current_access', 'EMP001', loader)
+        first['apps'].append('mutado')
+        second = cache.get_or_load('current_access', ' EMP001 ', loader)
+
+        self.assertEqual(second, {'apps': ['A']})
+        self.assertEqual(loader.call_count, 1)
+
+        cache.get_or_load('current_access', 'EMP002', loader)
+        cache.get_or_load('current_access', 'EMP001', loader)   # EMP001 pasa a ser el más reciente
+        cache.get_or_load('current_access', 'EMP003', loader)   # expulsa a EMP002
+        self.assertEqual(cache.stats()['entries'], 2)
+        cache.get_or_load('current_access', 'EMP001', loader)
+        self.assertEqual(loader.call_count, 3)
+        cache.get_or_load('current_access', 'EMP002', loader)
+        self.assertEqual(loader.call_count, 4)
+
+    def test_ttl_expires_entries(self):
+        cache = SidResultCache(max_entries=10, ttl=30)
+        loader = MagicMock(return_value=[])
+        with patch('services.result_cache.time.monotonic', side_effect=[100.0, 110.0, 140.0, 140.0]):
+            cache.get_or_load('reconciliation', 'EMP001', loader)
+            cache.get_or_load('reconciliation', 'EMP001', loader)
+            cache.get_or_load('reconciliation', 'EMP001', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidation_by_tag_and_generation(self):
+        cache = SidResultCache(max_entries=10, ttl=60)
+        cache.get_or_load('reconciliation', 'EMP001', lambda: 'r1',
+                          tags=lambda _: [SidResultCache.position_tag('Analista'), SidResultCache.app_tag('AppA')])
+        cache.get_or_load('reconciliation', 'EMP002', lambda: 'r2',
+                          tags=lambda _: [SidResultCache.position_tag('Cajero')])
+
+        cache.invalidate_tags([SidResultCache.app_tag(' appa ')])
+        self.assertEqual(cache.stats()['entries'], 1)
+
+        # Una carga que se cruza con una invalidación no se guarda
+        def loader():
+            cache.invalidate_sid('EMP009')
+            return 'viejo'
+        self.assertEqual(cache.get_or_load('reconciliation', 'EMP003', loader), 'viejo')
+        self.assertEqual(cache.stats()['entries'], 1)
+
+    def test_failed_results_are_not_cached(self):
+        cache = SidResultCache(max_entries=10, ttl=60)
+        loader = MagicMock(return_value={'success': False})
+        cache.get_or_load('reconciliation', 'EMP001', loader, cache_if=lambda r: r['success'])
+        cache.get_or_load('reconciliation', 'EMP001', loader, cache_if=lambda r: r['success'])
+        self.assertEqual(loader.call_count, 2)
+
+
+class ServiceResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.db_manager = MagicMock()
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
+        self.service.result_cache = SidResultCache(max_entries=10, ttl=60)
+        self.service.application_cache = MagicMock()
+        self.report = {
+            'success': True,
+            'data': {
+                'employee': {'scotia_id': 'EMP001', 'position': 'Analista'},
+                'current_access': [{'app_name': 'AppA'}],
+                'to_grant': [], 'to_revoke': []
+            }
+        }
+        self.service._load_access_reconciliation_report = MagicMock(return_value=self.report)
+
+    def test_report_is_cached_until_historical_write(self):
+        self.service.get_access_reconciliation_report('EMP001')
+        self.service.get_access_reconciliation_report('EMP001')
+        self.assertEqual(self.service._load_access_reconciliation_report.call_count, 1)
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (0,)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        self.service.get_connection = MagicMock(return_value=conn)
+        self.service.create_historical_record({
+            'scotia_id': 'EMP001', 'process_access': 'onboarding', 'app_access_name': 'AppB',
+            'employee_email': 'emp001@empresa.com'
+        })
+
+        self.service.get_access_reconciliation_report('EMP001')
+        self.assertEqual(self.service._load_access_reconciliation_report.call_count, 2)
+
+    def test_application_mutation_invalidates_by_position(self):
+        self.service.get_access_reconciliation_report('EMP001')
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (7,)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        self.service.get_connection = MagicMock(return_value=conn)
+        self.service._prepare_application_db_data = MagicMock(return_value={'name_element': 'AppNueva', 'role': 'analista '})
+
+        success, _ = self.service.create_application({'logical_access_name': 'AppNueva'})
+
+        self.assertTrue(success)
+        self.service.get_access_reconciliation_report('EMP001')
+        self.assertEqual(self.service._load_access_reconciliation_report.call_count, 2)
+
+    def test_assign_accesses_bypasses_cache(self):
+        self.service.get_access_reconciliation_report('EMP001')
+        self.service.get_access_reconciliation_report('EMP001', use_cache=False)
+        self.assertEqual(self.service._load_access_reconciliation_report.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
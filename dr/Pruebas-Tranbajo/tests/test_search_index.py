@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from benchmarks import SQLiteStandIn, SyntheticDataGenerator
+from services.search_index import ProcessSearchIndex
+from services.search_service import SearchService
+
+HISTORICO = '[dbo].[historico_dr]'
+
+
+class ProcessSearchIndexPredicateTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ProcessSearchIndex(HISTORICO)
+
+    def test_ids_use_prefix_or_exact(self):
+        self.assertEqual(self.index.predicate('scotia_id', 'SID_01'),
+                         ("scotia_id LIKE ? ESCAPE '\\'", ['SID\\_01%']))
+        self.assertEqual(self.index.predicate('case_id', '=CASE-7', alias='h.'), ("h.case_id = ?", ['CASE-7']))
+
+    def test_dates_become_ranges(self):
+        self.assertEqual(ProcessSearchIndex.date_range('2024'), (datetime(2024, 1, 1), datetime(2025, 1, 1)))
+        self.assertEqual(ProcessSearchIndex.date_range('2024-12'), (datetime(2024, 12, 1), datetime(2025, 1, 1)))
+        self.assertEqual(ProcessSearchIndex.date_range('05/03/2024'), (datetime(2024, 3, 5), datetime(2024, 3, 6)))
+        self.assertEqual(ProcessSearchIndex.date_range(date(2024, 3, 5)), (datetime(2024, 3, 5), datetime(2024, 3, 6)))
+        self.assertIsNone(ProcessSearchIndex.date_range('2024-13-01'))
+
+        condition, params = self.index.predicate('record_date', '2024-03-05 10:00', alias='h.')
+        self.assertEqual(condition, "h.record_date >= ? AND h.record_date < ?")
+        self.assertEqual(params, [datetime(2024, 3, 5), datetime(2024, 3, 6)])
+        self.assertEqual(self.index.predicate('request_date', 'marzo'), ("request_date LIKE ?", ['%marzo%']))
+
+    def test_free_text_without_index_or_short_text_uses_like(self):
+        self.assertEqual(self.index.predicate('comment', 'ab%'), ("comment LIKE ? ESCAPE '\\'", ['%ab\\%%']))
+        self.index._available = True
+        self.assertEqual(self.index.predicate('comment', 'ab', cursor=object()), ("comment LIKE ? ESCAPE '\\'", ['%ab%']))
+        self.assertEqual(self.index.predicate('status', 'Pendiente', cursor=object()),
+                         ("status LIKE ? ESCAPE '\\'", ['%Pendiente%']))
+
+    def test_long_text_caps_trigrams(self):
+        self.index._available = True
+        condition, params = self.index.predicate('event_description', 'Otorgamiento de acceso', cursor=object())
+        self.assertIn("GROUP BY t.historico_id HAVING COUNT(*) = ?", condition)
+        self.assertEqual(params[0], ProcessSearchIndex.TEXT_FIELDS['event_description'])
+        self.assertEqual(params[1 + ProcessSearchIndex.MAX_TRIGRAMS], ProcessSearchIndex.MAX_TRIGRAMS)
+        self.assertEqual(params[-1], '%Otorgamiento de acceso%')
+
+
+class ProcessSearchIndexDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = SQLiteStandIn(os.path.join(self.tmpdir.name, 'search.db'))
+        SyntheticDataGenerator(employees=40, applications=40, history=600, seed=4).load(self.db)
+        self.service = SearchService.__new__(SearchService)
+        self.service.historico_table = HISTORICO
+        self.service.get_connection = self.db.get_connection
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _like_ids(self, column, text):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id FROM {HISTORICO} WHERE {column} LIKE ? ORDER BY record_date DESC, id DESC",
+                           (f"%{text}%",))
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_indexed_search_matches_full_scan(self):
+        for filtros, column, text in [
+            ({'event_description': 'acceso para'}, 'event_description', 'acceso para'),
+            ({'app_name': 'ADMIN'}, 'app_access_name', 'ADMIN'),
+            ({'responsible': 'zzzz'}, 'responsible', 'zzzz')
+        ]:
+            rows = self.service.buscar_procesos(filtros)
+            self.assertEqual([row['id'] for row in rows], self._like_ids(column, text), filtros)
+            self.assertEqual(self.service.contar_procesos(filtros), len(rows))
+        self.assertTrue(self.service._search_index()._available)
+
+    def test_empty_index_with_history_falls_back_to_like(self):
+        with self.db.connection() as conn:
+            conn.cursor().execute("DELETE FROM [dbo].[historico_trigram_dr]")
+            conn.commit()
+
+        rows = self.service.buscar_procesos({'event_description': 'acceso para'})
+
+        self.assertEqual([row['id'] for row in rows], self._like_ids('event_description', 'acceso para'))
+        self.assertTrue(rows)
+        self.assertFalse(self.service._search_index()._available)
+
+    def test_triggers_keep_index_current(self):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id, scotia_id FROM {HISTORICO} ORDER BY id LIMIT 1")
+            history_id, scotia_id = cursor.fetchone()
+            cursor.execute(f"UPDATE {HISTORICO} SET comment = ? WHERE id = ?", ('Ticket escalado a Mesa Central', history_id))
+            conn.commit()
+
+        rows = self.service.buscar_procesos({'comment': 'mesa central', 'sid': scotia_id})
+        self.assertEqual([row['id'] for row in rows], [history_id])
+
+        with self.db.connection() as conn:
+            conn.cursor().execute(f"UPDATE {HISTORICO} SET comment = NULL WHERE id = ?", (history_id,))
+            conn.commit()
+        self.assertEqual(self.service.buscar_procesos({'comment': 'mesa central'}), [])
+
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            before = cursor.execute("SELECT COUNT(*) FROM [dbo].[historico_trigram_dr]").fetchone()[0]
+            rebuilt = ProcessSearchIndex(HISTORICO).rebuild(cursor)
+            conn.commit()
+        self.assertEqual(rebuilt, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.search_service import SearchService
+from ui import components
+from ui.components import EdicionBusquedaFrame
+
+
+class SearchPagingTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin abrir conexión real
+        self.service = SearchService.__new__(SearchService)
+        self.service.historico_table = '[dbo].[historico_dr]'
+        self.cursor = MagicMock()
+        self.cursor.description = [('id',), ('scotia_id',)]
+        self.cursor.fetchall.return_value = [(10, 'EMP001'), (9, 'EMP002')]
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.get_connection = MagicMock(return_value=self.conn)
+
+    def test_page_uses_offset_fetch_with_stable_order(self):
+        rows = self.service.buscar_procesos({'sid': 'EMP'}, limit=200, offset=400)
+
+        query, params = self.cursor.execute.call_args.args
+        self.assertIn("WHERE scotia_id LIKE ?", query)
+        self.assertIn("ORDER BY record_date DESC, id DESC", query)
+        self.assertIn("OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", query)
+        self.assertEqual(params, ['EMP%', 400, 200])
+        self.assertEqual(rows, [{'id': 10, 'scotia_id': 'EMP001'}, {'id': 9, 'scotia_id': 'EMP002'}])
+
+    def test_without_limit_returns_everything(self):
+        self.service.buscar_procesos({})
+
+        query, params = self.cursor.execute.call_args.args
+        self.assertNotIn("OFFSET", query)
+        self.assertNotIn("WHERE", query)
+        self.assertEqual(params, [])
+
+    def test_count_shares_filters(self):
+        self.cursor.fetchone.return_value = (1234,)
+
+        total = self.service.contar_procesos({'status': 'Pendiente'})
+
+        query, params = self.cursor.execute.call_args.args
+        self.assertEqual(total, 1234)
+        self.assertIn("SELECT COUNT_BIG(*) FROM [dbo].[historico_dr] WHERE status LIKE ?", query)
+        self.assertEqual(params, ['%Pendiente%'])
+        self.conn.close.assert_called_once()
+
+
+    def test_headcount_emails_for_page(self):
+        self.service.headcount_table = '[dbo].[Master_Staff_List]'
+        self.service.access_service = MagicMock(MAX_IN_PARAMS=2)
+        self.cursor.fetchall.side_effect = [[('EMP001', 'uno@bank.com'), ('EMP002', None)],
+                                            [('EMP003', 'tres@bank.com')]]
+
+        emails = self.service.emails_headcount(['EMP002', 'EMP001 ', None, 'EMP003', 'EMP001'])
+
+        self.assertEqual(emails, {'EMP001': 'uno@bank.com', 'EMP003': 'tres@bank.com'})
+        calls = [c.args for c in self.cursor.execute.call_args_list]
+        self.assertEqual([params for _, params in calls], [('EMP001', 'EMP002'), ('EMP003',)])
+        self.assertIn("SELECT scotia_id, business_email FROM [dbo].[Master_Staff_List] WHERE scotia_id IN (?,?)",
+                      calls[0][0])
+        self.conn.close.assert_called_once()
+
+
+    def test_column_filter_trusts_server_predicate(self):
+        frame = EdicionBusquedaFrame.__new__(EdicionBusquedaFrame)
+        frame.service = MagicMock()
+        rows = [{'case_id': 'CASE-1', 'request_date': '2024-03-05'}]
+        frame.service.buscar_procesos.return_value = rows
+
+        # '=CASE-1' y '05/03/2024' no son subcadenas del valor, pero el servidor ya los resolvió
+        self.assertEqual(frame._buscar_por_columna('case_id', '=CASE-1'), rows)
+        frame.service.buscar_procesos.assert_called_with({'case_id': '=CASE-1'})
+        self.assertEqual(frame._buscar_por_columna('request_date', '05/03/2024'), rows)
+
+
+    def test_update_result_uses_update_rowcount(self):
+        self.service.headcount_table = '[dbo].[Master_Staff_List]'
+        self.service.access_service = MagicMock()
+        self.cursor.fetchone.side_effect = [('EMP001',), ('emp001@bank.com',)]
+        self.cursor.rowcount = 1
+
+        def refresh(cursor, scotia_ids):
+            # El SID no tiene accesos completados: el INSERT del estado no escribe filas
+            cursor.rowcount = 0
+            return 0
+        self.service.access_service.refresh_current_access.side_effect = refresh
+
+        success, message = self.service.actualizar_proceso('CASE-1', {'status': 'Cerrado'})
+
+        self.assertTrue(success, message)
+        self.conn.commit.assert_called_once()
+
+
+    def test_multiple_filters_run_in_background_with_server_predicates(self):
+        frame = EdicionBusquedaFrame.__new__(EdicionBusquedaFrame)
+        frame.frame = MagicMock()
+        frame.campos_filtro = {"SID": "scotia_id", "Request Date": "request_date"}
+        frame.filtros_activos = {"SID": "=EMP001", "Request Date": "05/03/2024"}
+        runner = MagicMock()
+
+        with patch.object(components, 'get_task_runner', return_value=runner):
+            frame._aplicar_filtros_multiples()
+
+        func, filtros = runner.submit.call_args.args
+        self.assertEqual(func, components.search_service.buscar_procesos)
+        self.assertEqual(filtros, {'scotia_id': '=EMP001', 'request_date': '05/03/2024'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from ui.task_runner import BackgroundTaskRunner
+
+
+class FakeRoot:
+    """Sustituto mínimo de tk.Tk: guarda los callbacks de after() para ejecutarlos a mano"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.cursor = ""
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def config(self, cursor=""):
+        self.cursor = cursor
+
+    def pump(self, runner, timeout=2.0):
+        """Ejecuta el 'mainloop' hasta que el runner no tenga tareas pendientes"""
+        deadline = time.monotonic() + timeout
+        while runner.busy and time.monotonic() < deadline:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.01)
+
+
+class BackgroundTaskRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.runner = BackgroundTaskRunner(self.root, max_workers=2)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_is_delivered_on_the_polling_thread(self):
+        received = []
+        busy_changes = []
+        self.runner.add_busy_listener(busy_changes.append)
+
+        self.runner.submit(lambda x: (x * 2, threading.current_thread().name), 21,
+                           on_success=lambda value: received.append((value, threading.current_thread().name)))
+        self.assertEqual(self.root.cursor, "watch")
+        self.root.pump(self.runner)
+
+        (value, worker_thread), callback_thread = received[0]
+        self.assertEqual(value, 42)
+        self.assertTrue(worker_thread.startswith("ui-task"))
+        self.assertEqual(callback_thread, threading.current_thread().name)
+        self.assertEqual(busy_changes, [True, False])
+        self.assertEqual(self.root.cursor, "")
+
+    def test_errors_go_to_on_error(self):
+        errors = []
+
+        def falla():
+            raise ValueError("sin conexión")
+
+        self.runner.submit(falla, on_success=lambda _: self.fail("no debe llamarse"), on_error=errors.append)
+        self.root.pump(self.runner)
+
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_same_key_supersedes_previous_task(self):
+        release = threading.Event()
+        received = []
+
+        def lenta(texto):
+            release.wait(1)
+            return texto
+
+        self.runner.submit(lenta, "a", on_success=received.append, key="filtro")
+        self.runner.submit(lenta, "ab", on_success=received.append, key="filtro")
+        release.set()
+        self.root.pump(self.runner)
+        time.sleep(0.05)
+        self.root.pump(self.runner)
+
+        self.assertEqual(received, ["ab"])
+        self.assertFalse(self.runner.busy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock
+
+from services.access_management_service import AccessManagementService
+from services.result_cache import SidResultCache
+from services.unit_of_work import UnitOfWorkManager, transactional
+
+
+class UnitOfWorkTest(unittest.TestCase):
+    def setUp(self):
+        # Crear instancia sin ejecutar __init__
+        self.service = AccessManagementService.__new__(AccessManagementService)
+        self.service.headcount_table = AccessManagementService.HEADCOUNT_TABLE
+        self.service.applications_table = AccessManagementService.APPLICATIONS_TABLE
+        self.service.historico_table = AccessManagementService.HISTORICO_TABLE
+        self.service.procesos_table = AccessManagementService.PROCESOS_TABLE
+        self.service.result_cache = SidResultCache(max_entries=10, ttl=60)
+
+        self.cursor = MagicMock()
+        self.cursor.description = [('scotia_id',), ('full_name',), ('position',)]
+        self.cursor.fetchone.return_value = ('EMP001', 'Ana', 'Analista')
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.db_manager = MagicMock()
+        self.service.db_manager.get_connection.return_value = self.conn
+
+    def test_one_connection_and_single_commit(self):
+        with self.service.unit_of_work():
+            self.service.update_employee_position('EMP001', 'Gerente', 'Tecnología')
+            self.service.update_employee_status('EMP001', True)
+            self.conn.commit.assert_not_called()
+            self.conn.close.assert_not_called()
+
+        self.service.db_manager.get_connection.assert_called_once()
+        self.conn.commit.assert_called_once()
+        self.conn.rollback.assert_not_called()
+        self.conn.close.assert_called_once()
+
+    def test_exception_rolls_back_everything(self):
+        with self.assertRaises(ValueError):
+            with self.service.unit_of_work():
+                self.service.update_employee_position('EMP001', 'Gerente', 'Tecnología')
+                raise ValueError("falla")
+
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called_once()
+        self.conn.close.assert_called_once()
+
+    def test_employee_lookup_is_memoized_and_forgotten_after_write(self):
+        with self.service.unit_of_work():
+            first = self.service.get_employee_by_id('EMP001')
+            first['position'] = 'mutado'
+            second = self.service.get_employee_by_id('EMP001')
+            self.assertEqual(second['position'], 'Analista')
+            self.assertEqual(self.cursor.execute.call_count, 1)
+
+            self.service.update_employee_position('EMP001', 'Gerente', 'Tecnología')
+            self.service.get_employee_by_id('EMP001')
+
+        selects = [c for c in self.cursor.execute.call_args_list if 'SELECT' in c[0][0]]
+        self.assertEqual(len(selects), 2)
+
+    def test_result_cache_is_invalidated_only_after_commit(self):
+        self.service.result_cache.get_or_load('current_access', 'EMP001', lambda: ['viejo'])
+
+        with self.service.unit_of_work():
+            self.service.update_employee_position('EMP001', 'Gerente', 'Tecnología')
+            self.assertEqual(self.service.result_cache.stats()['entries'], 1)
+
+        self.assertEqual(self.service.result_cache.stats()['entries'], 0)
+
+    def test_transactional_flow_failure_rolls_back(self):
+        self.service.get_employee_by_id = MagicMock(return_value=None)
+
+        success, _, _ = self.service.process_flex_staff_return('EMP404')
+
+        self.assertFalse(success)
+        self.assertIsNone(self.service._units().current)
+
+
+    def test_inner_rollback_turns_success_into_failure(self):
+        manager = UnitOfWorkManager(lambda: self.conn)
+
+        class Flow:
+            def _units(self):
+                return manager
+
+            @transactional
+            def run(self):
+                # Un método interno atrapa su error y hace rollback, pero el flujo sigue
+                with manager.current.connection() as conn:
+                    conn.rollback()
+                return True, "ok", {'otorgados': 2}
+
+        result = Flow().run()
+
+        self.assertEqual(result, (False, "La operación se deshizo: una consulta interna falló", {'otorgados': 0}))
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called_once()
+        self.assertIsNone(manager.current)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 from .components import (CamposGeneralesFrame, OnboardingFrame, OffboardingFrame, 
                         LateralMovementFrame, FlexStaffFrame, EdicionBusquedaFrame, CreacionPersonaFrame)
+from .task_runner import BackgroundTaskRunner, TaskHandle, get_task_runner
 
 __all__ = ['CamposGeneralesFrame', 'OnboardingFrame', 'OffboardingFrame', 
-            'LateralMovementFrame', 'FlexStaffFrame', 'EdicionBusquedaFrame', 'CreacionPersonaFrame']
+            'LateralMovementFrame', 'FlexStaffFrame', 'EdicionBusquedaFrame', 'CreacionPersonaFrame',
+            'BackgroundTaskRunner', 'TaskHandle', 'get_task_runner']
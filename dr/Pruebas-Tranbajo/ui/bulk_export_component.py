@@ -0,0 +1,123 @@
+"""
+Componente para exportar historico_dr o Master_Staff_List completos a CSV/Parquet
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from ui.task_runner import get_task_runner
+
+
+class BulkExportDialog:
+    """Diálogo de exportación masiva (se ejecuta en segundo plano con services.bulk_export)"""
+
+    TITLES = {'historico': "Historial completo", 'headcount': "Headcount completo"}
+
+    def __init__(self, parent, dataset: str):
+        from services.bulk_export import DATASETS
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"💾 Exportar {self.TITLES.get(dataset, dataset)}")
+        self.dialog.geometry("520x330")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        self.dataset = dataset
+        self.date_columns = list(DATASETS[dataset]['date_columns'])
+        self.result = None
+
+        # Variables
+        self.variables = {
+            'archivo': tk.StringVar(),
+            'columnas': tk.StringVar(),
+            'columna_fecha': tk.StringVar(value=self.date_columns[0]),
+            'desde': tk.StringVar(),
+            'hasta': tk.StringVar()
+        }
+
+        self._setup_ui()
+
+    def _setup_ui(self):
+        """Configura la interfaz del diálogo"""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(1, weight=1)
+
+        # Archivo de salida
+        ttk.Label(main_frame, text="Archivo:").grid(row=0, column=0, sticky="w", pady=5)
+        ttk.Entry(main_frame, textvariable=self.variables['archivo']).grid(row=0, column=1, sticky="ew", pady=5)
+        ttk.Button(main_frame, text="...", width=3, command=self._elegir_archivo).grid(row=0, column=2, padx=(5, 0))
+        ttk.Label(main_frame, text=".csv, .csv.gz, .csv.zst o .parquet",
+                 foreground="gray").grid(row=1, column=1, sticky="w")
+
+        # Proyección de columnas
+        ttk.Label(main_frame, text="Columnas:").grid(row=2, column=0, sticky="w", pady=5)
+        ttk.Entry(main_frame, textvariable=self.variables['columnas']).grid(row=2, column=1, columnspan=2, sticky="ew", pady=5)
+        ttk.Label(main_frame, text="Separadas por coma (vacío = todas)",
+                 foreground="gray").grid(row=3, column=1, sticky="w")
+
+        # Rango de fechas
+        ttk.Label(main_frame, text="Fecha:").grid(row=4, column=0, sticky="w", pady=5)
+        ttk.Combobox(main_frame, textvariable=self.variables['columna_fecha'], values=self.date_columns,
+                     state="readonly").grid(row=4, column=1, columnspan=2, sticky="ew", pady=5)
+        ttk.Label(main_frame, text="Desde (YYYY-MM-DD):").grid(row=5, column=0, sticky="w", pady=5)
+        ttk.Entry(main_frame, textvariable=self.variables['desde']).grid(row=5, column=1, columnspan=2, sticky="ew", pady=5)
+        ttk.Label(main_frame, text="Hasta (YYYY-MM-DD):").grid(row=6, column=0, sticky="w", pady=5)
+        ttk.Entry(main_frame, textvariable=self.variables['hasta']).grid(row=6, column=1, columnspan=2, sticky="ew", pady=5)
+
+        # Estado y botones
+        self.estado = ttk.Label(main_frame, text="")
+        self.estado.grid(row=7, column=0, columnspan=3, sticky="w", pady=(10, 0))
+
+        botones = ttk.Frame(main_frame)
+        botones.grid(row=8, column=0, columnspan=3, pady=(15, 0))
+        self.boton_exportar = ttk.Button(botones, text="💾 Exportar", command=self._exportar, style="Success.TButton")
+        self.boton_exportar.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(botones, text="Cerrar", command=self.dialog.destroy).pack(side=tk.LEFT)
+
+    def _elegir_archivo(self):
+        """Selecciona el archivo de salida"""
+        filename = filedialog.asksaveasfilename(
+            parent=self.dialog,
+            defaultextension=".csv",
+            initialfile=f"{self.dataset}.csv",
+            filetypes=[("CSV", "*.csv"), ("CSV gzip", "*.csv.gz"), ("CSV zstd", "*.csv.zst"),
+                       ("Parquet", "*.parquet"), ("All files", "*.*")],
+            title="Guardar exportación"
+        )
+        if filename:
+            self.variables['archivo'].set(filename)
+
+    def _exportar(self):
+        """Lanza la exportación en segundo plano"""
+        from services.bulk_export import bulk_export_service
+
+        archivo = self.variables['archivo'].get().strip()
+        if not archivo:
+            messagebox.showwarning("Advertencia", "Seleccione el archivo de salida", parent=self.dialog)
+            return
+        columnas = [c.strip() for c in self.variables['columnas'].get().split(',') if c.strip()] or None
+        desde = self.variables['desde'].get().strip() or None
+        hasta = self.variables['hasta'].get().strip() or None
+
+        self.boton_exportar.config(state="disabled")
+        self.estado.config(text="⏳ Exportando...")
+        get_task_runner(self.dialog).submit(
+            bulk_export_service.export, self.dataset, archivo,
+            columns=columnas, date_from=desde, date_to=hasta,
+            date_column=self.variables['columna_fecha'].get() if (desde or hasta) else None,
+            on_success=self._al_terminar,
+            on_error=lambda e: self._al_terminar((False, f"Error exportando: {str(e)}", 0)),
+            key=f'bulk_export_{self.dataset}'
+        )
+
+    def _al_terminar(self, resultado):
+        """Muestra el resultado (hilo de Tk)"""
+        success, message, total = resultado
+        if not self.dialog.winfo_exists():
+            return
+        self.boton_exportar.config(state="normal")
+        self.estado.config(text=("✅ " if success else "❌ ") + message)
+        if success:
+            self.result = total
+            messagebox.showinfo("Éxito", message, parent=self.dialog)
+        else:
+            messagebox.showerror("Error", message, parent=self.dialog)
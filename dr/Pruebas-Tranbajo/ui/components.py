@@ -4,6 +4,21 @@ from datetime import datetime
 from typing import List, Optional
 from tkinter import messagebox
 from services.dropdown_service import dropdown_service
+from services.search_service import search_service
+from ui.task_runner import get_task_runner
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def exportar_completo(parent, dataset: str):
+    """Abre el diálogo de exportación masiva (CSV/Parquet) de 'historico' o 'headcount'"""
+    try:
+        from ui.bulk_export_component import BulkExportDialog
+        BulkExportDialog(parent, dataset)
+    except Exception as e:
+        messagebox.showerror("Error", f"Error abriendo la exportación: {str(e)}")
+
 
 class CamposGeneralesFrame:
     """Componente para los campos generales del empleado"""
@@ -113,7 +128,7 @@ class CamposGeneralesFrame:
             if 'nuevo_cargo' in self.comboboxes:
                 self.comboboxes['nuevo_cargo']['values'] = dropdown_values.get('positions', [])
             
-            print("Desplegables actualizados en CamposGeneralesFrame")
+            logger.debug("Desplegables actualizados en CamposGeneralesFrame")
             
         except Exception as e:
             print(f"Error actualizando desplegables en CamposGeneralesFrame: {e}")
@@ -427,11 +442,24 @@ class FlexStaffFrame:
 class EdicionBusquedaFrame:
     """Componente para la pestaña de edición y búsqueda de registros"""
     
+    # Registros por página del historial completo (se cargan más al hacer scroll)
+    HISTORIAL_PAGE_SIZE = 200
+    # Fracción visible de la tabla a partir de la cual se pide la siguiente página
+    HISTORIAL_SCROLL_THRESHOLD = 0.9
+    # Columnas que muestra la tabla del historial (solo esas se piden al servidor)
+    HISTORIAL_COLUMNS = (
+        'id', 'scotia_id', 'employee_email', 'case_id', 'process_access', 'app_access_name', 'status',
+        'record_date', 'request_date', 'responsible', 'subunit', 'computer_system_type', 'duration_of_access',
+        'closing_date_app', 'closing_date_ticket', 'app_quality', 'confirmation_by_user', 'comment'
+    )
+    
     def __init__(self, parent, service=None):
         self.parent = parent
         self.service = service
         self.variables = {}
         self.registros_encontrados = []
+        # Estado de la paginación del historial (None = la tabla no está paginada)
+        self._paginacion_historial = None
         self._crear_variables()
         self._crear_widgets()
     
@@ -528,6 +556,8 @@ class EdicionBusquedaFrame:
                   style="Success.TButton").pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(toolbar, text="📤 Exportar Excel", command=self.exportar_estadisticas, 
                   style="Warning.TButton").pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(toolbar, text="💾 Exportar Historial Completo", 
+                  command=lambda: exportar_completo(self.frame, 'historico')).pack(side=tk.LEFT, padx=(0, 10))
         
         # Separador
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=10)
@@ -596,15 +626,20 @@ class EdicionBusquedaFrame:
         self.tree.column("Comentario", width=200, minwidth=150)
         
         # Scrollbars (vertical y horizontal)
-        vsb = ttk.Scrollbar(resultados_frame, orient="vertical", command=self.tree.yview)
+        # La vertical pasa por _on_scroll_historial para cargar páginas al llegar al final
+        self.tree_vsb = ttk.Scrollbar(resultados_frame, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(resultados_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(yscrollcommand=self._on_scroll_historial, xscrollcommand=hsb.set)
         
         # Empaquetar tabla y scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.tree_vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
         
+        # Indicador de registros cargados / total del historial
+        self.historial_status_label = ttk.Label(resultados_frame, text="")
+        self.historial_status_label.grid(row=2, column=0, sticky="w", pady=(5, 0))
+        
         # Configurar grid para que la tabla se expanda
         resultados_frame.columnconfigure(0, weight=1)
         resultados_frame.rowconfigure(0, weight=1)
@@ -656,10 +691,7 @@ class EdicionBusquedaFrame:
             app_access_name = values[4]  # Aplicación
             
             # Buscar los datos completos del registro del historial
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             historico_table = access_service.historico_table
             applications_table = access_service.applications_table
             headcount_table = access_service.headcount_table
@@ -670,7 +702,7 @@ class EdicionBusquedaFrame:
             cursor = conn.cursor()
             
             # Debug: imprimir los valores que estamos buscando
-            print(f"DEBUG: Buscando registro con ID: {record_id}")
+            logger.debug("Buscando registro con ID: %s", record_id)
             
             cursor.execute(f'''
                 SELECT * FROM {historico_table} 
@@ -679,7 +711,7 @@ class EdicionBusquedaFrame:
             row = cursor.fetchone()
             
             # Debug: imprimir si se encontró algo
-            print(f"DEBUG: Registro encontrado: {row is not None}")
+            logger.debug("Registro encontrado: %s", row is not None)
             
             if not row:
                 conn.close()
@@ -691,7 +723,7 @@ class EdicionBusquedaFrame:
             historial_data = dict(zip(columns, row))
             conn.close()
             
-            print(f"DEBUG: Datos del historial: {historial_data}")
+            logger.debug("Datos del historial: %s", historial_data)
             
             # Crear diálogo de edición del historial
             dialog = HistorialDialog(self.parent, f"Editar Registro de Historial - SID: {scotia_id}", historial_data)
@@ -714,10 +746,7 @@ class EdicionBusquedaFrame:
     def actualizar_registro_historial_por_id(self, record_id, data):
         """Actualiza un registro del historial usando el ID como identificador"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             historico_table = access_service.historico_table
             headcount_table = access_service.headcount_table
             
@@ -752,12 +781,17 @@ class EdicionBusquedaFrame:
             
             query = f"UPDATE {historico_table} SET {', '.join(set_clauses)} WHERE id = ?"
             
-            print(f"DEBUG: Query de actualización: {query}")
-            print(f"DEBUG: Parámetros: {params}")
+            logger.debug("Query de actualización: %s", query)
+            logger.debug("Parámetros: %s", params)
             
             cursor.execute(query, params)
+            if scotia_id_result:
+                # Un cambio de estado puede otorgar o retirar un acceso: mismo commit
+                access_service.refresh_current_access(cursor, [scotia_id_result[0]])
             conn.commit()
             conn.close()
+            if scotia_id_result:
+                access_service.invalidate_employee_cache(scotia_id_result[0])
             
             return True, "Registro actualizado exitosamente"
             
@@ -768,10 +802,7 @@ class EdicionBusquedaFrame:
     def actualizar_registro_historial_por_campos(self, scotia_id, case_id, process_access, app_access_name, data):
         """Actualiza un registro del historial usando una combinación de campos para identificarlo"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             historico_table = access_service.historico_table
             headcount_table = access_service.headcount_table
             
@@ -802,8 +833,8 @@ class EdicionBusquedaFrame:
             
             query = f"UPDATE {historico_table} SET {', '.join(set_clauses)} WHERE {where_clause}"
             
-            print(f"DEBUG: Query de actualización: {query}")
-            print(f"DEBUG: Parámetros: {params}")
+            logger.debug("Query de actualización: %s", query)
+            logger.debug("Parámetros: %s", params)
             
             cursor.execute(query, params)
             
@@ -811,8 +842,10 @@ class EdicionBusquedaFrame:
                 conn.close()
                 return False, f"Registro con SID {scotia_id}, Caso {case_id} no encontrado"
             
+            access_service.refresh_current_access(cursor, [scotia_id])
             conn.commit()
             conn.close()
+            access_service.invalidate_employee_cache(scotia_id)
             
             return True, f"Registro actualizado exitosamente"
             
@@ -924,7 +957,7 @@ class EdicionBusquedaFrame:
                 detalle = f"SID={scotia_id}, Caso={case_id}"
                 if app_name:
                     detalle += f", App={app_name}"
-                return False, f"No se pudo eliminar el registro ({detalle}). Revisa los mensajes DEBUG en consola."
+                return False, f"No se pudo eliminar el registro ({detalle}). Activa LOG_LEVEL=DEBUG para ver el detalle en consola."
             
         except Exception as e:
             return False, f"Error eliminando registro: {str(e)}"
@@ -950,18 +983,17 @@ class EdicionBusquedaFrame:
         # Limpiar tabla anterior
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._paginacion_historial = None
         
         if resultados:
             for i, resultado in enumerate(resultados):
                 if i < 2:  # Debug para los primeros 2 registros
-                    print(f"DEBUG: Insertando registro {i}:")
-                    print(f"  scotia_id: {resultado.get('scotia_id', '')}")
-                    print(f"  employee: {resultado.get('employee', '')}")
-                    print(f"  unit: {resultado.get('unit', '')}")
-                    print(f"  position: {resultado.get('position', '')}")
-                    print(f"  activo: {resultado.get('activo', True)}")
-                    print(f"  start_date: {resultado.get('start_date', '')}")
-                    print(f"  email: {resultado.get('email', '')}")
+                    logger.debug("Insertando registro %s: scotia_id=%s, employee=%s, unit=%s, position=%s, "
+                                 "activo=%s, start_date=%s, email=%s", i,
+                                 resultado.get('scotia_id', ''), resultado.get('employee', ''),
+                                 resultado.get('unit', ''), resultado.get('position', ''),
+                                 resultado.get('activo', True), resultado.get('start_date', ''),
+                                 resultado.get('email', ''))
                 
                 # Mapear los campos correctos de la base de datos headcount
                 # Separar nombre y apellido del full_name
@@ -982,7 +1014,7 @@ class EdicionBusquedaFrame:
                 )
                 
                 if i < 2:  # Debug para los primeros 2 registros
-                    print(f"  Valores a insertar: {values}")
+                    logger.debug("Valores a insertar: %s", values)
                 
                 self.tree.insert("", "end", values=values)
         else:
@@ -997,10 +1029,14 @@ class EdicionBusquedaFrame:
         
         try:
             if self.service and hasattr(self.service, 'buscar_procesos'):
-                # Buscar en la base de datos
+                # Buscar en la base de datos (en segundo plano)
                 filtros = {'numero_caso': numero_caso}
-                resultados = self.service.buscar_procesos(filtros)
-                self.mostrar_resultados_busqueda(resultados, f"número de caso: {numero_caso}")
+                get_task_runner(self.frame).submit(
+                    self.service.buscar_procesos, filtros,
+                    on_success=lambda resultados: self.mostrar_resultados_busqueda(resultados, f"número de caso: {numero_caso}"),
+                    on_error=lambda e: messagebox.showerror("Error", f"Error en la búsqueda: {str(e)}"),
+                    key='historial_busqueda'
+                )
             else:
                 messagebox.showerror("Error", "Servicio no disponible para búsqueda")
         except Exception as e:
@@ -1103,140 +1139,142 @@ class EdicionBusquedaFrame:
             self.filtros_listbox.insert(tk.END, f"{campo}: {valor}")
     
     def _aplicar_filtros_multiples(self):
-        """Aplica todos los filtros activos"""
+        """Aplica todos los filtros activos con los predicados indexados del servidor (en segundo plano)"""
         if not self.filtros_activos:
             messagebox.showwarning("Advertencia", "No hay filtros activos para aplicar")
             return
         
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener todos los registros del historial
-            todos_resultados = access_service.buscar_procesos({})
-            
-            # Aplicar filtros múltiples
-            resultados_filtrados = self._aplicar_filtros_en_memoria(todos_resultados)
-            
-            # Mostrar resultados
+        # Cada filtro pasa a buscar_procesos: el servidor filtra (prefijo, rangos de fecha, trigramas)
+        filtros = {self.campos_filtro[campo]: valor
+                   for campo, valor in self.filtros_activos.items() if campo in self.campos_filtro}
+        
+        def al_terminar(resultados_filtrados):
             if resultados_filtrados:
                 mensaje = f"Se encontraron {len(resultados_filtrados)} registros con los filtros aplicados"
                 self.mostrar_resultados_historial(resultados_filtrados, mensaje)
             else:
                 messagebox.showinfo("Filtros", "No se encontraron registros que coincidan con los filtros aplicados")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}")
+        
+        get_task_runner(self.frame).submit(
+            search_service.buscar_procesos, filtros,
+            on_success=al_terminar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}"),
+            key='historial_busqueda'
+        )
     
-    def _aplicar_filtros_en_memoria(self, resultados):
-        """Aplica los filtros activos a los resultados en memoria"""
-        if not resultados:
-            return resultados
+    def mostrar_todo_el_historial(self):
+        """
+        Muestra todo el historial de procesos paginado desde el servidor
+        
+        Solo se trae la primera página (keyset vía listing_service, con las columnas
+        de la tabla) y un COUNT para el total; las siguientes se cargan al hacer scroll.
+        """
+        # Una búsqueda en curso no debe pisar el historial completo
+        get_task_runner(self.frame).cancel('historial_busqueda')
+        self.mostrar_resultados_historial([], None)
+        paginacion = {
+            'filtros': {},
+            'offset': 0,
+            'total': 0,
+            'token': None,
+            'cargando': True
+        }
+        self._paginacion_historial = paginacion
+        
+        def primera_pagina():
+            total = search_service.contar_procesos(paginacion['filtros'])
+            return total, self._traer_pagina_historial(None)
+        
+        def al_terminar(resultado):
+            paginacion['total'], pagina = resultado
+            self._agregar_pagina_historial(paginacion, pagina)
+        
+        # Las páginas se piden fuera del hilo de Tk; una nueva carga reemplaza a la anterior
+        get_task_runner(self.frame).submit(
+            primera_pagina,
+            on_success=al_terminar,
+            on_error=lambda e: self._error_pagina_historial(paginacion, e),
+            key='historial_pagina'
+        )
+    
+    def _traer_pagina_historial(self, token):
+        """
+        Trae una página del historial (en el hilo de trabajo) con el email del headcount
         
-        resultados_filtrados = []
-        for resultado in resultados:
-            cumple_filtros = True
-            
-            for campo_ui, valor_filtro in self.filtros_activos.items():
-                campo_bd = self.campos_filtro.get(campo_ui)
-                if campo_bd:
-                    valor_campo = str(resultado.get(campo_bd, '')).lower()
-                    if valor_filtro.lower() not in valor_campo:
-                        cumple_filtros = False
-                        break
-            
-            if cumple_filtros:
-                resultados_filtrados.append(resultado)
+        Como la consulta anterior con LEFT JOIN al headcount, cada registro lleva
+        'headcount_email'; se buscan solo los SID de la página.
         
-        return resultados_filtrados
+        Returns:
+            Tupla (página, registros como diccionarios)
+        """
+        from services.listing_service import listing_service
+        
+        pagina = listing_service.page(
+            'historico', columns=self.HISTORIAL_COLUMNS, page_size=self.HISTORIAL_PAGE_SIZE, token=token
+        )
+        registros = pagina.as_dicts()
+        emails = search_service.emails_headcount([r.get('scotia_id') for r in registros])
+        for registro in registros:
+            registro['headcount_email'] = emails.get(str(registro.get('scotia_id') or '').strip(), '')
+        return pagina, registros
+    
+    def _cargar_siguiente_pagina_historial(self):
+        """Pide la siguiente página del historial; se agrega al final de la tabla al llegar"""
+        paginacion = self._paginacion_historial
+        if not paginacion or paginacion['cargando'] or not paginacion['token']:
+            return
+        
+        paginacion['cargando'] = True
+        get_task_runner(self.frame).submit(
+            self._traer_pagina_historial,
+            paginacion['token'],
+            on_success=lambda pagina: self._agregar_pagina_historial(paginacion, pagina),
+            on_error=lambda e: self._error_pagina_historial(paginacion, e),
+            key='historial_pagina'
+        )
     
-    def mostrar_todo_el_historial(self):
-        """Muestra todo el historial de procesos"""
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener todo el historial usando el método del servicio
-            conn = access_service.get_connection()
-            cursor = conn.cursor()
-            
-            # Primero verificar cuántos registros hay en total
-            cursor.execute(f'SELECT COUNT(*) FROM {historico_table}')
-            total_count = cursor.fetchone()[0]
-            print(f"DEBUG: Total de registros en historico: {total_count}")
-            
-            # Verificar registros recientes
-            cursor.execute(f'SELECT TOP 5 scotia_id, process_access, event_description, record_date FROM {historico_table} ORDER BY record_date DESC')
-            recent_records = cursor.fetchall()
-            print("DEBUG: Últimos 5 registros en la base de datos:")
-            for record in recent_records:
-                print(f"  SID={record[0]}, Process={record[1]}, Event={record[2][:30]}..., Date={record[3]}")
-            
-            cursor.execute(f'''
-                SELECT h.id, h.scotia_id, h.case_id, h.responsible, h.record_date, h.request_date, 
-                       h.process_access, h.subunit, h.event_description, h.ticket_email, h.app_access_name, 
-                       h.computer_system_type, h.status, h.closing_date_app, h.closing_date_ticket, 
-                       h.app_quality, h.confirmation_by_user, h.comment, h.ticket_quality, 
-                       h.average_time_open_ticket, h.duration_of_access, h.comment_tq, h.general_status_ticket, 
-                       h.general_status_case, h.sla_app, h.sla_ticket, h.sla_case, h.employee_email,
-                       a.logical_access_name, a.description as app_description,
-                       hc.email as headcount_email
-                FROM {historico_table} h
-                LEFT JOIN (
-                    SELECT 
-                        logical_access_name,
-                        description,
-                        ROW_NUMBER() OVER (PARTITION BY logical_access_name ORDER BY id) as rn
-                    FROM {applications_table}
-                ) a ON h.app_access_name = a.logical_access_name AND a.rn = 1
-                LEFT JOIN {headcount_table} hc ON h.scotia_id = hc.scotia_id
-                ORDER BY h.record_date DESC
-            ''')
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Convertir a diccionarios
-            columns = [description[0] for description in cursor.description]
-            historial = [dict(zip(columns, row)) for row in rows]
-            
-            print(f"DEBUG: Historial obtenido: {len(historial)} registros")
-            
-            # Debug: mostrar los primeros 5 registros
-            for i, registro in enumerate(historial[:5]):
-                print(f"DEBUG: Registro {i}: SID={registro.get('scotia_id')}, Process={registro.get('process_access')}, Event={registro.get('event_description', '')[:50]}...")
-            
-            # Analizar registros de lateral movement para debug
-            lateral_records = [r for r in historial if r.get('event_description') and 'lateral movement' in r.get('event_description', '')]
-            onboarding_count = len([r for r in lateral_records if r.get('process_access') == 'onboarding'])
-            offboarding_count = len([r for r in lateral_records if r.get('process_access') == 'offboarding'])
-            
-            print(f"DEBUG: Registros de lateral movement: {len(lateral_records)} (Onboarding: {onboarding_count}, Offboarding: {offboarding_count})")
-            
-            # Debug: mostrar todos los registros recientes (últimos 10)
-            print("DEBUG: Últimos 10 registros:")
-            for i, registro in enumerate(historial[:10]):
-                print(f"  {i+1}. SID={registro.get('scotia_id')}, Process={registro.get('process_access')}, Status={registro.get('status')}, Event={registro.get('event_description', '')[:30]}...")
-            
-            self.mostrar_resultados_historial(historial, "")
-            
-            # Mostrar información de debug al usuario
-            if lateral_records:
-                messagebox.showinfo("Información de Debug", 
-                    f"Se encontraron {len(lateral_records)} registros de lateral movement:\n"
-                    f"• Onboarding: {onboarding_count}\n"
-                    f"• Offboarding: {offboarding_count}\n\n"
-                    f"Si no ves todos los registros, verifica:\n"
-                    f"1. Filtros activos en la interfaz\n"
-                    f"2. Búsqueda por SID específico\n"
-                    f"3. Scroll en la tabla")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error obteniendo historial: {str(e)}")
-            print(f"Error completo: {e}")
+    def _agregar_pagina_historial(self, paginacion, resultado_pagina):
+        """Agrega una página recibida a la tabla (ignorada si la tabla ya muestra otra cosa)"""
+        paginacion['cargando'] = False
+        if paginacion is not self._paginacion_historial:
+            return
+        
+        pagina, registros = resultado_pagina
+        for resultado in registros:
+            self._insertar_fila_historial(resultado)
+        
+        paginacion['offset'] += len(pagina)
+        paginacion['token'] = pagina.next_token
+        if not pagina.has_more:
+            # Se llegó al final (el total pudo cambiar desde el COUNT)
+            paginacion['total'] = paginacion['offset']
+        self._actualizar_estado_historial()
+    
+    def _error_pagina_historial(self, paginacion, error):
+        """Maneja el error al traer una página del historial"""
+        paginacion['cargando'] = False
+        if paginacion is self._paginacion_historial:
+            messagebox.showerror("Error", f"Error obteniendo historial: {str(error)}")
+            print(f"Error completo: {error}")
+    
+    def _on_scroll_historial(self, first, last):
+        """yscrollcommand de la tabla: mueve la scrollbar y pide otra página cerca del final"""
+        self.tree_vsb.set(first, last)
+        paginacion = self._paginacion_historial
+        if (paginacion and not paginacion['cargando']
+                and paginacion['token']
+                and float(last) >= self.HISTORIAL_SCROLL_THRESHOLD):
+            # after_idle evita cargar dentro del propio callback de scroll
+            self.tree.after_idle(self._cargar_siguiente_pagina_historial)
+    
+    def _actualizar_estado_historial(self):
+        """Actualiza el texto 'Mostrando X de Y registros'"""
+        paginacion = self._paginacion_historial
+        if paginacion:
+            texto = f"Mostrando {paginacion['offset']} de {paginacion['total']} registros"
+        else:
+            texto = f"{len(self.tree.get_children())} registros"
+        self.historial_status_label.config(text=texto)
     
     def crear_datos_ejemplo_historial(self, conn, cursor):
         """Crea datos de ejemplo en la tabla historico si está vacía"""
@@ -1290,107 +1328,98 @@ class EdicionBusquedaFrame:
                     dato['computer_system_type'], dato['status'], dato['general_status_ticket']
                 ))
             
-            print("DEBUG: Datos de ejemplo creados en historico")
+            logger.debug("Datos de ejemplo creados en historico")
             
         except Exception as e:
             print(f"Error creando datos de ejemplo: {e}")
     
     def mostrar_resultados_historial(self, resultados, busqueda=""):
         """Muestra los resultados del historial en la tabla"""
-        # Limpiar tabla anterior
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Un listado completo desactiva la paginación del historial
+        self._paginacion_historial = None
         
-        print(f"DEBUG: Mostrando {len(resultados) if resultados else 0} resultados del historial")
+        # Limpiar tabla anterior
+        self.tree.delete(*self.tree.get_children())
         
         if resultados:
-            for i, resultado in enumerate(resultados):
-                # Debug: imprimir los primeros 3 registros
-                if i < 3:
-                    print(f"DEBUG: Registro {i}: {resultado}")
-                
-                # Formatear fecha
-                fecha = resultado.get('record_date', '')
-                try:
-                    from datetime import datetime
-                    fecha_formatted = datetime.fromisoformat(fecha).strftime('%d/%m/%Y %H:%M') if fecha else 'N/A'
-                except:
-                    fecha_formatted = fecha or 'N/A'
-                
-                # Formatear fecha de solicitud
-                request_fecha = resultado.get('request_date', '')
-                try:
-                    from datetime import datetime
-                    request_fecha_formatted = datetime.fromisoformat(request_fecha).strftime('%d/%m/%Y') if request_fecha else 'N/A'
-                except:
-                    request_fecha_formatted = request_fecha or 'N/A'
-                
-                # Formatear fechas adicionales
-                closing_app = resultado.get('closing_date_app', '')
-                closing_ticket = resultado.get('closing_date_ticket', '')
-                try:
-                    closing_app_formatted = datetime.fromisoformat(closing_app).strftime('%d/%m/%Y') if closing_app else 'N/A'
-                    closing_ticket_formatted = datetime.fromisoformat(closing_ticket).strftime('%d/%m/%Y') if closing_ticket else 'N/A'
-                except:
-                    closing_app_formatted = closing_app or 'N/A'
-                    closing_ticket_formatted = closing_ticket or 'N/A'
-                
-                # Formatear confirmación
-                confirmation = resultado.get('confirmation_by_user', '')
-                confirmation_text = 'Sí' if confirmation else 'No' if confirmation is not None else 'N/A'
-                
-                # Mapear todos los campos del historial
-                # Usar el email del headcount si está disponible, sino usar el employee_email de la tabla historico
-                email_to_show = resultado.get('headcount_email', '') or resultado.get('employee_email', '')
-                
-                # Debug para ver qué email se está usando
-                if i < 3:  # Debug para los primeros 3 registros
-                    print(f"DEBUG: Email del headcount: {resultado.get('headcount_email', '')}")
-                    print(f"DEBUG: Email del historico: {resultado.get('employee_email', '')}")
-                    print(f"DEBUG: Email final a mostrar: {email_to_show}")
-                
-                values = (
-                    resultado.get('id', ''),                     # ID
-                    resultado.get('scotia_id', ''),             # SID
-                    email_to_show,                               # Email (del headcount o historico)
-                    resultado.get('case_id', ''),               # Caso
-                    resultado.get('process_access', ''),        # Proceso
-                    resultado.get('app_access_name', ''),       # Aplicación
-                    resultado.get('status', ''),                # Estado
-                    fecha_formatted,                            # Fecha
-                    request_fecha_formatted,                    # Fecha Solicitud
-                    resultado.get('responsible', ''),           # Responsable
-                    resultado.get('subunit', ''),               # Subunidad
-                    resultado.get('computer_system_type', ''),   # Tipo Sistema
-                    resultado.get('duration_of_access', ''),     # Duración
-                    closing_app_formatted,                       # Cierre App
-                    closing_ticket_formatted,                    # Cierre Ticket
-                    resultado.get('app_quality', ''),           # Calidad App
-                    confirmation_text,                          # Confirmación
-                    resultado.get('comment', '')                # Comentario
-                )
-                
-                if i < 3:  # Debug para los primeros 3 registros
-                    print(f"DEBUG: Valores a insertar: {values}")
-                
-                self.tree.insert("", "end", values=values)
+            logger.debug("Mostrando %s resultados del historial", len(resultados))
+            for resultado in resultados:
+                self._insertar_fila_historial(resultado)
             
             if busqueda and busqueda.strip():
                 messagebox.showinfo("Búsqueda", f"Se encontraron {len(resultados)} registros para: {busqueda}")
         else:
             if busqueda and busqueda.strip():
                 messagebox.showinfo("Búsqueda", f"No se encontraron registros para: {busqueda}")
-            elif busqueda == "":
+            elif not busqueda:
                 # Solo mostrar mensaje si no hay resultados y no es una búsqueda específica
                 pass
             else:
                 messagebox.showinfo("Búsqueda", "No se encontraron registros")
+        self._actualizar_estado_historial()
+    
+    def _insertar_fila_historial(self, resultado):
+        """Formatea un registro del historial y lo agrega al final de la tabla"""
+        # Formatear fecha
+        fecha = resultado.get('record_date', '')
+        try:
+            fecha_formatted = datetime.fromisoformat(str(fecha)).strftime('%d/%m/%Y %H:%M') if fecha else 'N/A'
+        except:
+            fecha_formatted = fecha or 'N/A'
+        
+        # Formatear fecha de solicitud
+        request_fecha = resultado.get('request_date', '')
+        try:
+            request_fecha_formatted = datetime.fromisoformat(str(request_fecha)).strftime('%d/%m/%Y') if request_fecha else 'N/A'
+        except:
+            request_fecha_formatted = request_fecha or 'N/A'
+        
+        # Formatear fechas adicionales
+        closing_app = resultado.get('closing_date_app', '')
+        closing_ticket = resultado.get('closing_date_ticket', '')
+        try:
+            closing_app_formatted = datetime.fromisoformat(str(closing_app)).strftime('%d/%m/%Y') if closing_app else 'N/A'
+            closing_ticket_formatted = datetime.fromisoformat(str(closing_ticket)).strftime('%d/%m/%Y') if closing_ticket else 'N/A'
+        except:
+            closing_app_formatted = closing_app or 'N/A'
+            closing_ticket_formatted = closing_ticket or 'N/A'
+        
+        # Formatear confirmación
+        confirmation = resultado.get('confirmation_by_user', '')
+        confirmation_text = 'Sí' if confirmation else 'No' if confirmation is not None else 'N/A'
+        
+        # Usar el email del headcount si está disponible, sino usar el employee_email de la tabla historico
+        email_to_show = resultado.get('headcount_email', '') or resultado.get('employee_email', '')
+        
+        values = (
+            resultado.get('id', ''),                     # ID
+            resultado.get('scotia_id', ''),             # SID
+            email_to_show,                               # Email (del headcount o historico)
+            resultado.get('case_id', ''),               # Caso
+            resultado.get('process_access', ''),        # Proceso
+            resultado.get('app_access_name', ''),       # Aplicación
+            resultado.get('status', ''),                # Estado
+            fecha_formatted,                            # Fecha
+            request_fecha_formatted,                    # Fecha Solicitud
+            resultado.get('responsible', ''),           # Responsable
+            resultado.get('subunit', ''),               # Subunidad
+            resultado.get('computer_system_type', ''),   # Tipo Sistema
+            resultado.get('duration_of_access', ''),     # Duración
+            closing_app_formatted,                       # Cierre App
+            closing_ticket_formatted,                    # Cierre Ticket
+            resultado.get('app_quality', ''),           # Calidad App
+            confirmation_text,                          # Confirmación
+            resultado.get('comment', '')                # Comentario
+        )
+        
+        self.tree.insert("", "end", values=values)
     
     def mostrar_resultados_busqueda(self, resultados, busqueda=""):
         """Muestra los resultados de búsqueda en el treeview"""
         # Limpiar resultados anteriores
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._paginacion_historial = None
         
         if resultados:
             for resultado in resultados:
@@ -1482,27 +1511,29 @@ class EdicionBusquedaFrame:
                 
                 campo_bd = mapeo_columnas.get(columna, "scotia_id")
                 
-                # Crear filtro para la búsqueda
-                filtros = {campo_bd: texto_filtro}
-                resultados = self.service.buscar_procesos(filtros)
-                
-                # Aplicar filtro adicional en memoria si es necesario
-                if resultados:
-                    resultados_filtrados = []
-                    for resultado in resultados:
-                        valor_campo = str(resultado.get(campo_bd, '')).lower()
-                        if texto_filtro.lower() in valor_campo:
-                            resultados_filtrados.append(resultado)
-                    resultados = resultados_filtrados
-                
-                # Mostrar resultados con mensaje de confirmación
-                self.mostrar_resultados_busqueda(resultados, f"filtro '{texto_filtro}' en columna '{columna}'")
+                # Buscar en segundo plano y mostrar resultados con mensaje de confirmación
+                get_task_runner(self.frame).submit(
+                    self._buscar_por_columna, campo_bd, texto_filtro,
+                    on_success=lambda resultados: self.mostrar_resultados_busqueda(
+                        resultados, f"filtro '{texto_filtro}' en columna '{columna}'"),
+                    on_error=lambda e: messagebox.showerror("Error", f"Error aplicando filtro: {str(e)}"),
+                    key='historial_busqueda'
+                )
             else:
                 messagebox.showerror("Error", "Servicio no disponible para búsqueda")
         except Exception as e:
             messagebox.showerror("Error", f"Error aplicando filtro: {str(e)}")
             print(f"Error en aplicar_filtro: {e}")
     
+    def _buscar_por_columna(self, campo_bd, texto_filtro):
+        """Busca en el historial por una columna (se ejecuta en un hilo de trabajo)
+        
+        El servidor ya aplica el predicado de la columna (ver services/search_index.py):
+        '=valor' exacto, fechas como rango, texto libre con trigramas. No se vuelve a
+        filtrar en memoria porque eso descartaría esas coincidencias.
+        """
+        return self.service.buscar_procesos({campo_bd: texto_filtro})
+    
     def limpiar_filtro(self):
         """Limpia el filtro y muestra todos los registros"""
         self.variables['filtro_texto'].set("")
@@ -1549,21 +1580,13 @@ class EdicionBusquedaFrame:
                 
                 campo_bd = mapeo_columnas.get(columna, "scotia_id")
                 
-                # Crear filtro para la búsqueda
-                filtros = {campo_bd: texto_filtro}
-                resultados = self.service.buscar_procesos(filtros)
-                
-                # Aplicar filtro adicional en memoria si es necesario
-                if resultados:
-                    resultados_filtrados = []
-                    for resultado in resultados:
-                        valor_campo = str(resultado.get(campo_bd, '')).lower()
-                        if texto_filtro.lower() in valor_campo:
-                            resultados_filtrados.append(resultado)
-                    resultados = resultados_filtrados
-                
-                # Mostrar resultados sin mensaje de confirmación
-                self._mostrar_resultados_sin_mensaje(resultados)
+                # Cada pulsación reemplaza la búsqueda anterior (misma clave): solo se pinta la última
+                get_task_runner(self.frame).submit(
+                    self._buscar_por_columna, campo_bd, texto_filtro,
+                    on_success=self._mostrar_resultados_sin_mensaje,
+                    on_error=lambda e: print(f"Error en filtrado en tiempo real: {e}"),
+                    key='historial_busqueda'
+                )
             else:
                 print("Servicio no disponible para filtrado en tiempo real")
         except Exception as e:
@@ -1574,6 +1597,7 @@ class EdicionBusquedaFrame:
         # Limpiar resultados anteriores
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._paginacion_historial = None
         
         if resultados:
             for resultado in resultados:
@@ -1726,18 +1750,22 @@ class EdicionBusquedaFrame:
         # Limpiar resultados de búsqueda
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._paginacion_historial = None
 
     def mostrar_estadisticas(self):
-        """Muestra las estadísticas del historial en una ventana"""
+        """Muestra las estadísticas del historial en una ventana (se calculan en segundo plano)"""
+        from services.access_management_service import access_service
+        
+        get_task_runner(self.frame).submit(
+            access_service.get_historial_statistics,
+            on_success=self._mostrar_ventana_estadisticas,
+            on_error=lambda e: messagebox.showerror("Error", f"Error mostrando estadísticas: {str(e)}"),
+            key='estadisticas_historial'
+        )
+    
+    def _mostrar_ventana_estadisticas(self, stats):
+        """Crea la ventana con las estadísticas del historial"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            
-            # Obtener estadísticas
-            stats = access_service.get_historial_statistics()
-            
             if "error" in stats:
                 messagebox.showerror("Error", stats["error"])
                 return
@@ -1832,37 +1860,35 @@ Aplicaciones Únicas: {generales.get('aplicaciones_unicas', 0)}
             messagebox.showerror("Error", f"Error mostrando estadísticas: {str(e)}")
 
     def exportar_estadisticas(self):
-        """Exporta las estadísticas del historial a Excel"""
-        try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
-            from export_service import export_service
-            
-            # Obtener estadísticas
+        """Exporta las estadísticas del historial a Excel (en segundo plano)"""
+        from services.access_management_service import access_service
+        from export_service import export_service
+        
+        def exportar():
             stats = access_service.get_historial_statistics()
-            
             if "error" in stats:
-                messagebox.showerror("Error", stats["error"])
-                return
-            
-            # Exportar a Excel
-            filepath = export_service.export_historial_statistics(stats)
-            
-            messagebox.showinfo("Éxito", f"Estadísticas exportadas exitosamente a:\n{filepath}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}")
+                return False, stats["error"]
+            return True, export_service.export_historial_statistics(stats)
+        
+        def al_terminar(resultado):
+            exito, detalle = resultado
+            if exito:
+                messagebox.showinfo("Éxito", f"Estadísticas exportadas exitosamente a:\n{detalle}")
+            else:
+                messagebox.showerror("Error", detalle)
+        
+        get_task_runner(self.frame).submit(
+            exportar,
+            on_success=al_terminar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error exportando estadísticas: {str(e)}"),
+            key='exportar_estadisticas_historial'
+        )
 
     def crear_registro_manual(self):
         """Abre el diálogo para crear un registro manual de acceso"""
         try:
             from ui.manual_access_component import ManualAccessDialog
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             
             # Abrir diálogo de registro manual
             dialog = ManualAccessDialog(self.frame, access_service)
@@ -1995,6 +2021,8 @@ class CreacionPersonaFrame:
         
         # Botón de exportar
         ttk.Button(toolbar, text="📊 Exportar", command=self.exportar_estadisticas_headcount).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(toolbar, text="💾 Exportar Completo", 
+                  command=lambda: exportar_completo(self.frame, 'headcount')).pack(side=tk.LEFT, padx=(10, 0))
         
         # Panel de filtros múltiples
         self._crear_panel_filtros_personas(main_frame)
@@ -2155,33 +2183,37 @@ class CreacionPersonaFrame:
             messagebox.showwarning("Advertencia", "No hay filtros activos para aplicar")
             return
         
-        try:
-            # Obtener todos los registros del headcount
-            todos_resultados = self.service.obtener_todo_headcount()
-            
-            # Aplicar filtros múltiples
-            resultados_filtrados = self._aplicar_filtros_en_memoria_personas(todos_resultados)
-            
-            # Mostrar resultados
+        filtros = dict(self.filtros_activos)
+        
+        def filtrar():
+            # Lectura y filtrado en el hilo de trabajo (con una copia de los filtros)
+            return self._aplicar_filtros_en_memoria_personas(self.service.obtener_todo_headcount(), filtros)
+        
+        def al_terminar(resultados_filtrados):
             if resultados_filtrados:
                 mensaje = f"Se encontraron {len(resultados_filtrados)} personas con los filtros aplicados"
                 self.mostrar_resultados_busqueda(resultados_filtrados, mensaje)
             else:
                 messagebox.showinfo("Filtros", "No se encontraron personas que coincidan con los filtros aplicados")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}")
+        
+        get_task_runner(self.frame).submit(
+            filtrar,
+            on_success=al_terminar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error aplicando filtros: {str(e)}"),
+            key='personas_busqueda'
+        )
     
-    def _aplicar_filtros_en_memoria_personas(self, resultados):
-        """Aplica los filtros activos a los resultados de personas en memoria"""
+    def _aplicar_filtros_en_memoria_personas(self, resultados, filtros=None):
+        """Aplica los filtros (por defecto los activos) a los resultados de personas en memoria"""
         if not resultados:
             return resultados
         
+        filtros = self.filtros_activos if filtros is None else filtros
         resultados_filtrados = []
         for resultado in resultados:
             cumple_filtros = True
             
-            for campo_ui, valor_filtro in self.filtros_activos.items():
+            for campo_ui, valor_filtro in filtros.items():
                 campo_bd = self.campos_filtro.get(campo_ui)
                 if campo_bd:
                     valor_campo = self._obtener_valor_persona(resultado, campo_bd)
@@ -2196,12 +2228,13 @@ class CreacionPersonaFrame:
     
     def mostrar_todos(self):
         """Muestra todos los registros del headcount"""
-        try:
-            # Obtener todos los registros de la base de datos real
-            resultados = self.service.obtener_todo_headcount()
-            self.mostrar_resultados_busqueda(resultados)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error obteniendo registros: {str(e)}")
+        # Obtener todos los registros de la base de datos real (en segundo plano)
+        get_task_runner(self.frame).submit(
+            self.service.obtener_todo_headcount,
+            on_success=self.mostrar_resultados_busqueda,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo registros: {str(e)}"),
+            key='personas_busqueda'
+        )
     
     def aplicar_filtro(self):
         """Aplica un filtro por texto en la columna seleccionada"""
@@ -2212,39 +2245,40 @@ class CreacionPersonaFrame:
             messagebox.showwarning("Advertencia", "Por favor ingrese texto para filtrar")
             return
         
-        try:
-            # Obtener todos los registros de la base de datos real
-            todos_resultados = self.service.obtener_todo_headcount()
-            
-            # Mapear nombres de columnas a campos de la base de datos real
-            mapeo_columnas = {
-                "SID": "scotia_id",
-                "Eikon ID": "eikon_id",
-                "Employee #": "employee_number",
-                "Nombre": "employee_name",
-                "Apellido": "employee_last_name",
-                "Business Email": "business_email",
-                "Departamento": "department",
-                "Cargo": "current_position_title",
-                "Estado": "status"
-            }
-            
-            campo_bd = mapeo_columnas.get(columna, "scotia_id")
-            
-            # Aplicar filtro en memoria
-            if todos_resultados:
-                resultados_filtrados = []
-                for resultado in todos_resultados:
-                    valor_campo = self._obtener_valor_persona(resultado, campo_bd)
-                    if texto_filtro.lower() in valor_campo:
-                        resultados_filtrados.append(resultado)
-                todos_resultados = resultados_filtrados
-            
+        def al_terminar(todos_resultados):
             self.mostrar_resultados_busqueda(todos_resultados)
             messagebox.showinfo("Filtro", f"Se encontraron {len(todos_resultados)} registros para: filtro '{texto_filtro}' en columna '{columna}'")
-        except Exception as e:
+        
+        def al_fallar(e):
             messagebox.showerror("Error", f"Error aplicando filtro: {str(e)}")
             print(f"Error en aplicar_filtro: {e}")
+        
+        get_task_runner(self.frame).submit(
+            self._filtrar_personas, columna, texto_filtro,
+            on_success=al_terminar, on_error=al_fallar, key='personas_busqueda'
+        )
+    
+    def _filtrar_personas(self, columna, texto_filtro):
+        """Filtra el headcount por columna con la foto indexada (se ejecuta en un hilo de trabajo)"""
+        # Mapear nombres de columnas a campos de la base de datos real
+        mapeo_columnas = {
+            "SID": "scotia_id",
+            "Eikon ID": "eikon_id",
+            "Employee #": "employee_number",
+            "Nombre": "employee_name",
+            "Apellido": "employee_last_name",
+            "Business Email": "business_email",
+            "Departamento": "department",
+            "Cargo": "current_position_title",
+            "Estado": "status"
+        }
+        
+        campo_bd = mapeo_columnas.get(columna, "scotia_id")
+        if campo_bd == 'status':
+            # El estado se guarda en inglés (Active/Inactive)
+            texto_filtro = {'activo': 'active', 'inactivo': 'inactive'}.get(texto_filtro.strip().lower(), texto_filtro)
+        
+        return self.service.filtrar_headcount(campo_bd, texto_filtro)
 
     def _obtener_valor_persona(self, resultado, campo_bd: str) -> str:
         """Normaliza el valor del campo para filtros de personas."""
@@ -2285,38 +2319,13 @@ class CreacionPersonaFrame:
             self.mostrar_todos()
             return
         
-        try:
-            # Obtener todos los registros de la base de datos real
-            todos_resultados = self.service.obtener_todo_headcount()
-            
-            # Mapear nombres de columnas a campos de la base de datos real
-            mapeo_columnas = {
-                "SID": "scotia_id",
-                "Eikon ID": "eikon_id",
-                "Employee #": "employee_number",
-                "Nombre": "employee_name",
-                "Apellido": "employee_last_name",
-                "Business Email": "business_email",
-                "Departamento": "department",
-                "Cargo": "current_position_title",
-                "Estado": "status"
-            }
-            
-            campo_bd = mapeo_columnas.get(columna, "scotia_id")
-            
-            # Aplicar filtro en memoria
-            if todos_resultados:
-                resultados_filtrados = []
-                for resultado in todos_resultados:
-                    valor_campo = str(resultado.get(campo_bd, '')).lower()
-                    if texto_filtro.lower() in valor_campo:
-                        resultados_filtrados.append(resultado)
-                todos_resultados = resultados_filtrados
-            
-            # Mostrar resultados sin mensaje de confirmación
-            self._mostrar_resultados_sin_mensaje(todos_resultados)
-        except Exception as e:
-            print(f"Error en filtrado en tiempo real: {e}")
+        # Cada pulsación reemplaza la búsqueda anterior (misma clave): solo se pinta la última
+        get_task_runner(self.frame).submit(
+            self._filtrar_personas, columna, texto_filtro,
+            on_success=self._mostrar_resultados_sin_mensaje,
+            on_error=lambda e: print(f"Error en filtrado en tiempo real: {e}"),
+            key='personas_busqueda'
+        )
     
     
     def _mostrar_resultados_sin_mensaje(self, resultados):
@@ -2414,13 +2423,17 @@ class CreacionPersonaFrame:
         self.variables['status'].set("Active")
     
     def actualizar_tabla(self):
-        """Actualiza la tabla con todos los registros"""
-        try:
-            resultados = self.service.obtener_todo_headcount()
+        """Actualiza la tabla con todos los registros (se leen en segundo plano)"""
+        def al_terminar(resultados):
             self.mostrar_resultados_busqueda(resultados)
             messagebox.showinfo("Actualización", f"Tabla actualizada. Se encontraron {len(resultados)} registros.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error actualizando tabla: {str(e)}")
+        
+        get_task_runner(self.frame).submit(
+            self.service.obtener_todo_headcount,
+            on_success=al_terminar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error actualizando tabla: {str(e)}"),
+            key='personas_busqueda'
+        )
     
     def _on_doble_clic(self, event):
         """Maneja doble clic en la tabla"""
@@ -2534,11 +2547,17 @@ class CreacionPersonaFrame:
                 messagebox.showinfo("Búsqueda", "No se encontraron registros")
 
     def mostrar_estadisticas_headcount(self):
-        """Muestra las estadísticas del headcount en una ventana"""
+        """Muestra las estadísticas del headcount en una ventana (se calculan en segundo plano)"""
+        get_task_runner(self.frame).submit(
+            self.access_service.get_headcount_statistics,
+            on_success=self._mostrar_ventana_estadisticas_headcount,
+            on_error=lambda e: messagebox.showerror("Error", f"Error mostrando estadísticas: {str(e)}"),
+            key='estadisticas_headcount'
+        )
+    
+    def _mostrar_ventana_estadisticas_headcount(self, stats):
+        """Crea la ventana con las estadísticas del headcount"""
         try:
-            # Obtener estadísticas
-            stats = self.access_service.get_headcount_statistics()
-            
             if "error" in stats:
                 messagebox.showerror("Error", stats["error"])
                 return
@@ -2718,10 +2737,7 @@ Puestos Únicos: {generales.get('puestos_unicos', 0)}
     def exportar_estadisticas_headcount(self):
         """Exporta las estadísticas del headcount a Excel"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
-            from access_management_service import access_service
+            from services.access_management_service import access_service
             from export_service import export_service
             
             # Obtener estadísticas
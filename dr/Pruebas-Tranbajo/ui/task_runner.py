@@ -0,0 +1,209 @@
+"""
+Ejecutor de tareas en segundo plano para la interfaz Tkinter
+
+Las llamadas a SQL Server (pyodbc) bloquean; si se hacen en el hilo de Tk la ventana
+se congela. BackgroundTaskRunner las ejecuta en un pool de hilos y entrega el resultado
+de vuelta al hilo de Tk con root.after (Tk no es seguro para hilos).
+
+Uso típico desde un frame:
+
+    runner = get_task_runner(self.frame)
+    runner.submit(access_service.get_all_applications,
+                  on_success=self._mostrar_aplicaciones,
+                  on_error=lambda e: self._actualizar_estado(f"❌ {e}", error=True),
+                  key='aplicaciones')
+
+Con 'key', una tarea nueva reemplaza a la anterior con la misma clave: la anterior se
+cancela si aún no empezó y, si ya estaba corriendo, su resultado se descarta (útil para
+el filtrado en tiempo real mientras el usuario escribe).
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class TaskHandle:
+    """Referencia a una tarea enviada al runner"""
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancela la tarea; si ya está corriendo, su resultado se descarta"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class BackgroundTaskRunner:
+    """Pool de hilos cuyos resultados se procesan en el hilo de Tk"""
+
+    DEFAULT_MAX_WORKERS = 4
+    POLL_INTERVAL_MS = 50   # Frecuencia con la que se revisan resultados mientras hay tareas
+
+    def __init__(self, root, max_workers: int = DEFAULT_MAX_WORKERS, poll_interval: int = POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-task")
+        self._results: "queue.Queue" = queue.Queue()
+        self._pending: List[TaskHandle] = []
+        self._by_key: Dict[str, TaskHandle] = {}
+        self._busy_listeners: List[Callable[[bool], None]] = []
+        self._poll_id = None
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def submit(self, func: Callable[..., Any], *args,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               key: Optional[str] = None, **kwargs) -> TaskHandle:
+        """
+        Ejecuta func(*args, **kwargs) en un hilo del pool
+
+        Args:
+            func: Función bloqueante (consulta a base de datos, etc.)
+            on_success: Se llama en el hilo de Tk con el valor retornado
+            on_error: Se llama en el hilo de Tk con la excepción (por defecto se imprime)
+            key: Clave de reemplazo; cancela la tarea previa con la misma clave
+
+        Returns:
+            TaskHandle de la tarea
+        """
+        if key is not None:
+            self.cancel(key)
+
+        handle = TaskHandle(key)
+        if key is not None:
+            self._by_key[key] = handle
+        self._pending.append(handle)
+
+        def run():
+            if handle.cancelled:
+                return
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._results.put((handle, False, e, on_success, on_error))
+            else:
+                self._results.put((handle, True, result, on_success, on_error))
+
+        handle.future = self._executor.submit(run)
+        if len(self._pending) == 1:
+            self._notify_busy(True)
+        self._schedule_poll()
+        return handle
+
+    def cancel(self, key: str):
+        """Cancela la tarea pendiente registrada con esa clave (si existe)"""
+        handle = self._by_key.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+            self._finish(handle)
+
+    def cancel_all(self):
+        """Cancela todas las tareas pendientes"""
+        for handle in list(self._pending):
+            handle.cancel()
+            self._finish(handle)
+
+    @property
+    def busy(self) -> bool:
+        """True mientras haya tareas sin terminar"""
+        return bool(self._pending)
+
+    def add_busy_listener(self, listener: Callable[[bool], None]):
+        """Registra un callback (en el hilo de Tk) que recibe True/False al cambiar el estado ocupado"""
+        self._busy_listeners.append(listener)
+
+    def shutdown(self):
+        """Cancela lo pendiente y libera los hilos (al cerrar la ventana)"""
+        self._closed = True
+        self.cancel_all()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Entrega de resultados en el hilo de Tk
+    # ------------------------------------------------------------------
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                handle, ok, value, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if handle.cancelled:
+                continue
+            self._finish(handle)
+            try:
+                if ok:
+                    if on_success is not None:
+                        on_success(value)
+                elif on_error is not None:
+                    on_error(value)
+                else:
+                    print(f"Error en tarea en segundo plano: {value}")
+            except Exception as e:
+                print(f"Error procesando resultado de tarea: {e}")
+
+        if self._pending:
+            self._schedule_poll()
+
+    def _finish(self, handle: TaskHandle):
+        if handle in self._pending:
+            self._pending.remove(handle)
+            if not self._pending:
+                self._notify_busy(False)
+        if handle.key is not None and self._by_key.get(handle.key) is handle:
+            del self._by_key[handle.key]
+
+    def _notify_busy(self, busy: bool):
+        try:
+            self.root.config(cursor="watch" if busy else "")
+        except Exception:
+            pass
+        for listener in self._busy_listeners:
+            try:
+                listener(busy)
+            except Exception as e:
+                print(f"Error en indicador de ocupado: {e}")
+
+
+# Un runner por ventana raíz
+_RUNNERS: Dict[Any, BackgroundTaskRunner] = {}
+
+
+def get_task_runner(widget) -> BackgroundTaskRunner:
+    """Runner compartido de la ventana raíz a la que pertenece el widget"""
+    root = widget.winfo_toplevel()
+    while getattr(root, 'master', None) is not None:
+        root = root.master.winfo_toplevel()
+    runner = _RUNNERS.get(root)
+    if runner is None:
+        runner = BackgroundTaskRunner(root)
+        _RUNNERS[root] = runner
+    return runner